@@ -6,10 +6,14 @@ from langchain.schema.agent import AgentAction, AgentFinish
 from langchain.schema.messages import BaseMessage
 import asyncio
 
+from app.agent.parallel_executor import current_tool_call, tool_call_id
+
+
 class StreamingCallbackHandler(AsyncCallbackHandler):
     def __init__(self, queue: asyncio.Queue):
         super().__init__()
         self.queue = queue
+        self.tools_by_run: Dict[Any, Any] = {}
 
     async def on_chat_model_start(
         self, serialized: Dict[str, Any], messages: List[List[BaseMessage]], **kwargs: Any
@@ -19,12 +23,29 @@ class StreamingCallbackHandler(AsyncCallbackHandler):
 
     async def on_agent_action(self, action: AgentAction, **kwargs: Any) -> Any:
         """Send the agent's action (tool call) to the frontend."""
-        data = { "tool": action.tool, "tool_input": action.tool_input }
+        # call_id pairs this with its tool_end when several tools of one step run at once
+        data = { "tool": action.tool, "tool_input": action.tool_input, "call_id": tool_call_id(action) }
         await self.queue.put(f"event: tool_start\ndata: {json.dumps(data)}\n\n")
 
-    async def on_tool_end(self, output: str, **kwargs: Any) -> Any:
-        """Send the tool's output to the frontend."""
-        data = { "output": output }
+    async def on_custom_event(self, name: str, data: Any, **kwargs: Any) -> None:
+        """Forward incremental tool output (e.g. each roadmap step as it is parsed)."""
+        if name == "roadmap_step":
+            await self.queue.put(f"event: roadmap_step\ndata: {json.dumps(data)}\n\n")
+
+    async def on_tool_start(self, serialized: Dict[str, Any], input_str: str, **kwargs: Any) -> Any:
+        """Remember which tool each run is, so its tool_end can name it."""
+        self.tools_by_run[kwargs.get("run_id")] = serialized.get("name")
+
+    async def on_tool_end(self, output: Any, **kwargs: Any) -> Any:
+        """Send the tool's output to the frontend as soon as that tool finishes."""
+        data = { "output": output, "tool": self.tools_by_run.pop(kwargs.get("run_id"), None),
+                 "call_id": current_tool_call.get() }
+        await self.queue.put(f"event: tool_end\ndata: {json.dumps(data)}\n\n")
+
+    async def on_tool_error(self, error: BaseException, **kwargs: Any) -> Any:
+        """Close the tool's tool_start even when it raised, so the frontend stops waiting on it."""
+        data = { "output": f"Error: {error}", "tool": self.tools_by_run.pop(kwargs.get("run_id"), None),
+                 "call_id": current_tool_call.get(), "error": True }
         await self.queue.put(f"event: tool_end\ndata: {json.dumps(data)}\n\n")
 
     async def on_agent_finish(self, finish: AgentFinish, **kwargs: Any) -> Any:
@@ -0,0 +1,215 @@
+# In backend/app/agent/context_budget.py
+import os
+import json
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain.agents.format_scratchpad.openai_tools import format_to_openai_tool_messages
+from langchain.agents.output_parsers.openai_tools import OpenAIToolsAgentOutputParser
+from langchain_core.agents import AgentAction
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import LLMResult
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import Runnable, RunnablePassthrough
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from app.services.embedding_scheduler import estimate_tokens
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+# Estimated tokens the agent_scratchpad may take; older tool outputs are squeezed first
+SCRATCHPAD_TOKEN_BUDGET = int(os.getenv("SCRATCHPAD_TOKEN_BUDGET", "6000"))
+# Cap on any one tool output, the newest included
+TOOL_OUTPUT_TOKEN_LIMIT = int(os.getenv("TOOL_OUTPUT_TOKEN_LIMIT", "3000"))
+# What an older output is squeezed to when the scratchpad is over budget
+OLD_TOOL_OUTPUT_TOKEN_LIMIT = int(os.getenv("OLD_TOOL_OUTPUT_TOKEN_LIMIT", "300"))
+
+# Outputs the agent must hand back word for word (the advisor's roadmap JSON is the final answer)
+VERBATIM_TOOLS = {"advisor_tool"}
+
+# Fields the next tool needs from each item of a tool's JSON list; everything else is dropped first
+KEEP_FIELDS = {
+    # bulk_create_calendar_events takes these five per event
+    "contest_scanner_tool": ("title", "start_time", "end_time", "location", "description"),
+}
+
+# Rough characters per token, matching estimate_tokens
+CHARS_PER_TOKEN = 4
+
+
+# ============================================================
+# COMPACTORS
+# ============================================================
+
+def truncate_text(text: str, limit: int) -> str:
+    """Keeps the head and a shorter tail of `text` within `limit` estimated tokens."""
+    if estimate_tokens(text) <= limit:
+        return text
+    chars = max(limit * CHARS_PER_TOKEN - 60, 40)
+    head, tail = text[:chars * 2 // 3], text[-(chars // 3):]
+    return f"{head}\n[... {len(text) - len(head) - len(tail)} characters omitted ...]\n{tail}"
+
+
+def compact_json_list(items: List[Any], limit: int, fields: Optional[Sequence[str]] = None) -> str:
+    """
+    A JSON list re-serialized without whitespace, with only `fields` of each
+    object, and cut to as many whole items as fit in `limit`; the count of
+    dropped items is appended so the model knows the list is partial.
+    """
+    if fields:
+        items = [{k: item[k] for k in fields if k in item} if isinstance(item, dict) else item for item in items]
+    kept, used = [], 2
+    for item in items:
+        encoded = json.dumps(item, separators=(",", ":"), ensure_ascii=False)
+        cost = estimate_tokens(encoded)
+        if kept and used + cost > limit:
+            break
+        kept.append(item)
+        used += cost
+    text = json.dumps(kept, separators=(",", ":"), ensure_ascii=False)
+    if len(kept) < len(items):
+        text += f"\n[... {len(items) - len(kept)} more items omitted; narrow the request to see them ...]"
+    return truncate_text(text, limit)
+
+
+def compact_emails(text: str, limit: int) -> str:
+    """read_gmail output: every email keeps its sender and subject, the bodies share what is left."""
+    emails = text.split("\n\nEmail ")
+    if len(emails) < 2:
+        return truncate_text(text, limit)
+    per_email = max(limit // len(emails), 40)
+    parts = []
+    for i, email in enumerate(emails):
+        header, sep, body = email.partition("\nContent: ")
+        body_limit = max(per_email - estimate_tokens(header), 20)
+        parts.append(("" if i == 0 else "Email ") + header + sep + truncate_text(body, body_limit))
+    return "\n\n".join(parts)
+
+
+def compact_observation(tool: str, observation: Any, limit: int) -> Any:
+    """Shrinks one tool output to about `limit` tokens, keeping what the next step needs."""
+    if not isinstance(observation, str) or tool in VERBATIM_TOOLS:
+        return observation
+    if tool == "read_gmail":
+        return compact_emails(observation, limit)
+    fields = KEEP_FIELDS.get(tool)
+    if fields or observation.lstrip().startswith("["):
+        try:
+            parsed = json.loads(observation)
+        except ValueError:
+            parsed = None
+        if isinstance(parsed, list):
+            compact = compact_json_list(parsed, limit, fields)
+            # Re-serializing alone often halves a pretty-printed list; keep whichever is smaller
+            return compact if len(compact) < len(observation) else observation
+    return truncate_text(observation, limit)
+
+
+# ============================================================
+# SCRATCHPAD
+# ============================================================
+
+def _size(observation: Any) -> int:
+    return estimate_tokens(observation if isinstance(observation, str) else str(observation))
+
+
+def _turn(action: AgentAction) -> int:
+    # Every call the model made in one message carries that message as its log
+    message_log = getattr(action, "message_log", None)
+    return id(message_log[0]) if message_log else id(action)
+
+
+def budget_steps(steps: Sequence[Tuple[AgentAction, Any]], budget: int = SCRATCHPAD_TOKEN_BUDGET,
+                 output_limit: int = TOOL_OUTPUT_TOKEN_LIMIT,
+                 old_limit: int = OLD_TOOL_OUTPUT_TOKEN_LIMIT) -> List[Tuple[AgentAction, Any]]:
+    """
+    The steps with their observations cut to `output_limit` each and, while
+    the total is over `budget`, older ones (oldest first) cut to `old_limit`.
+    The steps of the latest agent turn are never squeezed below `output_limit`.
+    The executor's own steps, and the tool_end events, keep the full outputs.
+    """
+    compacted = [(action, compact_observation(action.tool, obs, output_limit)) for action, obs in steps]
+    total = sum(_size(obs) for _, obs in compacted)
+    latest = _turn(steps[-1][0]) if steps else None
+    for i, (action, obs) in enumerate(compacted):
+        if total <= budget or _turn(action) == latest:
+            break
+        squeezed = compact_observation(action.tool, obs, old_limit)
+        total -= _size(obs) - _size(squeezed)
+        compacted[i] = (action, squeezed)
+    return compacted
+
+
+def format_scratchpad(steps: Sequence[Tuple[AgentAction, Any]]) -> List[BaseMessage]:
+    """Drop-in for format_to_openai_tool_messages that keeps the scratchpad within budget."""
+    compacted = budget_steps(steps)
+    before, after = sum(_size(obs) for _, obs in steps), sum(_size(obs) for _, obs in compacted)
+    if after < before:
+        print(f"[Context] Tool outputs in scratchpad cut from ~{before} to ~{after} tokens over {len(steps)} steps")
+    return format_to_openai_tool_messages(compacted)
+
+
+def create_budgeted_tools_agent(llm: Any, tools: Sequence[BaseTool], prompt: ChatPromptTemplate) -> Runnable:
+    """create_openai_tools_agent, with the scratchpad built by format_scratchpad."""
+    llm_with_tools = llm.bind(tools=[convert_to_openai_tool(tool) for tool in tools])
+    scratchpad = RunnablePassthrough.assign(agent_scratchpad=lambda x: format_scratchpad(x["intermediate_steps"]))
+    return scratchpad | prompt | llm_with_tools | OpenAIToolsAgentOutputParser()
+
+
+# ============================================================
+# ACCOUNTING
+# ============================================================
+
+class ContextMeter(AsyncCallbackHandler):
+    """
+    Records the prompt of every LLM call made for one request (the agent's
+    turns and the tools' own calls): estimated tokens going in, and the
+    provider's counts of prompt, cached and output tokens coming back.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.turns: List[Dict[str, Any]] = []
+        self._pending: Dict[Any, Dict[str, Any]] = {}
+        self.started = time.perf_counter()
+
+    async def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[BaseMessage]],
+                                  **kwargs: Any) -> None:
+        flat = [m for batch in messages for m in batch]
+        self._pending[kwargs.get("run_id")] = {
+            "estimated": sum(_size(m.content) for m in flat),
+            "scratchpad": sum(_size(m.content) for m in flat if m.type == "tool"),
+            "messages": len(flat),
+        }
+
+    async def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        turn = self._pending.pop(kwargs.get("run_id"), {"estimated": 0, "scratchpad": 0, "messages": 0})
+        usage: Dict[str, Any] = {}
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or usage
+        turn["prompt"] = usage.get("input_tokens", 0)
+        turn["cached"] = (usage.get("input_token_details") or {}).get("cache_read", 0) or 0
+        turn["output"] = usage.get("output_tokens", 0)
+        self.turns.append(turn)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "calls": len(self.turns),
+            "prompt_tokens": sum(t["prompt"] for t in self.turns),
+            "cached_tokens": sum(t["cached"] for t in self.turns),
+            "output_tokens": sum(t["output"] for t in self.turns),
+            "largest_prompt": max((t["prompt"] or t["estimated"] for t in self.turns), default=0),
+            "per_call": [t["prompt"] or t["estimated"] for t in self.turns],
+        }
+
+    def log(self, user: Optional[str]):
+        s = self.summary()
+        print(f"[Context] Request for {user or 'anonymous'}: {s['calls']} LLM calls, "
+              f"{s['prompt_tokens']} prompt tokens ({s['cached_tokens']} cached), {s['output_tokens']} output, "
+              f"largest prompt {s['largest_prompt']}, per call {s['per_call']}, "
+              f"{time.perf_counter() - self.started:.2f}s")
@@ -0,0 +1,403 @@
+# In backend/app/agent/event_extraction.py
+"""
+Deterministic event extraction.
+
+Most text handed to the event parsers is already structured: contest JSON
+from contest_scanner_tool, .ics invites, schema.org Event markup on scraped
+pages, or emails with explicit "Date: ... Time: ..." lines. extract_events()
+handles those with plain parsing and reports a confidence score; the parser
+tools only call the LLM when the confidence is below CONFIDENCE_THRESHOLD.
+
+All times are returned as 'YYYY-MM-DDTHH:MM:SS' in Asia/Kolkata, the same
+format the LLM prompts ask for.
+"""
+import re
+import json
+from dataclasses import dataclass, field
+from datetime import datetime, date, time, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+IST = ZoneInfo("Asia/Kolkata")
+CONFIDENCE_THRESHOLD = 0.8
+DEFAULT_DURATION = timedelta(hours=2)
+
+TZ_ABBREVIATIONS = {
+    "IST": timedelta(hours=5, minutes=30),
+    "UTC": timedelta(0), "GMT": timedelta(0), "Z": timedelta(0),
+    "BST": timedelta(hours=1), "CET": timedelta(hours=1), "CEST": timedelta(hours=2),
+    "EST": timedelta(hours=-5), "EDT": timedelta(hours=-4),
+    "CST": timedelta(hours=-6), "CDT": timedelta(hours=-5),
+    "PST": timedelta(hours=-8), "PDT": timedelta(hours=-7),
+    "JST": timedelta(hours=9), "SGT": timedelta(hours=8),
+}
+
+MONTHS = {
+    name: i + 1 for i, names in enumerate([
+        ("jan", "january"), ("feb", "february"), ("mar", "march"), ("apr", "april"),
+        ("may",), ("jun", "june"), ("jul", "july"), ("aug", "august"),
+        ("sep", "sept", "september"), ("oct", "october"), ("nov", "november"), ("dec", "december"),
+    ]) for name in names
+}
+
+
+@dataclass
+class Extraction:
+    events: List[Dict[str, str]] = field(default_factory=list)
+    confidence: float = 0.0
+    method: str = "none"
+
+    @property
+    def is_confident(self) -> bool:
+        return bool(self.events) and self.confidence >= CONFIDENCE_THRESHOLD
+
+
+def extract_events(text: str) -> Extraction:
+    """Runs the structured extractors in order of reliability and returns the first hit."""
+    if not text or not text.strip():
+        return Extraction()
+
+    for extractor in (_from_json, _from_ics, _from_schema_org, _from_labeled_lines):
+        try:
+            result = extractor(text)
+        except Exception as e:
+            print(f"[EventExtraction] {extractor.__name__} failed: {e}")
+            continue
+        if result and result.events:
+            return result
+    return Extraction()
+
+
+# ============================================================
+# NORMALIZATION
+# ============================================================
+
+def to_ist(value: datetime) -> str:
+    """Naive datetimes are taken to already be Asia/Kolkata local time."""
+    if value.tzinfo is not None:
+        value = value.astimezone(IST).replace(tzinfo=None)
+    return value.replace(microsecond=0).isoformat()
+
+
+def parse_iso(value: str) -> Optional[datetime]:
+    value = (value or "").strip()
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        pass
+    try:
+        return datetime.combine(date.fromisoformat(value[:10]), time())
+    except ValueError:
+        return None
+
+
+def make_event(title: str, start: datetime, end: Optional[datetime] = None,
+               location: str = "", description: str = "") -> Dict[str, str]:
+    if end is None or end <= start:
+        end = start + DEFAULT_DURATION
+    return {
+        "title": " ".join((title or "").split()),
+        "start_time": to_ist(start),
+        "end_time": to_ist(end),
+        "location": (location or "").strip() or "Online",
+        "description": (description or "").strip(),
+    }
+
+
+def event_key(event: Dict[str, Any]) -> Tuple[str, str]:
+    """(normalized title, start minute) -- used to de-duplicate events from different sources."""
+    title = re.sub(r"[^a-z0-9]+", " ", str(event.get("title", "")).lower()).strip()
+    start = parse_iso(str(event.get("start_time", "")))
+    return title, to_ist(start)[:16] if start else ""
+
+
+# ============================================================
+# JSON (e.g. contest_scanner_tool output)
+# ============================================================
+
+def _from_json(text: str) -> Optional[Extraction]:
+    starts = [i for i in (text.find("["), text.find("{")) if i != -1]
+    if not starts:
+        return None
+    try:
+        data, _ = json.JSONDecoder().raw_decode(text[min(starts):])
+    except json.JSONDecodeError:
+        return None
+
+    if isinstance(data, dict):
+        data = data.get("events", [data])
+    if not isinstance(data, list):
+        return None
+
+    events = []
+    for item in data:
+        if not isinstance(item, dict):
+            return None
+        title = item.get("title") or item.get("name") or item.get("summary")
+        start = parse_iso(str(item.get("start_time") or item.get("start") or item.get("startDate") or ""))
+        if not title or not start:
+            return None
+        end = parse_iso(str(item.get("end_time") or item.get("end") or item.get("endDate") or ""))
+        events.append(make_event(title, start, end, item.get("location", ""), item.get("description", "")))
+
+    return Extraction(events, 1.0, "json") if events else None
+
+
+# ============================================================
+# ICS / iCalendar
+# ============================================================
+
+def _ics_unescape(value: str) -> str:
+    return value.replace("\\n", "\n").replace("\\N", "\n").replace("\\,", ",").replace("\\;", ";").replace("\\\\", "\\")
+
+
+def _ics_datetime(params: Dict[str, str], value: str) -> Tuple[datetime, bool]:
+    """Returns (datetime, is_all_day)."""
+    value = value.strip()
+    if params.get("VALUE") == "DATE" or re.fullmatch(r"\d{8}", value):
+        return datetime.strptime(value[:8], "%Y%m%d"), True
+
+    parsed = datetime.strptime(value.rstrip("Z")[:15], "%Y%m%dT%H%M%S")
+    if value.endswith("Z"):
+        return parsed.replace(tzinfo=timezone.utc), False
+    if "TZID" in params:
+        try:
+            return parsed.replace(tzinfo=ZoneInfo(params["TZID"].strip('"'))), False
+        except (ZoneInfoNotFoundError, ValueError):
+            pass
+    return parsed, False
+
+
+def _from_ics(text: str) -> Optional[Extraction]:
+    if "BEGIN:VEVENT" not in text:
+        return None
+
+    # Unfold continuation lines (RFC 5545 3.1)
+    unfolded = re.sub(r"\r?\n[ \t]", "", text)
+    events = []
+    for block in re.findall(r"BEGIN:VEVENT(.*?)END:VEVENT", unfolded, re.S):
+        props: Dict[str, Tuple[Dict[str, str], str]] = {}
+        for line in block.splitlines():
+            if ":" not in line:
+                continue
+            head, value = line.split(":", 1)
+            name, *raw_params = head.split(";")
+            params = dict(p.split("=", 1) for p in raw_params if "=" in p)
+            props.setdefault(name.upper(), (params, value))
+
+        if "SUMMARY" not in props or "DTSTART" not in props:
+            continue
+        start, all_day = _ics_datetime(*props["DTSTART"])
+        end = _ics_datetime(*props["DTEND"])[0] if "DTEND" in props else (start + timedelta(days=1) if all_day else None)
+        events.append(make_event(
+            _ics_unescape(props["SUMMARY"][1]), start, end,
+            _ics_unescape(props.get("LOCATION", ({}, ""))[1]),
+            _ics_unescape(props.get("DESCRIPTION", ({}, ""))[1]),
+        ))
+
+    return Extraction(events, 1.0, "ics") if events else None
+
+
+# ============================================================
+# schema.org Event (JSON-LD and microdata)
+# ============================================================
+
+def _is_event_type(value: Any) -> bool:
+    types = value if isinstance(value, list) else [value]
+    return any(isinstance(t, str) and t.split("/")[-1].endswith("Event") for t in types)
+
+
+def _schema_location(value: Any) -> str:
+    if isinstance(value, list):
+        value = value[0] if value else ""
+    if isinstance(value, dict):
+        if value.get("@type") == "VirtualLocation":
+            return "Online"
+        address = value.get("address")
+        if isinstance(address, dict):
+            address = ", ".join(str(address[k]) for k in ("streetAddress", "addressLocality") if address.get(k))
+        return ", ".join(str(p) for p in (value.get("name"), address) if p)
+    return str(value or "")
+
+
+def _schema_event(item: Dict[str, Any]) -> Optional[Dict[str, str]]:
+    start = parse_iso(str(item.get("startDate", "")))
+    if not item.get("name") or not start:
+        return None
+    description = item.get("description", "")
+    if item.get("url"):
+        description = f"{description} More info: {item['url']}".strip()
+    return make_event(item["name"], start, parse_iso(str(item.get("endDate", ""))),
+                      _schema_location(item.get("location")), description)
+
+
+def _walk_json_ld(node: Any):
+    if isinstance(node, list):
+        for item in node:
+            yield from _walk_json_ld(item)
+    elif isinstance(node, dict):
+        if _is_event_type(node.get("@type")):
+            yield node
+        for key in ("@graph", "itemListElement", "item", "subEvent"):
+            if key in node:
+                yield from _walk_json_ld(node[key])
+
+
+def extract_schema_org_events(html: str) -> List[Dict[str, str]]:
+    """Events described with schema.org JSON-LD or microdata in an HTML page."""
+    if "schema.org" not in html and "application/ld+json" not in html:
+        return []
+
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "html.parser")
+    events = []
+
+    for script in soup.find_all("script", type="application/ld+json"):
+        try:
+            data = json.loads(script.string or "")
+        except json.JSONDecodeError:
+            continue
+        events.extend(e for e in map(_schema_event, _walk_json_ld(data)) if e)
+
+    for scope in soup.find_all(attrs={"itemtype": True}):
+        if not _is_event_type(scope["itemtype"]):
+            continue
+        item = {}
+        for prop in scope.find_all(attrs={"itemprop": True}):
+            key = prop["itemprop"]
+            if key in item:
+                continue
+            item[key] = prop.get("content") or prop.get("datetime") or prop.get_text(" ", strip=True)
+        event = _schema_event(item)
+        if event:
+            events.append(event)
+
+    unique = {event_key(e): e for e in events}
+    return list(unique.values())
+
+
+def _from_schema_org(text: str) -> Optional[Extraction]:
+    events = extract_schema_org_events(text)
+    return Extraction(events, 0.95, "schema.org") if events else None
+
+
+# ============================================================
+# Labeled lines ("Date: ... Time: ...")
+# ============================================================
+
+LABEL_RE = re.compile(
+    r"^\s*[*\-•]?\s*(?P<label>event|title|subject|topic|date|time|timing|timings|when|venue|location|where|place)"
+    r"\s*[:\-–]\s*(?P<value>.+?)\s*$",
+    re.I | re.M,
+)
+TIME_RE = re.compile(
+    r"(?P<h>\d{1,2})(?:[:.](?P<m>\d{2}))?\s*(?P<ampm>[ap]\.?\s?m\.?)?(?:\s*(?P<tz>[A-Z]{1,4})\b)?",
+    re.I,
+)
+# "Date: Mon, 12 May 2025 10:15:30 +0530" is when a mail was sent, not when anything happens
+HEADER_DATE_RE = re.compile(r"\d{1,2}:\d{2}(?::\d{2})?\s+[+-]\d{4}\b|\d{1,2}:\d{2}:\d{2}\s+(?:GMT|UTC?)\b", re.I)
+# Forwarded threads and read_gmail's "Email 2:" blocks hold several messages, each with its own labels
+MESSAGE_BREAK_RE = re.compile(
+    r"^\s*(?:-{2,}\s*(?:original|forwarded) message\s*-{2,}|on .+ wrote:|email \d+:)\s*$|^\s*from:\s",
+    re.I | re.M,
+)
+
+
+def _split_date(value: str) -> Tuple[Optional[date], str]:
+    """The date in a label value, and the value with the date cut out (so '12.05.2025' is not read as 12:05)."""
+    value = re.sub(r"(\d)(st|nd|rd|th)\b", r"\1", value.lower())
+    value = re.sub(r"^(mon|tue|wed|thu|fri|sat|sun)[a-z]*,?\s*", "", value.strip())
+
+    m = re.search(r"\b(\d{4})-(\d{2})-(\d{2})\b", value)
+    if m:
+        day = date(int(m[1]), int(m[2]), int(m[3]))
+    # DD/MM/YYYY, as written in Indian emails
+    elif m := re.search(r"\b(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})\b", value):
+        day = date(int(m[3]), int(m[2]), int(m[1]))
+    elif (m := re.search(r"\b(\d{1,2})\s+([a-z]+)\.?,?\s+(\d{4})\b", value)) and m[2] in MONTHS:
+        day = date(int(m[3]), MONTHS[m[2]], int(m[1]))
+    elif (m := re.search(r"\b([a-z]+)\.?\s+(\d{1,2}),?\s+(\d{4})\b", value)) and m[1] in MONTHS:
+        day = date(int(m[3]), MONTHS[m[1]], int(m[2]))
+    else:
+        return None, value
+    return day, value[:m.start()] + " " + value[m.end():]
+
+
+def _parse_times(value: str) -> List[Tuple[time, Optional[timedelta]]]:
+    """All clock times in a string such as '7:00 PM - 9:00 PM IST', with their UTC offsets if given."""
+    found = []
+    for m in TIME_RE.finditer(value):
+        if not m["m"] and not m["ampm"]:
+            continue
+        hour, minute = int(m["h"]), int(m["m"] or 0)
+        ampm = (m["ampm"] or "").lower().replace(".", "").replace(" ", "")
+        if ampm == "pm" and hour < 12:
+            hour += 12
+        elif ampm == "am" and hour == 12:
+            hour = 0
+        if hour > 23 or minute > 59:
+            continue
+        tz = (m["tz"] or "").upper()
+        found.append((time(hour, minute), TZ_ABBREVIATIONS.get(tz)))
+
+    # A zone written once after a range ("7 - 9 PM IST") applies to both ends
+    offsets = [o for _, o in found if o is not None]
+    if offsets:
+        found = [(t, o if o is not None else offsets[-1]) for t, o in found]
+    return found
+
+
+def _combine(day: date, clock: time, offset: Optional[timedelta]) -> datetime:
+    value = datetime.combine(day, clock)
+    if offset is not None:
+        value = value.replace(tzinfo=timezone(offset))
+    return value
+
+
+def _from_labeled_lines(text: str) -> Optional[Extraction]:
+    labels: Dict[str, List[str]] = {}
+    for m in LABEL_RE.finditer(text):
+        labels.setdefault(m["label"].lower(), []).append(m["value"])
+
+    date_values = [v for v in labels.get("date", []) if not HEADER_DATE_RE.search(v)] + labels.get("when", [])
+    if not date_values:
+        return None
+
+    day = None
+    rest: List[str] = []
+    for value in date_values:
+        found, remainder = _split_date(value)
+        day = day or found
+        rest.append(remainder)
+    if day is None:
+        return None
+    # An explicit Time line beats a time written next to the date
+    times: List[Tuple[time, Optional[timedelta]]] = []
+    for value in labels.get("time", []) + labels.get("timing", []) + labels.get("timings", []) + rest:
+        times = times or _parse_times(value)
+
+    title_values = labels.get("event") or labels.get("title") or labels.get("topic") or labels.get("subject") or []
+    title = re.sub(r"^(re|fwd?):\s*", "", title_values[0], flags=re.I) if title_values else ""
+    location = (labels.get("venue") or labels.get("location") or labels.get("where") or labels.get("place") or [""])[0]
+
+    if times:
+        start = _combine(day, *times[0])
+        end = _combine(day, *times[1]) if len(times) > 1 else None
+        if end is not None and end <= start:
+            end += timedelta(days=1)  # e.g. "10 PM - 1 AM"
+    else:
+        start, end = datetime.combine(day, time()), None
+
+    confidence = 0.5
+    if title and times:
+        confidence = 0.9
+    elif title or times:
+        confidence = 0.6
+    # Several dates or messages usually means several events (or a schedule) -- leave that to the LLM
+    if len(date_values) > 1 or len(MESSAGE_BREAK_RE.findall(text)) > 1:
+        confidence = min(confidence, 0.5)
+
+    description = text.strip()[:500]
+    return Extraction([make_event(title or "Event", start, end, location, description)], confidence, "labeled")
@@ -0,0 +1,209 @@
+# In backend/app/agent/intent_router.py
+import os
+import re
+import json
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+from langchain.agents.output_parsers.tools import ToolAgentAction
+from langchain_core.agents import AgentFinish
+from langchain_core.callbacks import AsyncCallbackManager
+from langchain_core.tools import BaseTool
+
+from app.agent.parallel_executor import current_tool_call
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+# Answer recognised single-tool requests without the agent loop
+INTENT_ROUTER = os.getenv("INTENT_ROUTER", "1") != "0"
+# Anything the classifier is less sure of goes to the agent
+INTENT_MIN_CONFIDENCE = float(os.getenv("INTENT_MIN_CONFIDENCE", "0.8"))
+
+# Contests listed in a fast-path answer; the rest are counted
+CONTESTS_SHOWN = 15
+
+# contest_scanner_tool's site names, and how answers spell them
+CONTEST_SITES = {"leetcode": "LeetCode", "codeforces": "Codeforces", "atcoder": "AtCoder", "codechef": "CodeChef"}
+
+# Anything touching mail, documents, links or the calendar needs the agent's multi-step workflows
+_NEEDS_AGENT = re.compile(
+    r"https?://|www\.|\b(e-?mails?|gmail|inbox|mail|pdfs?|documents?|uploads?|uploaded|files?|notes|calendar|"
+    r"schedule|remind(?:er)?s?|add|mark|put|book|register|save)\b"
+)
+_CONTEST = re.compile(r"\b(contests?|leetcode|codeforces|atcoder|codechef)\b")
+_CONTEST_LISTING = re.compile(
+    r"\b(show|list|upcoming|next|what|which|any|when|find|get|tell|scan|check|coming|this week|today|tomorrow|"
+    r"weekend|all)\b|\?$"
+)
+# Questions about contests rather than for a list of them
+_CONTEST_QUESTION = re.compile(
+    r"\b(how|why|explain|tips?|rating|rank(?:ing)?|solve|solution|problems?|editorial|difference|vs|better|should)\b|"
+    r"\bwhat(?:'s| is| are)\s+(?:a\s+|an\s+)?(?:leetcode|codeforces|atcoder|codechef|contests?)\b"
+)
+# Past contests and the user's own history are not what contest_scanner_tool lists
+_CONTEST_PAST_OR_MINE = re.compile(
+    r"\b(missed|miss|past|previous|last|ago|yesterday|earlier|registered|joined|participated|attended|"
+    r"my|mine|i|i've|i'm|i'd)\b"
+)
+_ROADMAP = re.compile(
+    r"\b(?P<kind>road\s?map|study plan|learning plan|learning path|prep(?:aration)? plan|plan)\s+"
+    r"(?:for|to|on|of)\s*:?\s*(?P<goal>.+)$"
+)
+# A bare "plan for X" is only a roadmap when it is asked for ("what's the plan for today" is not)
+_ASKING_FOR = re.compile(r"\b(make|create|give|build|generate|draft|suggest|need|want|prepare)\b")
+_HOW_TO = re.compile(
+    r"^(?:how\s+(?:do|can|should|would)\s+i|how\s+to|help\s+me|i\s+want\s+to|i\s+need\s+to)\s+"
+    r"(?P<goal>(?:learn|prepare\s+for|prep\s+for|get\s+started\s+with|start\s+learning|master|get\s+better\s+at|"
+    r"crack)\s+.+)$"
+)
+_TRAILING = re.compile(r"[\s.?!]+$|\s+please$")
+
+
+@dataclass
+class Intent:
+    """What a message asks for: a tool with its arguments, or `agent` when unsure."""
+    name: str
+    confidence: float
+    tool: Optional[str] = None
+    args: Dict[str, Any] = field(default_factory=dict)
+
+
+AGENT = Intent("agent", 0.0)
+
+
+# ============================================================
+# CLASSIFIER
+# ============================================================
+
+def _normalize(message: str) -> str:
+    return re.sub(r"\s+", " ", message.strip().lower())
+
+
+def _goal(text: str) -> str:
+    return _TRAILING.sub("", text.strip()).strip(" :\"'")
+
+
+def _contests(text: str) -> Intent:
+    if not _CONTEST.search(text):
+        return AGENT
+    sites = [site for site in CONTEST_SITES if site in text]
+    args = {"site_name": sites[0]} if len(sites) == 1 else {}
+    if _CONTEST_QUESTION.search(text) or _CONTEST_PAST_OR_MINE.search(text):
+        return Intent("contests", 0.4, "contest_scanner_tool", args)
+    # "codeforces contests" needs no verb; other messages without a listing cue may want something else
+    confident = _CONTEST_LISTING.search(text) or ("contest" in text and len(text.split()) <= 3)
+    return Intent("contests", 0.9 if confident else 0.6, "contest_scanner_tool", args)
+
+
+def _roadmap(text: str) -> Intent:
+    match = _ROADMAP.search(text)
+    if match:
+        confidence = 0.95 if match.group("kind") != "plan" else 0.85 if _ASKING_FOR.search(text) else 0.5
+    else:
+        match = _HOW_TO.search(text)
+        confidence = 0.9
+    if not match:
+        return AGENT
+    goal = _goal(match.group("goal"))
+    if not goal or len(goal.split()) > 12:
+        confidence = 0.5
+    return Intent("roadmap", confidence, "advisor_tool", {"goal": goal})
+
+
+def classify(message: str) -> Intent:
+    """
+    Keyword and pattern rules for the requests the orchestrator prompt maps
+    to exactly one tool. Cheap enough to run on every message; anything
+    mixed with another workflow (mail, PDFs, links, scheduling) is the agent's.
+    """
+    text = _normalize(message)
+    if not text or _NEEDS_AGENT.search(text):
+        return AGENT
+    return max((_roadmap(text), _contests(text)), key=lambda intent: intent.confidence)
+
+
+# ============================================================
+# ANSWERS
+# ============================================================
+
+def _when(contest: Dict[str, Any]) -> str:
+    try:
+        start = datetime.fromisoformat(contest["start_time"])
+        end = datetime.fromisoformat(contest["end_time"])
+    except (KeyError, TypeError, ValueError):
+        return str(contest.get("start_time", "time unknown"))
+    minutes = int((end - start).total_seconds() // 60)
+    return f"{start.strftime('%a, %d %b %Y, %H:%M')} IST ({minutes} min)"
+
+
+def format_contests(observation: Any, intent: Intent) -> str:
+    try:
+        contests = json.loads(observation) if isinstance(observation, str) else list(observation)
+    except (TypeError, ValueError):
+        return str(observation)
+    site = intent.args.get("site_name")
+    where = CONTEST_SITES.get(site, site) if site else "LeetCode, Codeforces, AtCoder or CodeChef"
+    if not contests:
+        return f"There are no upcoming contests on {where} right now."
+    lines = [f"Here are the upcoming contests on {where}:", ""]
+    lines += [f"- **{c.get('title', 'Untitled contest')}** — {_when(c)}" for c in contests[:CONTESTS_SHOWN]]
+    if len(contests) > CONTESTS_SHOWN:
+        lines.append(f"- ...and {len(contests) - CONTESTS_SHOWN} more.")
+    lines += ["", "Ask me to schedule them and I'll add them to your calendar."]
+    return "\n".join(lines)
+
+
+def format_roadmap(observation: Any, intent: Intent) -> str:
+    # The roadmap JSON is the answer itself; the frontend parses it
+    return observation if isinstance(observation, str) else json.dumps(observation, ensure_ascii=False)
+
+
+FORMATTERS = {"contests": format_contests, "roadmap": format_roadmap}
+
+
+# ============================================================
+# DISPATCH
+# ============================================================
+
+async def route_request(message: str, tools: Iterable[BaseTool], config: Optional[Dict[str, Any]] = None,
+                        min_confidence: Optional[float] = None) -> Optional[str]:
+    """
+    Answers `message` with a single tool call when it is a recognised
+    intent, and returns None for the agent to handle it otherwise. The
+    callbacks see the same tool_start / tool_end / final answer sequence an
+    agent run produces, so the chat stream looks the same either way.
+    """
+    if not INTENT_ROUTER:
+        return None
+    started = time.perf_counter()
+    intent = classify(message)
+    by_name = {tool.name: tool for tool in tools}
+    threshold = INTENT_MIN_CONFIDENCE if min_confidence is None else min_confidence
+    if intent.tool not in by_name or intent.confidence < threshold:
+        print(f"[Router] To the agent (best guess {intent.name}, {intent.confidence:.2f})")
+        return None
+
+    manager = AsyncCallbackManager.configure(inheritable_callbacks=(config or {}).get("callbacks"))
+    run_manager = await manager.on_chain_start({"name": "IntentRouter"}, {"input": message}, name="IntentRouter")
+    action = ToolAgentAction(tool=intent.tool, tool_input=intent.args, log=f"Routed as {intent.name}\n",
+                             message_log=[], tool_call_id=f"route_{uuid.uuid4().hex[:12]}")
+    token = current_tool_call.set(action.tool_call_id)
+    try:
+        await run_manager.on_agent_action(action)
+        observation = await by_name[intent.tool].ainvoke(intent.args, config={"callbacks": run_manager.get_child()})
+        output = FORMATTERS[intent.name](observation, intent)
+        await run_manager.on_agent_finish(AgentFinish({"output": output}, ""))
+        await run_manager.on_chain_end({"output": output})
+    except BaseException as e:
+        await run_manager.on_chain_error(e)
+        raise
+    finally:
+        current_tool_call.reset(token)
+    print(f"[Router] {intent.name} ({intent.confidence:.2f}) answered by {intent.tool} "
+          f"in {time.perf_counter() - started:.2f}s")
+    return output
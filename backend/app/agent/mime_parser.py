@@ -0,0 +1,155 @@
+# In backend/app/agent/mime_parser.py
+import re
+import base64
+import binascii
+import codecs
+from html import unescape
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+# Bodies are cut to this many decoded bytes before charset decoding;
+# newsletters with inline HTML can otherwise run into megabytes.
+MAX_BODY_BYTES = 64 * 1024
+
+# Parts of these types are never the readable body
+SKIPPED_DISPOSITIONS = ("attachment",)
+
+
+# ============================================================
+# DECODING
+# ============================================================
+
+def header_value(headers: List[Dict[str, str]], name: str, default: str = "") -> str:
+    name = name.lower()
+    return next((h.get("value", "") for h in headers or [] if h.get("name", "").lower() == name), default)
+
+
+def part_charset(part: Dict[str, Any]) -> str:
+    """Charset from the part's Content-Type header, defaulting to utf-8."""
+    content_type = header_value(part.get("headers", []), "Content-Type")
+    match = re.search(r'charset="?([^";\s]+)"?', content_type, re.IGNORECASE)
+    if match:
+        try:
+            return codecs.lookup(match.group(1)).name
+        except LookupError:
+            pass
+    return "utf-8"
+
+
+def decode_body_data(data: str, charset: str = "utf-8", max_bytes: int = MAX_BODY_BYTES) -> str:
+    """
+    Decodes Gmail's base64url body data. Only enough input for max_bytes of
+    output is decoded, and undecodable bytes are replaced rather than raised.
+    """
+    if not data:
+        return ""
+    # 4 base64 characters carry 3 bytes
+    data = data[:((max_bytes + 2) // 3) * 4]
+    try:
+        raw = base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+    except (binascii.Error, ValueError):
+        return ""
+    return raw[:max_bytes].decode(charset, errors="replace")
+
+
+# ============================================================
+# HTML TO TEXT
+# ============================================================
+
+class _TextExtractor(HTMLParser):
+    BLOCK_TAGS = {"p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "table", "section", "article"}
+    SKIP_TAGS = {"script", "style", "head", "title", "noscript"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.pieces: List[str] = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in self.BLOCK_TAGS:
+            self.pieces.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in self.BLOCK_TAGS:
+            self.pieces.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.pieces.append(data)
+
+
+def html_to_text(html: str) -> str:
+    """Readable text from an HTML body: scripts and styles dropped, blocks on their own lines."""
+    parser = _TextExtractor()
+    try:
+        parser.feed(html)
+        parser.close()
+        text = "".join(parser.pieces)
+    except Exception:
+        text = unescape(re.sub(r"<[^>]+>", " ", html))
+    text = re.sub(r"[ \t\r\f\v\xa0]+", " ", text)
+    return re.sub(r"\s*\n\s*", "\n", text).strip()
+
+
+# ============================================================
+# BODY EXTRACTION
+# ============================================================
+
+def _is_attachment(part: Dict[str, Any]) -> bool:
+    if part.get("filename"):
+        return True
+    disposition = header_value(part.get("headers", []), "Content-Disposition").lower()
+    return disposition.startswith(SKIPPED_DISPOSITIONS)
+
+
+def extract_body(payload: Dict[str, Any], max_bytes: int = MAX_BODY_BYTES) -> str:
+    """
+    Walks the MIME tree depth-first and returns the first text/plain body,
+    falling back to the first text/html body converted to text.
+    """
+    html_part: Optional[Dict[str, Any]] = None
+    stack = [payload or {}]
+    while stack:
+        part = stack.pop()
+        mime_type = (part.get("mimeType") or "").lower()
+        if mime_type.startswith("multipart/"):
+            # Reversed so parts are visited in document order
+            stack.extend(reversed(part.get("parts") or []))
+            continue
+        if _is_attachment(part):
+            continue
+        data = (part.get("body") or {}).get("data", "")
+        if not data:
+            continue
+        if mime_type == "text/plain" or (not mime_type and not part.get("parts")):
+            text = decode_body_data(data, part_charset(part), max_bytes)
+            if text.strip():
+                return text.strip()
+        elif mime_type == "text/html" and html_part is None:
+            html_part = part
+
+    if html_part is not None:
+        return html_to_text(decode_body_data(html_part["body"]["data"], part_charset(html_part), max_bytes))
+    return ""
+
+
+def parse_message(msg: Dict[str, Any], max_bytes: int = MAX_BODY_BYTES) -> Dict[str, Any]:
+    """Flattens a Gmail `format='full'` message into id/from/subject/date/timestamp/body."""
+    payload = msg.get("payload") or {}
+    headers = payload.get("headers", [])
+    return {
+        "id": msg.get("id", ""),
+        "from": header_value(headers, "From", "Unknown Sender"),
+        "subject": header_value(headers, "Subject", "No Subject"),
+        "date": header_value(headers, "Date"),
+        "timestamp": int(msg.get("internalDate", 0) or 0) / 1000,
+        "body": extract_body(payload, max_bytes) or msg.get("snippet", ""),
+    }
@@ -1,6 +1,6 @@
 import os
+from typing import Optional
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain.agents import AgentExecutor, create_openai_tools_agent
 from dotenv import load_dotenv
 
 from google.oauth2.credentials import Credentials
@@ -9,19 +9,21 @@ from googleapiclient.errors import HttpError
 
 # Import all your tools
 from app.agent.tools.web_scraper_tool import WebScraperTool
-from app.agent.tools.calendar_tool import CreateCalendarEventTool
+from app.agent.tools.calendar_tool import CreateCalendarEventTool, BulkCreateCalendarEventsTool
 from app.agent.tools.gmail_reader_tool import GmailReaderTool
 from app.agent.tools.event_parser_tool import EventParserTool
 from app.agent.tools.rag_tool import DocumentQueryTool
 from app.agent.tools.contest_scanner_tool import ContestScannerTool
 from app.agent.tools.bulk_event_parser_tool import BulkEventParserTool
 from app.agent.tools.advisor_tool import AdvisorTool
-from langchain_google_genai import ChatGoogleGenerativeAI
+from app.agent.parallel_executor import ParallelAgentExecutor
+from app.agent.context_budget import ContextMeter, create_budgeted_tools_agent
+from app.agent.intent_router import route_request
+from app.services.container import services
+from app.services.llm_registry import acting_for
 
 load_dotenv()
 
-llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", google_api_key=os.getenv("GOOGLE_API_KEY"), temperature=0)
-
 
 # ---
 
@@ -38,10 +40,11 @@ base_tools = [
 ]
 # ---
 
-# The prompt is correct and already tells the agent to pass {user_email}
+# The system prompt is the same for every user and request, so Gemini's implicit caching can reuse it
+# as a prompt prefix; the user's email travels with their message instead
 prompt = ChatPromptTemplate.from_messages([
     ("system", 
-     "You are an expert AI university navigator. You are acting on behalf of a user with the email: {user_email}. "
+     "You are an expert AI university navigator, acting on behalf of the signed-in user whose email opens their message. "
      "You MUST use this email for any tools that require a user_email parameter (like `document_query_tool`). "
      "Today's date is November 01, 2025. The user's timezone is 'Asia/Kolkata'."
      "\n\n"
@@ -59,8 +62,8 @@ prompt = ChatPromptTemplate.from_messages([
      "\n3.  **CREATE EVENT:** If the parser is successful, call `Calendar`."
      "\n"
      "**Workflow #3: Competitive Programming Contests**"
-     "\n1.  If the user asks about 'contests', 'leetcode', or 'codeforces', you MUST use the `contest_scanner_tool`."
-     "\n2.  If the user asks to schedule the contests, you MUST then call the `Calendar` tool for **EACH** event in the list."
+     "\n1.  If the user asks about 'contests', 'leetcode', 'codeforces', 'atcoder' or 'codechef', you MUST use the `contest_scanner_tool`."
+     "\n2.  If the user asks to schedule the contests, you MUST then call `bulk_create_calendar_events` **ONCE** with the whole list of events. Never call a calendar tool once per contest."
      "\n\n"
      "**Workflow #4: Strategic Advising**"
      "\n- If the user asks for a 'roadmap', 'plan', 'how to prepare', or 'how to learn', you MUST use the `advisor_tool`."
@@ -68,12 +71,12 @@ prompt = ChatPromptTemplate.from_messages([
      "\n\n"
      "**CRITICAL RULE:** Do not explain your plan. Execute the necessary workflow from start to finish. If the user asks you to schedule events, your final response MUST be a confirmation that the events have been added to the calendar."
     ),
-    ("user", "{input}"),
+    ("user", "[Signed in as {user_email}]\n{input}"),
     MessagesPlaceholder(variable_name="agent_scratchpad"),
 ])
 
 # This function is now correct
-def create_agent_executor(access_token: str):
+def create_agent_executor(access_token: str, user_email: Optional[str] = None):
     """
     Factory function to create an agent executor with token-aware tools.
     This function is called ONCE per request.
@@ -94,16 +97,21 @@ def create_agent_executor(access_token: str):
 
     # Start with the stateless, non-auth tools
     request_tools = list(base_tools) 
+    # Scoped to the signed-in user's own uploads
+    request_tools.append(DocumentQueryTool(user_email=user_email))
     
     # Add the stateful, auth-dependent tools
     if calendar_service:
-        request_tools.append(CreateCalendarEventTool(service=calendar_service))
+        request_tools.append(CreateCalendarEventTool(service=calendar_service, user_email=user_email))
+        request_tools.append(BulkCreateCalendarEventsTool(service=calendar_service, user_email=user_email))
     if gmail_service:
-        request_tools.append(GmailReaderTool(service=gmail_service))
+        request_tools.append(GmailReaderTool(service=gmail_service, user_email=user_email))
 
-    agent = create_openai_tools_agent(llm, request_tools, prompt)
+    # Tool outputs are trimmed to a token budget before they go back into the prompt
+    agent = create_budgeted_tools_agent(services.get("llm"), request_tools, prompt)
     
-    agent_executor = AgentExecutor(
+    # Independent tool calls of one step (two URLs, several lookups) run side by side
+    agent_executor = ParallelAgentExecutor(
         agent=agent, 
         tools=request_tools, 
         verbose=True, 
@@ -123,12 +131,23 @@ async def get_agent_response(
     config: dict = {}
 ):
     try:
-        agent_executor = create_agent_executor(access_token)
+        meter = ContextMeter()
+        config = dict(config, callbacks=[*(config.get("callbacks") or []), meter])
     
-        response = await agent_executor.ainvoke({
-            "input": user_input,
-            "user_email": user_email 
-        }, config=config)
+        # Every LLM call of this turn, tools included, queues under this user's share
+        try:
+            with acting_for(user_email):
+                # Requests the prompt maps to exactly one tool skip the agent loop and its Gemini calls
+                routed = await route_request(user_input, base_tools, config)
+                if routed is not None:
+                    return routed
+                agent_executor = create_agent_executor(access_token, user_email)
+                response = await agent_executor.ainvoke({
+                    "input": user_input,
+                    "user_email": user_email 
+                }, config=config)
+        finally:
+            meter.log(user_email)
         
         output = response.get('output', '')
         
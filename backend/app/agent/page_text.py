@@ -0,0 +1,280 @@
+# In backend/app/agent/page_text.py
+import re
+from typing import List, Optional
+
+from lxml import etree
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+MAX_PAGE_CHARS = 5000
+
+# Reading stops once this many times MAX_PAGE_CHARS of paragraph text is in,
+# or after MAX_READ_BYTES, whichever comes first. The margin leaves room for
+# boilerplate paragraphs that main-content detection later throws away.
+READ_AHEAD_FACTOR = 3
+MAX_READ_BYTES = 2 * 1024 * 1024
+
+FEED_CHUNK = 64 * 1024
+
+# Never content
+BOILERPLATE_TAGS = {
+    "script", "style", "noscript", "template", "nav", "footer", "header", "aside",
+    "form", "iframe", "svg", "button", "select", "dialog",
+}
+# class/id hints for boilerplate containers, unless they also look like content
+BOILERPLATE_HINTS = re.compile(
+    r"cookie|consent|banner|breadcrumb|sidebar|side-bar|menu|navbar|nav-|footer|masthead|"
+    r"social|share|comment|advert|\bads?\b|promo|newsletter|popup|modal|related|widget|login|signup",
+    re.IGNORECASE,
+)
+CONTENT_HINTS = re.compile(r"article|content|main|post|entry|story|event|detail|body|text", re.IGNORECASE)
+# Page structure a class/id hint alone never drops ("<body class='no-sidebar'>")
+STRUCTURAL_TAGS = {"html", "body", "main", "article"}
+
+# Emitted as a paragraph of their own
+BLOCK_TAGS = {"p", "h1", "h2", "h3", "h4", "h5", "h6", "li", "pre", "blockquote", "dd", "dt", "figcaption", "td", "th"}
+# Close any loose inline text collected so far
+BREAK_TAGS = {"div", "section", "article", "main", "body", "br", "tr", "ul", "ol", "dl", "table", "hr", "center"}
+SCORED_TAGS = {"p", "pre", "td", "li", "blockquote"}
+MAIN_TAGS = ("main", "article")
+
+META_CHARSET = re.compile(rb"""<meta[^>]+charset=["']?([\w-]+)""", re.IGNORECASE)
+
+
+def _squash(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _hint(el) -> str:
+    return f"{el.get('class', '')} {el.get('id', '')}"
+
+
+def _is_boilerplate(el, hints: bool = True) -> bool:
+    """By tag or ARIA role; with `hints`, also by class/id unless the element is page structure."""
+    if el.tag in BOILERPLATE_TAGS or el.get("role") in ("navigation", "banner", "contentinfo", "complementary"):
+        return True
+    if not hints or el.tag in STRUCTURAL_TAGS:
+        return False
+    hint = _hint(el)
+    return bool(hint.strip()) and bool(BOILERPLATE_HINTS.search(hint)) and not CONTENT_HINTS.search(hint)
+
+
+def _is_main(el) -> bool:
+    return el.tag in MAIN_TAGS or el.get("role") == "main"
+
+
+def _drop(el) -> None:
+    """Removes an element but keeps its tail text attached to the document."""
+    parent = el.getparent()
+    if parent is None:
+        return
+    if el.tail:
+        previous = el.getprevious()
+        if previous is not None:
+            previous.tail = (previous.tail or "") + el.tail
+        else:
+            parent.text = (parent.text or "") + el.tail
+    parent.remove(el)
+
+
+def _drop_all(root, predicate) -> None:
+    for el in list(root.iter()):
+        if isinstance(el.tag, str) and el.getparent() is not None and predicate(el):
+            _drop(el)
+
+
+# ============================================================
+# MAIN CONTENT DETECTION
+# ============================================================
+
+def _text_length(el) -> int:
+    return len(_squash("".join(el.itertext())))
+
+
+def _link_density(el) -> float:
+    total = _text_length(el)
+    if not total:
+        return 1.0
+    links = sum(_text_length(a) for a in el.iter("a"))
+    return min(1.0, links / total)
+
+
+def find_main_content(root):
+    """
+    Picks the element holding the page's main text: an explicit <main>/<article>
+    when it has real text, otherwise the container whose paragraphs score highest
+    (long, comma-rich text, few links), in the spirit of Readability.
+    """
+    explicit = [el for tag in MAIN_TAGS for el in root.iter(tag)] + root.xpath("//*[@role='main']")
+    explicit = [el for el in explicit if _text_length(el) >= 200]
+    if explicit:
+        return max(explicit, key=_text_length)
+
+    scores = {}
+    for block in root.iter(*SCORED_TAGS):
+        length = _text_length(block)
+        if length < 25:
+            continue
+        text = "".join(block.itertext())
+        score = 1 + text.count(",") + min(length / 100, 3)
+        parent = block.getparent()
+        if parent is None:
+            continue
+        scores[parent] = scores.get(parent, 0) + score
+        grandparent = parent.getparent()
+        if grandparent is not None:
+            scores[grandparent] = scores.get(grandparent, 0) + score / 2
+
+    if not scores:
+        body = root.find("body")
+        return body if body is not None else root
+
+    for el in scores:
+        scores[el] *= 1 - _link_density(el)
+        if CONTENT_HINTS.search(_hint(el)):
+            scores[el] *= 1.25
+    return max(scores, key=scores.get)
+
+
+# ============================================================
+# RENDERING
+# ============================================================
+
+def _flush(out: List[str], buf: List[str]) -> None:
+    text = _squash("".join(buf))
+    buf.clear()
+    if text:
+        out.append(text)
+
+
+def _render(el, out: List[str], buf: List[str]) -> None:
+    tag = el.tag if isinstance(el.tag, str) else ""
+    if tag in BLOCK_TAGS:
+        _flush(out, buf)
+        text = _squash("".join(el.itertext()))
+        if text:
+            out.append(f"- {text}" if tag == "li" else text)
+        return
+
+    if tag in BREAK_TAGS:
+        _flush(out, buf)
+    if el.text and tag:
+        buf.append(el.text)
+    for child in el:
+        _render(child, out, buf)
+        if child.tail:
+            buf.append(child.tail)
+    if tag in BREAK_TAGS:
+        _flush(out, buf)
+
+
+def render_paragraphs(el) -> List[str]:
+    out: List[str] = []
+    buf: List[str] = []
+    _render(el, out, buf)
+    _flush(out, buf)
+    # Layout tables and nested lists can repeat a block verbatim
+    return [p for i, p in enumerate(out) if i == 0 or p != out[i - 1]]
+
+
+def _truncate(paragraphs: List[str], max_chars: int) -> str:
+    kept, size = [], 0
+    for paragraph in paragraphs:
+        if size + len(paragraph) > max_chars:
+            if not kept:
+                kept.append(paragraph[:max_chars])
+            break
+        kept.append(paragraph)
+        size += len(paragraph) + 2
+    return "\n\n".join(kept)
+
+
+# ============================================================
+# STREAMING EXTRACTOR
+# ============================================================
+
+class PageTextExtractor:
+    """
+    Incremental HTML-to-text: feed() response chunks into lxml's C parser and
+    stop reading once it returns True; result() then returns the page's main
+    content as paragraphs separated by blank lines.
+    """
+
+    def __init__(self, max_chars: int = MAX_PAGE_CHARS, max_bytes: int = MAX_READ_BYTES, encoding: Optional[str] = None):
+        self.max_chars = max_chars
+        self.max_bytes = max_bytes
+        # Charset from the Content-Type header; otherwise sniffed from <meta>, then utf-8
+        self.encoding = encoding
+        self.bytes_read = 0
+        self.collected = 0
+        self.done = False
+        self._parser = None
+
+    def _start(self, first_chunk: bytes):
+        encoding = self.encoding
+        if not encoding:
+            match = META_CHARSET.search(first_chunk[:4096])
+            encoding = match.group(1).decode("ascii") if match else "utf-8"
+        try:
+            self._parser = etree.HTMLPullParser(events=("end",), encoding=encoding, remove_comments=True, no_network=True)
+        except LookupError:
+            self._parser = etree.HTMLPullParser(events=("end",), encoding="utf-8", remove_comments=True, no_network=True)
+
+    def feed(self, chunk: bytes) -> bool:
+        """Returns True once enough text has been read."""
+        if self.done or not chunk:
+            return self.done
+        if self._parser is None:
+            self._start(chunk)
+        self.bytes_read += len(chunk)
+        self._parser.feed(chunk)
+
+        for _, el in self._parser.read_events():
+            if el.tag not in BLOCK_TAGS:
+                continue
+            if self._in_boilerplate(el):
+                continue
+            self.collected += _text_length(el)
+
+        self.done = self.collected >= self.max_chars * READ_AHEAD_FACTOR or self.bytes_read >= self.max_bytes
+        return self.done
+
+    @staticmethod
+    def _in_boilerplate(el) -> bool:
+        # A <main> or <article> shields its text from the wrappers around it
+        for ancestor in el.iterancestors():
+            if _is_boilerplate(ancestor):
+                return True
+            if _is_main(ancestor):
+                return False
+        return False
+
+    def result(self) -> str:
+        if self._parser is None:
+            return ""
+        try:
+            root = self._parser.close()
+        except etree.XMLSyntaxError:
+            return ""
+        if root is None:
+            return ""
+
+        # Hints only drop what is not on the way to the main content
+        _drop_all(root, lambda el: _is_boilerplate(el, hints=False))
+        main = find_main_content(root)
+        protected = {main, *main.iterancestors()}
+        _drop_all(root, lambda el: el not in protected and _is_boilerplate(el))
+
+        return _truncate(render_paragraphs(find_main_content(root)), self.max_chars)
+
+
+def extract_main_text(html, max_chars: int = MAX_PAGE_CHARS, encoding: Optional[str] = None) -> str:
+    """Main text of a complete page (str or bytes), reading only as much as PageTextExtractor needs."""
+    data = html.encode("utf-8") if isinstance(html, str) else html
+    extractor = PageTextExtractor(max_chars=max_chars, encoding="utf-8" if isinstance(html, str) else encoding)
+    for offset in range(0, len(data), FEED_CHUNK):
+        if extractor.feed(data[offset:offset + FEED_CHUNK]):
+            break
+    return extractor.result()
@@ -0,0 +1,81 @@
+# In backend/app/agent/parallel_executor.py
+import os
+import uuid
+import asyncio
+from contextlib import nullcontext
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from langchain.agents import AgentExecutor
+from langchain_core.agents import AgentAction, AgentStep
+from langchain_core.callbacks import AsyncCallbackManagerForChainRun
+from langchain_core.tools import BaseTool
+from pydantic import PrivateAttr
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+# Tool calls of one agent step that may run at the same time, per request (1 runs them one by one)
+TOOL_CONCURRENCY = int(os.getenv("TOOL_CONCURRENCY", "4"))
+
+# The call id of the tool running in this task; callbacks use it to pair tool_start with tool_end
+current_tool_call: ContextVar[Optional[str]] = ContextVar("current_tool_call", default=None)
+
+
+def tool_call_id(action: AgentAction) -> str:
+    """The model's id for the call, or a fresh one for agents that don't assign ids."""
+    call_id = getattr(action, "tool_call_id", None)
+    if not call_id:
+        call_id = f"call_{uuid.uuid4().hex[:12]}"
+        try:
+            action.tool_call_id = call_id
+        except (AttributeError, ValueError):
+            pass
+    return call_id
+
+
+# ============================================================
+# EXECUTOR
+# ============================================================
+
+class ParallelAgentExecutor(AgentExecutor):
+    """
+    AgentExecutor whose tool calls from one step (the model asking to scrape
+    two URLs, say) run concurrently, at most `max_parallel_tools` at once.
+    Steps still reach the scratchpad in the order the model made the calls.
+    A call's `on_agent_action` fires when it gets a slot rather than when it
+    is queued, so streamed tool_start/tool_end events follow the real runs.
+    Tools holding the same Google `service` object never overlap: its
+    httplib2 client isn't safe to use from two threads.
+    """
+
+    max_parallel_tools: int = TOOL_CONCURRENCY
+
+    _slots: Optional[asyncio.Semaphore] = PrivateAttr(default=None)
+    _service_locks: Dict[int, asyncio.Lock] = PrivateAttr(default_factory=dict)
+
+    def _slot(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(max(1, self.max_parallel_tools))
+        return self._slots
+
+    def _service_lock(self, tool: Optional[BaseTool]) -> Optional[asyncio.Lock]:
+        service = getattr(tool, "service", None)
+        if service is None:
+            return None
+        return self._service_locks.setdefault(id(service), asyncio.Lock())
+
+    async def _aperform_agent_action(
+        self,
+        name_to_tool_map: Dict[str, BaseTool],
+        color_mapping: Dict[str, str],
+        agent_action: AgentAction,
+        run_manager: Optional[AsyncCallbackManagerForChainRun] = None,
+    ) -> AgentStep:
+        # Each call runs in its own task (the executor gathers them), so this only tags this call
+        current_tool_call.set(tool_call_id(agent_action))
+        # Wait for a busy service before taking a slot, so a blocked call doesn't hold one
+        async with self._service_lock(name_to_tool_map.get(agent_action.tool)) or nullcontext():
+            async with self._slot():
+                return await super()._aperform_agent_action(name_to_tool_map, color_mapping, agent_action, run_manager)
@@ -0,0 +1,223 @@
+# In backend/app/agent/roadmap_parser.py
+import json
+from typing import Any, Dict, List, Optional
+
+SMART_QUOTES = "“”„‟"
+STEP_LIST_KEYS = ("steps", "stages")
+VALID_ESCAPES = '"\\/bfnrtu'
+
+
+class IncrementalRoadmapParser:
+    """
+    Tolerant, incremental parser for the advisor's roadmap JSON.
+
+    Feed it LLM tokens as they arrive; every time a step object inside the
+    top-level "steps" (or "stages") array closes, feed() returns it. It
+    repairs the usual LLM mistakes in the same single pass instead of
+    regex-cleaning the whole response afterwards:
+      - preamble text and ```json fences around the object
+      - smart quotes used as string delimiters
+      - trailing commas before '}' or ']'
+      - raw control characters (newlines, tabs) inside strings
+      - a truncated response (open strings/containers are closed in finish())
+    """
+
+    def __init__(self):
+        self._out: List[str] = []
+        self._stack: List[str] = []
+        self._keys: Dict[int, Optional[str]] = {}
+        self._started = False
+        self._done = False
+
+        self._in_string = False
+        self._string_smart = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+
+        self._pending_comma = False
+        self._step_start: Optional[int] = None
+
+    # --- public API ---
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """Consumes a chunk of text and returns the raw step objects it completed."""
+        steps = []
+        for ch in text:
+            if self._done:
+                break
+            step = self._consume(ch)
+            if step is not None:
+                steps.append(step)
+        return steps
+
+    def finish(self) -> Dict[str, Any]:
+        """Returns the whole parsed object, closing anything left open by a truncated stream."""
+        if not self._started:
+            raise ValueError("No valid JSON object found in response text")
+
+        out = list(self._out)
+        if self._in_string:
+            if self._escape:
+                out.pop()
+            out.append('"')
+        for container in reversed(self._stack):
+            out.append("}" if container == "{" else "]")
+
+        try:
+            parsed = json.loads("".join(out))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"JSON parsing failed: {e}")
+        if not isinstance(parsed, dict):
+            raise ValueError("Roadmap response is not a JSON object")
+        return parsed
+
+    # --- scanner ---
+
+    def _consume(self, ch: str) -> Optional[Dict[str, Any]]:
+        if not self._started:
+            if ch != "{":
+                return None
+            self._started = True
+
+        if self._in_string:
+            self._consume_string_char(ch)
+            return None
+
+        if ch.isspace() or ord(ch) < 32 or 127 <= ord(ch) < 160:
+            return None
+
+        if ch in '"' + SMART_QUOTES:
+            self._flush_comma()
+            self._in_string = True
+            self._string_smart = ch != '"'
+            self._string_start = len(self._out)
+            self._out.append('"')
+            return None
+
+        if ch == ",":
+            self._pending_comma = True
+            return None
+
+        if ch in "}]":
+            # A comma directly before a closing bracket is dropped
+            self._pending_comma = False
+            return self._close(ch)
+
+        self._flush_comma()
+
+        if ch in "{[":
+            self._open(ch)
+        elif ch == ":":
+            self._keys[len(self._stack)] = self._last_string
+            self._out.append(ch)
+        else:
+            self._out.append(ch)
+        return None
+
+    def _consume_string_char(self, ch: str):
+        if self._escape:
+            self._escape = False
+            if ch not in VALID_ESCAPES:
+                # e.g. \' -- drop the backslash rather than fail the parse
+                self._out.pop()
+            self._out.append(ch)
+            return
+
+        if ch == "\\":
+            self._escape = True
+            self._out.append(ch)
+        elif ch == '"' or (self._string_smart and ch in SMART_QUOTES):
+            self._out.append('"')
+            self._in_string = False
+            self._last_string = self._decode_string(self._string_start)
+        elif ch in "\n\r\t":
+            self._out.append(" ")
+        elif ord(ch) < 32:
+            pass
+        else:
+            self._out.append(ch)
+
+    def _flush_comma(self):
+        if self._pending_comma:
+            self._out.append(",")
+            self._pending_comma = False
+
+    def _open(self, ch: str):
+        if ch == "{" and self._in_step_list():
+            self._step_start = len(self._out)
+        self._stack.append(ch)
+        self._out.append(ch)
+
+    def _close(self, ch: str) -> Optional[Dict[str, Any]]:
+        if not self._stack:
+            return None
+
+        self._keys.pop(len(self._stack), None)
+        self._stack.pop()
+        self._out.append(ch)
+
+        if not self._stack:
+            self._done = True
+            return None
+
+        if ch == "}" and self._step_start is not None and self._in_step_list():
+            raw = "".join(self._out[self._step_start:])
+            self._step_start = None
+            try:
+                step = json.loads(raw)
+            except json.JSONDecodeError:
+                return None
+            return step if isinstance(step, dict) else None
+        return None
+
+    def _in_step_list(self) -> bool:
+        # Directly inside the root object's "steps" array
+        return self._stack == ["{", "["] and self._keys.get(1) in STEP_LIST_KEYS
+
+    def _decode_string(self, start: int) -> Optional[str]:
+        try:
+            return json.loads("".join(self._out[start:]))
+        except json.JSONDecodeError:
+            return None
+
+
+# ============================================================
+# NORMALIZATION
+# ============================================================
+
+def normalize_step(step: Dict[str, Any], index: int) -> Dict[str, Any]:
+    """Coerces one step (or legacy "stage") into {"title": str, "tasks": [str, ...]}."""
+    title = step.get("title") or step.get("name") or f"Step {index + 1}"
+    tasks: List[Any] = []
+
+    # Collect tasks from various possible fields
+    for field in ["tasks", "topics", "content"]:
+        if isinstance(step.get(field), list):
+            tasks.extend(step[field])
+
+    if "duration" in step:
+        tasks.insert(0, f"Duration: {step['duration']}")
+
+    # Ensure all tasks are strings and not empty
+    tasks = [str(task).strip() for task in tasks if task and str(task).strip()]
+    if not tasks:
+        tasks = [f"Complete {title}"]
+
+    return {"title": str(title), "tasks": tasks}
+
+
+def normalize_roadmap(parsed: Dict[str, Any], goal: str) -> Dict[str, Any]:
+    """Normalizes a parsed roadmap into {"goal": str, "steps": [...]}."""
+    roadmap_goal = parsed.get("goal") or parsed.get("title") or goal
+
+    raw_steps = parsed.get("steps", parsed.get("stages"))
+    if raw_steps is None:
+        raw_steps = [{"title": "Getting Started", "tasks": [f"Begin working on: {goal}"]}]
+    if not isinstance(raw_steps, list):
+        raw_steps = []
+
+    steps = [normalize_step(step, i) for i, step in enumerate(raw_steps) if isinstance(step, dict)]
+
+    extras = {k: v for k, v in parsed.items() if k not in ("goal", "title", "steps", "stages")}
+    return {"goal": roadmap_goal, "steps": steps, **extras}
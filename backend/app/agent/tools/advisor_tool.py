@@ -1,26 +1,28 @@
 import json
-import re
-from typing import Type
+import asyncio
+from typing import Type, Optional
 from langchain.tools import BaseTool
+from langchain_core.callbacks import AsyncCallbackManagerForToolRun
+from langchain_core.callbacks.manager import adispatch_custom_event
 from pydantic import BaseModel, Field
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers.json import JsonOutputParser
-import os
-from langchain_google_genai import ChatGoogleGenerativeAI
-
-import os
+from app.services.container import services
+from app.services.roadmap_cache import ROADMAP_TTL, get_cached_roadmap, store_roadmap, canonicalize_goal
+from app.services.llm_cache import LLM_CACHE_TTL, CachedLLM
+from app.agent.roadmap_parser import IncrementalRoadmapParser, normalize_step, normalize_roadmap
 from dotenv import load_dotenv
 load_dotenv()
 
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-if not GOOGLE_API_KEY:
-    raise ValueError("GOOGLE_API_KEY is not set!")
+# Bump when the prompt below or the roadmap parsing changes, so cached LLM outputs are not reused
+PROMPT_VERSION = 1
+# A roadmap refreshed for being stale must not come back from the LLM cache
+LLM_CACHE_TTL_FOR_ROADMAPS = min(LLM_CACHE_TTL, ROADMAP_TTL)
 
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash", 
-    google_api_key=os.getenv("GOOGLE_API_KEY"), 
-    temperature=0
-)
+# Goal keys with a background refresh in flight, and the tasks themselves
+# (kept referenced so they aren't garbage collected mid-run)
+_refreshing_goals = set()
+_refresh_tasks = set()
 
 class AdvisorInput(BaseModel):
     goal: str = Field(description="The user's goal to create a roadmap for (e.g., 'learn React', 'prepare for the SIH hackathon').")
@@ -29,6 +31,8 @@ class AdvisorTool(BaseTool):
     name: str = "advisor_tool"
     description: str = "Generates a structured, step-by-step roadmap for a user's goal, such as learning a new skill or preparing for an event. Use this when the user asks for a 'plan', 'roadmap', or 'how to prepare'."
     args_schema: Type[AdvisorInput] = AdvisorInput
+    # Stream tokens from the LLM and emit each roadmap step as soon as it is complete
+    stream_steps: bool = True
 
     def _create_error_response(self, goal: str, error_msg: str) -> str:
         """Create a valid JSON error response"""
@@ -48,38 +52,60 @@ class AdvisorTool(BaseTool):
         # Return compact JSON without extra formatting
         return json.dumps(error_response, ensure_ascii=False)
 
-    def _clean_json_response(self, response_text: str) -> str:
-        """Clean and extract JSON from LLM response with better error handling"""
-        response_text = response_text.strip()
-        
-        # Remove markdown fences
-        response_text = re.sub(r'```json\s*', '', response_text)
-        response_text = re.sub(r'```\s*$', '', response_text)
-        response_text = response_text.strip()
-        
-        # Find the first '{' and the last '}'
-        start_index = response_text.find('{')
-        end_index = response_text.rfind('}')
-        
-        if start_index != -1 and end_index != -1 and end_index > start_index:
-            json_str = response_text[start_index:end_index+1]
-            
-            # Fix common JSON issues
-            # Replace smart quotes with regular quotes
-            json_str = json_str.replace('"', '"').replace('"', '"')
-            json_str = json_str.replace("'", "'").replace("'", "'")
-            
-            # Remove any trailing commas before closing brackets
-            json_str = re.sub(r',(\s*[}\]])', r'\1', json_str)
-            
-            # Remove control characters
-            json_str = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', json_str)
-            
-            return json_str
-        
-        raise ValueError("No valid JSON object found in response text")
-
-    async def _arun(self, goal: str):
+    async def _arun(self, goal: str, run_manager: Optional[AsyncCallbackManagerForToolRun] = None):
+        try:
+            cached = await asyncio.to_thread(get_cached_roadmap, goal)
+        except Exception as e:
+            print(f"[AdvisorTool] ⚠️ Roadmap cache unavailable: {e}")
+            cached = None
+
+        if cached:
+            response, is_stale = cached
+            print(f"[AdvisorTool] ✅ Cache hit for '{canonicalize_goal(goal)}' (stale={is_stale})")
+            if is_stale:
+                self._schedule_refresh(goal)
+            return response
+
+        return await self._generate_and_store(goal, run_manager)
+
+    async def refresh_roadmap(self, goal: str, force: bool = False) -> bool:
+        """
+        Regenerates and re-caches the roadmap for a goal. Returns True on success.
+        With `force`, the LLM is asked again even if its last output is still cached.
+        """
+        result = await self._generate_and_store(goal, refresh=force)
+        return "advisor_tool_response" in json.loads(result)
+
+    def _schedule_refresh(self, goal: str):
+        goal_key = canonicalize_goal(goal)
+        if goal_key in _refreshing_goals:
+            return
+        _refreshing_goals.add(goal_key)
+
+        async def refresh():
+            try:
+                await self.refresh_roadmap(goal)
+            finally:
+                _refreshing_goals.discard(goal_key)
+
+        task = asyncio.create_task(refresh())
+        _refresh_tasks.add(task)
+        task.add_done_callback(_refresh_tasks.discard)
+
+    async def _generate_and_store(self, goal: str, run_manager: Optional[AsyncCallbackManagerForToolRun] = None,
+                                  refresh: bool = False) -> str:
+        result = await self._generate_roadmap(goal, run_manager, refresh)
+
+        # Only successful roadmaps are cached; errors should be retried next time
+        if "advisor_tool_response" in json.loads(result):
+            try:
+                await asyncio.to_thread(store_roadmap, goal, result)
+            except Exception as e:
+                print(f"[AdvisorTool] ⚠️ Could not cache roadmap: {e}")
+        return result
+
+    async def _generate_roadmap(self, goal: str, run_manager: Optional[AsyncCallbackManagerForToolRun] = None,
+                                refresh: bool = False) -> str:
         parser_prompt = ChatPromptTemplate.from_template(
             "You are a world-class strategic advisor. Create a detailed roadmap for the user's goal.\n"
             "CRITICAL INSTRUCTIONS:\n"
@@ -106,104 +132,39 @@ class AdvisorTool(BaseTool):
             "USER'S GOAL: {goal}\n\n"
             "Return only the JSON object:"
         )
+        llm = CachedLLM(services.get("llm"), "advisor", PROMPT_VERSION, ttl=LLM_CACHE_TTL_FOR_ROADMAPS,
+                        cacheable=lambda text: "{" in text and "steps" in text, refresh=refresh)
         chain = parser_prompt | llm
+        callbacks = run_manager.get_child() if run_manager else None
+        parser = IncrementalRoadmapParser()
+        emitted = 0
 
         try:
-            response = await chain.ainvoke({"goal": goal})
-            response_text = response.content
-            
-            print(f"[AdvisorTool] Raw LLM response length: {len(response_text)}")
-            print(f"[AdvisorTool] First 200 chars: {response_text[:200]}")
-            
-            # Clean and extract JSON
+            if self.stream_steps:
+                # Steps are parsed and forwarded as soon as their closing brace arrives
+                response_length = 0
+                async for chunk in chain.astream({"goal": goal}, config={"callbacks": callbacks}):
+                    text = chunk.content if isinstance(chunk.content, str) else ""
+                    response_length += len(text)
+                    for step in parser.feed(text):
+                        await self._emit_step(normalize_step(step, emitted), emitted, callbacks)
+                        emitted += 1
+            else:
+                response = await chain.ainvoke({"goal": goal}, config={"callbacks": callbacks})
+                response_length = len(response.content)
+                parser.feed(response.content)
+
+            print(f"[AdvisorTool] Raw LLM response length: {response_length} ({emitted} steps streamed)")
+
             try:
-                cleaned_json = self._clean_json_response(response_text)
+                parsed_json = parser.finish()
             except ValueError as e:
-                print(f"[AdvisorTool] ❌ Failed to extract JSON: {e}")
-                return self._create_error_response(goal, "Could not extract valid JSON from response")
-            
-            print(f"[AdvisorTool] Cleaned JSON length: {len(cleaned_json)}")
-            
-            # Try to parse the JSON
-            try:
-                parsed_json = json.loads(cleaned_json)
-                print(f"[AdvisorTool] ✅ Successfully parsed JSON")
-            except json.JSONDecodeError as e:
-                print(f"[AdvisorTool] ❌ Initial JSON parse failed: {e}")
-                print(f"[AdvisorTool] Attempting additional fixes...")
-                
-                # Additional aggressive fixes
-                cleaned_json = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', cleaned_json)
-                cleaned_json = re.sub(r"(\w)'(\w)", r"\1'\2", cleaned_json)
-                
-                # Try one more time
-                try:
-                    parsed_json = json.loads(cleaned_json)
-                    print(f"[AdvisorTool] ✅ Successfully parsed after additional fixes")
-                except json.JSONDecodeError as e2:
-                    print(f"[AdvisorTool] ❌ Parse still failed: {e2}")
-                    return self._create_error_response(goal, f"JSON parsing failed: {str(e2)}")
-            
-            # Normalize the structure
-            if "goal" not in parsed_json:
-                if "title" in parsed_json:
-                    parsed_json["goal"] = parsed_json.pop("title")
-                else:
-                    parsed_json["goal"] = goal
-            
-            if "steps" not in parsed_json:
-                if "stages" in parsed_json:
-                    stages = parsed_json.pop("stages")
-                    steps = []
-                    for i, stage in enumerate(stages):
-                        step = {
-                            "title": stage.get("name", stage.get("title", f"Step {i+1}")),
-                            "tasks": []
-                        }
-                        
-                        # Collect tasks from various possible fields
-                        for field in ["topics", "tasks", "content"]:
-                            if field in stage and isinstance(stage[field], list):
-                                step["tasks"].extend(stage[field])
-                        
-                        if "duration" in stage:
-                            step["tasks"].insert(0, f"Duration: {stage['duration']}")
-                        
-                        if not step["tasks"]:
-                            step["tasks"] = [f"Complete {step['title']}"]
-                        
-                        steps.append(step)
-                    
-                    parsed_json["steps"] = steps
-                else:
-                    parsed_json["steps"] = [
-                        {
-                            "title": "Getting Started",
-                            "tasks": [f"Begin working on: {goal}"]
-                        }
-                    ]
-            
-            # Ensure steps is a list
-            if not isinstance(parsed_json["steps"], list):
-                parsed_json["steps"] = []
-            
-            # Clean up each step
-            for step in parsed_json["steps"]:
-                if not isinstance(step.get("tasks"), list):
-                    step["tasks"] = []
-                
-                # Ensure all tasks are strings and not empty
-                step["tasks"] = [
-                    str(task).strip() 
-                    for task in step["tasks"] 
-                    if task and str(task).strip()
-                ]
-                
-                if not step["tasks"]:
-                    step["tasks"] = [f"Complete {step.get('title', 'this step')}"]
-            
-            # Return clean, compact JSON without pretty printing
-                        # Return clean, compact JSON with wrapper
+                print(f"[AdvisorTool] ❌ {e}")
+                return self._create_error_response(goal, str(e))
+
+            parsed_json = normalize_roadmap(parsed_json, goal)
+
+            # Return clean, compact JSON with wrapper
             result = json.dumps({"advisor_tool_response": parsed_json}, ensure_ascii=False)
             print(f"[AdvisorTool] ✅ Returning {len(parsed_json['steps'])} steps")
             return result
@@ -212,5 +173,14 @@ class AdvisorTool(BaseTool):
             print(f"[AdvisorTool] ❌ Unexpected error: {e}")
             return self._create_error_response(goal, str(e))
 
+    async def _emit_step(self, step: dict, index: int, callbacks):
+        """Pushes a completed step to the chat stream (StreamingCallbackHandler) as a custom event."""
+        if callbacks is None:
+            return
+        try:
+            await adispatch_custom_event("roadmap_step", {"index": index, "step": step}, config={"callbacks": callbacks})
+        except Exception as e:
+            print(f"[AdvisorTool] ⚠️ Could not emit step {index}: {e}")
+
     def _run(self, goal: str):
         raise NotImplementedError("This tool is async only.")
\ No newline at end of file
@@ -1,19 +1,92 @@
 # In backend/app/agent/tools/bulk_event_parser_tool.py
 import json,os
-from typing import Type
+import re
+import time
+import asyncio
+from typing import Type, Any, List, Dict, Tuple
 from langchain.tools import BaseTool
 from pydantic import BaseModel, Field
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_google_genai import ChatGoogleGenerativeAI
-import os
+from app.agent.event_extraction import extract_events, event_key
+from app.services.container import services
+from app.services.llm_cache import CachedLLM
 from dotenv import load_dotenv
 load_dotenv()
 
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-if not GOOGLE_API_KEY:
-    raise ValueError("GOOGLE_API_KEY is not set!")
+# Inputs longer than this are split and extracted chunk by chunk
+CHUNK_SIZE = 6000
+CHUNK_OVERLAP = 600
+MAX_CONCURRENT_CHUNKS = 4
+# Bump when the prompt below or the response parsing changes, so cached LLM outputs are not reused
+PROMPT_VERSION = 1
+
+
+def _split_long_unit(unit: str, chunk_size: int) -> List[str]:
+    """Splits a paragraph that alone exceeds chunk_size on lines, then sentences, then hard."""
+    pieces = []
+    for line in unit.splitlines():
+        if len(line) <= chunk_size:
+            pieces.append(line)
+            continue
+        for sentence in re.split(r"(?<=[.!?])\s+", line):
+            while len(sentence) > chunk_size:
+                pieces.append(sentence[:chunk_size])
+                sentence = sentence[chunk_size:]
+            pieces.append(sentence)
+    return [p for p in pieces if p.strip()]
+
+
+def split_into_chunks(text: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> List[str]:
+    """
+    Splits text on paragraph boundaries so an event's lines stay together.
+    Consecutive chunks repeat up to `overlap` characters of trailing
+    paragraphs, so an event straddling a boundary is seen whole at least once.
+    The overlap counts towards `chunk_size`: no chunk is longer than that.
+    """
+    if len(text) <= chunk_size:
+        return [text]
+
+    overlap = min(overlap, chunk_size // 2)
+    # A unit must fit next to a full carried-over overlap
+    budget = chunk_size - overlap
+    units = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        if not paragraph.strip():
+            continue
+        units.extend([paragraph] if len(paragraph) <= budget else _split_long_unit(paragraph, budget))
+
+    chunks, current, size = [], [], 0
+    for unit in units:
+        if current and size + len(unit) > chunk_size:
+            chunks.append("\n\n".join(current))
+            carry, carry_size = [], 0
+            for previous in reversed(current):
+                if carry_size + len(previous) + 2 > overlap:
+                    break
+                carry.insert(0, previous)
+                carry_size += len(previous) + 2
+            current, size = carry, carry_size
+        current.append(unit)
+        size += len(unit) + 2
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def merge_events(chunk_results: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Concatenates per-chunk results, dropping repeats (same normalized title and start time)."""
+    merged, seen = [], set()
+    for events in chunk_results:
+        for event in events:
+            if not isinstance(event, dict):
+                continue
+            key = event_key(event)
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(event)
+    return merged
 
-llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", google_api_key=os.getenv("GOOGLE_API_KEY"), temperature=0)
 
 class BulkParserInput(BaseModel):
     text_to_parse: str = Field(description="A large block of text that may contain multiple events or contests.")
@@ -22,8 +95,19 @@ class BulkEventParserTool(BaseTool):
     name: str = "bulk_event_parser_tool"
     description: str = "Parses a large block of text to extract a LIST of all upcoming events or contests. Use this after scanning a contest page."
     args_schema: Type[BulkParserInput] = BulkParserInput
+    # Defaults to the shared Gemini client; injectable for tests
+    llm: Any = None
+    chunk_size: int = CHUNK_SIZE
+    chunk_overlap: int = CHUNK_OVERLAP
+    max_concurrency: int = MAX_CONCURRENT_CHUNKS
 
     async def _arun(self, text_to_parse: str):
+        # Structured input (contest JSON, .ics, schema.org markup) is parsed without the LLM
+        extraction = extract_events(text_to_parse)
+        if extraction.is_confident:
+            print(f"[BulkEventParser] Fast-path extraction via {extraction.method}: {len(extraction.events)} events")
+            return json.dumps(extraction.events)
+
         # This prompt is specifically designed to extract a list of events
         parser_prompt = ChatPromptTemplate.from_template(
             "You are an expert event detail extractor. Analyze the text below and find ALL upcoming events or contests. "
@@ -37,23 +121,49 @@ class BulkEventParserTool(BaseTool):
             "\n\nText to parse:\n{text}\n\nJSON Response:"
         )
         
+        # The same contest page scraped for many users is parsed once; injected models are never cached
+        llm = self.llm or CachedLLM(services.get("llm"), "bulk_event_parser", PROMPT_VERSION,
+                                    cacheable=lambda text: "[" in text)
         chain = parser_prompt | llm
-        
-        try:
-            response = await chain.ainvoke({"text": text_to_parse})
+        chunks = split_into_chunks(text_to_parse, self.chunk_size, self.chunk_overlap)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def extract_chunk(index: int, chunk: str) -> Tuple[List[Dict[str, Any]], float]:
+            async with semaphore:
+                started = time.perf_counter()
+                response = await chain.ainvoke({"text": chunk})
+                elapsed = time.perf_counter() - started
+
             response_text = response.content
-            
             json_start = response_text.find('[')
             json_end = response_text.rfind(']') + 1
-            if json_start != -1 and json_end > json_start:
-                json_str = response_text[json_start:json_end]
-                # Validate and return the list as a JSON string
-                parsed_list = json.loads(json_str)
-                return json.dumps(parsed_list)
+            events = json.loads(response_text[json_start:json_end]) if json_start != -1 and json_end > json_start else []
+            print(f"[BulkEventParser] Chunk {index + 1}/{len(chunks)}: {len(chunk)} chars, {len(events)} events in {elapsed:.2f}s")
+            return events, elapsed
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(extract_chunk(i, c) for i, c in enumerate(chunks)), return_exceptions=True)
+
+        chunk_events = []
+        errors = []
+        for i, result in enumerate(results):
+            if isinstance(result, Exception):
+                print(f"[BulkEventParser] Chunk {i + 1}/{len(chunks)} failed: {result}")
+                errors.append(result)
             else:
-                return json.dumps([])
-        except Exception as e:
-            return json.dumps({"error": f"Could not parse the text. Error: {e}"})
-            
+                chunk_events.append(result[0])
+
+        # Only fail the whole call if nothing could be extracted
+        if errors and not chunk_events:
+            return json.dumps({"error": f"Could not parse the text. Error: {errors[0]}"})
+
+        merged = merge_events(chunk_events)
+        latencies = [r[1] for r in results if not isinstance(r, Exception)]
+        print(
+            f"[BulkEventParser] {len(merged)} events from {len(chunks)} chunks in {time.perf_counter() - started:.2f}s "
+            f"(slowest chunk {max(latencies):.2f}s, concurrency {self.max_concurrency})"
+        )
+        return json.dumps(merged)
+
     def _run(self, text_to_parse: str):
         raise NotImplementedError("This tool is async only.")
\ No newline at end of file
@@ -1,11 +1,14 @@
-from typing import Type, Any # <-- IMPORT Any
+from datetime import datetime, timedelta, timezone
+from typing import Type, Any, List, Dict, Optional # <-- IMPORT Any
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from langchain.tools import BaseTool
 from pydantic import BaseModel, Field
+from app.services.google_api import google_api
+from app.services.calendar_index import event_id_for, forget_events, known_events, record_events
 
 # REMOVED: from app.services.google_auth import get_user_credentials
-# This tool no longer accesses the database or auth service.
+# This tool no longer accesses the auth service; its only DB access is the local event index.
 
 class EventInput(BaseModel):
     title: str = Field(description="The title of the event.")
@@ -16,6 +19,59 @@ class EventInput(BaseModel):
     
     # REMOVED: user_email field. The agent already knows this.
 
+# Google allows up to 1000 calls per batch, but Calendar recommends keeping batches at 50
+BATCH_LIMIT = 50
+
+
+def build_event_body(title: str, start_time: str, end_time: str, location: str, description: str) -> Dict[str, Any]:
+    """Builds the Calendar API event resource, defaulting naive times to IST."""
+    if not start_time.endswith('Z') and '+' not in start_time and 'T' in start_time:
+        start_time = start_time + '+05:30' # Add IST timezone
+    if not end_time.endswith('Z') and '+' not in end_time and 'T' in end_time:
+        end_time = end_time + '+05:30' # Add IST timezone
+
+    return {
+        # Deterministic id: re-sending the same event is rejected with 409 instead of duplicated
+        'id': event_id_for(title, start_time),
+        'summary': title,
+        'location': location,
+        'description': description,
+        'start': {
+            'dateTime': start_time,
+            'timeZone': 'Asia/Kolkata'
+        },
+        'end': {
+            'dateTime': end_time,
+            'timeZone': 'Asia/Kolkata'
+        },
+    }
+
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+
+def _as_utc(value: str) -> datetime:
+    """An event's dateTime as an aware UTC datetime; times without an offset are IST, like build_event_body."""
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=IST)
+    return parsed.astimezone(timezone.utc)
+
+
+def _is_conflict(error: Exception) -> bool:
+    """True for the 409 Calendar returns when an event with the same id already exists."""
+    return isinstance(error, HttpError) and getattr(error.resp, "status", None) == 409
+
+
+def _is_gone(error: Exception) -> bool:
+    """True for the 404/410 Calendar returns for an event id that was never created or was purged."""
+    return isinstance(error, HttpError) and getattr(error.resp, "status", None) in (404, 410)
+
+
+def _index_entry(body: Dict[str, Any], link: str) -> Dict[str, str]:
+    return {"event_id": body['id'], "title": body['summary'], "start_time": body['start']['dateTime'], "html_link": link}
+
+
 class CreateCalendarEventTool(BaseTool):
     name: str = "create_calendar_event"
     description: str = "Creates a new event in the user's Google Calendar with the provided event details."
@@ -24,6 +80,38 @@ class CreateCalendarEventTool(BaseTool):
     # --- NEW FIELD ---
     # The Google API service object, initialized and passed in by the agent orchestrator
     service: Any
+    # Owner of the calendar, used for the local index of created events
+    user_email: Optional[str] = None
+
+    def _create(self, event: Dict[str, Any]) -> str:
+        """Inserts the event, treating a 409 on its deterministic id as "already exists". Blocking."""
+        known = known_events(self.user_email, [event['id']])
+        if event['id'] in known:
+            # The index is only a hint: the user may have deleted the event in Google since
+            try:
+                current = self.service.events().get(calendarId='primary', eventId=event['id']).execute()
+            except HttpError as error:
+                if not _is_gone(error):
+                    raise
+                current = {'status': 'cancelled'}
+            if current.get('status') != 'cancelled':
+                print(f"[DEBUG] Event {event['id']} already in your calendar, skipping insert")
+                return current.get('htmlLink') or known[event['id']]
+            print(f"[DEBUG] Event {event['id']} was deleted in Google, creating it again")
+            forget_events(self.user_email, [event['id']])
+
+        try:
+            created_event = self.service.events().insert(calendarId='primary', body=event).execute()
+        except HttpError as error:
+            if not _is_conflict(error):
+                raise
+            # The id exists (possibly as a deleted event); update restores it with the latest details
+            print(f"[DEBUG] Event {event['id']} already exists, updating instead")
+            created_event = self.service.events().update(calendarId='primary', eventId=event['id'], body=event).execute()
+
+        link = created_event.get('htmlLink', '')
+        record_events(self.user_email, [_index_entry(event, link)])
+        return link
 
     async def _arun(self, title: str, start_time: str, end_time: str, location: str, description: str):
         """Async version of the calendar event creation"""
@@ -34,30 +122,15 @@ class CreateCalendarEventTool(BaseTool):
             # We no longer get credentials or build the service.
             # We use the 'self.service' object that was passed in.
             
-            if not start_time.endswith('Z') and '+' not in start_time and 'T' in start_time:
-                start_time = start_time + '+05:30' # Add IST timezone
-            if not end_time.endswith('Z') and '+' not in end_time and 'T' in end_time:
-                end_time = end_time + '+05:30' # Add IST timezone
-            
-            event = {
-                'summary': title,
-                'location': location,
-                'description': description,
-                'start': {
-                    'dateTime': start_time,
-                    'timeZone': 'Asia/Kolkata'
-                },
-                'end': {
-                    'dateTime': end_time,
-                    'timeZone': 'Asia/Kolkata'
-                },
-            }
+            event = build_event_body(title, start_time, end_time, location, description)
+            start_time = event['start']['dateTime']
             
             print(f"[DEBUG] Event object: {event}")
             
-            created_event = self.service.events().insert(calendarId='primary', body=event).execute()
+            # Runs on the Google API pool so the event loop stays free
+            link = await google_api.run(self._create, event, user=self.user_email, service=self.service)
             
-            success_message = f"✅ SUCCESS: Event '{title}' has been created in your Google Calendar for {start_time}! You can view it at: {created_event.get('htmlLink', 'your calendar')}"
+            success_message = f"✅ SUCCESS: Event '{title}' has been created in your Google Calendar for {start_time}! You can view it at: {link or 'your calendar'}"
             print(f"[DEBUG] {success_message}")
             return success_message
             
@@ -71,4 +144,170 @@ class CreateCalendarEventTool(BaseTool):
             return error_message
 
     def _run(self, title: str, start_time: str, end_time: str, location: str, description: str):
-        raise NotImplementedError("This tool is async only.")
\ No newline at end of file
+        raise NotImplementedError("This tool is async only.")
+
+
+class BulkEventInput(BaseModel):
+    events: List[EventInput] = Field(description="All events to create, each with title, start_time, end_time, location and description.")
+
+class BulkCreateCalendarEventsTool(BaseTool):
+    name: str = "bulk_create_calendar_events"
+    description: str = (
+        "Creates MANY events in the user's Google Calendar in a single step. "
+        "Use this instead of calling create_calendar_event repeatedly whenever there is more than one event to schedule "
+        "(e.g. a list of contests). Returns a per-event result."
+    )
+    args_schema: Type[BulkEventInput] = BulkEventInput
+
+    # The Google API service object, initialized and passed in by the agent orchestrator
+    service: Any
+    # Owner of the calendar, used for the local index of created events
+    user_email: Optional[str] = None
+
+    def _existing_events(self, bodies: List[Dict[str, Any]]) -> Dict[str, str]:
+        """
+        Pre-flight check: one events.list over the whole batch window, returning
+        {event_id: html_link} for events already in the calendar. Events created
+        by hand are matched on their title and start time. Blocking.
+        """
+        # Compared as instants: '...Z' and '...+05:30' strings don't sort in time order
+        time_min = min(_as_utc(b['start']['dateTime']) for b in bodies).isoformat()
+        time_max = max(_as_utc(b['end']['dateTime']) for b in bodies).isoformat()
+        existing: Dict[str, str] = {}
+        page_token = None
+        while True:
+            page = self.service.events().list(
+                calendarId='primary', timeMin=time_min, timeMax=time_max, singleEvents=True,
+                maxResults=2500, pageToken=page_token,
+            ).execute()
+            for item in page.get('items', []):
+                link = item.get('htmlLink', '')
+                existing[item.get('id', '')] = link
+                start = item.get('start', {})
+                # Google returns dateTime in the calendar's own offset; hash the UTC instant, as the bodies' ids do
+                when = _as_utc(start['dateTime']).isoformat() if start.get('dateTime') else start.get('date', '')
+                existing[event_id_for(item.get('summary', ''), when)] = link
+            page_token = page.get('nextPageToken')
+            if not page_token:
+                return existing
+
+    def _send_batched(self, method: str, indices: List[int], bodies: List[Dict[str, Any]],
+                      results: List[Dict[str, Any]], status: str) -> List[int]:
+        """
+        Sends one request per index as Google batch requests (one HTTP round-trip per
+        BATCH_LIMIT events), filling results in place. Returns the indices that hit a 409.
+        """
+        conflicts: List[int] = []
+
+        def on_response(request_id, response, exception):
+            index = int(request_id)
+            if exception is None:
+                results[index] = {"status": status, "link": response.get("htmlLink", "")}
+            elif _is_conflict(exception):
+                conflicts.append(index)
+            else:
+                results[index] = {"status": "failed", "error": str(exception)}
+
+        events = self.service.events()
+        for offset in range(0, len(indices), BATCH_LIMIT):
+            batch = self.service.new_batch_http_request(callback=on_response)
+            for index in indices[offset:offset + BATCH_LIMIT]:
+                if method == "insert":
+                    request = events.insert(calendarId='primary', body=bodies[index])
+                else:
+                    request = events.update(calendarId='primary', eventId=bodies[index]['id'], body=bodies[index])
+                batch.add(request, request_id=str(index))
+            batch.execute()
+        return sorted(conflicts)
+
+    def _schedule(self, bodies: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Creates the events that don't exist yet; retries of the same batch are no-ops. Blocking."""
+        results: List[Dict[str, Any]] = [{} for _ in bodies]
+
+        # Repeats inside one batch are only sent once
+        first_index: Dict[str, int] = {}
+        for index, body in enumerate(bodies):
+            first_index.setdefault(body['id'], index)
+
+        known = known_events(self.user_email, first_index)
+        try:
+            existing = self._existing_events(bodies)
+        except Exception as e:
+            # Not fatal: the local index and the deterministic ids still turn duplicates into skips and 409s
+            print(f"[DEBUG] Pre-flight events.list failed, relying on the local index and event ids: {e}")
+            existing = dict(known)
+        # Indexed events the calendar no longer lists were deleted in Google; schedule them again
+        stale = [event_id for event_id in known if event_id not in existing]
+        if stale:
+            print(f"[DEBUG] {len(stale)} indexed events were deleted in Google, creating them again")
+            forget_events(self.user_email, stale)
+        pending = []
+        for event_id, index in first_index.items():
+            if event_id in existing:
+                results[index] = {"status": "exists", "link": existing[event_id]}
+            else:
+                pending.append(index)
+
+        conflicts = self._send_batched("insert", pending, bodies, results, "created")
+        # A 409 for an id the pre-flight didn't list means the event was deleted; update restores it
+        if conflicts:
+            self._send_batched("update", conflicts, bodies, results, "created")
+
+        for index, body in enumerate(bodies):
+            if index != first_index[body['id']]:
+                results[index] = {"status": "repeat", "link": results[first_index[body['id']]].get("link", "")}
+
+        record_events(self.user_email, [
+            _index_entry(bodies[index], results[index]["link"])
+            for index in first_index.values() if results[index].get("status") in ("created", "exists")
+        ])
+        return results
+
+    async def _arun(self, events: List[Any]):
+        events = [e.model_dump() if isinstance(e, BaseModel) else dict(e) for e in events]
+        if not events:
+            return "No events were provided to schedule."
+
+        try:
+            print(f"[DEBUG] Creating {len(events)} calendar events in batch")
+            bodies = [
+                build_event_body(e.get('title', ''), e.get('start_time', ''), e.get('end_time', ''),
+                                 e.get('location', ''), e.get('description', ''))
+                for e in events
+            ]
+            # The Google client is synchronous; keep it off the event loop
+            results = await google_api.run(self._schedule, bodies, user=self.user_email, service=self.service)
+        except HttpError as error:
+            error_message = f"❌ Google Calendar API error: {error}"
+            print(f"[DEBUG] {error_message}")
+            return error_message
+        except Exception as e:
+            error_message = f"❌ An error occurred while creating the calendar events: {str(e)}"
+            print(f"[DEBUG] {error_message}")
+            return error_message
+
+        lines = []
+        for event, body, result in zip(events, bodies, results):
+            if result.get("status") == "created":
+                lines.append(f"✅ '{event.get('title')}' on {body['start']['dateTime']}: {result['link'] or 'created'}")
+            elif result.get("status") == "exists":
+                lines.append(f"☑️ '{event.get('title')}' on {body['start']['dateTime']}: already in your calendar")
+            elif result.get("status") == "repeat":
+                lines.append(f"☑️ '{event.get('title')}' on {body['start']['dateTime']}: repeated in the list, "
+                             "scheduled once")
+            else:
+                lines.append(f"❌ '{event.get('title')}': {result.get('error', 'no response from Google Calendar')}")
+
+        created = sum(1 for r in results if r.get("status") == "created")
+        skipped = sum(1 for r in results if r.get("status") == "exists")
+        summary = f"Created {created} of {len(events)} events in your Google Calendar."
+        repeats = sum(1 for r in results if r.get("status") == "repeat")
+        if skipped:
+            summary += f" {skipped} were already scheduled."
+        if repeats:
+            summary += f" {repeats} repeated an event earlier in the list."
+        print(f"[DEBUG] {summary}")
+        return summary + "\n" + "\n".join(lines)
+
+    def _run(self, events: List[Any]):
+        raise NotImplementedError("This tool is async only.")
@@ -3,12 +3,18 @@ from typing import Type, Dict, Any
 from langchain.tools import BaseTool
 from pydantic import BaseModel, Field
 from langchain_core.prompts import ChatPromptTemplate
+from app.agent.event_extraction import extract_events
+from app.services.container import services
+from app.services.llm_cache import CachedLLM
 import os
 from dotenv import load_dotenv
 
 # Load environment variables when module loads (safe)
 load_dotenv()
 
+# Bump when the prompt below or the response parsing changes, so cached LLM outputs are not reused
+PROMPT_VERSION = 1
+
 class EventParserInput(BaseModel):
     text_to_parse: str = Field(
         description="A block of text that may contain event details."
@@ -19,16 +25,27 @@ class EventParserTool(BaseTool):
     description: str = (
         "Parses a block of text to extract structured event information "
         "(title, start_time, end_time, location, description). Returns a JSON "
-        "object with event details that can be used directly for scheduling."
+        "object with event details that can be used directly for scheduling. "
+        "If the text holds several events, the object is the first one and its "
+        "'note' says how many more there are; use bulk_event_parser_tool for all of them."
     )
     args_schema: Type[EventParserInput] = EventParserInput
 
     async def _arun(self, text_to_parse: str) -> str:  # Return JSON as string
         """
-        This method lazy-loads the LLM so importing this module in tests
-        does not require GOOGLE_API_KEY.
+        The shared LLM is only built when the fast path fails, so importing
+        this module in tests does not require GOOGLE_API_KEY.
         """
-        from langchain_google_genai import ChatGoogleGenerativeAI
+        # Structured input (contest JSON, .ics, schema.org, "Date: ... Time: ...") needs no LLM
+        extraction = extract_events(text_to_parse)
+        if extraction.is_confident:
+            print(f"[DEBUG] Fast-path extraction via {extraction.method} (confidence {extraction.confidence})")
+            event = dict(extraction.events[0])
+            others = len(extraction.events) - 1
+            if others:
+                event["note"] = (f"The text has {others} more event(s) besides this one; "
+                                 "use bulk_event_parser_tool to get all of them.")
+            return json.dumps(event)
 
         GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 
@@ -39,11 +56,9 @@ class EventParserTool(BaseTool):
         try:
             print(f"[DEBUG] Parsing text of length: {len(text_to_parse)}")
 
-            llm = ChatGoogleGenerativeAI(
-                model="gemini-2.5-flash",
-                google_api_key=GOOGLE_API_KEY,
-                temperature=0
-            )
+            # The same email or page parsed for another user is answered from the cache
+            llm = CachedLLM(services.get("llm"), "event_parser", PROMPT_VERSION,
+                            cacheable=lambda text: "{" in text and "}" in text)
 
             parser_prompt = ChatPromptTemplate.from_template(
                 "You are an expert event detail extractor. Analyze the text and extract event information. "
@@ -1,8 +1,9 @@
-import base64
 import json
 from datetime import datetime, timedelta
 from googleapiclient.discovery import build
 from app.services.google_auth import get_user_credentials
+from app.services.google_api import batch_execute
+from app.agent.mime_parser import parse_message
 
 class GmailJsonTool:
     """
@@ -51,81 +52,28 @@ class GmailJsonTool:
             if not messages:
                 return json.dumps([])
 
-            email_details = []
-            for message_info in messages:
-                try:
-                    msg = service.users().messages().get(
-                        userId='me', 
-                        id=message_info['id'], 
-                        format='full'
-                    ).execute()
-                    
-                    payload = msg.get('payload', {})
-                    headers = payload.get('headers', [])
-                    
-                    # Extract headers
-                    subject = next((h['value'] for h in headers if h['name'].lower() == 'subject'), 'No Subject')
-                    sender = next((h['value'] for h in headers if h['name'].lower() == 'from'), 'Unknown Sender')
-                    date_header = next((h['value'] for h in headers if h['name'].lower() == 'date'), '')
-                    
-                    # Get internal date (timestamp in milliseconds)
-                    internal_date = int(msg.get('internalDate', 0)) / 1000  # Convert to seconds
-                    
-                    body_data = ""
-                    
-                    # Recursively search for the text/plain part
-                    def find_plain_text_part(parts):
-                        """Recursively find the text/plain part's data."""
-                        if not parts:
-                            return ""
-                            
-                        data = ""
-                        for p in parts:
-                            if p.get('mimeType') == 'text/plain':
-                                body = p.get('body')
-                                if body:
-                                    data = body.get('data', '')
-                                return data
-                            
-                            # Recurse into multipart parts
-                            if p.get('mimeType', '').startswith('multipart/'):
-                                data = find_plain_text_part(p.get('parts', []))
-                                if data:  # Stop as soon as we find it
-                                    return data
-                        return data
-
-                    if 'parts' in payload:
-                        body_data = find_plain_text_part(payload.get('parts', []))
-                    
-                    # Fallback for simple emails (non-multipart)
-                    if not body_data and 'body' in payload:
-                        msg_body = payload.get('body')
-                        if msg_body:
-                            body_data = msg_body.get('data', '')
-                            
-                    body = ""
-                    if body_data:
-                        try:
-                            # Ensure data is valid base64
-                            body = base64.urlsafe_b64decode(body_data).decode('utf-8')
-                        except Exception as decode_error:
-                            print(f"[GmailJsonTool]: Base64 decode error for message {message_info['id']}: {decode_error}")
-                            body = msg.get('snippet', '')  # Fallback to snippet
-                    else:
-                        body = msg.get('snippet', '')
+            # Fetched in batches of 50 (one HTTP round-trip each) instead of one request per message
+            requests = [
+                service.users().messages().get(userId='me', id=m['id'], format='full')
+                for m in messages
+            ]
+            responses = batch_execute(service, requests)
 
-                    email_details.append({
-                        "id": msg['id'],
-                        "from": sender,
-                        "subject": subject,
-                        "date": date_header,
-                        "timestamp": internal_date,  # For sorting
-                        "body_snippet": body[:500]
-                    })
-                    
-                except Exception as msg_error:
+            email_details = []
+            for message_info, (msg, msg_error) in zip(messages, responses):
+                if msg_error is not None or msg is None:
                     print(f"[GmailJsonTool]: Error fetching message {message_info['id']}: {msg_error}")
                     continue
+
+                parsed = parse_message(msg)
+                email_details.append({
+                    "id": parsed['id'],
+                    "from": parsed['from'],
+                    "subject": parsed['subject'],
+                    "date": parsed['date'],
+                    "timestamp": parsed['timestamp'],  # For sorting
+                    "body_snippet": parsed['body'][:500]
+                })
             
             # Sort by timestamp (newest first)
             email_details.sort(key=lambda x: x.get('timestamp', 0), reverse=True)
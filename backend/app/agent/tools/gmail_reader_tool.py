@@ -1,9 +1,9 @@
-import base64
-import json
-from typing import Type, Any  # <-- IMPORT Any
+from typing import Type, Any, Optional  # <-- IMPORT Any
 from googleapiclient.discovery import build
 from langchain.tools import BaseTool
 from pydantic import BaseModel, Field
+from app.services.google_api import google_api, batch_execute
+from app.agent.mime_parser import parse_message
 
 # REMOVED: from app.services.google_auth import get_user_credentials
 # This tool no longer accesses the database or auth service.
@@ -20,6 +20,8 @@ class GmailReaderTool(BaseTool):
     # --- NEW FIELD ---
     # The Google API service object, initialized and passed in by the agent orchestrator
     service: Any 
+    # Owner of the mailbox, used for the per-user Google API concurrency limit
+    user_email: Optional[str] = None
 
     async def _arun(self, query: str = "in:inbox"):
         """Async version of Gmail reading"""
@@ -29,40 +31,32 @@ class GmailReaderTool(BaseTool):
             # --- CRITICAL CHANGE ---
             # We no longer get credentials or build the service.
             # We use the 'self.service' object that was passed in.
-            results = self.service.users().messages().list(userId='me', q=query, maxResults=5).execute()
+            # Google calls run on the Google API pool, never on the event loop
+            results = await google_api.execute(
+                self.service.users().messages().list(userId='me', q=query, maxResults=5), user=self.user_email
+            )
             messages = results.get('messages', [])
 
             if not messages:
                 return "No emails found matching the query."
 
-            email_details = []
-            for message_info in messages:
-                msg = self.service.users().messages().get(userId='me', id=message_info['id'], format='full').execute()
-                payload = msg.get('payload', {})
-                headers = payload.get('headers', [])
-                
-                subject = next((h['value'] for h in headers if h['name'].lower() == 'subject'), 'No Subject')
-                sender = next((h['value'] for h in headers if h['name'].lower() == 'from'), 'Unknown Sender')
-                
-                body_data = ""
-                if 'parts' in payload:
-                    for part in payload['parts']:
-                        if part['mimeType'] == 'text/plain':
-                            body_data = part['body'].get('data', '')
-                            break
-                elif 'body' in payload:
-                        body_data = payload['body'].get('data', '')
-                
-                try:
-                    body = base64.urlsafe_b64decode(body_data + '===').decode('utf-8') if body_data else msg.get('snippet', '')
-                except Exception:
-                    body = msg.get('snippet', '')
+            # One batched round-trip for all messages instead of one request each
+            requests = [self.service.users().messages().get(userId='me', id=m['id'], format='full') for m in messages]
+            responses = await google_api.run(
+                batch_execute, self.service, requests, user=self.user_email, service=self.service
+            )
 
+            email_details = []
+            for message_info, (msg, error) in zip(messages, responses):
+                if error is not None or msg is None:
+                    print(f"[DEBUG] Could not fetch message {message_info['id']}: {error}")
+                    continue
+                parsed = parse_message(msg)
                 email_details.append({
-                    "id": msg['id'],
-                    "from": sender,
-                    "subject": subject,
-                    "body_snippet": body[:1000] # Increased snippet length
+                    "id": parsed['id'],
+                    "from": parsed['from'],
+                    "subject": parsed['subject'],
+                    "body_snippet": parsed['body'][:1000] # Increased snippet length
                 })
             
             formatted_emails = "\n\n".join([
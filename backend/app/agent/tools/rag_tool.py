@@ -1,20 +1,60 @@
 import os
-from typing import Type
+from typing import Any, Dict, List, Optional, Type
 from langchain.tools import BaseTool
 from pydantic import BaseModel, Field
 import httpx # Make sure to add 'httpx' to backend/requirements.txt!
 
+from app.services.vector_index import DEFAULT_TOP_K, get_retriever
+
+
 class DocumentQueryInput(BaseModel):
     file_path: str = Field(description="The file name of the PDF document to query.")
     query: str = Field(description="The question to ask about the document.")
     user_email: str = Field(description="The email of the user, e.g., 'user@example.com'.")
 
+
+def format_passages(passages: List[Dict[str, Any]]) -> str:
+    lines = []
+    for n, passage in enumerate(passages, start=1):
+        page = passage["metadata"].get("page")
+        where = f"{passage['file_name']}, page {page + 1}" if isinstance(page, int) else passage["file_name"]
+        lines.append(f"[{n}] ({where})\n{passage['content'].strip()}")
+    return "\n\n".join(lines)
+
+
 class DocumentQueryTool(BaseTool):
     name: str = "document_query_tool"
-    description: str = "Use this tool to answer questions about a specific PDF document that the user has uploaded. You must provide the file_path, query, and user_email."
+    description: str = "Use this tool to answer questions about a specific PDF document that the user has uploaded. You must provide the file_path, query, and user_email. It returns the most relevant passages from the document; answer the question from them."
     args_schema: Type[DocumentQueryInput] = DocumentQueryInput
+    # The signed-in user; when set, the agent can't query anyone else's documents
+    user_email: Optional[str] = None
+    retriever: Any = None
+    top_k: int = DEFAULT_TOP_K
 
     async def _arun(self, file_path: str, query: str, user_email: str):
+        """
+        Searches the user's chunks in the in-process vector index, embedding
+        the question with the same model used at ingestion.
+        """
+        user_email = self.user_email or user_email
+        file_name = os.path.basename(file_path) if file_path else None
+        retriever = self.retriever or get_retriever()
+        try:
+            passages = await retriever.retrieve(user_email, query, file_name=file_name, k=self.top_k)
+            if not passages and file_name:
+                # Not an uploaded name (the agent often paraphrases it); search all of the user's documents
+                print(f"RAG Tool: '{file_name}' not indexed for {user_email}; searching all documents")
+                passages = await retriever.retrieve(user_email, query, k=self.top_k)
+        except Exception as e:
+            print(f"RAG Tool: local retrieval failed ({e}); falling back to the RAG server")
+            return await self._query_rag_server(file_path, query, user_email)
+
+        if not passages:
+            return "No uploaded documents were found for this user. Ask them to upload the PDF first."
+        print(f"RAG Tool: {len(passages)} passages for {user_email} (top score {passages[0]['score']:.3f})")
+        return format_passages(passages)
+
+    async def _query_rag_server(self, file_path: str, query: str, user_email: str):
         """
         Calls the dedicated Vercel RAG server to perform the query.
         """
@@ -30,14 +70,14 @@ class DocumentQueryTool(BaseTool):
                 "query": query,
                 "user_email": user_email
             }
-            
+
             print(f"RAG Tool: Calling Vercel RAG server: {api_endpoint}")
 
             async with httpx.AsyncClient() as client:
                 response = await client.post(api_endpoint, json=payload, timeout=60.0)
-            
+
             response.raise_for_status()
-            
+
             data = response.json()
             return data.get("answer", "No answer found from RAG server.")
 
@@ -46,6 +86,6 @@ class DocumentQueryTool(BaseTool):
             return f"An error occurred while querying the document: {e.response.json().get('detail', 'Query API failed')}"
         except Exception as e:
             return f"An unexpected error occurred during RAG query: {str(e)}"
-            
+
     def _run(self, file_path: str, query: str, user_email: str):
-        raise NotImplementedError("This tool is async only.")
\ No newline at end of file
+        raise NotImplementedError("This tool is async only.")
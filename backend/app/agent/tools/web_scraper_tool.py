@@ -1,10 +1,30 @@
+import json
 import httpx  # <-- NEW: Replaces Playwright
-from bs4 import BeautifulSoup
+from collections import OrderedDict
 from langchain.tools import BaseTool
 from pydantic import BaseModel, Field
-from typing import Type
+from typing import Type, Any, Tuple
+from app.agent.event_extraction import extract_schema_org_events
+from app.services.http_cache import http_fetcher
+from app.agent.page_text import PageTextExtractor, extract_main_text
+
+# Cleaned page text keyed by (url, content hash): a cache hit or a 304 skips parsing entirely
+CLEANED_TEXT_CACHE_SIZE = 256
+_cleaned_text_cache: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+
+
+def _with_structured_events(html_content: str, text: str) -> str:
+    # schema.org Event markup lives in <script>/attributes that text extraction drops
+    structured_events = extract_schema_org_events(html_content)
+    if structured_events:
+        return f"Structured events (schema.org): {json.dumps(structured_events)}\n\n{text}"
+    return text
+
+
+def clean_html(html_content: str) -> str:
+    """Main page text as paragraphs, prefixed with any schema.org events found in the markup."""
+    return _with_structured_events(html_content, extract_main_text(html_content))
 
-# NOTE: We have removed all 'asyncio' and 'playwright' imports
 
 class ScraperInput(BaseModel):
     url: str = Field(description="The URL of the webpage to scrape for content.")
@@ -13,37 +33,32 @@ class WebScraperTool(BaseTool):
     name: str = "web_scraper"
     description: str = (
         "Useful for scraping a webpage to find its text content. "
-        "It returns the cleaned text that can be parsed for information. "
-        "This tool is synchronous and does not use asyncio."
+        "It returns the cleaned text that can be parsed for information."
     )
     args_schema: Type[ScraperInput] = ScraperInput
+    # Defaults to the shared cached fetcher; injectable for tests
+    fetcher: Any = None
 
-    def _run(self, url: str):
-        """Synchronously scrapes a webpage using httpx and BeautifulSoup."""
+    async def _arun(self, url: str):
+        """Scrapes a webpage through the shared HTTP cache and pooled client."""
         try:
-            print(f"[DEBUG] Scraping URL (sync with httpx): {url}")
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
-                              'AppleWebKit/537.36 (KHTML, like Gecko) '
-                              'Chrome/91.0.4472.124 Safari/537.36'
-            }
-
-            # Use httpx.Client for a sync request
-            with httpx.Client(headers=headers, follow_redirects=True, timeout=30.0) as client:
-                response = client.get(url)
-                response.raise_for_status() # Raise error for 4xx/5xx
-                html_content = response.text
-
-            soup = BeautifulSoup(html_content, "html.parser")
-
-            # Remove all script, style, nav, footer, header, and aside tags
-            for tag in soup(["script", "style", "nav", "footer", "header", "aside"]):
-                tag.decompose()
-
-            raw_text = soup.get_text(separator=" ", strip=True)
-            lines = [line.strip() for line in raw_text.split("\n") if len(line.strip()) > 3]
-            cleaned_text = "\n".join(lines)[:5000]
+            # Parses while downloading and stops reading once enough main text is in
+            extractor = PageTextExtractor()
+            response = await (self.fetcher or http_fetcher).fetch(url, consumer=extractor)
+            print(f"[DEBUG] Scraping URL: {url} (cache {response.cache_status}, {response.size} bytes read)")
+
+            key = (url, response.content_hash)
+            cleaned_text = _cleaned_text_cache.get(key)
+            if cleaned_text is None:
+                if response.cache_status == "miss":
+                    cleaned_text = _with_structured_events(response.text, extractor.result())
+                else:
+                    cleaned_text = clean_html(response.text)
+                _cleaned_text_cache[key] = cleaned_text
+                if len(_cleaned_text_cache) > CLEANED_TEXT_CACHE_SIZE:
+                    _cleaned_text_cache.popitem(last=False)
+            else:
+                _cleaned_text_cache.move_to_end(key)
 
             print(f"[DEBUG] Scraped {len(cleaned_text)} characters")
             return cleaned_text
@@ -57,4 +72,5 @@ class WebScraperTool(BaseTool):
             print(f"[DEBUG] {msg}")
             return msg
 
-    # We do not need _arun, the agent will run _run in a thread
+    def _run(self, url: str):
+        raise NotImplementedError("This tool is async only.")
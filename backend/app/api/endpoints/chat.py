@@ -1,8 +1,7 @@
 from fastapi import APIRouter, Depends
 from app.schemas.chat import ChatRequest, ChatResponse
-from app.agent.orchestrator import get_agent_response
 from fastapi.responses import StreamingResponse
-from app.agent.callbacks import StreamingCallbackHandler
+from app.services.container import services
 import asyncio
 
 # --- THIS IS THE FIX ---
@@ -20,13 +19,17 @@ async def chat_stream(
     # This dependency secures the endpoint using the token in the HEADER
     user: VerifiedUser = Depends(get_current_user) 
 ):
+    from app.agent.callbacks import StreamingCallbackHandler  # imports LangChain; deferred past startup
+
     queue = asyncio.Queue()
     callback = StreamingCallbackHandler(queue=queue)
 
     async def agent_task():
         try:
+            # The agent and its LangChain imports load on the first chat, unless the warm-up got there first
+            orchestrator = await asyncio.to_thread(services.get, "agent")
             # Pass the token from the BODY to the agent
-            await get_agent_response(
+            await orchestrator.get_agent_response(
                 user_input=chat_request.message,
                 user_email=user.email,
                 access_token=chat_request.access_token, # <-- Use the token from the body
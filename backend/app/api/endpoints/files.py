@@ -1,105 +1,127 @@
-import os
-import shutil
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+import asyncio
+from fastapi import APIRouter, BackgroundTasks, UploadFile, File, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from app.core.security import get_current_user, VerifiedUser
 
-from langchain_community.document_loaders import PyPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-# --- 1. Use Google's Embedding model ---
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_community.vectorstores import SupabaseVectorStore
-from supabase.client import create_client, Client
-import os
+from app.services.container import services
+from app.services.ingestion_jobs import IngestionJobRunner, JobNotRetryableError, format_sse
+from app.services.embedding_cache import embedding_stats, forget_document
+from app.services.embedding_scheduler import embedding_scheduler
+from app.services.ingestion import EMBEDDING_MODEL_NAME
+from app.services.vector_index import vector_indexes
 from dotenv import load_dotenv
 load_dotenv()
 
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-if not GOOGLE_API_KEY:
-    raise ValueError("GOOGLE_API_KEY is not set!")
 router = APIRouter()
 
-UPLOAD_DIR = "temp_uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-supabase_url = os.getenv("SUPABASE_URL")
-supabase_key = os.getenv("SUPABASE_SERVICE_KEY")
-if not supabase_url or not supabase_key:
-    raise ValueError("Supabase URL/Key not set in environment.")
+# The Supabase client and Google embedding model are built on first use (or by the startup warm-up),
+# so a missing key fails uploads, not the whole app
+def embed_documents(texts):
+    return services.get("embeddings").embed_documents(texts)
 
-supabase_client: Client = create_client(supabase_url, supabase_key)
 
-# --- 2. Initialize the Google Embedding model ---
-# This runs on Google's servers and uses 0 of your server's RAM.
-google_embeddings = GoogleGenerativeAIEmbeddings(
-    model="models/embedding-001",
-    google_api_key=os.getenv("GOOGLE_API_KEY")
-)
-# ---
+def insert_documents(rows):
+    """Inserts one batch of embedded chunks into the Supabase documents table and the local vector index."""
+    # The documents table also holds chunks embedded elsewhere (the frontend's MiniLM uploads);
+    # the model name keeps them apart
+    rows = [dict(r, metadata=dict(r.get("metadata") or {}, embedding_model=EMBEDDING_MODEL_NAME)) for r in rows]
+    response = services.get("supabase").table("documents").insert(rows).execute()
+    if response.data is None:
+        raise Exception(f"Insert failed: {response.error.message if response.error else 'Unknown error'}")
+    vector_indexes.add_rows(rows)
+
 
-vector_store = SupabaseVectorStore(
-    client=supabase_client,
-    embedding=google_embeddings, # <-- 3. Use the Google model
-    table_name="documents",
-    query_name="match_documents"
+# Ingestion runs in the background; clients poll the job or follow its SSE stream.
+# Chunk embeddings are cached by text + model, so re-uploaded handbooks cost no embedding calls.
+ingestion_jobs = IngestionJobRunner(
+    embed_documents=embed_documents,
+    insert_rows=insert_documents,
+    # The name GoogleGenerativeAIEmbeddings reports, so cached embeddings keep their keys
+    embedding_model=EMBEDDING_MODEL_NAME,
+    scheduler=embedding_scheduler,  # concurrent embedding within the API quotas, shared by all jobs
 )
 
-@router.post("/files/upload")
+
+@router.post("/files/upload", status_code=202)
 async def upload_file(
     user: VerifiedUser = Depends(get_current_user),
     file: UploadFile = File(...)
 ):
-    temp_file_path = None
     try:
-        temp_file_path = os.path.join(UPLOAD_DIR, file.filename)
-        with open(temp_file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        print(f"File saved temporarily to {temp_file_path}")
-
-        loader = PyPDFLoader(temp_file_path)
-        docs = loader.load()
-        if not docs:
-            raise HTTPException(status_code=400, detail="Could not load any content from the PDF.")
-
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-        split_docs = text_splitter.split_documents(docs)
-        
-        contents = [doc.page_content for doc in split_docs]
-        
-        # --- 4. Get embeddings from Google's API ---
-        print(f"Embedding {len(contents)} chunks for user {user.email} via Google API...")
-        doc_embeddings = google_embeddings.embed_documents(contents)
-        # ---
-        
-        data_to_insert = []
-        for i, doc in enumerate(split_docs):
-            data_to_insert.append({
-                "user_id": user.email,
-                "file_name": file.filename,
-                "content": contents[i],
-                "embedding": doc_embeddings[i],
-                "metadata": doc.metadata
-            })
-
-        print(f"Storing {len(data_to_insert)} vectors in Supabase...")
-        
-        batch_size = 50
-        for i in range(0, len(data_to_insert), batch_size):
-            batch = data_to_insert[i:i + batch_size]
-            print(f"Inserting batch {i // batch_size + 1} ({len(batch)} chunks)...")
-            response = supabase_client.table("documents").insert(batch).execute()
-            
-            if response.data is None:
-                 raise Exception(f"Insert failed: {response.error.message if response.error else 'Unknown error'}")
-
-        print(f"Successfully embedded and stored file {file.filename}.")
-        
-        return {"file_path": temp_file_path, "message": "File processed and ready for questions."}
-
+        job = await ingestion_jobs.submit(file, user.email)
     except Exception as e:
-        print(f"Error during file processing: {e}")
+        print(f"Error while queueing file {file.filename}: {e}")
         raise HTTPException(status_code=500, detail=f"There was an error processing the file: {str(e)}")
-    finally:
-        if temp_file_path and os.path.exists(temp_file_path):
-            os.remove(temp_file_path)
-            print(f"Removed temp file: {temp_file_path}")
\ No newline at end of file
+
+    if job["deduplicated"]:
+        message = f"You already uploaded this file as {job['file_name']}; it is ready to use."
+    else:
+        message = "File received; processing has started."
+        print(f"Queued ingestion job {job['job_id']} for {file.filename} from {user.email}")
+    return {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        # Questions about a deduplicated upload go to the name it was first stored under
+        "file_path": job["file_name"],
+        "deduplicated": job["deduplicated"],
+        "status_url": f"/api/files/jobs/{job['job_id']}",
+        "events_url": f"/api/files/jobs/{job['job_id']}/events",
+        "message": message,
+    }
+
+
+@router.get("/files/embedding-stats")
+async def get_embedding_stats(user: VerifiedUser = Depends(get_current_user)):
+    return await asyncio.to_thread(embedding_stats, user.email)
+
+
+@router.delete("/files/documents/{file_name}")
+async def delete_document(
+    file_name: str,
+    background_tasks: BackgroundTasks,
+    user: VerifiedUser = Depends(get_current_user),
+):
+    def delete_rows():
+        return services.get("supabase").table("documents").delete().eq("user_id", user.email).eq("file_name", file_name).execute()
+
+    response = await asyncio.to_thread(delete_rows)
+    chunks_deleted = await asyncio.to_thread(vector_indexes.delete_file, user.email, file_name)
+    await asyncio.to_thread(forget_document, user.email, file_name)
+    if not response.data and not chunks_deleted:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    # Deleted chunks are skipped at query time; their disk space comes back once enough pile up
+    background_tasks.add_task(vector_indexes.compact, user.email)
+    return {"file_name": file_name, "chunks_deleted": max(len(response.data or []), chunks_deleted)}
+
+
+@router.get("/files/jobs/{job_id}")
+async def get_ingestion_job(job_id: str, user: VerifiedUser = Depends(get_current_user)):
+    job = await ingestion_jobs.get(job_id, user.email)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/files/jobs/{job_id}/events")
+async def stream_ingestion_job(job_id: str, user: VerifiedUser = Depends(get_current_user)):
+    if await ingestion_jobs.get(job_id, user.email) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def stream_generator():
+        async for snapshot in ingestion_jobs.events(job_id, user.email):
+            yield format_sse("progress", snapshot)
+        yield "event: end\ndata: {}\n\n"
+
+    return StreamingResponse(stream_generator(), media_type="text/event-stream")
+
+
+@router.post("/files/jobs/{job_id}/retry", status_code=202)
+async def retry_ingestion_job(job_id: str, user: VerifiedUser = Depends(get_current_user)):
+    try:
+        return await ingestion_jobs.retry(job_id, user.email)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Job not found")
+    except JobNotRetryableError as e:
+        raise HTTPException(status_code=409, detail=str(e))
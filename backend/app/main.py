@@ -9,7 +9,11 @@ from app.api.endpoints import chat, user, updates, files
 from app.database import engine
 from app import models
 from contextlib import asynccontextmanager
-from app.services.scheduler_service import scheduler
+from app.services.scheduler_service import scheduler, schedule_contest_refresh, schedule_upload_sweep
+from app.services.google_api import google_api
+from app.services.loop_monitor import loop_monitor
+from app.services.ingestion_jobs import fail_interrupted_jobs
+from app.services.container import services, SERVICE_WARM_UP
 # from app.mail_classifier import router as mail_router
 from dotenv import load_dotenv
 load_dotenv()
@@ -18,11 +22,23 @@ load_dotenv()
 async def lifespan(app: FastAPI):
     print("Application startup: Creating database tables...")
     models.Base.metadata.create_all(bind=engine)
+    interrupted = fail_interrupted_jobs()
+    if interrupted:
+        print(f"Application startup: {len(interrupted)} interrupted ingestion jobs can be retried")
     print("Application startup: Starting scheduler...")
     scheduler.start()
+    schedule_contest_refresh()
+    schedule_upload_sweep()
+    loop_monitor.start()
+    # LLM, embedding and Supabase clients are built after startup, while requests are already served
+    warm_up = asyncio.create_task(services.warm_up()) if SERVICE_WARM_UP else None
     yield
+    if warm_up is not None:
+        warm_up.cancel()
     print("Application shutdown: Stopping scheduler...")
     scheduler.shutdown()
+    await loop_monitor.stop()
+    google_api.shutdown()
 
 app = FastAPI(title="AI University Navigator API", lifespan=lifespan)
 
@@ -48,4 +64,22 @@ app.include_router(files.router, prefix="/api")
 
 @app.api_route("/", methods=["GET", "HEAD"])
 def read_root():
-    return {"message": "Backend is connected and running!"}
\ No newline at end of file
+    return {"message": "Backend is connected and running!"}
+
+@app.get("/health/loop")
+def loop_health():
+    """Recent event-loop lag; p99 should stay in the low milliseconds under chat load."""
+    return loop_monitor.snapshot()
+
+@app.get("/health/services")
+def services_health():
+    """Which lazily built clients exist yet, how long each took, and why one could not be built."""
+    return services.snapshot()
+
+@app.get("/health/llm")
+def llm_health():
+    """Per-model LLM calls in flight and queued, latency percentiles, token usage and result-cache hits."""
+    # Imports LangChain; the first chat loads it anyway
+    from app.services.llm_registry import llm_registry
+    from app.services.llm_cache import llm_cache
+    return {**llm_registry.snapshot(), "cache": llm_cache.snapshot()}
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime 
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Text, UniqueConstraint
 from sqlalchemy.orm import relationship
 from .database import Base
 from sqlalchemy.sql import func 
@@ -48,4 +48,107 @@ class Feedback(Base):
     is_correct = Column(Boolean, nullable=False)  # True = correct, False = incorrect
     predicted_label = Column(String, nullable=True)  # The label that was shown
     
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+# Cache of generated roadmaps, keyed by the canonicalized goal text
+class RoadmapCache(Base):
+    __tablename__ = "roadmap_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    goal_key = Column(String, unique=True, index=True, nullable=False)  # canonical form, e.g. "data structures and algorithms"
+    goal = Column(String, nullable=False)  # goal text as first requested
+    response = Column(Text, nullable=False)  # serialized {"advisor_tool_response": ...}
+
+    hit_count = Column(Integer, default=0, nullable=False)
+    generated_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_requested_at = Column(DateTime(timezone=True), server_default=func.now())
+
+# Local index of calendar events the agent has created, so retries can skip the API
+class CalendarEventRecord(Base):
+    __tablename__ = "calendar_events"
+    __table_args__ = (UniqueConstraint("user_email", "event_id", name="uq_calendar_event_user"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_email = Column(String, index=True, nullable=False)
+    event_id = Column(String, nullable=False)  # deterministic id sent to Google, see calendar_index.event_id_for
+    title = Column(String, nullable=False)
+    start_time = Column(String, nullable=False)
+    html_link = Column(String, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+# Background PDF ingestion started by /files/upload
+class IngestionJob(Base):
+    __tablename__ = "ingestion_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String, unique=True, index=True, nullable=False)  # uuid4 hex, returned to the client
+    user_email = Column(String, index=True, nullable=False)
+    file_name = Column(String, nullable=False)
+
+    status = Column(String, default="queued", nullable=False)  # queued, parsing, embedding, storing, done, failed
+    total_pages = Column(Integer, nullable=True)
+    pages_parsed = Column(Integer, default=0, nullable=False)
+    chunks_embedded = Column(Integer, default=0, nullable=False)
+    chunks_stored = Column(Integer, default=0, nullable=False)
+    total_chunks = Column(Integer, nullable=True)  # known once parsing has finished
+    # Batches are stored in order, so a retry resumes after the last stored one
+    batches_stored = Column(Integer, default=0, nullable=False)
+    chunks_cached = Column(Integer, default=0, nullable=False)  # embeddings reused from embedding_cache
+    file_hash = Column(String, nullable=True)  # sha256 of the uploaded bytes
+    attempts = Column(Integer, default=0, nullable=False)
+    error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+# Content-addressed embeddings: one row per (model, chunk text), shared by all users
+class EmbeddingCacheEntry(Base):
+    __tablename__ = "embedding_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String, unique=True, index=True, nullable=False)  # sha256 of model name + chunk text
+    model = Column(String, nullable=False)
+    embedding = Column(Text, nullable=False)  # JSON list of floats
+    hit_count = Column(Integer, default=0, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+# A PDF a user has fully ingested, identified by the hash of its bytes
+class UploadedDocument(Base):
+    __tablename__ = "uploaded_documents"
+    __table_args__ = (UniqueConstraint("user_email", "file_hash", name="uq_uploaded_document_user_hash"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_email = Column(String, index=True, nullable=False)
+    file_hash = Column(String, index=True, nullable=False)
+    file_name = Column(String, nullable=False)
+    chunk_count = Column(Integer, default=0, nullable=False)
+    job_id = Column(String, nullable=True)
+    # First upload of the same bytes by anyone; its chunks' embeddings are reused from the cache
+    source_document_id = Column(Integer, ForeignKey("uploaded_documents.id"), nullable=True)
+    # Re-uploads answered from this record without any processing
+    duplicate_uploads = Column(Integer, default=0, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+# Outputs of deterministic (temperature 0) tool prompts, shared by all users; see app/services/llm_cache.py
+class LLMCacheEntry(Base):
+    __tablename__ = "llm_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String, unique=True, index=True, nullable=False)  # sha256 of model, template@version, rendered input
+    model = Column(String, nullable=False)
+    template = Column(String, index=True, nullable=False)  # e.g. "event_parser@1"
+    response = Column(Text, nullable=False)
+    size_bytes = Column(Integer, default=0, nullable=False)
+    latency_ms = Column(Integer, default=0, nullable=False)  # what the original call took; saved again on every hit
+    hit_count = Column(Integer, default=0, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    last_used_at = Column(DateTime(timezone=True), index=True, nullable=False)  # LRU eviction order
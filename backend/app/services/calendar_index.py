@@ -0,0 +1,112 @@
+# In backend/app/services/calendar_index.py
+import re
+import hashlib
+import unicodedata
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import SessionLocal
+
+
+# ============================================================
+# DETERMINISTIC EVENT IDS
+# ============================================================
+
+def normalize_title(title: str) -> str:
+    text = unicodedata.normalize("NFKC", title or "").lower()
+    return re.sub(r"[^a-z0-9]+", " ", text).strip()
+
+
+def normalize_start(start_time: str) -> str:
+    """Reduces a start time to its UTC minute so '+05:30' and 'Z' spellings of one instant match."""
+    try:
+        parsed = datetime.fromisoformat((start_time or "").strip().replace("Z", "+00:00"))
+    except ValueError:
+        return (start_time or "").strip()
+    if parsed.tzinfo is None:
+        return parsed.strftime("%Y-%m-%dT%H:%M")
+    return parsed.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%MZ")
+
+
+def event_id_for(title: str, start_time: str) -> str:
+    """
+    Calendar accepts client-supplied ids made of base32hex characters (a-v, 0-9),
+    so a hex digest of the normalized title and start works as-is. Inserting the
+    same event twice then fails with 409 instead of creating a duplicate.
+    """
+    key = f"{normalize_title(title)}|{normalize_start(start_time)}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+# ============================================================
+# LOCAL INDEX
+# ============================================================
+
+def known_events(user_email: Optional[str], event_ids: Iterable[str]) -> Dict[str, str]:
+    """Returns {event_id: html_link} for the ids already recorded for this user."""
+    event_ids = list(event_ids)
+    if not user_email or not event_ids:
+        return {}
+
+    db: Session = SessionLocal()
+    try:
+        rows = (
+            db.query(models.CalendarEventRecord)
+            .filter(models.CalendarEventRecord.user_email == user_email)
+            .filter(models.CalendarEventRecord.event_id.in_(event_ids))
+            .all()
+        )
+        return {row.event_id: row.html_link or "" for row in rows}
+    finally:
+        db.close()
+
+
+def record_events(user_email: Optional[str], events: List[Dict[str, str]]) -> None:
+    """Adds events (dicts with event_id, title, start_time, html_link) to the user's index, skipping known ids."""
+    if not user_email or not events:
+        return
+
+    db: Session = SessionLocal()
+    try:
+        existing = set(known_events(user_email, [e["event_id"] for e in events]))
+        for event in events:
+            if event["event_id"] in existing:
+                continue
+            existing.add(event["event_id"])
+            db.add(models.CalendarEventRecord(
+                user_email=user_email,
+                event_id=event["event_id"],
+                title=event.get("title", ""),
+                start_time=event.get("start_time", ""),
+                html_link=event.get("html_link", ""),
+            ))
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"[CalendarIndex] ⚠️ Could not record events for {user_email}: {e}")
+    finally:
+        db.close()
+
+
+def forget_events(user_email: Optional[str], event_ids: Iterable[str]) -> None:
+    """Drops index entries for events that no longer exist in the user's calendar (deleted in Google)."""
+    event_ids = list(event_ids)
+    if not user_email or not event_ids:
+        return
+
+    db: Session = SessionLocal()
+    try:
+        (
+            db.query(models.CalendarEventRecord)
+            .filter(models.CalendarEventRecord.user_email == user_email)
+            .filter(models.CalendarEventRecord.event_id.in_(event_ids))
+            .delete(synchronize_session=False)
+        )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"[CalendarIndex] ⚠️ Could not forget events for {user_email}: {e}")
+    finally:
+        db.close()
@@ -0,0 +1,336 @@
+# In backend/app/services/chunking.py
+import os
+import re
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from pypdf import PdfReader
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+# Chunks grow block by block up to this size; blocks are only cut when a single one is larger
+CHUNK_MAX_CHARS = 1500
+# Only a paragraph cut mid-text repeats anything: its last sentence, if no longer than this
+SPLIT_OVERLAP_CHARS = 200
+
+# Page text is extracted in worker processes for PDFs with at least PARALLEL_MIN_PAGES pages
+PDF_EXTRACT_PROCESSES = int(os.getenv("PDF_EXTRACT_PROCESSES", str(min(4, os.cpu_count() or 1))))
+PARALLEL_MIN_PAGES = 24
+PAGES_PER_TASK = 8
+
+_BULLET = re.compile(r"^(?:[•◦▪‣●○■·*\-–]|\(?\d{1,2}[.)]|\(?[a-z][.)]|\(?[ivx]{1,4}\))\s+")
+_NUMBERED_HEADING = re.compile(r"^(?:\d+(?:\.\d+)*\.?|[A-Z]\.|(?:chapter|section|part|unit|appendix|annexure)\b)",
+                               re.IGNORECASE)
+_COLUMN_GAP = re.compile(r"\s{3,}|\t|\s\|\s")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[A-Z0-9])")
+
+
+class EmptyDocumentError(ValueError):
+    """The PDF has no pages at all."""
+
+
+@dataclass
+class Block:
+    kind: str  # heading, paragraph, list, table
+    lines: List[str]
+
+    @property
+    def text(self) -> str:
+        if self.kind == "table":
+            return "\n".join(" | ".join(_COLUMN_GAP.split(line.strip())) for line in self.lines)
+        if self.kind == "list":
+            return "\n".join(self.lines)
+        return " ".join(self.lines)
+
+
+# ============================================================
+# PAGE EXTRACTION
+# ============================================================
+
+def _page_text(page: Any, layout: bool = True) -> str:
+    if not layout:
+        return page.extract_text() or ""
+    # Layout mode keeps column gaps and blank lines, which is what tables and headings are found by
+    try:
+        return page.extract_text(extraction_mode="layout") or ""
+    except Exception:
+        return page.extract_text() or ""
+
+
+def _extract_range(path: str, start: int, end: int, layout: bool) -> List[str]:
+    """Runs in a worker process: the text of pages [start, end) of the PDF at `path`."""
+    reader = PdfReader(path)
+    return [_page_text(reader.pages[i], layout) for i in range(start, end)]
+
+
+_extract_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _pool() -> ProcessPoolExecutor:
+    global _extract_pool
+    if _extract_pool is None:
+        # spawn, not fork: the server process has threads and an event loop
+        _extract_pool = ProcessPoolExecutor(max_workers=PDF_EXTRACT_PROCESSES,
+                                            mp_context=multiprocessing.get_context("spawn"))
+    return _extract_pool
+
+
+def iter_page_texts(fileobj: Any, progress: Optional[Any] = None, processes: int = PDF_EXTRACT_PROCESSES,
+                    layout: bool = True) -> Iterator[str]:
+    """
+    Page texts in order. A PDF on disk with enough pages is extracted by a
+    process pool a few pages per task, at most two tasks per process ahead
+    of the consumer; anything else is extracted in this process.
+    """
+    reader = PdfReader(fileobj)
+    total = len(reader.pages)
+    if not total:
+        raise EmptyDocumentError("Could not load any content from the PDF.")
+    if progress is not None:
+        progress.total_pages = total
+    path = getattr(fileobj, "name", None)
+
+    if processes > 1 and total >= PARALLEL_MIN_PAGES and isinstance(path, str) and os.path.isfile(path):
+        pool = _pool()
+        ranges = deque((start, min(start + PAGES_PER_TASK, total)) for start in range(0, total, PAGES_PER_TASK))
+        pending: deque = deque()
+        try:
+            while ranges or pending:
+                while ranges and len(pending) < 2 * processes:
+                    start, end = ranges.popleft()
+                    pending.append((end, pool.submit(_extract_range, path, start, end, layout)))
+                end, future = pending.popleft()
+                for text in future.result():
+                    yield text
+                if progress is not None:
+                    progress.pages_parsed = end
+        finally:
+            for _, future in pending:
+                future.cancel()
+        return
+
+    for page_number, page in enumerate(reader.pages):
+        text = _page_text(page, layout)
+        if progress is not None:
+            progress.pages_parsed = page_number + 1
+        yield text
+
+
+# ============================================================
+# STRUCTURE
+# ============================================================
+
+def _is_heading(line: str, next_line: Optional[str], after_break: bool) -> bool:
+    """
+    A short line that is numbered, upper case, a short label ending in ":",
+    or Title Case after a paragraph break. Headings are followed by text
+    unless they are upper case.
+    """
+    words = line.split()
+    if not words or len(line) > 80 or len(words) > 12 or line[-1] in ".,;" or _COLUMN_GAP.search(line):
+        return False
+    if sum(c.isalpha() for c in line) < 3 or next_line is None and not line.isupper():
+        return False
+    if line.isupper() or (_NUMBERED_HEADING.match(line) and len(words) > 1):
+        return True
+    if line.endswith(":"):
+        return len(words) <= 6
+    long_words = [w for w in words if w[0].isalpha() and len(w) > 3]
+    return after_break and bool(long_words) and all(w[0].isupper() for w in long_words)
+
+
+def heading_level(heading: str) -> int:
+    """1 for "3." or upper-case headings, 2 for "3.1", and so on; unnumbered headings rank below all of those."""
+    number = re.match(r"^(\d+(?:\.\d+)*)", heading)
+    if number:
+        return number.group(1).count(".") + 1
+    return 1 if heading.isupper() or _NUMBERED_HEADING.match(heading) else 9
+
+
+def _is_table_row(line: str) -> bool:
+    return len(_COLUMN_GAP.findall(line.strip())) >= 2
+
+
+def parse_blocks(text: str) -> List[Block]:
+    """Splits a page's text into headings, paragraphs, lists and tables."""
+    raw = text.splitlines()
+    blocks: List[Block] = []
+    current: Optional[Block] = None
+
+    def close():
+        nonlocal current
+        if current is not None:
+            blocks.append(current)
+        current = None
+
+    # The next non-blank line after each line
+    following: List[Optional[str]] = [None] * len(raw)
+    upcoming: Optional[str] = None
+    for i in range(len(raw) - 1, -1, -1):
+        following[i] = upcoming
+        upcoming = raw[i].strip() or upcoming
+
+    after_break = True
+    for i, line in enumerate(raw):
+        stripped = line.strip()
+        if not stripped:
+            # Blank lines end paragraphs and tables; list items may be spaced out
+            if current is not None and current.kind != "list":
+                close()
+            after_break = True
+            continue
+        heading = _is_heading(stripped, following[i], after_break)
+        after_break = heading or stripped[-1] in ".!?:"
+        if _is_table_row(stripped):
+            if current is None or current.kind != "table":
+                close()
+                current = Block("table", [])
+            current.lines.append(stripped)
+        elif _BULLET.match(stripped) and not (heading and _NUMBERED_HEADING.match(stripped)):
+            if current is None or current.kind != "list":
+                close()
+                current = Block("list", [])
+            current.lines.append(re.sub(r"\s+", " ", stripped))
+        elif current is not None and current.kind == "list" and line[:1].isspace():
+            current.lines[-1] += " " + re.sub(r"\s+", " ", stripped)  # wrapped list item
+        elif heading:
+            close()
+            blocks.append(Block("heading", [re.sub(r"\s+", " ", stripped)]))
+        else:
+            if current is None or current.kind != "paragraph":
+                close()
+                current = Block("paragraph", [])
+            current.lines.append(re.sub(r"\s+", " ", stripped))
+    close()
+    return blocks
+
+
+def _split_block(block: Block, limit: int) -> List[str]:
+    """Pieces of one oversized block: tables by rows (header repeated), lists by items, prose by sentences."""
+    if block.kind in ("table", "list"):
+        rows = block.text.split("\n")
+        header = [rows[0]] if block.kind == "table" else []
+        pieces, current = [], []
+        for row in rows[len(header):]:
+            if current and len("\n".join(header + current + [row])) > limit:
+                pieces.append("\n".join(header + current))
+                current = []
+            current.append(row)
+        if current or not pieces:
+            pieces.append("\n".join(header + current))
+        return pieces
+
+    sentences: List[str] = []
+    for sentence in _SENTENCE_END.split(block.text):
+        while len(sentence) > limit:  # a run-on "sentence": cut at the last space that fits
+            cut = sentence.rfind(" ", 0, limit)
+            cut = cut if cut > 0 else limit
+            sentences.append(sentence[:cut])
+            sentence = sentence[cut:].lstrip()
+        sentences.append(sentence)
+    pieces, current = [], []
+    for sentence in sentences:
+        if current and len(" ".join(current + [sentence])) > limit:
+            pieces.append(" ".join(current))
+            overlap = current[-1]
+            current = [overlap] if len(overlap) <= SPLIT_OVERLAP_CHARS else []
+        current.append(sentence)
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def chunk_page(blocks: List[Block], headings: List[Tuple[int, str]], max_chars: int = CHUNK_MAX_CHARS
+               ) -> Tuple[List[Tuple[str, Optional[str], List[str]]], List[Tuple[int, str]]]:
+    """
+    Packs one page's blocks into (content, section, block kinds) chunks.
+    `headings` is the open (level, heading) path, carried from page to page.
+    A heading at or above the level a chunk started at ends the chunk;
+    sub-sections are packed into it while they fit. Every chunk starts with
+    its section path ("3. Hostel Rules > Fees") and never spans pages.
+    """
+    headings = list(headings)
+    chunks: List[Tuple[str, Optional[str], List[str]]] = []
+    parts: List[str] = []
+    kinds: List[str] = []
+    chunk_section: Optional[str] = None
+    chunk_level = 0
+
+    def path() -> Optional[str]:
+        return " > ".join(text for _, text in headings) or None
+
+    def has_body() -> bool:
+        return any(kind != "heading" for kind in kinds)
+
+    def size() -> int:
+        return sum(len(part) + 1 for part in parts)
+
+    def flush():
+        if has_body():
+            chunks.append(("\n".join(parts), chunk_section, sorted(set(kinds))))
+            parts.clear()
+            kinds.clear()
+
+    def begin():
+        nonlocal chunk_section, chunk_level
+        if not parts:
+            chunk_section = path()
+            chunk_level = headings[-1][0] if headings else 0
+            if chunk_section:
+                parts.append(chunk_section)
+                kinds.append("heading")
+
+    for block in blocks:
+        text = block.text
+        if block.kind == "heading":
+            level = heading_level(text)
+            if has_body() and (level <= chunk_level or size() + len(text) > max_chars):
+                flush()
+            while headings and headings[-1][0] >= level:
+                headings.pop()
+            headings.append((level, text))
+            if has_body():
+                parts.append(text)
+                kinds.append("heading")
+            else:
+                parts.clear()
+                kinds.clear()
+                begin()
+            continue
+
+        begin()
+        if size() + len(text) <= max_chars:
+            parts.append(text)
+            kinds.append(block.kind)
+            continue
+        flush()
+        begin()
+        room = max(max_chars - size(), max_chars // 2)
+        pieces = [text] if len(text) <= room else _split_block(block, room)
+        for i, piece in enumerate(pieces):
+            if i:
+                flush()
+                begin()
+            parts.append(piece)
+            kinds.append(block.kind)
+    flush()
+    return chunks, headings
+
+
+def iter_structured_chunks(fileobj: Any, file_name: str, progress: Optional[Any] = None,
+                           max_chars: int = CHUNK_MAX_CHARS,
+                           processes: int = PDF_EXTRACT_PROCESSES) -> Iterator[Dict[str, Any]]:
+    """Yields {"content", "metadata"} chunks aligned to headings, lists, tables and pages."""
+    headings: List[Tuple[int, str]] = []
+    for page_number, text in enumerate(iter_page_texts(fileobj, progress, processes)):
+        chunks, headings = chunk_page(parse_blocks(text), headings, max_chars)
+        for content, chunk_section, kinds in chunks:
+            metadata: Dict[str, Any] = {"source": file_name, "page": page_number, "blocks": kinds}
+            if chunk_section:
+                metadata["section"] = chunk_section
+            yield {"content": content, "metadata": metadata}
@@ -0,0 +1,149 @@
+# In backend/app/services/container.py
+import os
+import time
+import asyncio
+import importlib
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+# Build the warm services in a background task once the server is accepting traffic
+SERVICE_WARM_UP = os.getenv("SERVICE_WARM_UP", "1") != "0"
+
+
+class MissingConfigurationError(RuntimeError):
+    """A service was used whose environment variables are not set."""
+
+
+class ServiceContainer:
+    """
+    Named services created by their factory on first use, once, from any
+    thread. Nothing is imported or connected until something asks for it
+    (or `warm_up` does so in the background), so the app starts without
+    LangChain, Gemini or Supabase and a missing key only fails the feature
+    that needs it.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._warm: Dict[str, bool] = {}
+        self._instances: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.build_seconds: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+
+    def register(self, name: str, factory: Callable[[], Any], warm: bool = True):
+        with self._lock:
+            self._factories[name] = factory
+            self._warm[name] = warm
+            self._locks.setdefault(name, threading.Lock())
+
+    def get(self, name: str) -> Any:
+        if name in self._instances:
+            return self._instances[name]
+        if name not in self._factories:
+            raise KeyError(f"Unknown service: {name}")
+        with self._locks[name]:
+            if name not in self._instances:
+                started = time.perf_counter()
+                try:
+                    instance = self._factories[name]()
+                except Exception as e:
+                    self.errors[name] = str(e)
+                    raise
+                self.build_seconds[name] = time.perf_counter() - started
+                self.errors.pop(name, None)
+                self._instances[name] = instance
+                print(f"[Services] {name} ready in {self.build_seconds[name]:.2f}s")
+        return self._instances[name]
+
+    def is_ready(self, name: str) -> bool:
+        return name in self._instances
+
+    def override(self, name: str, instance: Any):
+        """Uses `instance` for `name` instead of building it (tests, scripts)."""
+        with self._lock:
+            self._instances[name] = instance
+
+    def reset(self, name: Optional[str] = None):
+        """Forgets built instances so the next `get` builds them again."""
+        with self._lock:
+            for key in [name] if name else list(self._instances):
+                self._instances.pop(key, None)
+                self.build_seconds.pop(key, None)
+
+    async def warm_up(self, names: Optional[Iterable[str]] = None):
+        """Builds services one at a time in a worker thread; failures are logged and left for first use."""
+        started = time.perf_counter()
+        for name in names if names is not None else [n for n, warm in self._warm.items() if warm]:
+            if self.is_ready(name):
+                continue
+            try:
+                await asyncio.to_thread(self.get, name)
+            except Exception as e:
+                print(f"[Services] ⚠️ Could not warm up {name}: {e}")
+        print(f"[Services] Warm-up finished in {time.perf_counter() - started:.2f}s")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            name: {"ready": self.is_ready(name), "seconds": round(self.build_seconds.get(name, 0.0), 3),
+                   "error": self.errors.get(name)}
+            for name in self._factories
+        }
+
+
+def require_env(name: str) -> str:
+    value = os.getenv(name)
+    if not value:
+        raise MissingConfigurationError(f"{name} is not set!")
+    return value
+
+
+# ============================================================
+# FACTORIES
+# ============================================================
+
+def _chat_llm():
+    # Shared with every other caller of the default model, under its concurrency and token budgets
+    from app.services.llm_registry import llm_registry
+    return llm_registry.get()
+
+
+def _embeddings():
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+    from app.services.ingestion import EMBEDDING_MODEL
+
+    def build():
+        return GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL, google_api_key=require_env("GOOGLE_API_KEY"))
+
+    try:
+        asyncio.get_running_loop()
+        return build()
+    except RuntimeError:
+        pass
+    # The client also opens a grpc.aio channel, which needs an event loop in the building thread
+    # (a warm-up or ingestion worker has none); only the synchronous embed calls are used
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        return build()
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()  # never run; closing it releases its selector
+
+
+def _supabase():
+    from supabase.client import create_client
+    return create_client(require_env("SUPABASE_URL"), require_env("SUPABASE_SERVICE_KEY"))
+
+
+services = ServiceContainer()
+services.register("llm", _chat_llm)
+services.register("embeddings", _embeddings)
+services.register("supabase", _supabase)
+# The agent, its tools and their LangChain imports; loading it is most of a cold chat request
+services.register("agent", lambda: importlib.import_module("app.agent.orchestrator"))
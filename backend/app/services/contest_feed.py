@@ -0,0 +1,249 @@
+# In backend/app/services/contest_feed.py
+import os
+import time
+import asyncio
+import httpx
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+from dotenv import load_dotenv
+
+load_dotenv()
+
+IST = ZoneInfo("Asia/Kolkata")
+
+# Entries older than this are served as-is while a refresh runs in the background
+CONTEST_CACHE_TTL = timedelta(minutes=int(os.getenv("CONTEST_CACHE_TTL_MINUTES", "30")))
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _to_ist(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(IST).isoformat()
+
+
+def _contest(title: str, start: datetime, end: datetime, description: str) -> Dict[str, Any]:
+    return {
+        "title": title, "start_time": _to_ist(start), "end_time": _to_ist(end),
+        "location": "Online", "description": description
+    }
+
+
+# ============================================================
+# SOURCES
+# ============================================================
+
+class ContestSource:
+    """
+    One contest judge. Subclasses describe how to request the upstream feed
+    and how to turn its payload into our contest dicts; fetching, caching and
+    conditional requests are handled by ContestFeed.
+    """
+    name: str = ""
+    timeout: float = 15
+
+    def is_configured(self) -> bool:
+        return True
+
+    def build_request(self) -> Tuple[str, Dict[str, Any], Dict[str, str]]:
+        """Returns (url, params, headers)."""
+        raise NotImplementedError
+
+    def parse(self, data: Any) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+
+class ClistSource(ContestSource):
+    """Any judge tracked by clist.by, e.g. leetcode.com or atcoder.jp."""
+    api_url = "https://clist.by/api/v4/contest/"
+
+    def __init__(self, name: str, resource: str, label: str):
+        self.name = name
+        self.resource = resource
+        self.label = label
+
+    def is_configured(self) -> bool:
+        return bool(os.getenv("CLIST_API_KEY"))
+
+    def build_request(self):
+        # Rounded to the hour so the URL (and therefore the ETag) is stable between refreshes
+        since = (_utcnow() - timedelta(hours=1)).replace(minute=0, second=0, microsecond=0, tzinfo=None)
+        params = {
+            "resource": self.resource,
+            "start__gte": since.isoformat(),
+            "order_by": "start"
+        }
+        return self.api_url, params, {"Authorization": os.getenv("CLIST_API_KEY", "")}
+
+    def parse(self, data):
+        formatted = []
+        for c in data.get('objects', []):
+            # clist reports times in UTC
+            start = datetime.fromisoformat(c['start'].replace('Z', '+00:00'))
+            end = datetime.fromisoformat(c['end'].replace('Z', '+00:00'))
+            formatted.append(_contest(c['event'], start, end, f"{self.label} Contest. Register at: {c['href']}"))
+        return formatted
+
+
+class CodeforcesSource(ContestSource):
+    name = "codeforces"
+    timeout = 10
+
+    def build_request(self):
+        return "https://codeforces.com/api/contest.list", {"gym": "false"}, {}
+
+    def parse(self, data):
+        if data.get('status') != 'OK':
+            return []
+
+        formatted = []
+        for c in data.get('result', []):
+            if c.get('phase') != 'BEFORE':
+                continue
+            start = datetime.fromtimestamp(c['startTimeSeconds'], tz=timezone.utc)
+            end = start + timedelta(seconds=c['durationSeconds'])
+            formatted.append(_contest(c['name'], start, end, f"Codeforces Contest. Type: {c['type']}"))
+        return formatted
+
+
+class CodeChefSource(ContestSource):
+    name = "codechef"
+
+    def build_request(self):
+        url = "https://www.codechef.com/api/list/contests/all"
+        return url, {"sort_type": "START", "sort_order": "asc", "offset": 0, "mode": "premium"}, {}
+
+    def parse(self, data):
+        formatted = []
+        for c in data.get('future_contests', []):
+            start = datetime.fromisoformat(c['contest_start_date_iso'])
+            end = datetime.fromisoformat(c['contest_end_date_iso'])
+            link = f"https://www.codechef.com/{c['contest_code']}"
+            formatted.append(_contest(c['contest_name'], start, end, f"CodeChef Contest. Register at: {link}"))
+        return formatted
+
+
+CONTEST_SOURCES: Dict[str, ContestSource] = {
+    source.name: source for source in [
+        ClistSource("leetcode", "leetcode.com", "LeetCode"),
+        CodeforcesSource(),
+        ClistSource("atcoder", "atcoder.jp", "AtCoder"),
+        CodeChefSource(),
+    ]
+}
+
+
+# ============================================================
+# CACHE
+# ============================================================
+
+@dataclass
+class FeedEntry:
+    contests: List[Dict[str, Any]] = field(default_factory=list)
+    fetched_at: float = 0.0
+    url: Optional[str] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+class ContestFeed:
+    """
+    Shared, per-source cache of upcoming contests.
+
+    Sources are refreshed on a schedule (see scheduler_service), so agent calls
+    normally return straight from memory. If an entry has gone stale it is
+    still served immediately and refreshed in the background
+    (stale-while-revalidate); only a source that has never been fetched makes
+    the caller wait. Refreshes send If-None-Match / If-Modified-Since so an
+    unchanged upstream feed costs a 304 instead of a full download.
+    """
+
+    def __init__(self, sources: Dict[str, ContestSource] = None, ttl: timedelta = None,
+                 transport: httpx.AsyncBaseTransport = None):
+        self.sources = sources if sources is not None else CONTEST_SOURCES
+        self.ttl = ttl if ttl is not None else CONTEST_CACHE_TTL
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._entries: Dict[str, FeedEntry] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._background = set()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(transport=self._transport, follow_redirects=True)
+        return self._client
+
+    async def get(self, name: str) -> List[Dict[str, Any]]:
+        source = self.sources.get(name)
+        if source is None:
+            return []
+        if not source.is_configured():
+            return [{"error": f"{name} source is not configured (missing API key in .env file)."}]
+
+        entry = self._entries.get(name)
+        if entry is None or not entry.fetched_at:
+            entry = await self.refresh(name)
+        elif time.time() - entry.fetched_at > self.ttl.total_seconds():
+            self._refresh_in_background(name)
+
+        return self._upcoming(entry.contests)
+
+    async def refresh(self, name: str) -> FeedEntry:
+        """Re-fetches one source. Concurrent callers share a single upstream request."""
+        lock = self._locks.setdefault(name, asyncio.Lock())
+        in_flight = lock.locked()
+        async with lock:
+            entry = self._entries.setdefault(name, FeedEntry())
+            if in_flight and entry.fetched_at:
+                return entry
+
+            source = self.sources[name]
+            url, params, headers = source.build_request()
+            request_url = str(httpx.URL(url, params=params))
+            if entry.url == request_url:
+                if entry.etag:
+                    headers = {**headers, "If-None-Match": entry.etag}
+                if entry.last_modified:
+                    headers = {**headers, "If-Modified-Since": entry.last_modified}
+
+            try:
+                response = await self._get_client().get(request_url, headers=headers, timeout=source.timeout)
+                if response.status_code == 304:
+                    print(f"[ContestFeed] {name}: not modified")
+                else:
+                    response.raise_for_status()
+                    entry.contests = source.parse(response.json())
+                    entry.url = request_url
+                    entry.etag = response.headers.get("ETag")
+                    entry.last_modified = response.headers.get("Last-Modified")
+                    print(f"[ContestFeed] {name}: {len(entry.contests)} upcoming contests")
+                entry.fetched_at = time.time()
+            except Exception as e:
+                # Keep serving whatever we had; the next call or scheduled run retries
+                print(f"Error fetching {name} contests: {e}")
+            return entry
+
+    async def refresh_all(self):
+        names = [name for name, source in self.sources.items() if source.is_configured()]
+        await asyncio.gather(*(self.refresh(name) for name in names))
+
+    def _refresh_in_background(self, name: str):
+        lock = self._locks.get(name)
+        if lock is not None and lock.locked():
+            return
+        task = asyncio.create_task(self.refresh(name))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def _upcoming(self, contests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # A cached list can be up to one TTL old, so drop contests that have since ended
+        now = _utcnow()
+        return [c for c in contests if datetime.fromisoformat(c["end_time"]) > now]
+
+
+contest_feed = ContestFeed()
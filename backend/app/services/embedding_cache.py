@@ -0,0 +1,178 @@
+# In backend/app/services/embedding_cache.py
+import json
+import asyncio
+import hashlib
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import SessionLocal
+
+
+def chunk_key(model: str, text: str) -> str:
+    """Cache key for one chunk: the same text embedded by another model is a different entry."""
+    return hashlib.sha256(f"{model}\x00{text}".encode("utf-8")).hexdigest()
+
+
+def lookup_embeddings(keys: List[str]) -> Dict[str, List[float]]:
+    if not keys:
+        return {}
+    db: Session = SessionLocal()
+    try:
+        rows = db.query(models.EmbeddingCacheEntry).filter(models.EmbeddingCacheEntry.content_hash.in_(keys)).all()
+        for row in rows:
+            row.hit_count = (row.hit_count or 0) + 1
+        db.commit()
+        return {row.content_hash: json.loads(row.embedding) for row in rows}
+    finally:
+        db.close()
+
+
+def store_embeddings(model: str, entries: Dict[str, List[float]]) -> None:
+    if not entries:
+        return
+    db: Session = SessionLocal()
+    try:
+        for key, embedding in entries.items():
+            db.add(models.EmbeddingCacheEntry(content_hash=key, model=model, embedding=json.dumps(embedding)))
+        db.commit()
+    except IntegrityError:
+        # Another job stored some of the same chunks first; keep whichever rows are missing
+        db.rollback()
+        existing = {
+            k for (k,) in db.query(models.EmbeddingCacheEntry.content_hash)
+            .filter(models.EmbeddingCacheEntry.content_hash.in_(list(entries)))
+        }
+        for key, embedding in entries.items():
+            if key not in existing:
+                db.add(models.EmbeddingCacheEntry(content_hash=key, model=model, embedding=json.dumps(embedding)))
+        db.commit()
+    finally:
+        db.close()
+
+
+class CachedEmbedder:
+    """
+    Wraps an embed_documents function so chunks embedded before (by any user)
+    come from the embedding_cache table; only new text reaches the model.
+    Counts cache hits and misses.
+    """
+
+    def __init__(self, embed_documents: Callable[[List[str]], List[List[float]]], model: str):
+        self.embed_documents = embed_documents
+        self.model = model
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _lookup(self, texts: List[str]) -> Tuple[List[str], Dict[str, List[float]], Dict[str, str]]:
+        keys = [chunk_key(self.model, t) for t in texts]
+        found = lookup_embeddings(sorted(set(keys)))
+
+        # Repeats inside one batch are embedded once
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        return keys, found, missing
+
+    def _finish(self, keys: List[str], found: Dict[str, List[float]], missing: Dict[str, str],
+                embeddings: List[List[float]]) -> List[List[float]]:
+        fresh = dict(zip(missing.keys(), embeddings))
+        store_embeddings(self.model, fresh)
+        with self._lock:
+            self.misses += len(missing)
+            self.hits += len(keys) - len(missing)
+        return [found.get(k) or fresh[k] for k in keys]
+
+    def __call__(self, texts: List[str]) -> List[List[float]]:
+        keys, found, missing = self._lookup(texts)
+        embeddings = self.embed_documents(list(missing.values())) if missing else []
+        return self._finish(keys, found, missing, embeddings)
+
+    async def embed_with(self, scheduler: Any, texts: List[str]) -> List[List[float]]:
+        """Like calling the embedder, but misses go through an EmbeddingScheduler; hits use no quota."""
+        keys, found, missing = await asyncio.to_thread(self._lookup, texts)
+        embeddings = await scheduler.embed(self.embed_documents, list(missing.values())) if missing else []
+        return await asyncio.to_thread(self._finish, keys, found, missing, embeddings)
+
+
+# ============================================================
+# DOCUMENT DEDUPLICATION
+# ============================================================
+
+def find_document(user_email: str, file_hash: str) -> Optional[Dict]:
+    """This user's earlier ingestion of the same bytes, if any."""
+    db: Session = SessionLocal()
+    try:
+        doc = db.query(models.UploadedDocument).filter(
+            models.UploadedDocument.user_email == user_email,
+            models.UploadedDocument.file_hash == file_hash,
+        ).first()
+        if doc is None:
+            return None
+        doc.duplicate_uploads = (doc.duplicate_uploads or 0) + 1
+        db.commit()
+        return {"file_name": doc.file_name, "chunk_count": doc.chunk_count, "job_id": doc.job_id}
+    finally:
+        db.close()
+
+
+def record_document(user_email: str, file_hash: str, file_name: str, chunk_count: int, job_id: str) -> None:
+    db: Session = SessionLocal()
+    try:
+        source = db.query(models.UploadedDocument).filter(
+            models.UploadedDocument.file_hash == file_hash,
+            models.UploadedDocument.source_document_id.is_(None),
+        ).order_by(models.UploadedDocument.id).first()
+        db.add(models.UploadedDocument(
+            user_email=user_email, file_hash=file_hash, file_name=file_name, chunk_count=chunk_count,
+            job_id=job_id, source_document_id=source.id if source else None,
+        ))
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+    finally:
+        db.close()
+
+
+def forget_document(user_email: str, file_name: str) -> int:
+    """Drops the upload records for a deleted document, so uploading it again ingests it afresh."""
+    db: Session = SessionLocal()
+    try:
+        docs = db.query(models.UploadedDocument).filter(
+            models.UploadedDocument.user_email == user_email,
+            models.UploadedDocument.file_name == file_name,
+        ).all()
+        for doc in docs:
+            db.query(models.UploadedDocument).filter(
+                models.UploadedDocument.source_document_id == doc.id
+            ).update({models.UploadedDocument.source_document_id: None})
+            db.delete(doc)
+        db.commit()
+        return len(docs)
+    finally:
+        db.close()
+
+
+def embedding_stats(user_email: str) -> Dict[str, int]:
+    """Embedding work for this user's uploads, and how much of it the caches saved."""
+    db: Session = SessionLocal()
+    try:
+        jobs = db.query(models.IngestionJob).filter(models.IngestionJob.user_email == user_email).all()
+        docs = db.query(models.UploadedDocument).filter(models.UploadedDocument.user_email == user_email).all()
+        chunks_cached = sum(j.chunks_cached or 0 for j in jobs)
+        chunks_embedded = sum(j.chunks_embedded or 0 for j in jobs)
+        duplicate_uploads = sum(d.duplicate_uploads or 0 for d in docs)
+        chunks_deduplicated = sum((d.duplicate_uploads or 0) * (d.chunk_count or 0) for d in docs)
+        return {
+            "documents": len(docs),
+            "chunks_processed": chunks_embedded,
+            "chunks_from_cache": chunks_cached,
+            "duplicate_uploads": duplicate_uploads,
+            "embedding_calls_saved": chunks_cached + chunks_deduplicated,
+        }
+    finally:
+        db.close()
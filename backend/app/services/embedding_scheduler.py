@@ -0,0 +1,188 @@
+# In backend/app/services/embedding_scheduler.py
+import os
+import re
+import time
+import random
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+# batchEmbedContents accepts at most 100 texts and ~20k tokens per call
+EMBED_BATCH_SIZE = 100
+EMBED_BATCH_MAX_TOKENS = 20000
+
+# Embedding API quotas; both are enforced with token buckets shared by every job in the process
+EMBED_REQUESTS_PER_MINUTE = int(os.getenv("EMBED_REQUESTS_PER_MINUTE", "1500"))
+EMBED_TOKENS_PER_MINUTE = int(os.getenv("EMBED_TOKENS_PER_MINUTE", "1000000"))
+
+# Embedding calls in flight at once
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+
+# 429s are retried after Retry-After, or 2s, 4s, 8s... (with jitter)
+EMBED_RATE_LIMIT_RETRIES = 5
+EMBED_BACKOFF_BASE = 2.0
+
+
+def estimate_tokens(text: str) -> int:
+    # Close enough for quota accounting; counting exactly would cost an API call
+    return len(text) // 4 + 1
+
+
+def split_batches(texts: List[str], batch_size: int = EMBED_BATCH_SIZE,
+                  max_tokens: int = EMBED_BATCH_MAX_TOKENS) -> List[List[str]]:
+    """Provider-sized batches in order; a single oversized text still gets its own batch."""
+    batches: List[List[str]] = []
+    current: List[str] = []
+    current_tokens = 0
+    for text in texts:
+        tokens = estimate_tokens(text)
+        if current and (len(current) >= batch_size or current_tokens + tokens > max_tokens):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(text)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+# 429 or RESOURCE_EXHAUSTED as a status of its own, not inside an id, size or version ("req 14290", "v1.429")
+_RATE_LIMIT_STATUS = re.compile(r"(?<![\w.])(?:429|RESOURCE_EXHAUSTED)(?!\w|\.\d)")
+
+
+def is_rate_limited(exc: BaseException) -> bool:
+    """True for quota errors from google-api-core, httpx, or messages with a 429 / RESOURCE_EXHAUSTED status."""
+    for attr in ("code", "status_code"):
+        if getattr(exc, attr, None) == 429:
+            return True
+    response = getattr(exc, "response", None)
+    if getattr(response, "status_code", None) == 429:
+        return True
+    message = str(exc)
+    return bool(_RATE_LIMIT_STATUS.search(message)) or "rate limit" in message.lower()
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """The server's Retry-After in seconds, when the error carries one."""
+    value = getattr(exc, "retry_after", None)
+    if value is None:
+        headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+        value = headers.get("retry-after") or headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+# ============================================================
+# TOKEN BUCKET
+# ============================================================
+
+class TokenBucket:
+    """
+    Refills `rate_per_minute` tokens a minute up to `capacity`. Callers reserve
+    tokens up front and sleep off any debt, so waiting callers are served in
+    arrival order and a cost larger than the capacity still goes through.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else max(1.0, self.rate)
+        self.clock = clock
+        self.tokens = self.capacity
+        self._updated = clock()
+        self._paused_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, cost: float = 1.0) -> float:
+        """Takes `cost` tokens and returns how long the caller must wait before using them."""
+        now = self.clock()
+        self._refill(now)
+        self.tokens -= cost
+        wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(wait, self._paused_until - now)
+
+    async def acquire(self, cost: float = 1.0) -> None:
+        wait = self.reserve(cost)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """After a 429, hold every caller back for `seconds` and start refilling from empty."""
+        now = self.clock()
+        self._refill(now)
+        self.tokens = min(self.tokens, 0.0)
+        self._paused_until = max(self._paused_until, now + seconds)
+
+
+# ============================================================
+# SCHEDULER
+# ============================================================
+
+class EmbeddingScheduler:
+    """
+    Splits texts into provider-sized batches and embeds them concurrently,
+    within the request and token quotas. A 429 pauses every caller (the quota
+    is shared) and the batch is retried with backoff.
+    """
+
+    def __init__(self, requests_per_minute: int = EMBED_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: int = EMBED_TOKENS_PER_MINUTE, concurrency: int = EMBED_CONCURRENCY,
+                 batch_size: int = EMBED_BATCH_SIZE, batch_max_tokens: int = EMBED_BATCH_MAX_TOKENS,
+                 max_retries: int = EMBED_RATE_LIMIT_RETRIES, backoff_base: float = EMBED_BACKOFF_BASE):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.batch_max_tokens = batch_max_tokens
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        # Semaphores can't be shared across event loops
+        self._limit: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = None
+        self.stats = {"calls": 0, "texts": 0, "rate_limited": 0}
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._limit is None or self._limit[0] is not loop:
+            self._limit = (loop, asyncio.Semaphore(self.concurrency))
+        return self._limit[1]
+
+    async def _call(self, embed_documents: Callable[[List[str]], List[List[float]]], batch: List[str]):
+        cost = sum(estimate_tokens(t) for t in batch)
+        for attempt in range(self.max_retries + 1):
+            async with self._semaphore():
+                await self.requests.acquire(1)
+                await self.tokens.acquire(cost)
+                try:
+                    embeddings = await asyncio.to_thread(embed_documents, batch)
+                except Exception as e:
+                    if not is_rate_limited(e) or attempt == self.max_retries:
+                        raise
+                    self.stats["rate_limited"] += 1
+                    delay = retry_after(e) or self.backoff_base * (2 ** attempt) * random.uniform(0.5, 1.0)
+                    print(f"[Embeddings] Rate limited; backing off {delay:.1f}s (attempt {attempt + 1})")
+                    self.requests.pause(delay)
+                    continue
+            self.stats["calls"] += 1
+            self.stats["texts"] += len(batch)
+            return embeddings
+
+    async def embed(self, embed_documents: Callable[[List[str]], List[List[float]]],
+                    texts: List[str]) -> List[List[float]]:
+        """Embeds `texts` with the blocking `embed_documents`, returning vectors in input order."""
+        batches = split_batches(texts, self.batch_size, self.batch_max_tokens)
+        results = await asyncio.gather(*(self._call(embed_documents, b) for b in batches))
+        return [vector for result in results for vector in result]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return dict(self.stats, concurrency=self.concurrency)
+
+
+embedding_scheduler = EmbeddingScheduler()
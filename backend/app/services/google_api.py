@@ -0,0 +1,121 @@
+# In backend/app/services/google_api.py
+import os
+import asyncio
+import threading
+import weakref
+from contextlib import asynccontextmanager, nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+# googleapiclient is synchronous; its calls run on this many dedicated threads
+GOOGLE_API_WORKERS = int(os.getenv("GOOGLE_API_WORKERS", "16"))
+
+# One user's burst of calls can't take every worker
+GOOGLE_API_PER_USER = int(os.getenv("GOOGLE_API_PER_USER", "4"))
+
+# Google accepts up to 100 calls per batch, but Gmail rate-limits batches above 50
+GOOGLE_BATCH_LIMIT = 50
+
+
+# ============================================================
+# ADAPTER
+# ============================================================
+
+class GoogleApiRunner:
+    """
+    Runs blocking googleapiclient calls on a bounded thread pool so coroutines
+    can await them without stalling the event loop (and every other SSE stream).
+    """
+
+    def __init__(self, max_workers: int = GOOGLE_API_WORKERS, per_user: int = GOOGLE_API_PER_USER):
+        self.max_workers = max_workers
+        self.per_user = per_user
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        # user -> [loop, semaphore, calls holding or awaiting it]; semaphores can't be shared across
+        # event loops, and an entry is dropped once its last call is done
+        self._limits: Dict[str, List[Any]] = {}
+        # httplib2 client -> (loop, lock); a client is not safe to use from two threads at once
+        self._clients: "weakref.WeakKeyDictionary[Any, Tuple[asyncio.AbstractEventLoop, asyncio.Lock]]" = (
+            weakref.WeakKeyDictionary())
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="google-api")
+            return self._executor
+
+    @asynccontextmanager
+    async def _limit(self, user: Optional[str]):
+        loop = asyncio.get_running_loop()
+        key = user or ""
+        entry = self._limits.get(key)
+        if entry is None or entry[0] is not loop:
+            entry = [loop, asyncio.Semaphore(self.per_user), 0]
+            self._limits[key] = entry
+        entry[2] += 1
+        try:
+            async with entry[1]:
+                yield
+        finally:
+            entry[2] -= 1
+            if entry[2] == 0 and self._limits.get(key) is entry:
+                del self._limits[key]
+
+    def _one_at_a_time(self, client: Any) -> Any:
+        http = getattr(client, "http", None) or getattr(client, "_http", None)  # a request's, or a service's
+        if http is None:
+            return nullcontext()
+        loop = asyncio.get_running_loop()
+        entry = self._clients.get(http)
+        if entry is None or entry[0] is not loop:
+            entry = (loop, asyncio.Lock())
+            self._clients[http] = entry
+        return entry[1]
+
+    async def run(self, fn: Callable[..., Any], *args: Any, user: Optional[str] = None, service: Any = None) -> Any:
+        """
+        Awaits fn(*args) on the Google API pool, at most `per_user` at a time
+        for this user. Pass the `service` (or request) fn uses: calls sharing
+        its httplib2 client run one at a time.
+        """
+        async with self._one_at_a_time(service), self._limit(user):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), lambda: fn(*args))
+
+    async def execute(self, request: Any, user: Optional[str] = None) -> Any:
+        """Awaits a googleapiclient HttpRequest (or batch), e.g. `await google_api.execute(service.events().list(...))`."""
+        return await self.run(request.execute, user=user, service=request)
+
+    def shutdown(self) -> None:
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+
+google_api = GoogleApiRunner()
+
+
+def batch_execute(service: Any, requests: List[Any], limit: int = GOOGLE_BATCH_LIMIT) -> List[Tuple[Any, Optional[Exception]]]:
+    """
+    Sends requests as Google batch calls (one HTTP round-trip per `limit` requests)
+    and returns (response, exception) pairs in request order. Blocking; await it via
+    `google_api.run(batch_execute, service, requests, service=service)`. Unlike executing requests from
+    several threads at once, this never shares the service's httplib2 client concurrently.
+    """
+    results: List[Tuple[Any, Optional[Exception]]] = [(None, None)] * len(requests)
+
+    def on_response(request_id, response, exception):
+        results[int(request_id)] = (response, exception)
+
+    for offset in range(0, len(requests), limit):
+        batch = service.new_batch_http_request(callback=on_response)
+        for index in range(offset, min(offset + limit, len(requests))):
+            batch.add(requests[index], request_id=str(index))
+        batch.execute()
+    return results
@@ -0,0 +1,298 @@
+# In backend/app/services/http_cache.py
+import os
+import re
+import json
+import time
+import asyncio
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, asdict, field
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+HTTP_CACHE_DIR = os.getenv("HTTP_CACHE_DIR", os.path.join(tempfile.gettempdir(), "campus-companion-http-cache"))
+HTTP_CACHE_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_MB", "100")) * 1024 * 1024
+
+# Without max-age/Expires, a page is considered fresh for 10% of its age
+# (per its Last-Modified header), but never longer than this.
+HEURISTIC_FRESHNESS_CAP = 24 * 3600
+
+USER_AGENT = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
+    'AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/91.0.4472.124 Safari/537.36'
+)
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    status_code: int
+    content_type: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    stored_at: float
+    fresh_until: float
+    content_hash: str
+    size: int
+    # False when the reader stopped early; body then holds only the first `size` bytes and is never cached
+    complete: bool = True
+    body: bytes = field(default=b"", repr=False)
+    # How the last fetch was served: "miss", "hit" or "revalidated"
+    cache_status: str = "miss"
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.time() < self.fresh_until
+
+    @property
+    def text(self) -> str:
+        match = re.search(r"charset=([\w-]+)", self.content_type or "", re.IGNORECASE)
+        try:
+            return self.body.decode(match.group(1) if match else "utf-8", errors="replace")
+        except LookupError:
+            return self.body.decode("utf-8", errors="replace")
+
+
+def freshness_lifetime(headers: httpx.Headers, now: float) -> Optional[float]:
+    """Seconds the response may be served without revalidation; None if it must not be stored."""
+    cache_control = headers.get("Cache-Control", "").lower()
+    directives = dict(
+        (part.split("=", 1) + [""])[:2] for part in (p.strip() for p in cache_control.split(",")) if part
+    )
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0.0
+    for name in ("s-maxage", "max-age"):
+        if directives.get(name, "").isdigit():
+            return float(directives[name])
+    if "Expires" in headers:
+        try:
+            return max(0.0, parsedate_to_datetime(headers["Expires"]).timestamp() - now)
+        except (TypeError, ValueError):
+            return 0.0
+    if "Last-Modified" in headers:
+        try:
+            age = now - parsedate_to_datetime(headers["Last-Modified"]).timestamp()
+            return min(max(0.0, age * 0.1), HEURISTIC_FRESHNESS_CAP)
+        except (TypeError, ValueError):
+            pass
+    return 0.0
+
+
+# ============================================================
+# DISK STORE
+# ============================================================
+
+class HttpCache:
+    """
+    On-disk response cache: one `<key>.json` metadata file and one `<key>.body`
+    per URL, evicted least-recently-used once the bodies exceed max_bytes.
+    """
+
+    def __init__(self, directory: str = HTTP_CACHE_DIR, max_bytes: int = HTTP_CACHE_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, int]" = OrderedDict()  # key -> body size, oldest first
+        self._loaded = False
+
+    @staticmethod
+    def key(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _load_index(self):
+        if self._loaded:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entries = []
+        for meta in self.directory.glob("*.json"):
+            body = meta.with_suffix(".body")
+            if body.exists():
+                entries.append((meta.stat().st_mtime, meta.stem, body.stat().st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+        self._loaded = True
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            self._load_index()
+            return sum(self._index.values())
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        key = self.key(url)
+        with self._lock:
+            self._load_index()
+            if key not in self._index:
+                return None
+            meta_path = self.directory / f"{key}.json"
+            try:
+                meta = json.loads(meta_path.read_text())
+                body = (self.directory / f"{key}.body").read_bytes()
+            except (OSError, ValueError):
+                self._remove(key)
+                return None
+            # A truncated body (stored before partial reads were skipped) must not be served or revalidated
+            if not meta.get("complete", True):
+                self._remove(key)
+                return None
+            self._index.move_to_end(key)
+            os.utime(meta_path)
+        return CachedResponse(body=body, **meta)
+
+    def put(self, entry: CachedResponse) -> None:
+        if entry.size > self.max_bytes:
+            return
+        key = self.key(entry.url)
+        meta = asdict(entry)
+        meta.pop("body")
+        meta.pop("cache_status")
+        with self._lock:
+            self._load_index()
+            body_path = self.directory / f"{key}.body"
+            # Write then rename so a crash never leaves a half-written body behind
+            tmp_path = body_path.with_suffix(".tmp")
+            tmp_path.write_bytes(entry.body)
+            os.replace(tmp_path, body_path)
+            (self.directory / f"{key}.json").write_text(json.dumps(meta))
+            self._index[key] = entry.size
+            self._index.move_to_end(key)
+            self._evict()
+
+    def touch(self, entry: CachedResponse) -> None:
+        """Persists new freshness/validators after a 304 without rewriting the body."""
+        key = self.key(entry.url)
+        meta = asdict(entry)
+        meta.pop("body")
+        meta.pop("cache_status")
+        with self._lock:
+            self._load_index()
+            if key in self._index:
+                (self.directory / f"{key}.json").write_text(json.dumps(meta))
+                self._index.move_to_end(key)
+
+    def _evict(self):
+        total = sum(self._index.values())
+        while total > self.max_bytes and self._index:
+            key, size = self._index.popitem(last=False)
+            self._remove(key)
+            total -= size
+
+    def _remove(self, key: str):
+        self._index.pop(key, None)
+        for suffix in (".json", ".body"):
+            try:
+                (self.directory / f"{key}{suffix}").unlink()
+            except FileNotFoundError:
+                pass
+
+
+# ============================================================
+# FETCHER
+# ============================================================
+
+class CachedFetcher:
+    """
+    Async GET through a pooled httpx client and the disk cache: fresh entries
+    are served without a request, stale ones are revalidated with
+    If-None-Match / If-Modified-Since and reused on 304.
+    """
+
+    def __init__(self, cache: HttpCache = None, transport: httpx.AsyncBaseTransport = None, timeout: float = 30.0):
+        self.cache = cache or HttpCache()
+        self.timeout = timeout
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # A client's pool belongs to the loop it was created on
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(
+                transport=self._transport,
+                headers={"User-Agent": USER_AGENT},
+                follow_redirects=True,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            )
+            self._client_loop = loop
+        return self._client
+
+    def _conditional_headers(self, cached: Optional[CachedResponse]) -> Dict[str, str]:
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+        return headers
+
+    async def fetch(self, url: str, consumer: Any = None) -> CachedResponse:
+        """
+        Raises httpx.HTTPStatusError for 4xx/5xx, like response.raise_for_status().
+        A `consumer` (anything with feed(chunk) -> bool) sees the body as it
+        downloads; once feed() returns True the rest of the body is never read.
+        Its `encoding` attribute is set from the Content-Type charset, if any.
+        """
+        cached = await asyncio.to_thread(self.cache.get, url)
+        if cached is not None and cached.is_fresh:
+            cached.cache_status = "hit"
+            return cached
+
+        async with self._get_client().stream("GET", url, headers=self._conditional_headers(cached)) as response:
+            now = time.time()
+            if response.status_code == 304 and cached is not None:
+                lifetime = freshness_lifetime(response.headers, now)
+                cached.fresh_until = now + (lifetime or 0.0)
+                cached.etag = response.headers.get("ETag", cached.etag)
+                cached.last_modified = response.headers.get("Last-Modified", cached.last_modified)
+                cached.cache_status = "revalidated"
+                await asyncio.to_thread(self.cache.touch, cached)
+                return cached
+
+            response.raise_for_status()
+            if consumer is not None and response.charset_encoding:
+                consumer.encoding = response.charset_encoding
+
+            chunks: List[bytes] = []
+            complete = True
+            async for chunk in response.aiter_bytes():
+                chunks.append(chunk)
+                if consumer is not None and consumer.feed(chunk):
+                    complete = False
+                    break
+
+        body = b"".join(chunks)
+        lifetime = freshness_lifetime(response.headers, now)
+        entry = CachedResponse(
+            url=url,
+            status_code=response.status_code,
+            content_type=response.headers.get("Content-Type", ""),
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            stored_at=now,
+            fresh_until=now + (lifetime or 0.0),
+            content_hash=hashlib.sha256(body).hexdigest(),
+            size=len(body),
+            complete=complete,
+            body=body,
+        )
+        # A body cut short by the consumer would be served as the whole page on a later hit or 304
+        if lifetime is not None and complete:
+            await asyncio.to_thread(self.cache.put, entry)
+        return entry
+
+
+http_fetcher = CachedFetcher()
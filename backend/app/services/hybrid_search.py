@@ -0,0 +1,150 @@
+# In backend/app/services/hybrid_search.py
+import os
+import re
+import math
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+# "hybrid" (BM25 + vectors) or "vector"
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+
+# Candidates each retriever contributes before fusion
+FUSION_CANDIDATES = 20
+RRF_K = 60
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Cross-encoder re-ranking of the fused candidates; off unless RERANKER_MODEL is set
+RERANKER_MODEL = os.getenv("RERANKER_MODEL")  # e.g. cross-encoder/ms-marco-MiniLM-L-6-v2
+RERANK_CANDIDATES = 12
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:[-/.:][a-z0-9]+)*")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how i in is it of on or the this to was what when where "
+    "which who will with my me do does there their".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased terms. Compound tokens such as course codes, dates and rooms
+    ("CS-301", "14/11/2025", "LT-3") are indexed whole, joined ("cs301") and
+    by part, so "CS301" and "cs 301" still match "CS-301".
+    """
+    terms = []
+    for match in _TOKEN.finditer(text.lower()):
+        token = match.group()
+        parts = re.split(r"[-/.:]", token)
+        if len(parts) > 1:
+            terms.append(token)
+            terms.append("".join(parts))
+            terms.extend(parts)
+        elif token not in _STOPWORDS:
+            terms.append(token)
+    return terms
+
+
+# ============================================================
+# BM25
+# ============================================================
+
+class BM25Index:
+    """Inverted index over integer document ids; documents are added incrementally."""
+
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.doc_lengths: Dict[int, int] = {}
+        self.total_length = 0
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def add(self, doc_id: int, text: str) -> None:
+        counts = Counter(tokenize(text))
+        with self.lock:
+            for term, tf in counts.items():
+                self.postings.setdefault(term, {})[doc_id] = tf
+            length = sum(counts.values())
+            self.doc_lengths[doc_id] = length
+            self.total_length += length
+
+    def search(self, query: str, k: int, allowed: Optional[Set[int]] = None) -> List[Tuple[int, float]]:
+        """Top-k (doc_id, score), optionally only among `allowed` ids."""
+        with self.lock:
+            count = len(self.doc_lengths)
+            if not count:
+                return []
+            average = self.total_length / count
+            scores: Dict[int, float] = {}
+            for term in set(tokenize(query)):
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    if allowed is not None and doc_id not in allowed:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / average)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: -item[1])[:k]
+
+
+def reciprocal_rank_fusion(rankings: Iterable[List[int]], k: int = RRF_K) -> List[Tuple[int, float]]:
+    """Fuses ranked id lists: each id scores sum(1 / (k + rank)) over the lists it appears in."""
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: -item[1])
+
+
+# ============================================================
+# RE-RANKING
+# ============================================================
+
+class CrossEncoderReranker:
+    """
+    Scores (question, passage) pairs with a small local cross-encoder. The
+    model loads on first use; if sentence-transformers or the model is
+    unavailable, passages keep their fused order.
+    """
+
+    def __init__(self, model_name: Optional[str] = RERANKER_MODEL):
+        self.model_name = model_name
+        self._model: Any = None
+        self._failed = False
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.model_name) and not self._failed
+
+    def _load(self) -> Any:
+        with self._lock:
+            if self._model is None and not self._failed:
+                try:
+                    from sentence_transformers import CrossEncoder  # pulls in torch; only when enabled
+                    self._model = CrossEncoder(self.model_name)
+                    print(f"[Retrieval] Loaded re-ranker {self.model_name}")
+                except Exception as e:
+                    self._failed = True
+                    print(f"[Retrieval] ⚠️ Re-ranker {self.model_name} unavailable, using fused order: {e}")
+            return self._model
+
+    def rerank(self, query: str, passages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Blocking; call from a worker thread."""
+        model = self._load() if self.enabled else None
+        if model is None or len(passages) < 2:
+            return passages
+        scores = model.predict([(query, p["content"]) for p in passages])
+        ranked = sorted(zip(scores, range(len(passages))), key=lambda item: -item[0])
+        return [dict(passages[i], rerank_score=float(score)) for score, i in ranked]
@@ -0,0 +1,247 @@
+# In backend/app/services/ingestion.py
+import os
+import time
+import asyncio
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+from app.services.chunking import EmptyDocumentError, iter_page_texts, iter_structured_chunks
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+# Bytes read from an UploadFile at a time while it is copied to disk
+UPLOAD_READ_CHUNK = 1024 * 1024
+
+# Chunks are embedded with this model; queries must use the same one
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "models/embedding-001")
+# The name GoogleGenerativeAIEmbeddings reports for it; stored in each chunk's metadata
+EMBEDDING_MODEL_NAME = EMBEDDING_MODEL if EMBEDDING_MODEL.startswith("models/") else f"models/{EMBEDDING_MODEL}"
+# Its vector size; older chunks without a model in their metadata are matched by it
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "768"))
+
+# "structural" (headings, lists, tables and pages) or "recursive" (fixed 1000-char windows, 200 overlap)
+CHUNKER = os.getenv("CHUNKER", "structural")
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
+# Chunks per embedding call / Supabase insert
+BATCH_SIZE = 50
+
+# Embedded batches waiting for insertion; bounds memory to roughly
+# (MAX_PENDING_BATCHES + 2) * BATCH_SIZE chunks whatever the PDF size.
+MAX_PENDING_BATCHES = 2
+
+# A failing embedding batch is retried this many times (1s, 2s, 4s...) before the job fails
+EMBED_RETRIES = 3
+EMBED_RETRY_DELAY = 1.0
+
+# pypdf text extraction is CPU-bound; it runs here, never on the event loop
+_parse_pool = ThreadPoolExecutor(max_workers=int(os.getenv("PDF_PARSE_WORKERS", "2")), thread_name_prefix="pdf-parse")
+
+
+@dataclass
+class IngestionProgress:
+    stage: str = "parsing"  # parsing, embedding, storing
+    total_pages: Optional[int] = None
+    pages_parsed: int = 0
+    chunks_embedded: int = 0
+    chunks_stored: int = 0
+    total_chunks: Optional[int] = None  # known once parsing has finished
+    batches_stored: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+# ============================================================
+# PARSING
+# ============================================================
+
+def iter_chunks(fileobj: Any, file_name: str, splitter: Optional[Any] = None,
+                progress: Optional[IngestionProgress] = None, chunker: str = CHUNKER) -> Iterator[Dict[str, Any]]:
+    """
+    Yields {"content", "metadata"} chunks page by page; only a few pages' text
+    is held at a time. Passing a LangChain text splitter selects the
+    recursive chunker.
+    """
+    if splitter is None and chunker == "structural":
+        yield from iter_structured_chunks(fileobj, file_name, progress)
+        return
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    splitter = splitter or RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    for page_number, text in enumerate(iter_page_texts(fileobj, progress, layout=False)):
+        for content in splitter.split_text(text):
+            yield {"content": content, "metadata": {"source": file_name, "page": page_number}}
+
+
+def _next_batch(chunks: Iterator[Dict[str, Any]], size: int) -> List[Dict[str, Any]]:
+    batch = []
+    for chunk in chunks:
+        batch.append(chunk)
+        if len(batch) >= size:
+            break
+    return batch
+
+
+# ============================================================
+# PIPELINE
+# ============================================================
+
+async def _embed_with_retry(embed: Callable, contents: List[str], retries: int, delay: float):
+    for attempt in range(retries + 1):
+        try:
+            return await embed(contents)
+        except Exception as e:
+            if attempt == retries:
+                raise
+            wait = delay * (2 ** attempt)
+            print(f"[Ingestion] Embedding attempt {attempt + 1} failed ({e}); retrying in {wait:.0f}s")
+            await asyncio.sleep(wait)
+
+
+async def ingest_pdf(
+    fileobj: Any,
+    file_name: str,
+    user_email: str,
+    embed_documents: Callable[[List[str]], List[List[float]]],
+    insert_rows: Callable[[List[Dict[str, Any]]], Any],
+    batch_size: int = BATCH_SIZE,
+    progress: Optional[IngestionProgress] = None,
+    on_progress: Optional[Callable[[IngestionProgress], Any]] = None,
+    embed_retries: int = EMBED_RETRIES,
+    retry_delay: float = EMBED_RETRY_DELAY,
+    scheduler: Optional[Any] = None,
+) -> int:
+    """
+    Parses, embeds and stores a PDF as a pipeline: while batch N is being
+    inserted into Supabase, batch N+1 is already being parsed and embedded.
+
+    Batches before `progress.batches_stored` are skipped without embedding or
+    inserting, so a failed run resumes where it stopped. `on_progress` is
+    called (and awaited, if it is a coroutine function) after every stage
+    change and stored batch. Returns the number of
+    chunks stored by this call.
+
+    With an EmbeddingScheduler, up to `scheduler.concurrency` batches are
+    embedded ahead of the insert at once, within the embedding quotas;
+    otherwise one batch is embedded at a time.
+    """
+    loop = asyncio.get_running_loop()
+    lookahead = scheduler.concurrency if scheduler is not None else 0
+    queue: asyncio.Queue = asyncio.Queue(maxsize=MAX_PENDING_BATCHES + lookahead)
+    progress = progress or IngestionProgress()
+    resume_from = progress.batches_stored
+    started = time.perf_counter()
+    stored = 0
+
+    async def report(stage: Optional[str] = None):
+        if stage:
+            progress.stage = stage
+        if on_progress is not None:
+            result = on_progress(progress)
+            if inspect.isawaitable(result):
+                await result
+
+    async def embed(contents: List[str]) -> List[List[float]]:
+        if scheduler is None:
+            return await asyncio.to_thread(embed_documents, contents)
+        # A CachedEmbedder only sends its cache misses through the scheduler
+        embed_with = getattr(embed_documents, "embed_with", None)
+        if embed_with is not None:
+            return await embed_with(scheduler, contents)
+        return await scheduler.embed(embed_documents, contents)
+
+    async def embed_batch(batch_index: int, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        contents = [c["content"] for c in batch]
+        embeddings = await _embed_with_retry(embed, contents, embed_retries, retry_delay)
+        rows = [
+            {
+                "user_id": user_email,
+                "file_name": file_name,
+                "content": chunk["content"],
+                "embedding": embedding,
+                "metadata": chunk["metadata"],
+            }
+            for chunk, embedding in zip(batch, embeddings)
+        ]
+        progress.chunks_embedded += len(rows)
+        print(f"[Ingestion] Embedded batch {batch_index + 1} ({len(rows)} chunks) of {file_name}")
+        return rows
+
+    async def produce():
+        chunks = iter_chunks(fileobj, file_name, progress=progress)
+        batch_index = 0
+        total_chunks = 0
+        try:
+            while True:
+                batch = await loop.run_in_executor(_parse_pool, _next_batch, chunks, batch_size)
+                if not batch:
+                    break
+                total_chunks += len(batch)
+                if batch_index < resume_from:
+                    batch_index += 1
+                    continue
+                if progress.stage == "parsing":
+                    await report("embedding")
+
+                task = asyncio.create_task(embed_batch(batch_index, batch))
+                try:
+                    if scheduler is None:
+                        await task
+                    # Queued in order; with a scheduler the embedding is still running
+                    await queue.put((batch_index, task))
+                except asyncio.CancelledError:
+                    task.cancel()
+                    raise
+                batch_index += 1
+            progress.total_chunks = total_chunks
+            await report("storing")
+        finally:
+            await queue.put(None)
+
+    async def consume():
+        nonlocal stored
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            batch_index, task = item
+            rows = await task
+            await asyncio.to_thread(insert_rows, rows)
+            stored += len(rows)
+            progress.chunks_stored += len(rows)
+            progress.batches_stored = batch_index + 1
+            await report()
+
+    await report()
+    producer = asyncio.create_task(produce())
+    consumer = asyncio.create_task(consume())
+    try:
+        await asyncio.wait({producer, consumer}, return_when=asyncio.FIRST_EXCEPTION)
+        if consumer.done() and consumer.exception() is not None:
+            producer.cancel()
+            raise consumer.exception()
+        # If parsing/embedding failed, batches already embedded are still stored
+        # before the error surfaces, so a resume has less to redo.
+        await consumer
+        await producer
+    finally:
+        for task in (producer, consumer):
+            task.cancel()
+        # Embeddings queued behind a failure are abandoned
+        while not queue.empty():
+            item = queue.get_nowait()
+            if item is None:
+                continue
+            task = item[1]
+            if task.done() and not task.cancelled():
+                task.exception()  # retrieved, so it isn't logged as unhandled
+            task.cancel()
+
+    print(f"[Ingestion] Stored {stored} chunks of {file_name} for {user_email} in {time.perf_counter() - started:.2f}s")
+    return stored
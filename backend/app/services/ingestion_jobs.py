@@ -0,0 +1,359 @@
+# In backend/app/services/ingestion_jobs.py
+import os
+import json
+import time
+import uuid
+import asyncio
+import hashlib
+import tempfile
+from datetime import timezone
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import SessionLocal
+from app.services.ingestion import IngestionProgress, ingest_pdf, UPLOAD_READ_CHUNK
+from app.services.embedding_cache import CachedEmbedder, find_document, record_document
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+# Uploads are kept here (as <job_id>.pdf) until their job is done, so failed jobs can resume
+INGESTION_DIR = os.getenv("INGESTION_DIR", os.path.join(tempfile.gettempdir(), "campus-companion-ingestion"))
+
+# Uploads of failed jobs can be retried for this long, then sweep_uploads() removes them
+UPLOAD_TTL_HOURS = float(os.getenv("INGESTION_UPLOAD_TTL_HOURS", "24"))
+
+# Jobs beyond this wait in "queued"
+MAX_CONCURRENT_JOBS = int(os.getenv("INGESTION_MAX_CONCURRENT_JOBS", "2"))
+
+TERMINAL_STATUSES = ("done", "failed")
+
+# SSE keep-alive: a snapshot is re-sent at least this often even without progress
+EVENTS_HEARTBEAT = 15.0
+
+
+def job_to_dict(job: models.IngestionJob) -> Dict[str, Any]:
+    return {
+        "job_id": job.job_id,
+        "user_email": job.user_email,
+        "file_name": job.file_name,
+        "file_hash": job.file_hash,
+        "status": job.status,
+        "total_pages": job.total_pages,
+        "pages_parsed": job.pages_parsed,
+        "chunks_embedded": job.chunks_embedded,
+        "chunks_stored": job.chunks_stored,
+        "total_chunks": job.total_chunks,
+        "batches_stored": job.batches_stored,
+        "chunks_cached": job.chunks_cached,
+        "attempts": job.attempts,
+        "error": job.error,
+    }
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class JobNotRetryableError(Exception):
+    pass
+
+
+# ============================================================
+# RUNNER
+# ============================================================
+
+class IngestionJobRunner:
+    """
+    Runs PDF ingestion in background tasks. Job state lives in the
+    ingestion_jobs table; in-process listeners (SSE streams) are pushed
+    every update as it is saved.
+
+    With an `embedding_model`, chunk embeddings go through the shared
+    embedding cache and a user's re-upload of a file they already ingested
+    is answered from the earlier job.
+    """
+
+    def __init__(self, embed_documents: Callable, insert_rows: Callable, directory: str = INGESTION_DIR,
+                 max_concurrent: int = MAX_CONCURRENT_JOBS, embedding_model: Optional[str] = None,
+                 **ingest_options: Any):
+        self.embed_documents = embed_documents
+        self.embedding_model = embedding_model
+        self.insert_rows = insert_rows
+        self.directory = directory
+        self.max_concurrent = max_concurrent
+        self.ingest_options = ingest_options
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._listeners: Dict[str, Set[asyncio.Queue]] = {}
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.pdf")
+
+    # --- persistence ---
+
+    def _load(self, job_id: str, user_email: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        db: Session = SessionLocal()
+        try:
+            query = db.query(models.IngestionJob).filter(models.IngestionJob.job_id == job_id)
+            if user_email is not None:
+                query = query.filter(models.IngestionJob.user_email == user_email)
+            job = query.first()
+            return job_to_dict(job) if job else None
+        finally:
+            db.close()
+
+    def _create(self, job_id: str, user_email: str, file_name: str, file_hash: str) -> Dict[str, Any]:
+        db: Session = SessionLocal()
+        try:
+            job = models.IngestionJob(
+                job_id=job_id, user_email=user_email, file_name=file_name, status="queued", file_hash=file_hash,
+            )
+            db.add(job)
+            db.commit()
+            return job_to_dict(job)
+        finally:
+            db.close()
+
+    def _store(self, job_id: str, **fields: Any) -> Optional[Dict[str, Any]]:
+        db: Session = SessionLocal()
+        try:
+            job = db.query(models.IngestionJob).filter(models.IngestionJob.job_id == job_id).first()
+            if job is None:
+                return None
+            for name, value in fields.items():
+                setattr(job, name, value)
+            db.commit()
+            return job_to_dict(job)
+        finally:
+            db.close()
+
+    async def _save(self, job_id: str, **fields: Any) -> Optional[Dict[str, Any]]:
+        snapshot = await asyncio.to_thread(self._store, job_id, **fields)
+        if snapshot is not None:
+            self._notify(job_id, snapshot)
+        return snapshot
+
+    def _notify(self, job_id: str, snapshot: Dict[str, Any]):
+        for queue in list(self._listeners.get(job_id, ())):
+            queue.put_nowait(snapshot)
+
+    # --- lifecycle ---
+
+    async def submit(self, upload: Any, user_email: str) -> Dict[str, Any]:
+        """
+        Stores the upload under a fresh job id and queues its ingestion. If
+        this user already ingested the same bytes, nothing is queued and the
+        earlier job is returned with `deduplicated` set.
+        """
+        job_id = uuid.uuid4().hex
+        path = self._path(job_id)
+        digest = hashlib.sha256()
+        await asyncio.to_thread(os.makedirs, self.directory, exist_ok=True)
+        out = await asyncio.to_thread(open, path, "wb")
+        try:
+            with out:
+                while True:
+                    chunk = await upload.read(UPLOAD_READ_CHUNK)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    await asyncio.to_thread(out.write, chunk)
+        except BaseException:
+            # A dropped upload leaves no partial file behind (removed inline: this may be a cancellation)
+            _discard(path)
+            raise
+        file_hash = digest.hexdigest()
+
+        if self.embedding_model is not None:
+            existing = await asyncio.to_thread(find_document, user_email, file_hash)
+            if existing is not None:
+                await asyncio.to_thread(_discard, path)
+                snapshot = (existing["job_id"] and await asyncio.to_thread(self._load, existing["job_id"], user_email)) or {
+                    "job_id": existing["job_id"], "user_email": user_email, "status": "done",
+                    "chunks_stored": existing["chunk_count"],
+                }
+                snapshot["file_name"] = existing["file_name"]
+                print(f"[Ingestion] ♻️ {upload.filename} from {user_email} was already ingested as {existing['file_name']}")
+                return {**snapshot, "deduplicated": True}
+
+        try:
+            snapshot = await asyncio.to_thread(self._create, job_id, user_email, upload.filename, file_hash)
+        except BaseException:
+            _discard(path)
+            raise
+
+        self._start(job_id)
+        return {**snapshot, "deduplicated": False}
+
+    async def retry(self, job_id: str, user_email: str) -> Dict[str, Any]:
+        """Requeues a failed job; it resumes after its last stored batch."""
+        job = await asyncio.to_thread(self._load, job_id, user_email)
+        if job is None:
+            raise KeyError(job_id)
+        if job["status"] != "failed":
+            raise JobNotRetryableError(f"Job is {job['status']}; only failed jobs can be retried.")
+        if not await asyncio.to_thread(os.path.exists, self._path(job_id)):
+            raise JobNotRetryableError("The uploaded file is no longer available; please upload it again.")
+        snapshot = await self._save(job_id, status="queued", error=None)
+        self._start(job_id)
+        return snapshot
+
+    def _start(self, job_id: str):
+        task = asyncio.create_task(self._run(job_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, job_id: str):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+        async with self._slots:
+            job = await asyncio.to_thread(self._load, job_id)
+            if job is None:
+                return
+            progress = IngestionProgress(
+                total_pages=job["total_pages"],
+                chunks_embedded=job["chunks_stored"],  # embedded-but-unstored chunks are redone
+                chunks_stored=job["chunks_stored"],
+                batches_stored=job["batches_stored"],
+            )
+            await self._save(job_id, status="parsing", attempts=job["attempts"] + 1)
+
+            embed_documents = self.embed_documents
+            cached_before = job["chunks_cached"] or 0
+            if self.embedding_model is not None:
+                embed_documents = CachedEmbedder(self.embed_documents, self.embedding_model)
+
+            async def on_progress(p: IngestionProgress):
+                values = p.as_dict()
+                values["status"] = values.pop("stage")
+                if isinstance(embed_documents, CachedEmbedder):
+                    values["chunks_cached"] = cached_before + embed_documents.hits
+                await self._save(job_id, **values)
+
+            # The upload stays on failure so the job can be retried, until sweep_uploads() expires it
+            try:
+                fileobj = await asyncio.to_thread(open, self._path(job_id), "rb")
+                with fileobj:
+                    await ingest_pdf(
+                        fileobj, job["file_name"], job["user_email"],
+                        embed_documents, self.insert_rows,
+                        progress=progress, on_progress=on_progress, **self.ingest_options,
+                    )
+            except Exception as e:
+                print(f"[Ingestion] ❌ Job {job_id} failed after {progress.batches_stored} batches: {e}")
+                await self._save(job_id, status="failed", error=str(e))
+                return
+
+            # Recorded before "done" is announced, so a re-upload right after is deduplicated
+            if self.embedding_model is not None and job["file_hash"]:
+                await asyncio.to_thread(record_document, job["user_email"], job["file_hash"], job["file_name"],
+                                        progress.chunks_stored, job_id)
+            await asyncio.to_thread(_discard, self._path(job_id))
+            done = await self._save(job_id, status="done")
+            print(f"[Ingestion] ✅ Job {job_id} done: {progress.chunks_stored} chunks "
+                  f"({done['chunks_cached'] if done else 0} embeddings reused)")
+
+    # --- reading ---
+
+    async def get(self, job_id: str, user_email: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._load, job_id, user_email)
+
+    async def events(self, job_id: str, user_email: str) -> AsyncIterator[Dict[str, Any]]:
+        """Yields the job's state now and after every update, until it is done or failed."""
+        queue: asyncio.Queue = asyncio.Queue()
+        self._listeners.setdefault(job_id, set()).add(queue)
+        try:
+            snapshot = await asyncio.to_thread(self._load, job_id, user_email)
+            while snapshot is not None:
+                yield snapshot
+                if snapshot["status"] in TERMINAL_STATUSES:
+                    return
+                try:
+                    snapshot = await asyncio.wait_for(queue.get(), timeout=EVENTS_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    # Another worker may be running the job; fall back to the table
+                    snapshot = await asyncio.to_thread(self._load, job_id, user_email)
+        finally:
+            listeners = self._listeners.get(job_id)
+            if listeners is not None:
+                listeners.discard(queue)
+                if not listeners:
+                    del self._listeners[job_id]
+
+
+def _discard(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def fail_interrupted_jobs() -> List[str]:
+    """
+    Marks jobs left running by a previous process as failed, so they can be
+    retried. Their uploads are kept until sweep_uploads() expires them.
+    """
+    db: Session = SessionLocal()
+    try:
+        jobs = db.query(models.IngestionJob).filter(
+            models.IngestionJob.status.notin_(TERMINAL_STATUSES)
+        ).all()
+        for job in jobs:
+            job.status = "failed"
+            job.error = "Interrupted by a server restart."
+        db.commit()
+        return [job.job_id for job in jobs]
+    finally:
+        db.close()
+
+
+def sweep_uploads(directory: str = INGESTION_DIR, ttl_hours: float = UPLOAD_TTL_HOURS) -> List[str]:
+    """
+    Removes uploads nobody can use any more: those of jobs done or failed more
+    than `ttl_hours` ago, and files without a job (dropped uploads, jobs
+    deduplicated or deleted) older than that. Files of running jobs stay.
+    Returns the removed file names. Blocking.
+    """
+    try:
+        names = [name for name in os.listdir(directory) if name.endswith(".pdf")]
+    except FileNotFoundError:
+        return []
+    if not names:
+        return []
+
+    db: Session = SessionLocal()
+    try:
+        jobs = {
+            job.job_id: job
+            for job in db.query(models.IngestionJob).filter(
+                models.IngestionJob.job_id.in_([name[:-len(".pdf")] for name in names])
+            )
+        }
+    finally:
+        db.close()
+
+    cutoff = time.time() - ttl_hours * 3600
+    removed = []
+    for name in names:
+        path = os.path.join(directory, name)
+        job = jobs.get(name[:-len(".pdf")])
+        if job is not None and job.status not in TERMINAL_STATUSES:
+            continue
+        try:
+            changed = os.path.getmtime(path)
+        except FileNotFoundError:
+            continue
+        if job is not None and job.updated_at is not None:
+            updated = job.updated_at
+            if updated.tzinfo is None:
+                updated = updated.replace(tzinfo=timezone.utc)  # SQLite returns naive UTC
+            changed = max(changed, updated.timestamp())
+        if changed < cutoff:
+            _discard(path)
+            removed.append(name)
+    if removed:
+        print(f"[Ingestion] 🧹 Removed {len(removed)} expired uploads from {directory}")
+    return removed
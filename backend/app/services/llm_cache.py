@@ -0,0 +1,277 @@
+# In backend/app/services/llm_cache.py
+import os
+import time
+import asyncio
+import hashlib
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.runnables import Runnable, RunnableConfig
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import SessionLocal
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+# Bounds of the llm_cache table; least recently used rows go first
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "20000"))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_MB", "64")) * 2**20
+# Default lifetime of a cached output; chains can choose their own
+LLM_CACHE_TTL = timedelta(hours=int(os.getenv("LLM_CACHE_TTL_HOURS", "168")))
+# Bounds are checked every this many stores rather than on each one
+LLM_CACHE_EVICT_EVERY = 25
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "1") != "0"
+
+
+def cache_key(model: str, template: str, rendered: str) -> str:
+    """One entry per model, template@version and fully rendered prompt."""
+    return hashlib.sha256(f"{model}\x00{template}\x00{rendered}".encode("utf-8")).hexdigest()
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # SQLite hands back naive datetimes even for timezone=True columns
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _model_name(llm: Any) -> str:
+    for attr in ("model", "model_name"):
+        value = getattr(llm, attr, None)
+        if isinstance(value, str):
+            return value
+    try:
+        return str(llm._identifying_params.get("model", type(llm).__name__))
+    except Exception:
+        return type(llm).__name__
+
+
+def _render(prompt: Any) -> str:
+    if hasattr(prompt, "to_string"):
+        return prompt.to_string()
+    if isinstance(prompt, list):
+        return "\n".join(f"{m.type}: {m.content}" if isinstance(m, BaseMessage) else str(m) for m in prompt)
+    return str(prompt)
+
+
+# ============================================================
+# STORE
+# ============================================================
+
+class LLMResultCache:
+    """
+    LLM outputs in the llm_cache table, with a TTL per entry and LRU
+    eviction once the table outgrows its entry or byte bound. Counts hits,
+    misses, expiries and the model time hits saved, per template.
+    """
+
+    def __init__(self, max_entries: int = LLM_CACHE_MAX_ENTRIES, max_bytes: int = LLM_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._stores_since_evict = 0
+        self.stats: Dict[str, Dict[str, float]] = {}
+
+    def _count(self, template: str, field: str, amount: float = 1):
+        with self._lock:
+            counters = self.stats.setdefault(template, {"hits": 0, "misses": 0, "expired": 0, "stored": 0,
+                                                        "evicted": 0, "saved_seconds": 0.0})
+            counters[field] += amount
+
+    def lookup(self, key: str, template: str) -> Optional[str]:
+        db: Session = SessionLocal()
+        try:
+            entry = db.query(models.LLMCacheEntry).filter(models.LLMCacheEntry.cache_key == key).first()
+            now = datetime.now(timezone.utc)
+            if entry is not None and _as_utc(entry.expires_at) <= now:
+                db.delete(entry)
+                db.commit()
+                self._count(template, "expired")
+                entry = None
+            if entry is None:
+                self._count(template, "misses")
+                return None
+            entry.hit_count = (entry.hit_count or 0) + 1
+            entry.last_used_at = now
+            db.commit()
+            self._count(template, "hits")
+            self._count(template, "saved_seconds", (entry.latency_ms or 0) / 1000)
+            return entry.response
+        finally:
+            db.close()
+
+    def store(self, key: str, model: str, template: str, response: str, ttl: timedelta, latency: float,
+              replace: bool = False) -> None:
+        """Keeps the first output stored for a key, unless `replace` is set."""
+        now = datetime.now(timezone.utc)
+        db: Session = SessionLocal()
+        try:
+            if replace:
+                db.query(models.LLMCacheEntry).filter(models.LLMCacheEntry.cache_key == key).delete()
+            db.add(models.LLMCacheEntry(
+                cache_key=key, model=model, template=template, response=response,
+                size_bytes=len(response.encode("utf-8")), latency_ms=int(latency * 1000), hit_count=0,
+                expires_at=now + ttl, last_used_at=now,
+            ))
+            db.commit()
+        except IntegrityError:
+            db.rollback()  # another worker stored the same prompt first
+            return
+        finally:
+            db.close()
+        self._count(template, "stored")
+        with self._lock:
+            self._stores_since_evict += 1
+            due = self._stores_since_evict >= LLM_CACHE_EVICT_EVERY
+            if due:
+                self._stores_since_evict = 0
+        if due:
+            self.evict()
+
+    def evict(self) -> int:
+        """Drops expired rows, then least recently used ones until both bounds hold. Returns rows removed."""
+        db: Session = SessionLocal()
+        try:
+            table = models.LLMCacheEntry
+            removed = db.query(table).filter(table.expires_at <= datetime.now(timezone.utc)).delete()
+            count, size = db.query(func.count(table.id), func.coalesce(func.sum(table.size_bytes), 0)).one()
+            excess_rows = max(0, count - self.max_entries)
+            excess_bytes = max(0, size - self.max_bytes)
+            doomed = []
+            if excess_rows or excess_bytes:
+                for row_id, template, row_bytes in (
+                    db.query(table.id, table.template, table.size_bytes).order_by(table.last_used_at).yield_per(500)
+                ):
+                    if excess_rows <= 0 and excess_bytes <= 0:
+                        break
+                    doomed.append(row_id)
+                    self._count(template, "evicted")
+                    excess_rows -= 1
+                    excess_bytes -= row_bytes
+            for start in range(0, len(doomed), 500):
+                db.query(table).filter(table.id.in_(doomed[start:start + 500])).delete(synchronize_session=False)
+            db.commit()
+            if removed or doomed:
+                print(f"[LLMCache] Evicted {len(doomed)} least recently used and {removed} expired entries")
+            return removed + len(doomed)
+        finally:
+            db.close()
+
+    def snapshot(self) -> Dict[str, Any]:
+        db: Session = SessionLocal()
+        try:
+            table = models.LLMCacheEntry
+            count, size = db.query(func.count(table.id), func.coalesce(func.sum(table.size_bytes), 0)).one()
+        finally:
+            db.close()
+        with self._lock:
+            templates = {name: dict(c) for name, c in self.stats.items()}
+        for counters in templates.values():
+            lookups = counters["hits"] + counters["misses"]
+            counters["hit_rate"] = round(counters["hits"] / lookups, 3) if lookups else None
+            counters["saved_seconds"] = round(counters["saved_seconds"], 2)
+        return {"entries": count, "bytes": size, "max_entries": self.max_entries, "max_bytes": self.max_bytes,
+                "templates": templates}
+
+
+llm_cache = LLMResultCache()
+
+
+# ============================================================
+# CHAIN STEP
+# ============================================================
+
+class CachedLLM(Runnable):
+    """
+    Stands in for the chat model in `prompt | llm` chains. The rendered
+    prompt is looked up first and a hit is returned without touching the
+    model, its queue or the network; a miss calls the model and stores the
+    text if `cacheable` accepts it. Only for deterministic (temperature 0)
+    prompts: bump `version` whenever the prompt or its parsing changes.
+    With `refresh`, the lookup is skipped and the new output replaces the
+    cached one (for forced regeneration).
+    """
+
+    def __init__(self, llm: Any, template: str, version: int, ttl: timedelta = LLM_CACHE_TTL,
+                 cacheable: Callable[[str], bool] = bool, cache: Optional[LLMResultCache] = None,
+                 refresh: bool = False):
+        self.llm = llm
+        self.refresh = refresh
+        self.template = f"{template}@{version}"
+        self.ttl = ttl
+        self.cacheable = cacheable
+        self.cache = cache if cache is not None else llm_cache
+        self.model = _model_name(llm)
+
+    def _key(self, prompt: Any) -> str:
+        return cache_key(self.model, self.template, _render(prompt))
+
+    def _lookup(self, key: str) -> Optional[str]:
+        if self.refresh:
+            return None
+        try:
+            return self.cache.lookup(key, self.template)
+        except Exception as e:
+            print(f"[LLMCache] ⚠️ Lookup failed for {self.template}, calling the model: {e}")
+            return None
+
+    def _keep(self, key: str, message: Any, started: float):
+        text = message.content if isinstance(getattr(message, "content", None), str) else None
+        if text is None or not self.cacheable(text):
+            return
+        try:
+            self.cache.store(key, self.model, self.template, text, self.ttl, time.perf_counter() - started,
+                             replace=self.refresh)
+        except Exception as e:
+            print(f"[LLMCache] ⚠️ Could not store {self.template} output: {e}")
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> BaseMessage:
+        if not LLM_CACHE_ENABLED:
+            return self.llm.invoke(input, config, **kwargs)
+        key = self._key(input)
+        cached = self._lookup(key)
+        if cached is not None:
+            return AIMessage(content=cached)
+        started = time.perf_counter()
+        message = self.llm.invoke(input, config, **kwargs)
+        self._keep(key, message, started)
+        return message
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> BaseMessage:
+        if not LLM_CACHE_ENABLED:
+            return await self.llm.ainvoke(input, config, **kwargs)
+        key = self._key(input)
+        cached = await asyncio.to_thread(self._lookup, key)
+        if cached is not None:
+            return AIMessage(content=cached)
+        started = time.perf_counter()
+        message = await self.llm.ainvoke(input, config, **kwargs)
+        await asyncio.to_thread(self._keep, key, message, started)
+        return message
+
+    async def astream(self, input: Any, config: Optional[RunnableConfig] = None,
+                      **kwargs: Any) -> AsyncIterator[BaseMessage]:
+        """A hit arrives as a single chunk; a miss streams from the model and is stored once complete."""
+        if not LLM_CACHE_ENABLED:
+            async for chunk in self.llm.astream(input, config, **kwargs):
+                yield chunk
+            return
+        key = self._key(input)
+        cached = await asyncio.to_thread(self._lookup, key)
+        if cached is not None:
+            yield AIMessageChunk(content=cached)
+            return
+        started = time.perf_counter()
+        parts = []
+        async for chunk in self.llm.astream(input, config, **kwargs):
+            if isinstance(chunk.content, str):
+                parts.append(chunk.content)
+            yield chunk
+        await asyncio.to_thread(self._keep, key, AIMessage(content="".join(parts)), started)
@@ -0,0 +1,345 @@
+# In backend/app/services/llm_registry.py
+import os
+import time
+import asyncio
+import statistics
+import threading
+import contextvars
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+
+from app.services.embedding_scheduler import TokenBucket, estimate_tokens, is_rate_limited, retry_after
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+DEFAULT_CHAT_MODEL = os.getenv("CHAT_MODEL", "gemini-2.5-flash")
+
+# Per model: calls in flight, and the provider's tokens / requests per minute
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "8"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "1000000"))
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "1000"))
+# Overrides, e.g. "gemini-2.5-pro=2/250000/150,gemini-2.5-flash=16" (concurrency/tokens/requests)
+LLM_MODEL_LIMITS = os.getenv("LLM_MODEL_LIMITS", "")
+
+# Calls one user may have in flight per model; the rest wait their turn
+LLM_PER_USER_CONCURRENCY = int(os.getenv("LLM_PER_USER_CONCURRENCY", "2"))
+
+# Reserved against the token budget before a call, settled with the real usage after it
+LLM_EXPECTED_OUTPUT_TOKENS = 1024
+
+# Calls kept for latency percentiles and /health/llm
+LLM_RECENT_CALLS = 500
+
+_current_user: contextvars.ContextVar[str] = contextvars.ContextVar("llm_user", default="anonymous")
+
+
+@contextmanager
+def acting_for(user: Optional[str]):
+    """LLM calls made inside (including tasks started inside) count against `user`'s share."""
+    token = _current_user.set(user or "anonymous")
+    try:
+        yield
+    finally:
+        _current_user.reset(token)
+
+
+def parse_model_limits(spec: str) -> Dict[str, Tuple[int, int, int]]:
+    limits: Dict[str, Tuple[int, int, int]] = {}
+    for entry in filter(None, (e.strip() for e in spec.split(","))):
+        model, _, values = entry.partition("=")
+        parts = [int(v) for v in values.split("/") if v]
+        defaults = [LLM_CONCURRENCY, LLM_TOKENS_PER_MINUTE, LLM_REQUESTS_PER_MINUTE]
+        limits[model.strip()] = tuple(parts + defaults[len(parts):])[:3]
+    return limits
+
+
+def _prompt_tokens(messages: List[BaseMessage]) -> int:
+    return sum(estimate_tokens(m.content if isinstance(m.content, str) else str(m.content)) for m in messages)
+
+
+def _usage(message: Any) -> Tuple[int, int]:
+    usage = getattr(message, "usage_metadata", None) or {}
+    return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+
+
+# ============================================================
+# FAIR QUEUE
+# ============================================================
+
+class FairLimiter:
+    """
+    At most `capacity` holders, and at most `per_user` of them for one user.
+    Excess callers wait instead of failing; freed slots go round-robin over
+    the waiting users, so one user's burst can't starve everyone else.
+    """
+
+    def __init__(self, capacity: int, per_user: int):
+        self.capacity = capacity
+        self.per_user = per_user
+        self.active = 0
+        self.active_by_user: Dict[str, int] = {}
+        self.waiting: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+
+    def queued(self) -> int:
+        return sum(len(q) for q in self.waiting.values())
+
+    def _dispatch(self):
+        progressed = True
+        while progressed and self.active < self.capacity:
+            progressed = False
+            for user in list(self.waiting):
+                queue = self.waiting[user]
+                while queue and queue[0].done():  # cancelled while waiting
+                    queue.popleft()
+                if not queue:
+                    del self.waiting[user]
+                    continue
+                if self.active >= self.capacity or self.active_by_user.get(user, 0) >= self.per_user:
+                    continue
+                queue.popleft().set_result(None)
+                self.active += 1
+                self.active_by_user[user] = self.active_by_user.get(user, 0) + 1
+                self.waiting.move_to_end(user)  # served: to the back of the line
+                progressed = True
+                break
+
+    async def acquire(self, user: str):
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiting.setdefault(user, deque()).append(waiter)
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release(user)  # granted just as we were cancelled
+            else:
+                waiter.cancel()
+                self._dispatch()
+            raise
+
+    def release(self, user: str):
+        self.active -= 1
+        self.active_by_user[user] -= 1
+        if not self.active_by_user[user]:
+            del self.active_by_user[user]
+        self._dispatch()
+
+
+class ModelQuota:
+    """Concurrency, token and request budgets for one model, shared by every client of it."""
+
+    def __init__(self, model: str, concurrency: int, tokens_per_minute: int, requests_per_minute: int,
+                 per_user: int):
+        self.model = model
+        self.concurrency = concurrency
+        self.per_user = per_user
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.requests = TokenBucket(requests_per_minute)
+        # Futures can't be shared across event loops
+        self._limiter: Optional[Tuple[asyncio.AbstractEventLoop, FairLimiter]] = None
+        self.sync_slots = threading.BoundedSemaphore(concurrency)
+
+    def limiter(self) -> FairLimiter:
+        loop = asyncio.get_running_loop()
+        if self._limiter is None or self._limiter[0] is not loop:
+            self._limiter = (loop, FairLimiter(self.concurrency, self.per_user))
+        return self._limiter[1]
+
+    def load(self) -> Dict[str, int]:
+        limiter = self._limiter[1] if self._limiter is not None else None
+        return {"in_flight": limiter.active if limiter else 0, "waiting": limiter.queued() if limiter else 0}
+
+
+# ============================================================
+# GOVERNED CHAT MODEL
+# ============================================================
+
+class GovernedChatModel(BaseChatModel):
+    """
+    A shared chat model whose calls wait for a fair slot and the model's
+    token budget, and are timed and counted. Drop-in wherever the wrapped
+    model was used: chains, streaming and tool binding all go through it.
+    """
+
+    inner: BaseChatModel
+    quota: Any
+    registry: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return f"governed-{self.inner._llm_type}"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model": self.quota.model, **self.inner._identifying_params}
+
+    def bind_tools(self, tools: Any, **kwargs: Any):
+        return self.bind(**self.inner.bind_tools(tools, **kwargs).kwargs)
+
+    async def _admit(self, messages: List[BaseMessage]) -> Tuple[str, int, float]:
+        user = _current_user.get()
+        reserved = _prompt_tokens(messages) + LLM_EXPECTED_OUTPUT_TOKENS
+        queued_at = time.perf_counter()
+        await self.quota.limiter().acquire(user)
+        try:
+            await self.quota.requests.acquire(1)
+            await self.quota.tokens.acquire(reserved)
+        except BaseException:
+            self.quota.limiter().release(user)
+            raise
+        return user, reserved, time.perf_counter() - queued_at
+
+    def _settle(self, user: str, reserved: int, queued: float, started: float, usage: Tuple[int, int],
+                error: Optional[BaseException]):
+        if error is not None and is_rate_limited(error):
+            self.quota.requests.pause(retry_after(error) or 5.0)
+        used = sum(usage) if any(usage) else reserved
+        self.quota.tokens.reserve(used - reserved)  # a negative cost refunds an over-estimate
+        self.registry.record(self.quota.model, user, queued, time.perf_counter() - started, usage, error)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        user, reserved, queued = await self._admit(messages)
+        started, usage, error = time.perf_counter(), (0, 0), None
+        try:
+            result = await self.inner._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            usage = _usage(result.generations[0].message) if result.generations else (0, 0)
+            return result
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._settle(user, reserved, queued, started, usage, error)
+            self.quota.limiter().release(user)
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                       **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        user, reserved, queued = await self._admit(messages)
+        started, error = time.perf_counter(), None
+        input_tokens = output_tokens = 0
+        try:
+            async for chunk in self.inner._astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                chunk_in, chunk_out = _usage(chunk.message)
+                input_tokens, output_tokens = input_tokens + chunk_in, output_tokens + chunk_out
+                yield chunk
+        except GeneratorExit:
+            raise  # the consumer stopped reading early; not a failed call
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._settle(user, reserved, queued, started, (input_tokens, output_tokens), error)
+            self.quota.limiter().release(user)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        # Blocking callers only share the model's concurrency cap; budgets are for the async path
+        started, usage, error = time.perf_counter(), (0, 0), None
+        with self.quota.sync_slots:
+            try:
+                result = self.inner._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+                usage = _usage(result.generations[0].message) if result.generations else (0, 0)
+                return result
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                self.registry.record(self.quota.model, _current_user.get(), 0.0, time.perf_counter() - started,
+                                     usage, error)
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        with self.quota.sync_slots:
+            yield from self.inner._stream(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+
+# ============================================================
+# REGISTRY
+# ============================================================
+
+def _gemini(model: str, temperature: float) -> BaseChatModel:
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    from app.services.container import require_env
+    return ChatGoogleGenerativeAI(model=model, google_api_key=require_env("GOOGLE_API_KEY"), temperature=temperature)
+
+
+class LLMRegistry:
+    """
+    One shared client per (model, temperature), each behind its model's
+    quota: global and per-user concurrency, tokens and requests per minute.
+    Records latency, queueing and token usage per call.
+    """
+
+    def __init__(self, factory: Callable[[str, float], BaseChatModel] = _gemini,
+                 limits: Optional[Dict[str, Tuple[int, int, int]]] = None,
+                 per_user: int = LLM_PER_USER_CONCURRENCY):
+        self.factory = factory
+        self.limits = parse_model_limits(LLM_MODEL_LIMITS) if limits is None else limits
+        self.per_user = per_user
+        self._clients: Dict[Tuple[str, float], GovernedChatModel] = {}
+        self._quotas: Dict[str, ModelQuota] = {}
+        self._lock = threading.Lock()
+        self.calls: Deque[Dict[str, Any]] = deque(maxlen=LLM_RECENT_CALLS)
+        self.totals: Dict[str, Dict[str, int]] = {}
+
+    def quota(self, model: str) -> ModelQuota:
+        with self._lock:
+            if model not in self._quotas:
+                concurrency, tokens, requests = self.limits.get(
+                    model, (LLM_CONCURRENCY, LLM_TOKENS_PER_MINUTE, LLM_REQUESTS_PER_MINUTE))
+                self._quotas[model] = ModelQuota(model, concurrency, tokens, requests, self.per_user)
+            return self._quotas[model]
+
+    def get(self, model: str = DEFAULT_CHAT_MODEL, temperature: float = 0.0) -> GovernedChatModel:
+        key = (model, float(temperature))
+        client = self._clients.get(key)
+        if client is None:
+            quota = self.quota(model)
+            with self._lock:
+                if key not in self._clients:
+                    self._clients[key] = GovernedChatModel(inner=self.factory(model, temperature), quota=quota,
+                                                           registry=self)
+                client = self._clients[key]
+        return client
+
+    def record(self, model: str, user: str, queued: float, latency: float, usage: Tuple[int, int],
+               error: Optional[BaseException]):
+        input_tokens, output_tokens = usage
+        self.calls.append({"model": model, "user": user, "queued_s": round(queued, 3),
+                           "latency_s": round(latency, 3), "input_tokens": input_tokens,
+                           "output_tokens": output_tokens, "ok": error is None})
+        totals = self.totals.setdefault(model, {"calls": 0, "errors": 0, "input_tokens": 0, "output_tokens": 0})
+        totals["calls"] += 1
+        totals["errors"] += error is not None
+        totals["input_tokens"] += input_tokens
+        totals["output_tokens"] += output_tokens
+        print(f"[LLM] {model} for {user}: {latency:.2f}s (queued {queued:.2f}s), "
+              f"{input_tokens}+{output_tokens} tokens{'' if error is None else f', failed: {error}'}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        models = {}
+        for model, totals in self.totals.items():
+            latencies = sorted(c["latency_s"] for c in self.calls if c["model"] == model)
+            waits = sorted(c["queued_s"] for c in self.calls if c["model"] == model)
+            quota = self.quota(model)
+            models[model] = dict(
+                totals,
+                **quota.load(),
+                concurrency=quota.concurrency,
+                latency_p50_s=statistics.median(latencies) if latencies else None,
+                latency_p95_s=latencies[int(len(latencies) * 0.95)] if latencies else None,
+                queued_p95_s=waits[int(len(waits) * 0.95)] if waits else None,
+            )
+        return {"clients": [f"{m}@{t}" for m, t in self._clients], "per_user": self.per_user, "models": models}
+
+
+llm_registry = LLMRegistry()
@@ -0,0 +1,64 @@
+# In backend/app/services/loop_monitor.py
+import os
+import time
+import asyncio
+import statistics
+from collections import deque
+from typing import Deque, Dict, Optional
+
+# How often the probe wakes up, and how late it may wake before we log it
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL_MS", "100")) / 1000
+LOOP_LAG_WARN = float(os.getenv("LOOP_LAG_WARN_MS", "100")) / 1000
+
+
+class LoopLagMonitor:
+    """
+    Measures event-loop lag: a probe sleeps for `interval` and records how much
+    later than that it actually woke up. Anything blocking the loop (a sync
+    Google API call inside a coroutine, say) shows up directly as lag.
+    """
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, warn_after: float = LOOP_LAG_WARN, window: int = 600):
+        self.interval = interval
+        self.warn_after = warn_after
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.max_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._probe())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _probe(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - started - self.interval)
+            self.samples.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            if lag > self.warn_after:
+                print(f"[LoopMonitor] ⚠️ Event loop blocked for {lag * 1000:.0f}ms")
+
+    def snapshot(self) -> Dict[str, float]:
+        """Lag percentiles over the recent window, in milliseconds."""
+        if not self.samples:
+            return {"samples": 0, "p50_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        ordered = sorted(self.samples)
+        return {
+            "samples": len(ordered),
+            "p50_ms": statistics.median(ordered) * 1000,
+            "p99_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000,
+            "max_ms": self.max_lag * 1000,
+        }
+
+
+loop_monitor = LoopLagMonitor()
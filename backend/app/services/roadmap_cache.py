@@ -0,0 +1,226 @@
+import os
+import re
+import asyncio
+import argparse
+import unicodedata
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple, List
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import SessionLocal, engine
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+# Roadmaps older than this are still served, but refreshed in the background
+ROADMAP_TTL = timedelta(days=int(os.getenv("ROADMAP_CACHE_TTL_DAYS", "30")))
+
+# Goals warmed by the pre-generation command even before anyone asked for them
+SEED_GOALS = [
+    "learn DSA",
+    "learn web development",
+    "learn machine learning",
+    "learn competitive programming",
+    "prepare for placements",
+    "prepare for the SIH hackathon",
+    "learn React",
+    "learn Python",
+    "learn system design",
+    "prepare for GATE",
+]
+
+# Applied (in order) to the lowercased goal, so every spelling of a topic
+# lands on the same cache row.
+SYNONYMS = [
+    (r"\bds\s*(and|&)\s*algo(rithm)?s?\b", "data structures and algorithms"),
+    (r"\bdsa\b", "data structures and algorithms"),
+    (r"\bcp\b", "competitive programming"),
+    (r"\bml\b", "machine learning"),
+    (r"\bdl\b", "deep learning"),
+    (r"\bai\b", "artificial intelligence"),
+    (r"\bnlp\b", "natural language processing"),
+    (r"\bweb\s*dev\b", "web development"),
+    (r"\bapp\s*dev\b", "app development"),
+    (r"\bjs\b", "javascript"),
+    (r"\bts\b", "typescript"),
+    (r"\breact\s*(\.\s*)?js\b", "react"),
+    (r"\bnode\s*(\.\s*)?js\b", "nodejs"),
+    (r"\bnext\s*(\.\s*)?js\b", "nextjs"),
+    (r"\bpy\b", "python"),
+    (r"\bsde\b", "software development engineering"),
+    (r"\binterviews?\b", "interview"),
+    (r"\bplacements?\b", "placement"),
+    (r"\bhackathons?\b", "hackathon"),
+]
+
+# Leading phrases that don't change what the roadmap is about
+FILLER_PREFIXES = [
+    "please", "can you", "could you", "i want to", "i wanna", "i would like to",
+    "help me", "give me", "make me", "create", "make", "generate", "a", "an", "the",
+    "roadmap for", "roadmap to", "roadmap", "plan for", "plan to", "plan",
+    "how to", "how do i", "how can i", "learn", "learning", "study", "master",
+    "get started with", "start", "prepare for", "preparing for", "preparation for",
+    "prepare", "crack", "for", "to",
+]
+
+
+# ============================================================
+# CANONICALIZATION
+# ============================================================
+
+def canonicalize_goal(goal: str) -> str:
+    """
+    Normalizes a goal so that "Learn DSA", "learn  ds & algo" and
+    "Roadmap for Data Structures and Algorithms" share one cache key.
+    """
+    text = unicodedata.normalize("NFKC", goal or "").lower()
+    text = text.replace("&", " and ")
+
+    for pattern, replacement in SYNONYMS:
+        text = re.sub(pattern, replacement, text)
+
+    # Keep '+' and '#' so "c++" and "c#" survive; everything else is a separator
+    text = re.sub(r"[^a-z0-9+#]+", " ", text)
+    text = re.sub(r"\s+", " ", text).strip()
+
+    stripped = True
+    while stripped and text:
+        stripped = False
+        for prefix in FILLER_PREFIXES:
+            if text == prefix:
+                break
+            if text.startswith(prefix + " "):
+                text = text[len(prefix) + 1:]
+                stripped = True
+                break
+
+    return text
+
+
+# ============================================================
+# STORE
+# ============================================================
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # SQLite hands back naive datetimes even for timezone=True columns
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def get_cached_roadmap(goal: str, count_hit: bool = True) -> Optional[Tuple[str, bool]]:
+    """
+    Returns (response_json, is_stale) for a cached goal, or None on a miss.
+    Unless count_hit is False, the lookup counts towards the goal's popularity.
+    """
+    goal_key = canonicalize_goal(goal)
+    if not goal_key:
+        return None
+
+    db: Session = SessionLocal()
+    try:
+        entry = db.query(models.RoadmapCache).filter(models.RoadmapCache.goal_key == goal_key).first()
+        if not entry:
+            return None
+
+        now = datetime.now(timezone.utc)
+        if count_hit:
+            entry.hit_count = (entry.hit_count or 0) + 1
+            entry.last_requested_at = now
+            db.commit()
+
+        generated_at = _as_utc(entry.generated_at) or now
+        return entry.response, now - generated_at > ROADMAP_TTL
+    finally:
+        db.close()
+
+
+def store_roadmap(goal: str, response: str) -> None:
+    """Inserts or replaces the cached roadmap for a goal."""
+    goal_key = canonicalize_goal(goal)
+    if not goal_key:
+        return
+
+    db: Session = SessionLocal()
+    try:
+        now = datetime.now(timezone.utc)
+        entry = db.query(models.RoadmapCache).filter(models.RoadmapCache.goal_key == goal_key).first()
+        if entry:
+            entry.response = response
+            entry.generated_at = now
+        else:
+            db.add(models.RoadmapCache(
+                goal_key=goal_key,
+                goal=goal,
+                response=response,
+                hit_count=0,
+                generated_at=now,
+                last_requested_at=now,
+            ))
+        db.commit()
+    finally:
+        db.close()
+
+
+def top_goals(limit: int) -> List[str]:
+    """The most requested goals, most popular first."""
+    db: Session = SessionLocal()
+    try:
+        entries = (
+            db.query(models.RoadmapCache)
+            .order_by(models.RoadmapCache.hit_count.desc())
+            .limit(limit)
+            .all()
+        )
+        return [e.goal for e in entries]
+    finally:
+        db.close()
+
+
+# ============================================================
+# PRE-GENERATION
+# ============================================================
+
+async def warm_roadmap_cache(top_n: int = 20, force: bool = False) -> int:
+    """
+    Regenerates the top-N requested goals (plus SEED_GOALS) that are missing
+    or stale. Meant to be run offline, e.g. from a cron job or before a deploy.
+    """
+    # Imported here: the tool module pulls in LangChain
+    from app.agent.tools.advisor_tool import AdvisorTool
+
+    tool = AdvisorTool()
+    goals, seen = [], set()
+    for goal in top_goals(top_n) + SEED_GOALS:
+        key = canonicalize_goal(goal)
+        if key and key not in seen:
+            seen.add(key)
+            goals.append(goal)
+
+    warmed = 0
+    for goal in goals:
+        cached = get_cached_roadmap(goal, count_hit=False)
+        if cached and not cached[1] and not force:
+            print(f"[RoadmapCache] ✓ Fresh: {goal}")
+            continue
+
+        if await tool.refresh_roadmap(goal, force=force):
+            warmed += 1
+            print(f"[RoadmapCache] ✓ Generated: {goal}")
+        else:
+            print(f"[RoadmapCache] ✗ Failed: {goal}")
+
+    print(f"[RoadmapCache] Warmed {warmed}/{len(goals)} goals")
+    return warmed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-generate roadmaps for the most requested goals.")
+    parser.add_argument("--top", type=int, default=20, help="Number of most requested goals to warm.")
+    parser.add_argument("--force", action="store_true", help="Regenerate even if the cached roadmap is fresh.")
+    args = parser.parse_args()
+
+    models.Base.metadata.create_all(bind=engine)
+    asyncio.run(warm_roadmap_cache(top_n=args.top, force=args.force))
@@ -8,7 +8,10 @@ from sqlalchemy.exc import IntegrityError
 from app import models
 from app.database import SessionLocal
 from app.agent.tools.gmail_json_tool import GmailJsonTool
+from app.services.contest_feed import contest_feed
+from app.services.ingestion_jobs import sweep_uploads
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from datetime import datetime
 
 scheduler = AsyncIOScheduler()
 
@@ -227,6 +230,26 @@ def start_scheduler_for_user(user_email: str):
         print(f"[SCHEDULER] ✓ Added job for {user_email}")
 
 
+def schedule_contest_refresh():
+    """Keeps the shared contest cache warm so contest_scanner_tool never waits on upstream APIs."""
+    job_id = "contest_feed_refresh"
+    if not scheduler.get_job(job_id):
+        minutes = int(os.getenv("CONTEST_REFRESH_MINUTES", "30"))
+        scheduler.add_job(
+            contest_feed.refresh_all, "interval", minutes=minutes, id=job_id,
+            next_run_time=datetime.now()  # warm the cache right after startup
+        )
+        print(f"[SCHEDULER] ✓ Contest feed refresh every {minutes} min")
+
+
+def schedule_upload_sweep():
+    """Expires uploads of failed and interrupted ingestion jobs that were never retried."""
+    job_id = "ingestion_upload_sweep"
+    if not scheduler.get_job(job_id):
+        scheduler.add_job(sweep_uploads, "interval", hours=1, id=job_id, next_run_time=datetime.now())
+        print("[SCHEDULER] ✓ Ingestion upload sweep every hour")
+
+
 def stop_scheduler_for_user(user_email: str):
     job_id = f"email_scan_{user_email}"
     if scheduler.get_job(job_id):
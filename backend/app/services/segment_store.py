@@ -0,0 +1,501 @@
+# In backend/app/services/segment_store.py
+import os
+import json
+import fcntl
+import bisect
+import shutil
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+VECTOR_STORE_DIR = os.getenv("VECTOR_STORE_DIR", os.path.join(tempfile.gettempdir(), "campus-companion-vectors"))
+
+# float16 halves float32; int8 (with one float32 scale per row) quarters it
+VECTOR_DTYPE = os.getenv("VECTOR_DTYPE", "float16")
+
+# Rows per segment file; only the newest segment is ever appended to
+SEGMENT_MAX_ROWS = 65536
+
+# Rows dequantized at a time during a scan; bounds the float32 scratch memory per query
+SEARCH_BLOCK_ROWS = 8192
+
+# A user's segments are rewritten once this share of their rows belongs to deleted documents
+COMPACT_DEAD_FRACTION = 0.2
+
+# Users whose segments stay open (memory maps and manifest) in this process
+MAX_OPEN_USERS = int(os.getenv("VECTOR_MAX_OPEN_USERS", "64"))
+
+MANIFEST = "manifest.json"
+
+
+def normalized(vectors: Any) -> np.ndarray:
+    """float32 rows scaled to unit length, so inner product is cosine similarity."""
+    array = np.array(vectors, dtype=np.float32, ndmin=2)
+    norms = np.linalg.norm(array, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return array / norms
+
+
+def quantize(vectors: np.ndarray, dtype: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+    if dtype == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+    raise ValueError(f"Unsupported vector dtype: {dtype}")
+
+
+_fp16_codecs: Dict[int, Any] = {}
+
+
+def as_float32(block: np.ndarray) -> np.ndarray:
+    """float32 copy of a block of stored rows (int8 rows still need their scales applied)."""
+    if block.dtype == np.float16:
+        # FAISS's SIMD decoder is several times faster than numpy's float16 cast
+        codec = _fp16_codecs.get(block.shape[1])
+        if codec is None:
+            codec = _fp16_codecs.setdefault(block.shape[1], faiss.ScalarQuantizer(block.shape[1], faiss.ScalarQuantizer.QT_fp16))
+        return codec.decode(np.ascontiguousarray(block).view(np.uint8))
+    return block.astype(np.float32)
+
+
+def _write_atomic(path: str, data: Dict[str, Any]) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+# ============================================================
+# ONE USER'S SEGMENTS
+# ============================================================
+
+class UserSegments:
+    """
+    A user's chunks on disk as append-only segments under gen-G/ (G bumps
+    on compaction). Per segment:
+      seg-N.vec    quantized vectors, rows x dim
+      seg-N.scale  float32 per-row scale (int8 only)
+      seg-N.fid    int32 file id per row, for filtering and deletion
+      seg-N.off    int64 byte offset of each row's record in seg-N.jsonl
+      seg-N.jsonl  {"content", "file_name", "metadata"} per row
+    manifest.json is rewritten atomically after every append and is the only
+    source of row counts, so a crash mid-append leaves the tail unreferenced.
+    Arrays are read through read-only memory maps (no copy into the heap).
+    Writers take an flock on the directory, so several worker processes can
+    share it; each re-reads the manifest when another has changed it.
+    """
+
+    def __init__(self, path: str, dtype: str = VECTOR_DTYPE, segment_rows: int = SEGMENT_MAX_ROWS):
+        self.path = path
+        self.segment_rows = segment_rows
+        self.lock = threading.RLock()
+        self._maps: Dict[Tuple[int, int], Tuple[int, Dict[str, np.ndarray]]] = {}
+        self._manifest_mtime: Optional[int] = None
+        os.makedirs(path, exist_ok=True)
+        self.manifest = {"dtype": dtype, "dim": None, "generation": 0, "next_segment": 1,
+                         "segments": [], "files": {}, "deleted": []}
+        self.refresh()
+
+    # --- layout ---
+
+    @property
+    def dtype(self) -> str:
+        return self.manifest["dtype"]
+
+    @property
+    def dim(self) -> Optional[int]:
+        return self.manifest["dim"]
+
+    @property
+    def generation(self) -> int:
+        """Bumped by compaction, which renumbers rows."""
+        return self.manifest["generation"]
+
+    def __len__(self) -> int:
+        return sum(s["rows"] for s in self.manifest["segments"])
+
+    def _file(self, manifest: Dict[str, Any], segment: int, ext: str) -> str:
+        return os.path.join(self.path, f"gen-{manifest['generation']:04d}", f"seg-{segment:06d}.{ext}")
+
+    def _extensions(self) -> List[str]:
+        return ["vec", "fid", "off", "jsonl"] + (["scale"] if self.dtype == "int8" else [])
+
+    def _save(self) -> None:
+        path = os.path.join(self.path, MANIFEST)
+        _write_atomic(path, self.manifest)
+        self._manifest_mtime = os.stat(path).st_mtime_ns
+
+    def refresh(self) -> None:
+        """Re-reads the manifest if another process has rewritten it."""
+        path = os.path.join(self.path, MANIFEST)
+        with self.lock:
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except FileNotFoundError:
+                return
+            if mtime != self._manifest_mtime:
+                with open(path) as f:
+                    self.manifest = json.load(f)
+                self._manifest_mtime = mtime
+                self._maps = {key: value for key, value in self._maps.items() if key[0] == self.generation}
+
+    @contextmanager
+    def _exclusive(self, name: str = ".lock") -> Iterator[None]:
+        """Holds the thread lock and the directory's flock, with the manifest freshly read."""
+        with self.lock, open(os.path.join(self.path, name), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                self.refresh()
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _truncate_tail(self) -> None:
+        """Drops bytes written after the last manifest update (an append interrupted by a crash)."""
+        if not self.manifest["segments"]:
+            return
+        last = self.manifest["segments"][-1]
+        itemsize = np.dtype(self.dtype).itemsize
+        sizes = {"vec": last["rows"] * self.dim * itemsize, "scale": last["rows"] * 4,
+                 "fid": last["rows"] * 4, "off": last["rows"] * 8, "jsonl": last["text_bytes"]}
+        for ext in self._extensions():
+            path = self._file(self.manifest, last["id"], ext)
+            if os.path.exists(path) and os.path.getsize(path) > sizes[ext]:
+                with open(path, "r+b") as f:
+                    f.truncate(sizes[ext])
+
+    def _arrays(self, segment: Dict[str, Any]) -> Dict[str, np.ndarray]:
+        """Memory maps over one segment's files, cached until the segment grows."""
+        key = (self.generation, segment["id"])
+        cached = self._maps.get(key)
+        if cached is not None and cached[0] == segment["rows"]:
+            return cached[1]
+        rows = segment["rows"]
+
+        def mapped(ext, dtype, shape):
+            return np.memmap(self._file(self.manifest, segment["id"], ext), dtype=dtype, mode="r", shape=shape)
+
+        arrays = {
+            "vec": mapped("vec", self.dtype, (rows, self.dim)),
+            "fid": mapped("fid", np.int32, (rows,)),
+            "off": mapped("off", np.int64, (rows,)),
+            "text": mapped("jsonl", np.uint8, (segment["text_bytes"],)),
+        }
+        if self.dtype == "int8":
+            arrays["scale"] = mapped("scale", np.float32, (rows,))
+        self._maps[key] = (rows, arrays)
+        return arrays
+
+    def _snapshot(self) -> List[Tuple[int, Dict[str, Any], Dict[str, np.ndarray]]]:
+        """(first row id, segment, arrays) for every non-empty segment as of now."""
+        with self.lock:
+            out, base = [], 0
+            for segment in self.manifest["segments"]:
+                if segment["rows"]:
+                    out.append((base, dict(segment), self._arrays(segment)))
+                base += segment["rows"]
+            return out
+
+    # --- files ---
+
+    def file_id(self, file_name: str) -> Optional[int]:
+        return self.manifest["files"].get(file_name)
+
+    @property
+    def file_names(self) -> List[str]:
+        deleted = set(self.manifest["deleted"])
+        return sorted(name for name, fid in self.manifest["files"].items() if fid not in deleted)
+
+    @property
+    def deleted_ids(self) -> List[int]:
+        return list(self.manifest["deleted"])
+
+    # --- writing ---
+
+    def _segment_with_room(self, manifest: Dict[str, Any]) -> Dict[str, Any]:
+        segments = manifest["segments"]
+        if not segments or segments[-1]["rows"] >= self.segment_rows:
+            os.makedirs(os.path.dirname(self._file(manifest, 0, "vec")), exist_ok=True)
+            segments.append({"id": manifest["next_segment"], "rows": 0, "text_bytes": 0})
+            manifest["next_segment"] += 1
+        return segments[-1]
+
+    def append(self, rows: List[Dict[str, Any]]) -> np.ndarray:
+        """Stores rows ({"content", "file_name", "metadata", "embedding"}); returns their row ids."""
+        if not rows:
+            return np.empty(0, dtype=np.int64)
+        vectors = normalized([r["embedding"] for r in rows])
+        with self._exclusive():
+            return self._append(rows, vectors)
+
+    def backfill(self, rows: List[Dict[str, Any]]) -> int:
+        """
+        Stores rows only if nothing has been stored yet, so workers that all
+        found the user missing don't each write the same backfill. Returns
+        how many rows were stored.
+        """
+        if not rows:
+            return 0
+        vectors = normalized([r["embedding"] for r in rows])
+        with self._exclusive():
+            if len(self) or self.manifest["files"]:
+                return 0
+            return len(self._append(rows, vectors))
+
+    def clear(self) -> None:
+        """Drops every row, and the fixed dimension with them, by starting an empty generation."""
+        with self._exclusive():
+            old_generation = self.generation
+            self.manifest = {"dtype": self.dtype, "dim": None, "generation": old_generation + 1, "next_segment": 1,
+                             "segments": [], "files": {}, "deleted": []}
+            self._save()
+            self._maps.clear()
+        shutil.rmtree(os.path.join(self.path, f"gen-{old_generation:04d}"), ignore_errors=True)
+
+    def _append(self, rows: List[Dict[str, Any]], vectors: np.ndarray) -> np.ndarray:
+        """append() with the directory lock held."""
+        self._truncate_tail()
+        if self.dim is None:
+            self.manifest["dim"] = int(vectors.shape[1])
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dimensional embeddings, got {vectors.shape[1]}")
+        files = self.manifest["files"]
+        deleted = set(self.manifest["deleted"])
+        fids = []
+        for row in rows:
+            # A re-uploaded file name gets a fresh id, so its old (deleted) rows stay deleted
+            if row["file_name"] not in files or files[row["file_name"]] in deleted:
+                files[row["file_name"]] = max(list(files.values()) + list(deleted) + [-1]) + 1
+            fids.append(files[row["file_name"]])
+
+        quantized, scales = quantize(vectors, self.dtype)
+        records = [
+            json.dumps({"content": r["content"], "file_name": r["file_name"],
+                        "metadata": r.get("metadata") or {}}).encode("utf-8") + b"\n"
+            for r in rows
+        ]
+        first_id = len(self)
+        self._append_rows(self.manifest, quantized, scales, np.asarray(fids, dtype=np.int32), records)
+        self._save()
+        return np.arange(first_id, first_id + len(rows), dtype=np.int64)
+
+    def _append_rows(self, manifest: Dict[str, Any], quantized: np.ndarray, scales: Optional[np.ndarray],
+                     fids: np.ndarray, records: List[bytes]) -> None:
+        """Writes already-quantized rows to the end of `manifest`'s segments, starting new ones as they fill."""
+        done = 0
+        while done < len(records):
+            segment = self._segment_with_room(manifest)
+            take = slice(done, done + min(len(records) - done, self.segment_rows - segment["rows"]))
+            lengths = [len(r) for r in records[take]]
+            offsets = segment["text_bytes"] + np.cumsum([0] + lengths[:-1], dtype=np.int64)
+            parts = {"vec": quantized[take], "fid": fids[take], "off": offsets, "jsonl": b"".join(records[take])}
+            if scales is not None:
+                parts["scale"] = scales[take]
+            for ext, data in parts.items():
+                with open(self._file(manifest, segment["id"], ext), "ab") as f:
+                    f.write(data if isinstance(data, bytes) else np.ascontiguousarray(data).tobytes())
+            segment["rows"] += len(lengths)
+            segment["text_bytes"] += sum(lengths)
+            done = take.stop
+
+    def delete_file(self, file_name: str) -> int:
+        """Marks a document's rows deleted; they are skipped by searches until compaction drops them."""
+        with self._exclusive():
+            fid = self.manifest["files"].get(file_name)
+            if fid is None or fid in self.manifest["deleted"]:
+                return 0
+            self.manifest["deleted"].append(fid)
+            self._save()
+        return int(sum(np.count_nonzero(arrays["fid"] == fid) for _, _, arrays in self._snapshot()))
+
+    def dead_fraction(self) -> float:
+        total = len(self)
+        if not total or not self.manifest["deleted"]:
+            return 0.0
+        deleted = np.asarray(self.manifest["deleted"], dtype=np.int32)
+        dead = sum(np.count_nonzero(np.isin(arrays["fid"], deleted)) for _, _, arrays in self._snapshot())
+        return dead / total
+
+    def _copy_live(self, manifest: Dict[str, Any], arrays: Dict[str, np.ndarray], segment: Dict[str, Any],
+                   start: int, deleted: np.ndarray) -> int:
+        """Copies rows from `start` on in one old segment, minus deleted ones, into `manifest`; returns rows dropped."""
+        fids = arrays["fid"][start:]
+        keep = np.nonzero(~np.isin(fids, deleted))[0] + start
+        if len(keep):
+            ends = np.append(arrays["off"][1:], segment["text_bytes"])
+            records = [arrays["text"][arrays["off"][i]:ends[i]].tobytes() for i in keep]
+            scales = np.asarray(arrays["scale"][keep]) if "scale" in arrays else None
+            self._append_rows(manifest, np.asarray(arrays["vec"][keep]), scales, np.asarray(arrays["fid"][keep]), records)
+        return len(fids) - len(keep)
+
+    def compact(self) -> int:
+        """
+        Rewrites the segments without deleted documents' rows into the next
+        generation and swaps the manifest. Searches and appends continue
+        during the copy; only the final swap holds the lock. Row ids change,
+        so callers rebuild anything keyed by them. Returns rows dropped, or 0
+        if another thread or process is already compacting.
+        """
+        with open(os.path.join(self.path, ".compact"), "a") as busy:
+            try:
+                fcntl.flock(busy, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return 0
+            with self._exclusive():
+                deleted = np.asarray(self.manifest["deleted"], dtype=np.int32)
+                if not deleted.size:
+                    return 0
+                snapshot = self._snapshot()
+                copied = {segment["id"]: segment["rows"] for _, segment, _ in snapshot}
+                old_generation = self.generation
+            new = {"dtype": self.dtype, "dim": self.dim, "generation": old_generation + 1, "next_segment": 1,
+                   "segments": [], "files": {}, "deleted": []}
+            generation_dir = os.path.dirname(self._file(new, 0, "vec"))
+            shutil.rmtree(generation_dir, ignore_errors=True)  # left by a compaction that crashed
+            try:
+                dropped = sum(self._copy_live(new, arrays, segment, 0, deleted) for _, segment, arrays in snapshot)
+                with self._exclusive():
+                    # Rows appended while copying
+                    for _, segment, arrays in self._snapshot():
+                        if segment["rows"] > copied.get(segment["id"], 0):
+                            dropped += self._copy_live(new, arrays, segment, copied.get(segment["id"], 0), deleted)
+                    gone = set(deleted.tolist())
+                    new["files"] = {n: f for n, f in self.manifest["files"].items() if f not in gone}
+                    new["deleted"] = [f for f in self.manifest["deleted"] if f not in gone]
+                    self.manifest = new
+                    self._save()
+                    self._maps.clear()
+            except Exception:
+                shutil.rmtree(generation_dir, ignore_errors=True)
+                raise
+        # Open memory maps keep the old pages until they are released
+        shutil.rmtree(os.path.join(self.path, f"gen-{old_generation:04d}"), ignore_errors=True)
+        return dropped
+
+    # --- reading ---
+
+    def blocks(self, block_rows: int = SEARCH_BLOCK_ROWS) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+        """(first row id, float32 vectors, file ids) for every stored row, one block at a time."""
+        for base, segment, arrays in self._snapshot():
+            for start in range(0, segment["rows"], block_rows):
+                end = min(start + block_rows, segment["rows"])
+                vectors = as_float32(arrays["vec"][start:end])
+                if "scale" in arrays:
+                    vectors *= arrays["scale"][start:end, None]
+                yield base + start, vectors, arrays["fid"][start:end]
+
+    def ids_for_file(self, file_name: str) -> np.ndarray:
+        fid = self.file_id(file_name)
+        if fid is None or fid in self.manifest["deleted"]:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([np.nonzero(arrays["fid"] == fid)[0] + base
+                               for base, _, arrays in self._snapshot()] or [np.empty(0, dtype=np.int64)])
+
+    def live_ids(self) -> np.ndarray:
+        """Row ids not belonging to a deleted document."""
+        deleted = np.asarray(self.manifest["deleted"], dtype=np.int32)
+        return np.concatenate([np.nonzero(~np.isin(arrays["fid"], deleted))[0] + base
+                               for base, _, arrays in self._snapshot()] or [np.empty(0, dtype=np.int64)])
+
+    def search(self, query: Any, k: int, file_name: Optional[str] = None) -> List[Tuple[int, float]]:
+        """Exact top-k (row id, cosine score) by scanning the memory-mapped segments block by block."""
+        query = normalized(query)[0]
+        fid = None
+        if file_name is not None:
+            fid = self.file_id(file_name)
+            if fid is None:
+                return []
+        deleted = np.asarray(self.manifest["deleted"], dtype=np.int32)
+        best_ids: List[np.ndarray] = []
+        best_scores: List[np.ndarray] = []
+        for base, segment, arrays in self._snapshot():
+            for start in range(0, segment["rows"], SEARCH_BLOCK_ROWS):
+                end = min(start + SEARCH_BLOCK_ROWS, segment["rows"])
+                scores = as_float32(arrays["vec"][start:end]) @ query
+                if "scale" in arrays:
+                    scores *= arrays["scale"][start:end]
+                fids = arrays["fid"][start:end]
+                if fid is not None:
+                    scores[fids != fid] = -np.inf
+                if deleted.size:
+                    scores[np.isin(fids, deleted)] = -np.inf
+                top = np.argpartition(-scores, k - 1)[:k] if len(scores) > k else np.arange(len(scores))
+                best_ids.append(top + base + start)
+                best_scores.append(scores[top])
+        if not best_ids:
+            return []
+        ids, scores = np.concatenate(best_ids), np.concatenate(best_scores)
+        order = np.argsort(-scores)[:k]
+        return [(int(ids[i]), float(scores[i])) for i in order if np.isfinite(scores[i])]
+
+    def rows(self, ids: Iterable[int]) -> List[Dict[str, Any]]:
+        """The stored records for row ids, sliced out of the mapped text files by offset."""
+        with self.lock:  # row ids must resolve against a single generation
+            snapshot = self._snapshot()
+            bases = [base for base, _, _ in snapshot]
+            out = []
+            for row_id in ids:
+                base, segment, arrays = snapshot[bisect.bisect_right(bases, row_id) - 1]
+                local = row_id - base
+                start = int(arrays["off"][local])
+                end = int(arrays["off"][local + 1]) if local + 1 < segment["rows"] else segment["text_bytes"]
+                out.append(json.loads(arrays["text"][start:end].tobytes()))
+            return out
+
+    def disk_bytes(self) -> int:
+        return sum(
+            os.path.getsize(self._file(self.manifest, s["id"], ext))
+            for s in self.manifest["segments"] for ext in self._extensions()
+            if os.path.exists(self._file(self.manifest, s["id"], ext))
+        )
+
+
+# ============================================================
+# ALL USERS
+# ============================================================
+
+class SegmentStore:
+    """
+    One segment directory per user under `directory`, named by a hash of the
+    email. The most recently used users' segments are kept open.
+    """
+
+    def __init__(self, directory: str = VECTOR_STORE_DIR, dtype: str = VECTOR_DTYPE,
+                 segment_rows: int = SEGMENT_MAX_ROWS, max_open: int = MAX_OPEN_USERS):
+        self.directory = directory
+        self.dtype = dtype
+        self.segment_rows = segment_rows
+        self.max_open = max_open
+        self._users: "OrderedDict[str, UserSegments]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, user_email: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(user_email.encode("utf-8")).hexdigest()[:32])
+
+    def exists(self, user_email: str) -> bool:
+        return os.path.exists(os.path.join(self._path(user_email), MANIFEST))
+
+    def for_user(self, user_email: str) -> UserSegments:
+        with self._lock:
+            segments = self._users.get(user_email)
+            if segments is None:
+                segments = UserSegments(self._path(user_email), self.dtype, self.segment_rows)
+                self._users[user_email] = segments
+            self._users.move_to_end(user_email)
+            while len(self._users) > self.max_open:
+                self._users.popitem(last=False)
+            return segments
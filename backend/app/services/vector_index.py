@@ -0,0 +1,455 @@
+# In backend/app/services/vector_index.py
+import os
+import json
+import shutil
+import asyncio
+import weakref
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+from app.services.container import services
+from app.services.hybrid_search import (
+    BM25Index, CrossEncoderReranker, FUSION_CANDIDATES, RERANK_CANDIDATES, RETRIEVAL_MODE, reciprocal_rank_fusion,
+)
+from app.services.ingestion import EMBEDDING_DIM, EMBEDDING_MODEL_NAME
+from app.services.segment_store import COMPACT_DEAD_FRACTION, SEARCH_BLOCK_ROWS, SegmentStore, UserSegments, normalized
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+# Index type by corpus size: exact search while it is cheap, then graph/cluster ANN.
+# VECTOR_INDEX_TYPE=flat|hnsw|ivf pins one type for every user.
+FLAT_MAX_VECTORS = int(os.getenv("VECTOR_FLAT_MAX", "10000"))
+HNSW_MAX_VECTORS = int(os.getenv("VECTOR_HNSW_MAX", "200000"))
+FORCED_INDEX_TYPE = os.getenv("VECTOR_INDEX_TYPE")
+
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 80
+HNSW_EF_SEARCH = 64
+IVF_NPROBE = 16
+# Centroids are trained on at most this many vectors per list
+IVF_TRAIN_PER_LIST = 64
+
+# Per-user indexes kept in memory; the least recently queried are dropped and reloaded on demand
+MAX_LOADED_USERS = int(os.getenv("VECTOR_MAX_LOADED_USERS", "64"))
+
+DEFAULT_TOP_K = 4
+
+
+def choose_index_type(count: int) -> str:
+    if FORCED_INDEX_TYPE:
+        return FORCED_INDEX_TYPE
+    if count <= FLAT_MAX_VECTORS:
+        return "flat"
+    if count <= HNSW_MAX_VECTORS:
+        return "hnsw"
+    return "ivf"
+
+
+def _parse_embedding(value: Any) -> List[float]:
+    # pgvector columns come back from PostgREST as "[0.1,0.2,...]"
+    return json.loads(value) if isinstance(value, str) else value
+
+
+# ANN indexes keep vectors in memory at the precision they are stored at on disk
+_SQ_TYPES = {"float16": faiss.ScalarQuantizer.QT_fp16, "int8": faiss.ScalarQuantizer.QT_8bit}
+
+
+def build_faiss_index(kind: str, vectors: np.ndarray, dtype: str = "float32") -> Any:
+    dim = vectors.shape[1]
+    sq_type = _SQ_TYPES.get(dtype)
+    nlist = max(1, min(int(4 * np.sqrt(len(vectors))), len(vectors) // 39))
+    if kind == "flat":
+        index = faiss.IndexFlatIP(dim)
+    elif kind == "hnsw":
+        if sq_type is None:
+            index = faiss.IndexHNSWFlat(dim, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        else:
+            index = faiss.IndexHNSWSQ(dim, sq_type, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    elif kind == "ivf":
+        if sq_type is None:
+            index = faiss.IndexIVFFlat(faiss.IndexFlatIP(dim), dim, nlist, faiss.METRIC_INNER_PRODUCT)
+        else:
+            index = faiss.IndexIVFScalarQuantizer(faiss.IndexFlatIP(dim), dim, nlist, sq_type,
+                                                  faiss.METRIC_INNER_PRODUCT)
+    else:
+        raise ValueError(f"Unknown vector index type: {kind}")
+    if not index.is_trained:
+        sample = vectors
+        if len(vectors) > nlist * IVF_TRAIN_PER_LIST:
+            rows = np.random.default_rng(0).choice(len(vectors), nlist * IVF_TRAIN_PER_LIST, replace=False)
+            sample = vectors[np.sort(rows)]
+        index.train(sample)
+    index.add(vectors)
+    return index
+
+
+# ============================================================
+# PER-USER INDEX
+# ============================================================
+
+class UserVectorIndex:
+    """
+    One user's chunks, stored in memory-mapped segments on disk, with a BM25
+    inverted index over the same chunks. Small corpora are searched exactly
+    straight from the segments; larger ones get a FAISS HNSW/IVF index, rebuilt
+    as a different type when the corpus crosses a size threshold and otherwise
+    appended to in place. Both follow the segments, including rows another
+    worker appended and the renumbering done by compaction.
+    """
+
+    def __init__(self, segments: Optional[UserSegments] = None):
+        # Without a store directory (tests, benchmarks) the segments live in a scratch directory
+        if segments is None:
+            scratch = tempfile.mkdtemp(prefix="vectors-")
+            weakref.finalize(self, shutil.rmtree, scratch, True)
+            segments = UserSegments(scratch)
+        self.segments = segments
+        self.lock = self.segments.lock  # compaction swaps row ids under this lock
+        self.index: Any = None
+        self.kind: Optional[str] = None
+        self.count = 0  # rows indexed so far
+        self.generation = self.segments.generation
+        self.built_at = 0  # corpus size when the FAISS index was last (re)built
+        self.lexical = BM25Index()
+        with self.lock:
+            self._sync()
+
+    def __len__(self) -> int:
+        return len(self.segments)
+
+    @property
+    def file_names(self) -> List[str]:
+        return self.segments.file_names
+
+    def has_file(self, file_name: str) -> bool:
+        return file_name in self.segments.file_names
+
+    def _vectors(self, start: int) -> np.ndarray:
+        blocks = [vectors[max(0, start - base):] for base, vectors, _ in self.segments.blocks()
+                  if base + len(vectors) > start]
+        return np.ascontiguousarray(np.vstack(blocks))
+
+    def _sync(self) -> None:
+        """Indexes rows added to the segments since the last call (caller holds the lock)."""
+        self.segments.refresh()
+        if self.generation != self.segments.generation:
+            self.index, self.kind, self.count, self.built_at = None, None, 0, 0
+            self.lexical = BM25Index()
+            self.generation = self.segments.generation
+        total = len(self.segments)
+        if total == self.count:
+            return
+        for start in range(self.count, total, SEARCH_BLOCK_ROWS):
+            ids = range(start, min(start + SEARCH_BLOCK_ROWS, total))
+            for row_id, row in zip(ids, self.segments.rows(ids)):
+                self.lexical.add(row_id, row["content"])
+
+        kind = choose_index_type(total)
+        # IVF centroids are also retrained each time the corpus doubles
+        stale = kind == "ivf" and total >= 2 * self.built_at
+        if kind == "flat":
+            self.index = None  # scanned straight from the memory maps
+        elif self.index is None or kind != self.kind or stale:
+            self.index = build_faiss_index(kind, self._vectors(0), self.segments.dtype)
+            self.built_at = total
+        else:
+            self.index.add(self._vectors(self.count))
+        self.kind = kind
+        self.count = total
+
+    def add(self, rows: List[Dict[str, Any]]) -> None:
+        if not rows:
+            return
+        with self.lock:
+            self.segments.append([dict(r, embedding=_parse_embedding(r["embedding"])) for r in rows])
+            self._sync()
+
+    def backfill(self, rows: List[Dict[str, Any]]) -> int:
+        """Stores rows if the segments are still empty (no other worker got there first); returns how many."""
+        with self.lock:
+            stored = self.segments.backfill([dict(r, embedding=_parse_embedding(r["embedding"])) for r in rows])
+            self._sync()
+        return stored
+
+    def delete_file(self, file_name: str) -> int:
+        """Hides a document's chunks from every search; returns how many there were."""
+        return self.segments.delete_file(file_name)
+
+    def _allowed(self, file_name: Optional[str]) -> Optional[np.ndarray]:
+        """Row ids a search may return, or None for all of them."""
+        if file_name is not None:
+            return self.segments.ids_for_file(file_name)
+        if self.segments.deleted_ids:
+            return self.segments.live_ids()
+        return None
+
+    def _search_params(self, ids: Optional[np.ndarray]) -> Any:
+        selector = faiss.IDSelectorBatch(np.asarray(ids, dtype=np.int64)) if ids is not None else None
+        if self.kind == "hnsw":
+            return faiss.SearchParametersHNSW(sel=selector, efSearch=HNSW_EF_SEARCH)
+        if self.kind == "ivf":
+            return faiss.SearchParametersIVF(sel=selector, nprobe=IVF_NPROBE)
+        return faiss.SearchParameters(sel=selector) if selector is not None else None
+
+    def _vector_ranked(self, query: Any, k: int, file_name: Optional[str]) -> List[Tuple[int, float]]:
+        if self.index is None:
+            return self.segments.search(query, k, file_name)
+        ids = self._allowed(file_name)
+        k = min(k, len(ids) if ids is not None else self.count)
+        if k <= 0:
+            return []
+        scores, positions = self.index.search(normalized(query), k, params=self._search_params(ids))
+        return [(int(pos), float(score)) for score, pos in zip(scores[0], positions[0]) if pos >= 0]
+
+    def _keyword_ranked(self, query_text: str, k: int, file_name: Optional[str]) -> List[Tuple[int, float]]:
+        ids = self._allowed(file_name)
+        return self.lexical.search(query_text, k, set(ids.tolist()) if ids is not None else None)
+
+    def _with_rows(self, ranked: List[Tuple[int, float]]) -> List[Dict[str, Any]]:
+        rows = self.segments.rows([pos for pos, _ in ranked])
+        return [dict(row, score=score) for row, (_, score) in zip(rows, ranked)]
+
+    def search(self, query: Any, k: int = DEFAULT_TOP_K, file_name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Top-k chunks by cosine similarity, optionally only from `file_name`."""
+        with self.lock:
+            self._sync()
+            return self._with_rows(self._vector_ranked(query, k, file_name))
+
+    def keyword_search(self, query_text: str, k: int = DEFAULT_TOP_K,
+                       file_name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Top-k chunks by BM25, optionally only from `file_name`."""
+        with self.lock:
+            self._sync()
+            return self._with_rows(self._keyword_ranked(query_text, k, file_name))
+
+    def hybrid_search(self, query: Any, query_text: str, k: int = DEFAULT_TOP_K, file_name: Optional[str] = None,
+                      candidates: int = FUSION_CANDIDATES) -> List[Dict[str, Any]]:
+        """
+        Vector and BM25 candidates fused by reciprocal rank, so a chunk that
+        only matches an exact code, date or room number still surfaces.
+        """
+        with self.lock:
+            self._sync()
+            vector_ranking = [pos for pos, _ in self._vector_ranked(query, candidates, file_name)]
+            keyword_ranking = [pos for pos, _ in self._keyword_ranked(query_text, candidates, file_name)]
+            return self._with_rows(reciprocal_rank_fusion([vector_ranking, keyword_ranking])[:k])
+
+
+# ============================================================
+# STORE
+# ============================================================
+
+class VectorIndexStore:
+    """
+    Per-user indexes over the on-disk segment store. A user's segments are
+    backfilled from Supabase the first time they are queried, then kept
+    current by `add_rows` as new uploads are stored; indexes are rebuilt
+    from disk when they fall out of memory.
+    """
+
+    def __init__(self, load_rows: Optional[Callable[[str], List[Dict[str, Any]]]] = None,
+                 max_users: int = MAX_LOADED_USERS, segment_store: Optional[SegmentStore] = None,
+                 embedding_model: Optional[str] = None, dim: Optional[int] = None):
+        self.load_rows = load_rows
+        self.max_users = max_users
+        self.segment_store = segment_store
+        # Chunks from any other model (or of another size, when unlabeled) can't be compared with queries
+        self.embedding_model = embedding_model
+        self.dim = dim
+        self._indexes: "OrderedDict[str, UserVectorIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading: Dict[str, threading.Lock] = {}
+
+    def _matches(self, row: Dict[str, Any]) -> bool:
+        model = (row.get("metadata") or {}).get("embedding_model")
+        if model is not None and self.embedding_model is not None:
+            return model == self.embedding_model
+        return self.dim is None or len(row["embedding"]) == self.dim
+
+    def _usable(self, user_email: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        rows = [dict(r, embedding=_parse_embedding(r["embedding"])) for r in rows]
+        usable = [r for r in rows if self._matches(r)]
+        if len(usable) < len(rows):
+            print(f"[VectorIndex] Skipped {len(rows) - len(usable)} chunks of {user_email} "
+                  f"embedded with another model")
+        return usable
+
+    def _load(self, user_email: str) -> UserVectorIndex:
+        if self.segment_store is None:
+            index = UserVectorIndex()
+        else:
+            segments = self.segment_store.for_user(user_email)
+            if self.dim is not None and segments.dim not in (None, self.dim):
+                # Backfilled before chunks were filtered by model; start over from Supabase
+                print(f"[VectorIndex] ⚠️ Rebuilding {user_email}'s {segments.dim}-dimensional segments")
+                segments.clear()
+            index = UserVectorIndex(segments)
+            if len(index) or index.file_names:
+                print(f"[VectorIndex] Opened {len(index)} chunks for {user_email} ({index.kind or 'empty'})")
+                return index
+        if self.load_rows is not None:
+            index.backfill(self._usable(user_email, self.load_rows(user_email)))
+            print(f"[VectorIndex] Loaded {len(index)} chunks for {user_email} ({index.kind or 'empty'})")
+        return index
+
+    def _cached(self, user_email: str, reload: bool) -> Optional[UserVectorIndex]:
+        with self._lock:
+            index = self._indexes.get(user_email)
+            if index is None or (reload and self.segment_store is None):
+                return None
+            self._indexes.move_to_end(user_email)
+        if reload:
+            # Other workers append to the same segment directory
+            index.segments.refresh()
+        return index
+
+    def get(self, user_email: str, reload: bool = False) -> UserVectorIndex:
+        index = self._cached(user_email, reload)
+        if index is not None:
+            return index
+        with self._lock:
+            loading = self._loading.setdefault(user_email, threading.Lock())
+        # One backfill per user at a time; concurrent first queries wait for it and share its index
+        with loading:
+            index = None if reload else self._cached(user_email, False)
+            if index is not None:
+                return index
+            index = self._load(user_email)
+            with self._lock:
+                self._indexes[user_email] = index
+                self._indexes.move_to_end(user_email)
+                while len(self._indexes) > self.max_users:
+                    self._indexes.popitem(last=False)
+        return index
+
+    def _segments(self, user_email: str) -> Optional[UserSegments]:
+        with self._lock:
+            index = self._indexes.get(user_email)
+        if index is not None:
+            return index.segments
+        if self.segment_store is not None and self.segment_store.exists(user_email):
+            return self.segment_store.for_user(user_email)
+        return None
+
+    def add_rows(self, rows: List[Dict[str, Any]]) -> None:
+        """
+        Appends freshly stored chunks for users already in memory or on disk;
+        anyone else gets them with the Supabase backfill on first query.
+        """
+        by_user: Dict[str, List[Dict[str, Any]]] = {}
+        for row in rows:
+            by_user.setdefault(row["user_id"], []).append(row)
+        for user_email, user_rows in by_user.items():
+            user_rows = self._usable(user_email, user_rows)
+            with self._lock:
+                index = self._indexes.get(user_email)
+            if index is not None:
+                index.add(user_rows)
+                continue
+            segments = self._segments(user_email)
+            if segments is not None and self.dim is not None and segments.dim not in (None, self.dim):
+                continue  # outdated segments, rebuilt from Supabase (these rows included) on the next query
+            if segments is not None:
+                segments.append(user_rows)
+
+    def delete_file(self, user_email: str, file_name: str) -> int:
+        """Removes a document from the user's searches; compaction reclaims its space later."""
+        segments = self._segments(user_email)
+        return segments.delete_file(file_name) if segments is not None else 0
+
+    def compact(self, user_email: str, threshold: float = COMPACT_DEAD_FRACTION) -> int:
+        """
+        Rewrites the user's segments once deleted chunks make up `threshold`
+        of them. Blocking; run it off the event loop.
+        """
+        segments = self._segments(user_email)
+        if segments is None or segments.dead_fraction() < threshold:
+            return 0
+        dropped = segments.compact()
+        print(f"[VectorIndex] Compacted {user_email}: dropped {dropped} deleted chunks, {len(segments)} remain")
+        return dropped
+
+    def search(self, user_email: str, query_embedding: List[float], k: int = DEFAULT_TOP_K,
+               file_name: Optional[str] = None, query_text: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Vector search, or hybrid vector + BM25 search when the question text is given."""
+        index = self.get(user_email)
+        if file_name is not None and not index.has_file(file_name):
+            # Possibly stored by another worker since this index was loaded
+            index = self.get(user_email, reload=True)
+        if query_text:
+            return index.hybrid_search(query_embedding, query_text, k, file_name)
+        return index.search(query_embedding, k, file_name)
+
+
+# ============================================================
+# RETRIEVER
+# ============================================================
+
+class DocumentRetriever:
+    """
+    Embeds the question with the ingestion model and searches the user's
+    index off the event loop: hybrid BM25 + vector by default, then an
+    optional cross-encoder re-rank of the fused candidates.
+    """
+
+    def __init__(self, store: VectorIndexStore, embed_query: Callable[[str], List[float]],
+                 mode: str = RETRIEVAL_MODE, reranker: Optional[CrossEncoderReranker] = None):
+        self.store = store
+        self.embed_query = embed_query
+        self.mode = mode
+        self.reranker = reranker
+
+    async def retrieve(self, user_email: str, query: str, file_name: Optional[str] = None,
+                       k: int = DEFAULT_TOP_K) -> List[Dict[str, Any]]:
+        embedding = await asyncio.to_thread(self.embed_query, query)
+        query_text = query if self.mode == "hybrid" else None
+        rerank = self.reranker is not None and self.reranker.enabled
+        candidates = max(k, RERANK_CANDIDATES) if rerank else k
+        passages = await asyncio.to_thread(self.store.search, user_email, embedding, candidates, file_name, query_text)
+        if rerank:
+            passages = await asyncio.to_thread(self.reranker.rerank, query, passages)
+        return passages[:k]
+
+    def file_names(self, user_email: str) -> List[str]:
+        return self.store.get(user_email).file_names
+
+
+def load_rows_from_supabase(user_email: str) -> List[Dict[str, Any]]:
+    """Every chunk this user has stored, paged out of the Supabase documents table."""
+    client = services.get("supabase")
+    rows: List[Dict[str, Any]] = []
+    page = 1000
+    while True:
+        response = (
+            client.table("documents").select("user_id, file_name, content, embedding, metadata")
+            .eq("user_id", user_email).range(len(rows), len(rows) + page - 1).execute()
+        )
+        batch = response.data or []
+        rows.extend(batch)
+        if len(batch) < page:
+            return rows
+
+
+vector_indexes = VectorIndexStore(load_rows=load_rows_from_supabase, segment_store=SegmentStore(),
+                                  embedding_model=EMBEDDING_MODEL_NAME, dim=EMBEDDING_DIM)
+
+_retriever: Optional[DocumentRetriever] = None
+
+
+def get_retriever() -> DocumentRetriever:
+    """The shared retriever, embedding queries with the same Google model used at ingestion."""
+    global _retriever
+    if _retriever is None:
+        def embed_query(text: str) -> List[float]:
+            return services.get("embeddings").embed_query(text)
+
+        _retriever = DocumentRetriever(vector_indexes, embed_query, reranker=CrossEncoderReranker())
+    return _retriever
@@ -0,0 +1,133 @@
+# In backend/benchmarks/bench_chunking.py
+"""
+Chunk count, embedded characters, extraction time and retrieval quality of
+the structural chunker against the previous RecursiveCharacterTextSplitter
+(1000 chars, 200 overlap), on a generated multi-hundred-page handbook with
+headings, rule lists and fee tables, and questions whose answers sit in one
+of them.
+
+    cd backend && python -m benchmarks.bench_chunking                       # ~300 pages
+    cd backend && python -m benchmarks.bench_chunking --sections 2000 --processes 8
+    cd backend && python -m benchmarks.bench_chunking --pdf handbook.pdf    # your own PDF (no quality metrics)
+
+Embeddings are the offline hashed bag of words from bench_retrieval, so the
+quality numbers compare chunkers, not embedding models.
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+
+from app.services import chunking
+from app.services.ingestion import iter_chunks
+from app.services.vector_index import UserVectorIndex
+from benchmarks.bench_retrieval import hashed_embedding
+from tests.unit.test_chunking import make_structured_pdf
+
+TOPICS = ("scholarship", "placement", "library", "sports", "medical", "transport", "exam", "hostel", "mess",
+          "laundry", "counselling", "alumni", "research", "internship", "canteen", "security", "parking", "wifi")
+ITEMS = ("caution deposit", "lab fee", "id card", "gym membership", "bus pass", "transcript", "locker", "printing")
+
+
+FILLER = (
+    "Students are expected to read this section carefully and follow the procedure it describes.",
+    "Requests that do not follow the procedure are returned without action.",
+    "The office is closed on public holidays and during the mid-semester break.",
+    "Forms are available at the front desk and on the student portal.",
+    "Queries about eligibility are answered by email within three working days.",
+    "Late submissions are considered only with a written note from the faculty advisor.",
+    "Any change to these rules is announced on the notice board a week in advance.",
+    "Documents must be self-attested and submitted in a single envelope.",
+    "Appointments can be rescheduled once per semester without a penalty.",
+    "Staff will not accept cash; all payments go through the bank portal.",
+)
+
+
+def handbook(sections: int, rng: random.Random):
+    """Handbook items plus (question, answer) pairs whose answers appear exactly once."""
+    def prose(count):
+        return " ".join(rng.sample(FILLER, count)) + " "
+
+    items, questions = [], []
+    for n in range(1, sections + 1):
+        topic = TOPICS[n % len(TOPICS)]
+        room = f"{chr(65 + n % 26)}-{100 + n}"
+        items.append(("h", f"{n}. {topic.title()} Services, Unit {n}"))
+        fact = f"The unit {n} {topic} office is in room {room}. "
+        items.append(("p", prose(rng.randint(3, 8)) + fact + prose(rng.randint(2, 6))))
+        items += [("li", f"Unit {n} {topic} requests close {rng.randint(1, 28)} days before the semester ends."),
+                  ("li", "Carry your identity card and a copy of the fee receipt to every appointment.")]
+        questions.append((f"Where is the unit {n} {topic} office?", room))
+        if n % 2 == 0:
+            item = ITEMS[n % len(ITEMS)]
+            amount = f"{rng.randint(5, 90)},{rng.randint(100, 999)}"
+            items.append(("h", "Fees"))
+            items += [("row", ["Item", "Amount", "Due", "Refundable"])]
+            items += [("row", [f"Unit {n} {ITEMS[(n + k) % len(ITEMS)]}", f"{rng.randint(1, 4)},{rng.randint(100, 999)}",
+                               "31/07/2025", "No"]) for k in range(1, 4)]
+            items.append(("row", [f"Unit {n} {item}", amount, "31/07/2025", "Yes"]))
+            questions.append((f"How much is the unit {n} {item}?", amount))
+    return items, questions
+
+
+def quality(chunks, questions):
+    index = UserVectorIndex()
+    index.add([{"content": c["content"], "file_name": "handbook.pdf", "metadata": c["metadata"],
+                "embedding": hashed_embedding(c["content"])} for c in chunks])
+    scores = {}
+    for mode in ("vector", "hybrid"):
+        hit1 = hit4 = 0
+        for question, answer in questions:
+            vector = hashed_embedding(question)
+            results = index.search(vector, 4) if mode == "vector" else index.hybrid_search(vector, question, 4)
+            found = [answer in r["content"] for r in results]
+            hit1 += bool(found[:1] and found[0])
+            hit4 += any(found)
+        scores[mode] = (hit1 / len(questions), hit4 / len(questions))
+    return scores
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark structural vs recursive PDF chunking")
+    parser.add_argument("--sections", type=int, default=900, help="handbook sections (about three per page)")
+    parser.add_argument("--processes", type=int, default=chunking.PDF_EXTRACT_PROCESSES)
+    parser.add_argument("--pdf", default=None, help="chunk this PDF instead of the generated handbook")
+    args = parser.parse_args()
+
+    questions = []
+    if args.pdf:
+        path = args.pdf
+    else:
+        items, questions = handbook(args.sections, random.Random(7))
+        fd, path = tempfile.mkstemp(suffix=".pdf")
+        with os.fdopen(fd, "wb") as f:
+            f.write(make_structured_pdf(items).getvalue())
+
+    try:
+        runs = [("recursive", 1), ("structural", 1)]
+        if args.processes > 1:
+            runs.append(("structural", args.processes))
+        print(f"{os.path.basename(path)}: {os.path.getsize(path) / 2**20:.1f} MB, {len(questions)} questions")
+        for chunker, processes in runs:
+            chunking.PDF_EXTRACT_PROCESSES = processes
+            started = time.perf_counter()
+            with open(path, "rb") as f:
+                chunks = list(iter_chunks(f, "handbook.pdf", chunker=chunker))
+            elapsed = time.perf_counter() - started
+            pages = chunks[-1]["metadata"]["page"] + 1
+            chars = sum(len(c["content"]) for c in chunks)
+            line = (f"{chunker:>10} x{processes}: {pages} pages  {len(chunks):5d} chunks  "
+                    f"{chars / 1000:7.0f}k chars (~{chars / 4000:.0f}k tokens)  "
+                    f"avg {chars / len(chunks):4.0f}  {elapsed:6.2f}s")
+            if questions and processes == 1:
+                scores = quality(chunks, questions)
+                line += "".join(f"  {mode} hit@1 {h1:.2f} hit@4 {h4:.2f}" for mode, (h1, h4) in scores.items())
+            print(line)
+    finally:
+        if not args.pdf:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
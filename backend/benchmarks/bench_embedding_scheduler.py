@@ -0,0 +1,112 @@
+# In backend/benchmarks/bench_embedding_scheduler.py
+"""
+Embedding + insert throughput for a large PDF against a fake embedding API
+with real-world latency and a requests-per-second quota: the old sequential
+path (every batch embedded, then every batch inserted) against the scheduled
+pipeline at several concurrency levels.
+
+    cd backend && python -m benchmarks.bench_embedding_scheduler
+    cd backend && python -m benchmarks.bench_embedding_scheduler --chunks 5000 --latency 0.3 --quota 5
+"""
+import time
+import asyncio
+import argparse
+import threading
+
+from app.services.embedding_scheduler import EmbeddingScheduler, split_batches
+
+
+class QuotaExceeded(Exception):
+    code = 429
+
+
+class FakeEmbeddingApi:
+    """Sleeps `latency` per call and answers 429 past `quota` calls in any one-second window."""
+
+    def __init__(self, latency: float, quota: int):
+        self.latency = latency
+        self.quota = quota
+        self.lock = threading.Lock()
+        self.accepted = []
+        self.rejected = 0
+
+    def embed_documents(self, texts):
+        with self.lock:
+            now = time.monotonic()
+            self.accepted = [t for t in self.accepted if now - t < 1.0]
+            if len(self.accepted) >= self.quota:
+                self.rejected += 1
+                raise QuotaExceeded("429 RESOURCE_EXHAUSTED")
+            self.accepted.append(now)
+        time.sleep(self.latency)
+        return [[0.0] * 8 for _ in texts]
+
+
+def fake_insert(rows, latency: float):
+    time.sleep(latency)
+
+
+def run_sequential(texts, api, insert_latency, batch_size):
+    """The upload path before the pipeline: one blocking embed over everything, then serial inserts."""
+    started = time.perf_counter()
+    vectors = []
+    for batch in split_batches(texts):
+        while True:
+            try:
+                vectors.extend(api.embed_documents(batch))
+                break
+            except QuotaExceeded:
+                time.sleep(1.0)  # the old path's fixed retry delay
+    for offset in range(0, len(vectors), batch_size):
+        fake_insert(vectors[offset:offset + batch_size], insert_latency)
+    return time.perf_counter() - started
+
+
+async def run_scheduled(texts, api, insert_latency, batch_size, concurrency, quota, tokens_per_minute):
+    scheduler = EmbeddingScheduler(requests_per_minute=quota * 60, tokens_per_minute=tokens_per_minute,
+                                   concurrency=concurrency, backoff_base=0.25)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=2 + concurrency)
+    started = time.perf_counter()
+
+    async def produce():
+        for offset in range(0, len(texts), batch_size):
+            task = asyncio.create_task(scheduler.embed(api.embed_documents, texts[offset:offset + batch_size]))
+            await queue.put(task)
+        await queue.put(None)
+
+    async def consume():
+        while (task := await queue.get()) is not None:
+            await asyncio.to_thread(fake_insert, await task, insert_latency)
+
+    await asyncio.gather(produce(), consume())
+    return time.perf_counter() - started, scheduler.stats["rate_limited"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scheduled embedding against a fake quota-limited API")
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per embedding call")
+    parser.add_argument("--insert-latency", type=float, default=0.05, help="seconds per Supabase insert")
+    parser.add_argument("--quota", type=int, default=25, help="embedding calls per second")
+    parser.add_argument("--tpm", type=int, default=50_000_000, help="embedding tokens per minute")
+    parser.add_argument("--batch-size", type=int, default=50, help="chunks per pipeline batch")
+    args = parser.parse_args()
+
+    texts = [f"Chunk {i}: " + "course handbook text " * 40 for i in range(args.chunks)]
+    print(f"{args.chunks} chunks, {args.latency * 1000:.0f} ms/embed call, "
+          f"quota {args.quota} calls/s and {args.tpm} tokens/min")
+
+    sequential = run_sequential(texts, FakeEmbeddingApi(args.latency, args.quota), args.insert_latency, args.batch_size)
+    print(f"{'sequential':>14}: {sequential:6.2f}s  {args.chunks / sequential:7.0f} chunks/s")
+
+    for concurrency in (1, 2, 4, 8, 16):
+        api = FakeEmbeddingApi(args.latency, args.quota)
+        elapsed, limited = asyncio.run(
+            run_scheduled(texts, api, args.insert_latency, args.batch_size, concurrency, args.quota, args.tpm)
+        )
+        print(f"{f'concurrency {concurrency}':>14}: {elapsed:6.2f}s  {args.chunks / elapsed:7.0f} chunks/s  "
+              f"{limited} rate-limited, {sequential / elapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
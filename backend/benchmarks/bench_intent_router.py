@@ -0,0 +1,131 @@
+# In backend/benchmarks/bench_intent_router.py
+"""
+The intent router on the labeled corpus in tests/fixtures/intents: how
+often it routes, whether what it routes is right, and what it costs per
+message. Then end-to-end latency of the routable requests through the
+agent (the orchestrator prompt, a fake Gemini with real-world latency that
+makes the ideal two calls: the tool call, then the answer) against the
+fast path, which only runs the tool.
+
+    cd backend && python -m benchmarks.bench_intent_router
+    cd backend && python -m benchmarks.bench_intent_router --llm-latency 2.0 --tool-latency 0.5 --samples 3
+"""
+import json
+import time
+import asyncio
+import argparse
+import statistics
+from pathlib import Path
+from typing import Any, List
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import BaseTool
+
+from app.agent.context_budget import create_budgeted_tools_agent
+from app.agent.intent_router import INTENT_MIN_CONFIDENCE, classify, route_request
+from app.agent.orchestrator import prompt
+from app.agent.parallel_executor import ParallelAgentExecutor
+
+CORPUS = Path(__file__).parent.parent / "tests" / "fixtures" / "intents" / "corpus.json"
+
+
+class ScriptedGemini(BaseChatModel):
+    """Answers after `latency` seconds: first with the call to `tool`, then, seeing its output, with the answer."""
+
+    latency: float
+    tool: str = ""
+    args: Any = None
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-gemini"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        raise NotImplementedError
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if messages[-1].type == "tool":
+            message = AIMessage(content=messages[-1].content)
+        else:
+            message = AIMessage(content="", tool_calls=[{"name": self.tool, "args": self.args, "id": "call_0"}])
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+class SleepyTool(BaseTool):
+    description: str = "fake"
+    latency: float = 0.0
+    answer: str = ""
+
+    def _run(self, **kwargs):
+        raise NotImplementedError
+
+    async def _arun(self, **kwargs):
+        await asyncio.sleep(self.latency)
+        return self.answer
+
+
+def make_tools(latency: float) -> List[BaseTool]:
+    contests = [{"title": f"Contest {i}", "start_time": "2025-11-03T20:00:00+05:30",
+                 "end_time": "2025-11-03T22:00:00+05:30", "location": "Online", "description": "Rated"}
+                for i in range(12)]
+    return [SleepyTool(name="contest_scanner_tool", latency=latency, answer=json.dumps(contests)),
+            SleepyTool(name="advisor_tool", latency=latency, answer=json.dumps({"goal": "x", "steps": []}))]
+
+
+async def through_agent(message: str, tools: List[BaseTool], llm: ScriptedGemini) -> float:
+    executor = ParallelAgentExecutor(agent=create_budgeted_tools_agent(llm, tools, prompt), tools=tools,
+                                     max_iterations=10)
+    started = time.perf_counter()
+    await executor.ainvoke({"input": message, "user_email": "bench@campus.edu"})
+    return time.perf_counter() - started
+
+
+async def through_router(message: str, tools: List[BaseTool]) -> float:
+    started = time.perf_counter()
+    assert await route_request(message, tools) is not None
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the intent fast path against the agent loop")
+    parser.add_argument("--llm-latency", type=float, default=1.2, help="seconds per Gemini call")
+    parser.add_argument("--tool-latency", type=float, default=0.3, help="seconds per tool call")
+    parser.add_argument("--samples", type=int, default=4, help="routable messages timed per intent")
+    args = parser.parse_args()
+
+    corpus = json.loads(CORPUS.read_text())
+    started = time.perf_counter()
+    rounds = 200
+    for _ in range(rounds):
+        intents = [classify(example["text"]) for example in corpus]
+    per_message = (time.perf_counter() - started) / (rounds * len(corpus))
+
+    routed = [(e, i) for e, i in zip(corpus, intents) if i.confidence >= INTENT_MIN_CONFIDENCE]
+    correct = sum(e["intent"] == i.name and e.get("args") == i.args for e, i in routed)
+    routable = sum(e["intent"] != "agent" for e in corpus)
+    print(f"{len(corpus)} labeled messages, {routable} routable: routed {len(routed)}, {correct} correctly "
+          f"(precision {correct / max(len(routed), 1):.2f}, recall {correct / max(routable, 1):.2f}), "
+          f"{per_message * 1e6:.0f} µs per message")
+
+    tools = make_tools(args.tool_latency)
+    print(f"Gemini {args.llm_latency:.2f}s per call, tools {args.tool_latency:.2f}s per call")
+    for intent in ("contests", "roadmap"):
+        samples = [(e, i) for e, i in routed if i.name == intent][:args.samples]
+        agent_times, router_times, llm_calls = [], [], 0
+        for example, routed_intent in samples:
+            llm = ScriptedGemini(latency=args.llm_latency, tool=routed_intent.tool, args=routed_intent.args)
+            agent_times.append(asyncio.run(through_agent(example["text"], tools, llm)))
+            llm_calls += llm.calls
+            router_times.append(asyncio.run(through_router(example["text"], tools)))
+        agent, fast = statistics.mean(agent_times), statistics.mean(router_times)
+        print(f"{intent:>10}: agent {agent:5.2f}s ({llm_calls / len(samples):.0f} Gemini calls)  "
+              f"fast path {fast:5.2f}s (0 Gemini calls)  {agent / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+# In backend/benchmarks/bench_mime_parser.py
+"""
+Extraction throughput over the recorded Gmail payloads.
+
+    cd backend && python -m benchmarks.bench_mime_parser --rounds 2000
+"""
+import json
+import time
+import argparse
+from pathlib import Path
+
+from app.agent.mime_parser import parse_message
+
+CORPUS_PATH = Path(__file__).parent.parent / "tests" / "fixtures" / "gmail" / "messages.json"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MIME body extraction")
+    parser.add_argument("--rounds", type=int, default=1000, help="Passes over the corpus")
+    args = parser.parse_args()
+
+    messages = [case["message"] for case in json.loads(CORPUS_PATH.read_text(encoding="utf-8"))]
+    payload_bytes = sum(len(json.dumps(m)) for m in messages)
+
+    started = time.perf_counter()
+    for _ in range(args.rounds):
+        for message in messages:
+            parse_message(message)
+    elapsed = time.perf_counter() - started
+
+    total = args.rounds * len(messages)
+    print(f"{total} messages in {elapsed:.2f}s: {total / elapsed:,.0f} msg/s, "
+          f"{args.rounds * payload_bytes / elapsed / 1e6:.1f} MB/s of payload JSON")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# In backend/benchmarks/bench_page_text.py
+"""
+CPU time and peak memory of page-to-text extraction: the previous BeautifulSoup
+pipeline against the streaming lxml extractor, over a corpus of large pages.
+
+    cd backend && python -m benchmarks.bench_page_text                      # synthetic corpus
+    cd backend && python -m benchmarks.bench_page_text --corpus saved_pages/ # your own *.html
+
+Each variant runs in its own process so peak RSS is not shared between them.
+"""
+import sys
+import json
+import time
+import random
+import resource
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+FEED_CHUNK = 64 * 1024
+
+
+def generate_corpus(directory: Path, pages: int = 12) -> None:
+    """University/hackathon-style pages padded with menus, sidebars and comments to 0.5-3 MB."""
+    rng = random.Random(42)
+    words = ("hackathon registration deadline campus students team mentor prize round venue "
+             "schedule workshop placement exam semester results club").split()
+    directory.mkdir(parents=True, exist_ok=True)
+    for n in range(pages):
+        menu = "".join(f"<li><a href='/p/{i}'>{rng.choice(words).title()} {i}</a></li>" for i in range(400))
+        article = "".join(
+            f"<p>{' '.join(rng.choice(words) for _ in range(rng.randint(40, 120)))}, {i}.</p>" for i in range(60)
+        )
+        comments = "".join(
+            f"<div class='comment'><b>user{i}</b><p>{' '.join(rng.choice(words) for _ in range(30))}</p></div>"
+            for i in range(rng.randint(1500, 9000))
+        )
+        html = (
+            f"<html><head><title>Page {n}</title><style>{'.x{color:red}' * 2000}</style></head><body>"
+            f"<header><nav class='menu'><ul>{menu}</ul></nav></header>"
+            f"<div class='layout'><div class='post'><h1>Event {n}</h1>{article}</div>"
+            f"<aside class='sidebar'><ul>{menu}</ul></aside></div>"
+            f"<section class='comments'>{comments}</section><footer>{menu}</footer></body></html>"
+        )
+        (directory / f"page_{n:02d}.html").write_text(html, encoding="utf-8")
+
+
+def legacy_extract(data: bytes) -> str:
+    """The WebScraperTool pipeline before the streaming extractor."""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(data.decode("utf-8", errors="replace"), "html.parser")
+    for tag in soup(["script", "style", "nav", "footer", "header", "aside"]):
+        tag.decompose()
+    raw_text = soup.get_text(separator=" ", strip=True)
+    lines = [line.strip() for line in raw_text.split("\n") if len(line.strip()) > 3]
+    return "\n".join(lines)[:5000]
+
+
+def streaming_extract(data: bytes) -> str:
+    # Fed in network-sized chunks, exactly as the scraper does while downloading
+    from app.agent.page_text import PageTextExtractor
+    extractor = PageTextExtractor()
+    for offset in range(0, len(data), FEED_CHUNK):
+        if extractor.feed(data[offset:offset + FEED_CHUNK]):
+            break
+    return extractor.result()
+
+
+VARIANTS = {"legacy": legacy_extract, "streaming": streaming_extract}
+
+
+def run_variant(name: str, corpus: Path) -> None:
+    pages = [p.read_bytes() for p in sorted(corpus.glob("*.html"))]
+    VARIANTS[name](b"<html><body><p>warm up imports</p></body></html>")
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    cpu_started, wall_started = time.process_time(), time.perf_counter()
+    chars = sum(len(VARIANTS[name](page)) for page in pages)
+    cpu, wall = time.process_time() - cpu_started, time.perf_counter() - wall_started
+
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        "variant": name, "pages": len(pages), "mb": sum(map(len, pages)) / 1e6,
+        "cpu_s": cpu, "wall_s": wall, "peak_extra_mb": (peak_kb - baseline_kb) / 1024, "chars": chars,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML-to-text extraction")
+    parser.add_argument("--corpus", type=Path, help="Directory of saved *.html pages (default: generated)")
+    parser.add_argument("--variant", choices=sorted(VARIANTS), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variant:
+        run_variant(args.variant, args.corpus)
+        return
+
+    corpus = args.corpus
+    if corpus is None:
+        corpus = Path(tempfile.gettempdir()) / "campus-companion-page-corpus"
+        if not any(corpus.glob("*.html")):
+            generate_corpus(corpus)
+
+    results = []
+    for name in ("legacy", "streaming"):
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_page_text", "--variant", name, "--corpus", str(corpus)],
+            check=True, capture_output=True, text=True,
+        )
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    print(f"{results[0]['pages']} pages, {results[0]['mb']:.1f} MB from {corpus}")
+    for r in results:
+        print(f"{r['variant']:>10}: cpu {r['cpu_s']:.2f}s  wall {r['wall_s']:.2f}s  peak +{r['peak_extra_mb']:.0f} MB")
+    legacy, streaming = results
+    print(f"cpu {legacy['cpu_s'] / max(streaming['cpu_s'], 1e-9):.1f}x less, "
+          f"peak memory {legacy['peak_extra_mb'] / max(streaming['peak_extra_mb'], 1):.1f}x less")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# In backend/benchmarks/bench_retrieval.py
+"""
+Retrieval quality (hit@1, hit@4, MRR) and latency of vector, BM25, hybrid
+and hybrid + cross-encoder search over the fixture PDFs in
+tests/fixtures/pdfs and their labelled questions.
+
+    cd backend && python -m benchmarks.bench_retrieval                        # offline hashed embeddings
+    cd backend && python -m benchmarks.bench_retrieval --embedder google      # the real embedding-001 model
+    cd backend && python -m benchmarks.bench_retrieval --filler 20000         # plus 20k unrelated chunks
+    cd backend && RERANKER_MODEL=cross-encoder/ms-marco-MiniLM-L-6-v2 python -m benchmarks.bench_retrieval
+"""
+import re
+import json
+import time
+import random
+import hashlib
+import argparse
+import statistics
+from pathlib import Path
+
+import numpy as np
+
+from app.services.hybrid_search import CrossEncoderReranker, RERANK_CANDIDATES, _STOPWORDS
+from app.services.ingestion import iter_chunks
+from app.services.vector_index import UserVectorIndex
+
+FIXTURES = Path(__file__).resolve().parent.parent / "tests" / "fixtures" / "pdfs"
+
+
+def hashed_embedding(text: str, dim: int = 512) -> np.ndarray:
+    vector = np.zeros(dim)
+    for word in re.findall(r"[a-z]+|\d", text.lower()):
+        if word not in _STOPWORDS:
+            vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % dim] += 1.0
+    return vector
+
+
+def google_embedder():
+    import os
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+    from app.services.ingestion import EMBEDDING_MODEL
+    model = GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL, google_api_key=os.getenv("GOOGLE_API_KEY"))
+    return model.embed_documents, model.embed_query
+
+
+def filler_chunks(count: int, rng: random.Random):
+    words = ("lecture notes semester assignment lab report project course faculty department library "
+             "timetable quiz marks seminar workshop club event registration").split()
+    return [" ".join(rng.choice(words) for _ in range(150)) for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hybrid retrieval on the fixture PDFs")
+    parser.add_argument("--embedder", choices=["hashed", "google"], default="hashed")
+    parser.add_argument("--filler", type=int, default=0, help="unrelated chunks added to the corpus")
+    args = parser.parse_args()
+
+    if args.embedder == "google":
+        embed_documents, embed_query = google_embedder()
+    else:
+        embed_documents = lambda texts: [hashed_embedding(t) for t in texts]  # noqa: E731
+        embed_query = hashed_embedding
+
+    rows = []
+    for pdf in sorted(FIXTURES.glob("*.pdf")):
+        with open(pdf, "rb") as f:
+            rows += [dict(c, file_name=pdf.name) for c in iter_chunks(f, pdf.name)]
+    rows += [{"content": text, "file_name": "filler.pdf", "metadata": {"page": n}}
+             for n, text in enumerate(filler_chunks(args.filler, random.Random(1)))]
+    vectors = embed_documents([r["content"] for r in rows])
+    index = UserVectorIndex()
+    index.add([dict(r, embedding=v) for r, v in zip(rows, vectors)])
+
+    questions = json.loads((FIXTURES / "questions.json").read_text())
+    query_vectors = [embed_query(q["query"]) for q in questions]
+    reranker = CrossEncoderReranker()
+
+    modes = {
+        "vector": lambda q, v, k: index.search(v, k),
+        "keyword": lambda q, v, k: index.keyword_search(q, k),
+        "hybrid": lambda q, v, k: index.hybrid_search(v, q, k),
+    }
+    if reranker.enabled:
+        modes["hybrid+rerank"] = lambda q, v, k: reranker.rerank(q, index.hybrid_search(v, q, RERANK_CANDIDATES))[:k]
+
+    print(f"{len(rows)} chunks ({index.kind} index), {len(questions)} questions, {args.embedder} embeddings")
+    for name, search in modes.items():
+        ranks, timings = [], []
+        for q, v in zip(questions, query_vectors):
+            started = time.perf_counter()
+            results = search(q["query"], v, 10)
+            timings.append(time.perf_counter() - started)
+            positions = [i for i, r in enumerate(results, start=1)
+                         if r["file_name"] == q["file_name"] and r["metadata"]["page"] == q["page"]]
+            ranks.append(positions[0] if positions else None)
+        hit1 = sum(r == 1 for r in ranks) / len(ranks)
+        hit4 = sum(r is not None and r <= 4 for r in ranks) / len(ranks)
+        mrr = sum(1 / r for r in ranks if r) / len(ranks)
+        exact = [r for r, q in zip(ranks, questions) if q["kind"] == "exact"]
+        exact4 = sum(r is not None and r <= 4 for r in exact) / len(exact)
+        print(f"{name:>14}: hit@1 {hit1:.2f}  hit@4 {hit4:.2f}  MRR {mrr:.2f}  exact-term hit@4 {exact4:.2f}  "
+              f"p50 {statistics.median(timings) * 1000:.2f} ms  max {max(timings) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
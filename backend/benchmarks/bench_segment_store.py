@@ -0,0 +1,127 @@
+# In backend/benchmarks/bench_segment_store.py
+"""
+Disk size, resident memory and query latency of the memory-mapped segment
+store (float16 and int8) against holding the same vectors as a float32
+array in the heap, which is what every loaded user cost before.
+
+    cd backend && python -m benchmarks.bench_segment_store                      # 1M chunks x 768 dims
+    cd backend && python -m benchmarks.bench_segment_store --chunks 100000 --queries 50
+    cd backend && python -m benchmarks.bench_segment_store --dir /mnt/ssd/bench-vectors
+
+Each variant runs in a fresh process so its RssAnon (heap) and RssFile
+(mapped pages) are its own. Pages of the mapped segments are only resident
+while the page cache keeps them; under memory pressure the kernel drops them
+instead of swapping.
+"""
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import multiprocessing
+
+import numpy as np
+
+from app.services.segment_store import UserSegments
+
+BATCH = 20000
+FILES = 50
+
+
+def rss() -> dict:
+    with open("/proc/self/status") as f:
+        fields = dict(line.split(":", 1) for line in f if line.startswith("Rss"))
+    return {k: int(v.split()[0]) * 1024 for k, v in fields.items()}
+
+
+def batches(chunks: int, dim: int, text_bytes: int):
+    rng = np.random.default_rng(0)
+    filler = "x" * text_bytes
+    for start in range(0, chunks, BATCH):
+        count = min(BATCH, chunks - start)
+        vectors = rng.normal(size=(count, dim)).astype(np.float32)
+        yield start, vectors, [
+            {"content": f"chunk {start + i} {filler}", "file_name": f"doc_{(start + i) % FILES}.pdf",
+             "metadata": {"page": start + i}, "embedding": vectors[i]}
+            for i in range(count)
+        ]
+
+
+def timed(fn, queries):
+    timings = []
+    for q in queries:
+        started = time.perf_counter()
+        fn(q)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return statistics.median(timings) * 1000, timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000
+
+
+def run_float32(args, _path, out):
+    base = rss()
+    vectors = np.empty((args.chunks, args.dim), dtype=np.float32)
+    for start, block, _ in batches(args.chunks, args.dim, 0):
+        vectors[start:start + len(block)] = block / np.linalg.norm(block, axis=1, keepdims=True)
+    queries = np.random.default_rng(1).normal(size=(args.queries, args.dim)).astype(np.float32)
+    p50, p99 = timed(lambda q: np.argpartition(-(vectors @ q), 4)[:4], queries)
+    now = rss()
+    out.put({"variant": "float32 heap", "disk": 0, "append_s": 0.0, "open_s": 0.0, "p50": p50, "p99": p99,
+             "filtered_p50": float("nan"), "anon": now["RssAnon"] - base["RssAnon"],
+             "file": now["RssFile"] - base["RssFile"]})
+
+
+def run_segments(args, path, out):
+    dtype = args.variant
+    writer = UserSegments(path, dtype=dtype)
+    started = time.perf_counter()
+    for _, _, rows in batches(args.chunks, args.dim, args.text_bytes):
+        writer.append(rows)
+    append_s = time.perf_counter() - started
+    del writer
+
+    base = rss()
+    started = time.perf_counter()
+    segments = UserSegments(path)
+    segments._snapshot()  # maps every segment
+    open_s = time.perf_counter() - started
+    queries = np.random.default_rng(1).normal(size=(args.queries, args.dim)).astype(np.float32)
+    p50, p99 = timed(lambda q: segments.search(q, 4), queries)
+    filtered_p50, _ = timed(lambda q: segments.search(q, 4, file_name="doc_7.pdf"), queries[:10])
+    now = rss()
+    out.put({"variant": f"{dtype} mmap", "disk": segments.disk_bytes(), "append_s": append_s, "open_s": open_s,
+             "p50": p50, "p99": p99, "filtered_p50": filtered_p50,
+             "anon": now["RssAnon"] - base["RssAnon"], "file": now["RssFile"] - base["RssFile"]})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the memory-mapped vector segment store")
+    parser.add_argument("--chunks", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--text-bytes", type=int, default=800, help="stored text per chunk")
+    parser.add_argument("--dir", default=None, help="where segments are written (default: a temp dir)")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="bench-segments-", dir=args.dir)
+    ctx = multiprocessing.get_context("spawn")
+    print(f"{args.chunks} chunks x {args.dim} dims, {args.queries} exact top-4 queries")
+    print(f"{'variant':>14} {'disk MB':>9} {'append s':>9} {'open s':>7} {'RssAnon MB':>11} {'RssFile MB':>11} "
+          f"{'p50 ms':>8} {'p99 ms':>8} {'1-file p50':>11}")
+    try:
+        for variant, target in (("float32", run_float32), ("float16", run_segments), ("int8", run_segments)):
+            args.variant = variant
+            out = ctx.Queue()
+            worker = ctx.Process(target=target, args=(args, os.path.join(root, variant), out))
+            worker.start()
+            r = out.get()
+            worker.join()
+            print(f"{r['variant']:>14} {r['disk'] / 2**20:>9.0f} {r['append_s']:>9.1f} {r['open_s']:>7.3f} "
+                  f"{r['anon'] / 2**20:>11.0f} {r['file'] / 2**20:>11.0f} {r['p50']:>8.1f} {r['p99']:>8.1f} "
+                  f"{r['filtered_p50']:>11.1f}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
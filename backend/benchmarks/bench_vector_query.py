@@ -0,0 +1,136 @@
+# In backend/benchmarks/bench_vector_query.py
+"""
+Query latency of the in-process vector index (flat / HNSW / IVF, with recall
+against exact search) versus answering over HTTP the way DocumentQueryTool
+used to, through a local stand-in for the /api/query route.
+
+    cd backend && python -m benchmarks.bench_vector_query
+    cd backend && python -m benchmarks.bench_vector_query --sizes 20000 200000 --hop-ms 80
+    cd backend && python -m benchmarks.bench_vector_query --vercel-url https://<deployment> --email you@example.com
+
+Query embedding costs the same on both paths and is left out.
+"""
+import json
+import time
+import argparse
+import threading
+import statistics
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import numpy as np
+
+from app.services import vector_index
+from app.services.vector_index import UserVectorIndex
+
+DIM = 768
+QUERIES = 200
+
+
+def make_rows(count: int, rng: np.random.Generator):
+    # Clustered like real chunks: many near-duplicates around a few topics
+    centers = rng.normal(size=(max(1, count // 200), DIM))
+    vectors = centers[rng.integers(len(centers), size=count)] + 0.3 * rng.normal(size=(count, DIM))
+    rows = [
+        {"user_id": "bench", "file_name": f"doc_{i % 20}.pdf", "content": f"chunk {i}",
+         "embedding": vectors[i].tolist(), "metadata": {"page": i}}
+        for i in range(count)
+    ]
+    return rows, vectors
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    return statistics.median(ordered) * 1000, ordered[int(len(ordered) * 0.99) - 1] * 1000
+
+
+def bench_local(rows, queries, kind, exact):
+    vector_index.FORCED_INDEX_TYPE = kind
+    index = UserVectorIndex()
+    started = time.perf_counter()
+    index.add(rows)
+    build = time.perf_counter() - started
+
+    timings, found = [], 0
+    for n, query in enumerate(queries):
+        started = time.perf_counter()
+        hits = index.search(query, k=4)
+        timings.append(time.perf_counter() - started)
+        found += len({h["content"] for h in hits} & exact[n])
+    filtered = []
+    for query in queries[:50]:
+        started = time.perf_counter()
+        index.search(query, k=4, file_name="doc_3.pdf")
+        filtered.append(time.perf_counter() - started)
+    return build, percentiles(timings), percentiles(filtered)[0], found / (4 * len(queries))
+
+
+def serve_query_route(vectors, hop_ms):
+    """Stand-in for the /api/query route: JSON over HTTP, brute-force search, optional network delay."""
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            time.sleep(hop_ms / 1000)
+            query = np.asarray(payload["embedding"])
+            top = np.argsort(-(normalized @ (query / np.linalg.norm(query))))[:4]
+            body = json.dumps({"answer": [f"chunk {i}" for i in top]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def bench_http(url, payloads):
+    timings = []
+    with httpx.Client(timeout=60.0) as client:
+        for payload in payloads:
+            started = time.perf_counter()
+            client.post(url, json=payload).raise_for_status()
+            timings.append(time.perf_counter() - started)
+    return percentiles(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark local vector search against the HTTP query path")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5000, 50000])
+    parser.add_argument("--hop-ms", type=float, default=40.0, help="simulated network delay of the HTTP path")
+    parser.add_argument("--vercel-url", help="also time the real /api/query route")
+    parser.add_argument("--email", help="user whose upload the real route should query")
+    args = parser.parse_args()
+    rng = np.random.default_rng(7)
+
+    for size in args.sizes:
+        rows, vectors = make_rows(size, rng)
+        queries = vectors[rng.integers(size, size=QUERIES)] + 0.2 * rng.normal(size=(QUERIES, DIM))
+        normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        exact = [{f"chunk {i}" for i in np.argsort(-(normalized @ q))[:4]} for q in queries]
+
+        print(f"\n{size} chunks x {DIM} dims, {QUERIES} queries")
+        for kind in ("flat", "hnsw", "ivf"):
+            build, (p50, p99), filtered, recall = bench_local(rows, queries, kind, exact)
+            print(f"{kind:>6}: build {build:6.2f}s  p50 {p50:6.2f} ms  p99 {p99:6.2f} ms  "
+                  f"file filter p50 {filtered:6.2f} ms  recall@4 {recall:.2f}")
+
+        server = serve_query_route(vectors, args.hop_ms)
+        url = f"http://127.0.0.1:{server.server_address[1]}/api/query"
+        p50, p99 = bench_http(url, [{"embedding": q.tolist()} for q in queries[:50]])
+        server.shutdown()
+        print(f"{'http':>6}: p50 {p50:6.2f} ms  p99 {p99:6.2f} ms  ({args.hop_ms:.0f} ms simulated hop)")
+
+    if args.vercel_url:
+        payload = {"file_path": "", "query": "What is the attendance policy?", "user_email": args.email}
+        p50, p99 = bench_http(f"{args.vercel_url}/api/query", [payload] * 10)
+        print(f"\nvercel /api/query (includes re-embedding and answer generation): p50 {p50:.0f} ms  p99 {p99:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
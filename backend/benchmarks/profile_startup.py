@@ -0,0 +1,141 @@
+# In backend/benchmarks/profile_startup.py
+"""
+Cold-start report for the API: seconds and RSS to import app.main and serve
+the first request, which heavy packages got imported on the way, the slowest
+imports (python -X importtime), and the background warm-up that builds the
+LLM, embedding and Supabase clients afterwards.
+
+    cd backend && python -m benchmarks.profile_startup
+    cd backend && python -m benchmarks.profile_startup --baseline HEAD~1       # before/after
+    cd backend && python -m benchmarks.profile_startup --baseline origin/main --max-import-seconds 2.5
+
+Every run is a fresh interpreter. --baseline checks the given revision out
+into a temporary git worktree and profiles it the same way. In GitHub Actions
+the report is also written to the job summary; --max-import-seconds turns a
+regression into a failing step.
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+HEAVY_MODULES = ("langchain", "langchain_core", "langchain_community", "langchain_google_genai", "supabase",
+                 "google.generativeai", "googleapiclient", "faiss", "numpy", "pypdf")
+
+# Runs in the profiled tree's backend directory
+CHILD = r"""
+import sys, time, json, asyncio
+started = time.perf_counter()
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        fields = dict(line.split(":", 1) for line in f if ":" in line)
+    return int(fields["VmRSS"].split()[0]) / 1024
+
+import app.main
+result = {"import_s": time.perf_counter() - started, "import_rss": rss_mb(), "modules": len(sys.modules),
+          "heavy": [m for m in HEAVY if m in sys.modules]}
+
+from fastapi.testclient import TestClient
+TestClient(app.main.app).get("/")
+result["first_request_s"] = time.perf_counter() - started
+
+try:
+    from app.services.container import services
+except ImportError:
+    services = None
+if services is not None and WARM:
+    warm_started = time.perf_counter()
+    asyncio.run(services.warm_up())
+    result["warm_up_s"] = time.perf_counter() - warm_started
+    result["warm_rss"] = rss_mb()
+    result["warm_errors"] = {k: v["error"] for k, v in services.snapshot().items() if v["error"]}
+print("RESULT " + json.dumps(result))
+"""
+
+
+def run_child(backend: str, warm: bool) -> dict:
+    code = f"HEAVY = {HEAVY_MODULES!r}\nWARM = {warm!r}\n" + CHILD
+    out = subprocess.run([sys.executable, "-c", code], cwd=backend, capture_output=True, text=True, check=True)
+    line = next(line for line in out.stdout.splitlines() if line.startswith("RESULT "))
+    return json.loads(line[len("RESULT "):])
+
+
+def slowest_imports(backend: str, top: int) -> list:
+    """(cumulative seconds, module) of the slowest imports under app.main, nested ones included."""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"], cwd=backend,
+                         capture_output=True, text=True, check=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative) / 1e6, name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def profile(backend: str, repeat: int, top: int) -> dict:
+    runs = [run_child(backend, warm=(i == repeat - 1)) for i in range(repeat)]
+    result = dict(runs[-1])
+    for key in ("import_s", "first_request_s", "import_rss"):
+        result[key] = statistics.median(r[key] for r in runs)
+    result["imports"] = slowest_imports(backend, top)
+    return result
+
+
+def report(label: str, r: dict) -> list:
+    lines = [f"### {label}", "",
+             f"- import app.main: **{r['import_s']:.2f}s**, RSS **{r['import_rss']:.0f} MB**, {r['modules']} modules",
+             f"- first request served after {r['first_request_s']:.2f}s",
+             f"- heavy packages imported at startup: {', '.join(r['heavy']) or 'none'}"]
+    if "warm_up_s" in r:
+        failed = f" (failed: {', '.join(r['warm_errors'])})" if r["warm_errors"] else ""
+        lines.append(f"- background warm-up: {r['warm_up_s']:.2f}s, RSS afterwards {r['warm_rss']:.0f} MB{failed}")
+    lines += ["", "| cumulative s | import |", "|---:|---|"]
+    lines += [f"| {seconds:.3f} | `{name}` |" for seconds, name in r["imports"]]
+    return lines + [""]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile API cold start (import time, RSS, warm-up)")
+    parser.add_argument("--baseline", default=None, help="git revision to compare against, e.g. HEAD~1")
+    parser.add_argument("--repeat", type=int, default=3, help="cold imports per tree; the median is reported")
+    parser.add_argument("--top", type=int, default=15, help="slowest imports to list")
+    parser.add_argument("--max-import-seconds", type=float, default=None, help="exit 1 if importing takes longer")
+    args = parser.parse_args()
+
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sections = []
+    if args.baseline:
+        worktree = tempfile.mkdtemp(prefix="startup-baseline-")
+        try:
+            subprocess.run(["git", "worktree", "add", "--detach", worktree, args.baseline], cwd=backend,
+                           check=True, capture_output=True)
+            before = profile(os.path.join(worktree, "backend"), args.repeat, args.top)
+            sections += report(f"Before ({args.baseline})", before)
+        finally:
+            subprocess.run(["git", "worktree", "remove", "--force", worktree], cwd=backend, capture_output=True)
+            shutil.rmtree(worktree, ignore_errors=True)
+    after = profile(backend, args.repeat, args.top)
+    sections += report("After (working tree)" if args.baseline else "Working tree", after)
+    if args.baseline:
+        sections.insert(0, f"**Cold start: {before['import_s']:.2f}s → {after['import_s']:.2f}s, "
+                           f"RSS {before['import_rss']:.0f} → {after['import_rss']:.0f} MB**\n")
+
+    text = "\n".join(["## API startup profile", ""] + sections)
+    print(text)
+    summary = os.getenv("GITHUB_STEP_SUMMARY")
+    if summary:
+        with open(summary, "a") as f:
+            f.write(text + "\n")
+    if args.max_import_seconds is not None and after["import_s"] > args.max_import_seconds:
+        print(f"import app.main took {after['import_s']:.2f}s, over the {args.max_import_seconds:.2f}s budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
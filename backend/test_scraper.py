@@ -1,16 +1,12 @@
 import asyncio
-import sys
-
-# --- PATCH IS REMOVED FROM HERE ---
 
 from app.agent.tools.web_scraper_tool import WebScraperTool
 
-# The test must now call the sync _run method
-def main():
+# The scraper is async only; its sync _run raises NotImplementedError
+async def main():
     tool = WebScraperTool()
-    # We call .run() which is the sync entrypoint for BaseTool
-    result = tool.run(url="https://sih.gov.in/") 
+    result = await tool.ainvoke({"url": "https://sih.gov.in/"})
     print(result[:500])
 
 if __name__ == "__main__":
-    main() # No asyncio.run() needed
\ No newline at end of file
+    asyncio.run(main())
@@ -8,4 +8,4 @@ def test_pdf_processing_pipeline(client):
 
     response = client.post("/api/files/upload", files=files, headers=headers)
 
-    assert response.status_code in [200, 500]
\ No newline at end of file
+    assert response.status_code in [202, 500]
\ No newline at end of file
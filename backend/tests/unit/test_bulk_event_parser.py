@@ -0,0 +1,71 @@
+import json
+import asyncio
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+from app.agent.tools.bulk_event_parser_tool import BulkEventParserTool, split_into_chunks
+
+EVENTS = [
+    {"title": f"Hackathon Round {i}", "start_time": f"2025-06-{i:02d}T10:00:00", "end_time": f"2025-06-{i:02d}T12:00:00",
+     "location": "Online", "description": ""}
+    for i in range(1, 13)
+]
+
+
+def newsletter():
+    filler = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 8
+    return "\n\n".join(f"{e['title']} starts on June {i + 1} at 10 AM.\n{filler}" for i, e in enumerate(EVENTS))
+
+
+class FakeLLM:
+    """Returns the events whose titles appear in the prompt, tracking peak concurrency."""
+
+    def __init__(self):
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+
+    async def __call__(self, prompt):
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        text = prompt.to_string()
+        return AIMessage(content=json.dumps([e for e in EVENTS if e["title"] + " " in text]))
+
+
+def test_split_into_chunks_respects_size_and_overlaps():
+    text = newsletter()
+    chunks = split_into_chunks(text, chunk_size=1500, overlap=600)
+
+    assert len(chunks) > 3
+    assert all(len(c) <= 1500 for c in chunks)
+    # Each boundary repeats the previous chunk's last paragraph
+    for previous, current in zip(chunks, chunks[1:]):
+        assert current.startswith(previous.split("\n\n")[-1])
+
+    # Paragraphs just under the chunk size are split so the carried overlap still fits
+    long_paragraphs = "\n\n".join(f"Event {i}. " + "Details follow here. " * 70 for i in range(4))
+    chunks = split_into_chunks(long_paragraphs, chunk_size=1500, overlap=600)
+    assert len(chunks) > 4 and all(len(c) <= 1500 for c in chunks)
+
+
+def test_large_input_is_extracted_concurrently_and_deduplicated():
+    fake = FakeLLM()
+    tool = BulkEventParserTool(llm=RunnableLambda(fake), chunk_size=1500, chunk_overlap=600, max_concurrency=3)
+
+    result = json.loads(asyncio.run(tool._arun(newsletter())))
+
+    assert [e["title"] for e in result] == [e["title"] for e in EVENTS]
+    assert fake.calls > 3
+    assert fake.peak == 3
+
+
+def test_short_input_is_a_single_call():
+    fake = FakeLLM()
+    tool = BulkEventParserTool(llm=RunnableLambda(fake))
+
+    result = json.loads(asyncio.run(tool._arun("Hackathon Round 3 is on June 3rd.")))
+
+    assert fake.calls == 1
+    assert result == [EVENTS[2]]
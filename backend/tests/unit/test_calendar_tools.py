@@ -0,0 +1,179 @@
+import asyncio
+import threading
+import uuid
+import httplib2
+from googleapiclient.errors import HttpError
+from app.database import engine
+from app import models
+from app.agent.tools.calendar_tool import BulkCreateCalendarEventsTool, build_event_body
+
+
+class FakeRequest:
+    def __init__(self, body, method="insert", result=None):
+        self.body = body
+        self.method = method
+        self.result = result
+
+    def execute(self):
+        return self.result
+
+
+class FakeBatch:
+    def __init__(self, service, callback):
+        self.service = service
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id=None):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        self.service.batches.append(len(self.requests))
+        self.service.threads.add(threading.current_thread().name)
+        for request_id, request in self.requests:
+            if "FAIL" in request.body["summary"]:
+                self.callback(request_id, None, Exception("Invalid start time"))
+            elif request.method == "insert" and request.body["id"] in self.service.taken_ids:
+                self.callback(request_id, None, HttpError(httplib2.Response({"status": 409}), b"duplicate"))
+            else:
+                getattr(self.service, "created" if request.method == "insert" else "updated").append(request.body)
+                self.service.taken_ids.add(request.body["id"])
+                self.callback(request_id, {"htmlLink": f"https://calendar/{request_id}"}, None)
+
+
+class FakeCalendarService:
+    def __init__(self, listed=(), deleted_ids=()):
+        self.batches = []
+        self.created = []
+        self.updated = []
+        self.list_calls = 0
+        self.threads = set()
+        self.listed = list(listed)  # events visible to events.list, besides the ones created here
+        self.taken_ids = {e["id"] for e in self.listed if "id" in e} | set(deleted_ids)
+
+    def events(self):
+        return self
+
+    def insert(self, calendarId, body):
+        return FakeRequest(body)
+
+    def update(self, calendarId, eventId, body):
+        return FakeRequest(body, method="update")
+
+    def list(self, **kwargs):
+        self.list_calls += 1
+        self.list_window = (kwargs["timeMin"], kwargs["timeMax"])
+        return FakeRequest(None, method="list", result={"items": self.listed + self.created + self.updated})
+
+    def new_batch_http_request(self, callback=None):
+        return FakeBatch(self, callback)
+
+
+def make_events(n):
+    return [
+        {"title": f"Contest {i}", "start_time": "2025-05-01T20:00:00", "end_time": "2025-05-01T22:00:00",
+         "location": "Online", "description": ""}
+        for i in range(n)
+    ]
+
+
+def test_bulk_insert_uses_batches_off_the_event_loop():
+    service = FakeCalendarService()
+    tool = BulkCreateCalendarEventsTool(service=service)
+
+    result = asyncio.run(tool._arun(make_events(60)))
+
+    assert service.batches == [50, 10]
+    assert threading.main_thread().name not in service.threads
+    assert result.startswith("Created 60 of 60 events")
+    assert service.created[0]["start"]["dateTime"] == "2025-05-01T20:00:00+05:30"
+
+
+def test_bulk_insert_reports_per_event_failures():
+    events = make_events(2)
+    events[1]["title"] = "FAIL round"
+    tool = BulkCreateCalendarEventsTool(service=FakeCalendarService())
+
+    result = asyncio.run(tool._arun(events))
+
+    assert result.splitlines() == [
+        "Created 1 of 2 events in your Google Calendar.",
+        "✅ 'Contest 0' on 2025-05-01T20:00:00+05:30: https://calendar/0",
+        "❌ 'FAIL round': Invalid start time",
+    ]
+
+
+def test_retrying_a_batch_is_a_no_op():
+    models.Base.metadata.create_all(bind=engine)
+    service = FakeCalendarService()
+    tool = BulkCreateCalendarEventsTool(service=service, user_email=f"{uuid.uuid4().hex}@example.com")
+    events = make_events(3)
+
+    asyncio.run(tool._arun(events))
+    batches = list(service.batches)
+    result = asyncio.run(tool._arun(events))
+
+    # Second run only checks the calendar and sends nothing
+    assert service.batches == batches
+    assert len(service.created) == 3
+    assert result.startswith("Created 0 of 3 events in your Google Calendar. 3 were already scheduled.")
+
+
+def test_events_deleted_in_google_are_created_again():
+    models.Base.metadata.create_all(bind=engine)
+    service = FakeCalendarService()
+    tool = BulkCreateCalendarEventsTool(service=service, user_email=f"{uuid.uuid4().hex}@example.com")
+    events = make_events(2)
+
+    asyncio.run(tool._arun(events))
+    service.created.clear()  # deleted by the user; the ids stay taken, as in Google
+    result = asyncio.run(tool._arun(events))
+
+    assert [b["summary"] for b in service.updated] == ["Contest 0", "Contest 1"]
+    assert result.startswith("Created 2 of 2 events")
+
+
+def test_preflight_skips_events_already_in_calendar():
+    events = make_events(3)
+    by_id = build_event_body(**events[0])
+    # Added by hand: different id, same title and instant
+    by_hand = {"id": "manual1", "summary": "contest 1", "start": {"dateTime": "2025-05-01T14:30:00Z"}}
+    service = FakeCalendarService(listed=[by_id, by_hand])
+    tool = BulkCreateCalendarEventsTool(service=service)
+
+    result = asyncio.run(tool._arun(events + [events[2]]))
+
+    assert service.list_calls == 1
+    assert [b["summary"] for b in service.created] == ["Contest 2"]
+    lines = result.splitlines()
+    assert lines[0] == ("Created 1 of 4 events in your Google Calendar. 2 were already scheduled. "
+                        "1 repeated an event earlier in the list.")
+    assert lines[4] == "☑️ 'Contest 2' on 2025-05-01T20:00:00+05:30: repeated in the list, scheduled once"
+
+
+def test_preflight_window_and_matching_use_instants_not_strings():
+    events = make_events(2)
+    events[0].update(start_time="2025-05-01T20:00:00Z", end_time="2025-05-01T21:00:00Z")
+    events[1].update(start_time="2025-05-01T23:00:00+05:30", end_time="2025-05-02T00:00:00+05:30")
+    # Made by hand, returned by Google in the calendar's own offset
+    by_hand = {"id": "manual2", "summary": "Contest 1", "start": {"dateTime": "2025-05-01T13:30:00-04:00"}}
+    service = FakeCalendarService(listed=[by_hand])
+    tool = BulkCreateCalendarEventsTool(service=service)
+
+    result = asyncio.run(tool._arun(events))
+
+    assert service.list_window == ("2025-05-01T17:30:00+00:00", "2025-05-01T21:00:00+00:00")
+    assert [b["summary"] for b in service.created] == ["Contest 0"]
+    assert result.startswith("Created 1 of 2 events in your Google Calendar. 1 were already scheduled.")
+
+
+def test_conflict_on_deleted_event_restores_it():
+    events = make_events(1)
+    event_id = build_event_body(**events[0])["id"]
+    service = FakeCalendarService(deleted_ids=[event_id])
+    tool = BulkCreateCalendarEventsTool(service=service)
+
+    result = asyncio.run(tool._arun(events))
+
+    assert service.created == [] and [b["id"] for b in service.updated] == [event_id]
+    assert result.startswith("Created 1 of 1 events")
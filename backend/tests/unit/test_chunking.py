@@ -0,0 +1,167 @@
+import io
+import textwrap
+from app.services import chunking
+from app.services.chunking import Block, chunk_page, iter_page_texts, iter_structured_chunks, parse_blocks
+from app.services.ingestion import iter_chunks
+
+
+def make_structured_pdf(items, lines_per_page=48):
+    """
+    A PDF laid out like a handbook: ("h", heading), ("p", paragraph),
+    ("li", bullet item) and ("row", [cells]) items flow onto pages of
+    `lines_per_page` lines, wrapping prose at 95 characters.
+    """
+    def escape(text):
+        return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    pages, ops, y = [], [], 800
+    for kind, value in items:
+        if kind == "h":
+            lines = [("F2", 50, value)]
+        elif kind == "p":
+            lines = [("F1", 50, line) for line in textwrap.wrap(value, 95)]
+        elif kind == "li":
+            wrapped = textwrap.wrap(value, 85)
+            lines = [("F1", 60, "- " + wrapped[0])] + [("F1", 72, line) for line in wrapped[1:]]
+        else:
+            lines = [("F1", [50, 200, 330, 450], value)]
+        for font, x, text in lines:
+            if y < 800 - 14 * lines_per_page:
+                pages.append(ops)
+                ops, y = [], 800
+            if isinstance(x, list):
+                ops += [f"BT /F1 10 Tf {cx} {y} Td ({escape(cell)}) Tj ET" for cx, cell in zip(x, text)]
+            else:
+                ops.append(f"BT /{font} {13 if font == 'F2' else 10} Tf {x} {y} Td ({escape(text)}) Tj ET")
+            y -= 22 if font == "F2" else 14
+        if kind in ("h", "p"):
+            y -= 8
+    pages.append(ops)
+
+    font = "<< /Type /Font /Subtype /Type1 /BaseFont /{} /Encoding /WinAnsiEncoding >>"
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, font.format("Helvetica"), font.format("Helvetica-Bold")]
+    kids = []
+    for page_ops in pages:
+        stream = "\n".join(page_ops)
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    out.seek(0)
+    return out
+
+
+def handbook_items(sections=6, prose=1):
+    items = []
+    for n in range(1, sections + 1):
+        items.append(("h", f"{n}. Hostel Block {chr(64 + n)} Rules"))
+        items.append(("p", f"Block {chr(64 + n)} houses second year students. " + "Residents must keep the corridors "
+                      "clear and report damage to the caretaker within a day. " * 6 * prose))
+        items += [("li", f"Quiet hours in block {chr(64 + n)} start at {21 + n % 2}:00 on weekdays."),
+                  ("li", "Visitors sign the register at the front desk and leave before the gates close.")]
+        items.append(("h", "Fees"))
+        items += [("row", ["Item", "Amount", "Due", "Refundable"]),
+                  ("row", ["Mess advance", f"{10 + n},000", f"{n:02d}/07/2025", "Yes"]),
+                  ("row", ["Room rent", f"{28 + n},000", f"{n:02d}/08/2025", "No"])]
+        items.append(("p", "Fees are paid through the student portal. Late payment attracts a fine of 100 per day."))
+    return items
+
+
+def test_page_text_is_split_into_headings_lists_tables_and_paragraphs():
+    text = (
+        "3. Hostel Rules\n\n"
+        "Residents must follow the rules below at all times. The warden may\n"
+        "inspect rooms without notice.\n"
+        "• Gates close at 22:30 every night.\n"
+        "• Guests must sign the register\n"
+        "   at the front desk.\n"
+        "FEE STRUCTURE\n\n"
+        "Item            Amount        Due\n"
+        "Mess advance    12,000        31/07/2025\n"
+    )
+    blocks = parse_blocks(text)
+    assert [b.kind for b in blocks] == ["heading", "paragraph", "list", "heading", "table"]
+    assert blocks[1].text.endswith("may inspect rooms without notice.")
+    assert blocks[2].lines[1] == "• Guests must sign the register at the front desk."
+    assert blocks[4].text.splitlines()[1] == "Mess advance | 12,000 | 31/07/2025"
+
+
+def test_chunks_follow_sections_and_never_cross_pages():
+    chunks = list(iter_structured_chunks(make_structured_pdf(handbook_items()), "handbook.pdf"))
+
+    pages = {c["metadata"]["page"] for c in chunks}
+    assert len(pages) > 1
+    for chunk in chunks:
+        assert len(chunk["content"]) <= chunking.CHUNK_MAX_CHARS
+        # A table never loses its rows to a neighbouring chunk
+        if "Mess advance" in chunk["content"]:
+            assert "Room rent" in chunk["content"] and "table" in chunk["metadata"]["blocks"]
+        # Each chunk opens with its section path, including one continued from the previous page
+        assert chunk["content"].startswith(chunk["metadata"]["section"])
+
+    # The small Fees sub-section is packed with its parent section; the next numbered section starts afresh
+    block_a = [c for c in chunks if c["metadata"]["section"].startswith("1. Hostel Block A")]
+    assert len(block_a) == 1 and "Quiet hours in block A" in block_a[0]["content"]
+    assert "\nFees\n" in block_a[0]["content"] and "Block B" not in block_a[0]["content"]
+    # Fees carried over to a new page keeps its parent in the path
+    assert any(c["metadata"]["section"] == "3. Hostel Block C Rules > Fees" for c in chunks)
+
+
+def test_oversized_blocks_split_on_rows_and_sentences():
+    table = Block("table", ["Room     Block     Floor"] + [f"R-{i}     B     {i % 4}" for i in range(200)])
+    chunks, _ = chunk_page([Block("heading", ["Room List"]), table], [], max_chars=400)
+    assert len(chunks) > 3
+    for content, section, kinds in chunks:
+        assert len(content) <= 400 and section == "Room List"
+        assert content.splitlines()[:2] == ["Room List", "Room | Block | Floor"]
+
+    sentences = [f"Rule {i} applies to every resident of the hostel." for i in range(40)]
+    chunks, headings = chunk_page([Block("paragraph", sentences)], [(1, "RULES")], max_chars=300)
+    assert headings == [(1, "RULES")] and all(content.startswith("RULES\n") for content, _, _ in chunks)
+    bodies = [content.split("\n", 1)[1] for content, _, _ in chunks]
+    # Consecutive pieces share exactly one sentence
+    assert all(a.rsplit(". ", 1)[-1].rstrip(".") in b.split(". ", 1)[0] for a, b in zip(bodies, bodies[1:]))
+
+
+def test_structural_chunks_embed_less_than_the_recursive_splitter():
+    def chunks(pdf, chunker):
+        found = list(iter_chunks(io.BytesIO(pdf), "handbook.pdf", chunker=chunker))
+        return len(found), sum(len(c["content"]) for c in found)
+
+    # Short sections: about as many chunks, but no 200-character overlaps
+    pdf = make_structured_pdf(handbook_items(sections=12)).getvalue()
+    assert chunks(pdf, "structural")[1] < chunks(pdf, "recursive")[1]
+    # Longer sections: fewer, larger chunks
+    pdf = make_structured_pdf(handbook_items(sections=12, prose=3)).getvalue()
+    (structural, structural_chars), (recursive, recursive_chars) = chunks(pdf, "structural"), chunks(pdf, "recursive")
+    assert structural < recursive and structural_chars < 0.9 * recursive_chars
+
+
+def test_process_pool_extraction_matches_in_process(tmp_path, monkeypatch):
+    monkeypatch.setattr(chunking, "PARALLEL_MIN_PAGES", 2)
+    monkeypatch.setattr(chunking, "PAGES_PER_TASK", 2)
+    path = tmp_path / "handbook.pdf"
+    path.write_bytes(make_structured_pdf(handbook_items(sections=8), lines_per_page=20).getvalue())
+
+    class Progress:
+        total_pages = pages_parsed = 0
+
+    progress = Progress()
+    with open(path, "rb") as f:
+        parallel = list(iter_page_texts(f, progress, processes=2))
+    with open(path, "rb") as f:
+        sequential = list(iter_page_texts(f, processes=1))
+    assert parallel == sequential and progress.pages_parsed == progress.total_pages == len(sequential) > 4
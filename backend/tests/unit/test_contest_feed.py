@@ -0,0 +1,92 @@
+import asyncio
+import hashlib
+import httpx
+from pathlib import Path
+from datetime import datetime, timedelta, timezone
+from app.services import contest_feed as feed_module
+from app.services.contest_feed import ContestFeed
+
+FIXTURES = Path(__file__).parent.parent / "fixtures" / "contests"
+
+
+def recorded_transport(calls):
+    """Serves the recorded upstream responses and honours If-None-Match."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "clist.by":
+            resource = request.url.params["resource"].split(".")[0]
+            fixture = f"clist_{resource}.json"
+        elif request.url.host == "codeforces.com":
+            fixture = "codeforces_contest_list.json"
+        else:
+            fixture = "codechef_contests.json"
+
+        body = (FIXTURES / fixture).read_bytes()
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        not_modified = request.headers.get("If-None-Match") == etag
+        calls.append((fixture, 304 if not_modified else 200))
+        if not_modified:
+            return httpx.Response(304, headers={"ETag": etag})
+        return httpx.Response(200, content=body, headers={"ETag": etag, "Content-Type": "application/json"})
+
+    return httpx.MockTransport(handler)
+
+
+def freeze_now(monkeypatch, value="2025-04-20T00:00:00+00:00"):
+    monkeypatch.setattr(feed_module, "_utcnow", lambda: datetime.fromisoformat(value))
+
+
+def test_sources_parse_recorded_fixtures(monkeypatch):
+    freeze_now(monkeypatch)
+    monkeypatch.setenv("CLIST_API_KEY", "dummy")
+    calls = []
+    feed = ContestFeed(transport=recorded_transport(calls))
+
+    async def scan():
+        return {name: await feed.get(name) for name in feed.sources}
+
+    results = asyncio.run(scan())
+
+    # Finished Codeforces rounds and the LeetCode contest that already ended are dropped
+    assert [c["title"] for c in results["codeforces"]] == [
+        "Codeforces Round 1022 (Div. 2)", "Educational Codeforces Round 178 (Rated for Div. 2)"
+    ]
+    assert [c["title"] for c in results["leetcode"]] == ["Biweekly Contest 155", "Weekly Contest 447"]
+    assert results["atcoder"][0]["start_time"] == "2025-04-26T17:30:00+05:30"
+    assert results["codechef"][0]["end_time"] == "2025-04-23T22:00:00+05:30"
+    assert "https://www.codechef.com/START184" in results["codechef"][0]["description"]
+    assert len(calls) == 4
+
+
+def test_stale_entries_are_served_then_revalidated(monkeypatch):
+    freeze_now(monkeypatch)
+    calls = []
+    feed = ContestFeed(ttl=timedelta(minutes=30), transport=recorded_transport(calls))
+
+    async def scenario():
+        first = await feed.get("codeforces")
+        cached = await feed.get("codeforces")  # fresh: no upstream call
+
+        feed._entries["codeforces"].fetched_at -= 3600  # age the entry past its TTL
+        stale = await feed.get("codeforces")  # served immediately, refresh runs in background
+        await asyncio.gather(*feed._background)
+        return first, cached, stale
+
+    first, cached, stale = asyncio.run(scenario())
+
+    assert first == cached == stale
+    assert calls == [("codeforces_contest_list.json", 200), ("codeforces_contest_list.json", 304)]
+    assert feed._entries["codeforces"].fetched_at > datetime.now(timezone.utc).timestamp() - 60
+
+
+def test_failed_refresh_keeps_last_good_data(monkeypatch):
+    freeze_now(monkeypatch)
+    feed = ContestFeed(transport=recorded_transport([]))
+    contests = asyncio.run(feed.get("codechef"))
+
+    def broken(request):
+        return httpx.Response(503)
+
+    feed._client = httpx.AsyncClient(transport=httpx.MockTransport(broken))
+    entry = asyncio.run(feed.refresh("codechef"))
+
+    assert contests and feed._upcoming(entry.contests) == contests
@@ -0,0 +1,71 @@
+import json
+import asyncio
+
+from langchain.agents.output_parsers.tools import ToolAgentAction
+from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel
+from langchain_core.messages import AIMessage
+
+from app.agent.context_budget import ContextMeter, budget_steps, compact_observation
+from app.services.embedding_scheduler import estimate_tokens
+
+
+def contest(i):
+    return {"title": f"Weekly Contest {i}", "start_time": f"2025-11-{i % 28 + 1:02d}T08:00:00+05:30",
+            "end_time": f"2025-11-{i % 28 + 1:02d}T09:30:00+05:30", "location": "Online",
+            "description": "LeetCode Weekly Contest", "raw": {"id": i, "banner": "x" * 200}}
+
+
+def step(tool, observation, message):
+    action = ToolAgentAction(tool=tool, tool_input={}, log="", message_log=[message], tool_call_id=tool)
+    return action, observation
+
+
+def test_tool_outputs_keep_what_the_next_tool_needs():
+    contests = json.dumps([contest(i) for i in range(60)], indent=2)
+    compact = compact_observation("contest_scanner_tool", contests, 1000)
+    head, _, note = compact.partition("\n")
+    kept = json.loads(head)
+    assert estimate_tokens(compact) <= 1000 and "more items omitted" in note
+    assert kept[0] == {k: v for k, v in contest(0).items() if k != "raw"} and len(kept) > 10
+
+    emails = "\n\n".join(f"Email {i + 1}:\nFrom: prof{i}@uni.edu\nSubject: Exam {i}\nContent: {'body ' * 400}"
+                         for i in range(5))
+    compact = compact_observation("read_gmail", emails, 400)
+    assert estimate_tokens(compact) < 600
+    for i in range(5):
+        assert f"Email {i + 1}:\nFrom: prof{i}@uni.edu\nSubject: Exam {i}\nContent: body" in compact
+
+    roadmap = json.dumps({"steps": ["learn"] * 5000})
+    assert compact_observation("advisor_tool", roadmap, 100) == roadmap
+
+
+def test_older_outputs_are_squeezed_first_and_the_latest_turn_is_kept():
+    first, second, latest = AIMessage(content="1"), AIMessage(content="2"), AIMessage(content="3")
+    steps = [step("web_scraper", "a" * 8000, first), step("web_scraper", "b" * 8000, second),
+             step("web_scraper", "c" * 8000, latest), step("document_query_tool", "d" * 8000, latest)]
+
+    compacted = budget_steps(steps, budget=4500, output_limit=1500, old_limit=100)
+    sizes = [estimate_tokens(obs) for _, obs in compacted]
+    assert sizes[0] <= 100 and sizes[1] <= 100  # oldest turns squeezed
+    assert 1000 < sizes[2] <= 1500 and 1000 < sizes[3] <= 1500  # the turn the model is answering stays readable
+    assert [obs for _, obs in steps][0] == "a" * 8000  # the executor's own steps are untouched
+
+    roomy = budget_steps(steps, budget=100_000, output_limit=1500, old_limit=100)
+    assert all(1000 < estimate_tokens(obs) <= 1500 for _, obs in roomy)
+
+
+def test_meter_records_prompt_and_cached_tokens_per_call():
+    usage = {"input_tokens": 1200, "output_tokens": 40, "total_tokens": 1240,
+             "input_token_details": {"cache_read": 1024}}
+    llm = FakeMessagesListChatModel(responses=[AIMessage(content="ok", usage_metadata=usage)] * 2)
+    meter = ContextMeter()
+
+    async def main():
+        for _ in range(2):
+            await llm.ainvoke("hello " * 40, config={"callbacks": [meter]})
+
+    asyncio.run(main())
+    summary = meter.summary()
+    assert summary["calls"] == 2 and summary["prompt_tokens"] == 2400 and summary["cached_tokens"] == 2048
+    assert summary["per_call"] == [1200, 1200] and summary["largest_prompt"] == 1200
+    meter.log("alice@uni.edu")
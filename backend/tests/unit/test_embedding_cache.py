@@ -0,0 +1,82 @@
+import uuid
+import asyncio
+from app.database import engine
+from app import models
+from app.services.embedding_cache import CachedEmbedder, embedding_stats
+from app.services.ingestion_jobs import IngestionJobRunner
+from tests.unit.test_ingestion import FakeUpload, Recorder, make_pdf
+
+
+class CountingEmbedder:
+    def __init__(self):
+        self.texts = []
+
+    def __call__(self, texts):
+        self.texts.extend(texts)
+        return [[float(len(t)), 1.0] for t in texts]
+
+
+def test_only_new_chunks_reach_the_model():
+    models.Base.metadata.create_all(bind=engine)
+    tag = uuid.uuid4().hex
+    a, b, c = f"{tag} syllabus", f"{tag} grading", f"{tag} attendance"
+    model = CountingEmbedder()
+    embedder = CachedEmbedder(model, "test-embedding-model")
+
+    assert embedder([a, b, a]) == [[float(len(a)), 1.0], [float(len(b)), 1.0], [float(len(a)), 1.0]]
+    assert model.texts == [a, b]
+
+    assert embedder([b, c, a])[1] == [float(len(c)), 1.0]
+    assert model.texts == [a, b, c]
+    assert (embedder.hits, embedder.misses) == (3, 3)
+
+    # The same text under another model is a separate entry
+    CachedEmbedder(model, "other-embedding-model")([a])
+    assert model.texts == [a, b, c, a]
+
+
+def test_repeated_uploads_skip_embedding(tmp_path):
+    models.Base.metadata.create_all(bind=engine)
+    tag = uuid.uuid4().hex
+    pdf = make_pdf([f"Handbook {tag} part {i}. " + "Hostel and library rules for first years. " * 30 for i in range(3)]).read()
+    first_user, second_user = f"{uuid.uuid4().hex}@example.com", f"{uuid.uuid4().hex}@example.com"
+    recorder = Recorder()
+    model = CountingEmbedder()
+    runner = IngestionJobRunner(model, recorder.insert, directory=str(tmp_path), batch_size=2,
+                                embedding_model="test-embedding-model")
+
+    def upload(name):
+        u = FakeUpload(pdf)
+        u.filename = name
+        return u
+
+    async def finish(job, user):
+        return [s async for s in runner.events(job["job_id"], user)][-1]
+
+    async def scenario():
+        first = await finish(await runner.submit(upload("handbook.pdf"), first_user), first_user)
+        embedded_once = len(model.texts)
+        again = await runner.submit(upload("handbook (1).pdf"), first_user)
+        shared = await finish(await runner.submit(upload("hb.pdf"), second_user), second_user)
+        return first, embedded_once, again, shared
+
+    first, embedded_once, again, shared = asyncio.run(scenario())
+
+    # Chunks repeated within the handbook are embedded once
+    assert first["status"] == "done"
+    assert embedded_once + first["chunks_cached"] == first["chunks_stored"]
+
+    # Same user, same bytes: answered from the first job under its original name
+    assert again["deduplicated"] and again["job_id"] == first["job_id"]
+    assert again["file_name"] == "handbook.pdf" and again["status"] == "done"
+
+    # Another user gets their own rows, but every embedding comes from the cache
+    assert shared["status"] == "done" and shared["chunks_stored"] == first["chunks_stored"]
+    assert shared["chunks_cached"] == shared["chunks_stored"]
+    assert len(model.texts) == embedded_once
+    assert {r["user_id"] for r in recorder.rows} == {first_user, second_user}
+
+    stats = embedding_stats(first_user)
+    assert stats["duplicate_uploads"] == 1 and stats["documents"] == 1
+    assert stats["embedding_calls_saved"] == first["chunks_cached"] + first["chunks_stored"]
+    assert embedding_stats(second_user)["embedding_calls_saved"] == shared["chunks_stored"]
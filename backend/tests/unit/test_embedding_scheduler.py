@@ -0,0 +1,111 @@
+import time
+import asyncio
+import threading
+from app.services.embedding_scheduler import EmbeddingScheduler, TokenBucket, is_rate_limited, split_batches
+from app.services.ingestion import ingest_pdf
+from tests.unit.test_ingestion import Recorder, make_pdf
+
+
+class QuotaExceeded(Exception):
+    code = 429
+
+
+class FakeEmbeddingServer:
+    """Answers like batchEmbedContents: fixed latency, and a 429 past `quota` calls per `window` seconds."""
+
+    def __init__(self, latency=0.02, quota=None, window=1.0):
+        self.latency = latency
+        self.quota = quota
+        self.window = window
+        self.lock = threading.Lock()
+        self.accepted = []
+        self.rejected = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def embed_documents(self, texts):
+        with self.lock:
+            now = time.monotonic()
+            recent = [t for t in self.accepted if now - t < self.window]
+            if self.quota is not None and len(recent) >= self.quota:
+                self.rejected += 1
+                raise QuotaExceeded("429 RESOURCE_EXHAUSTED")
+            self.accepted.append(now)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.latency)
+        with self.lock:
+            self.in_flight -= 1
+        return [[float(len(t))] for t in texts]
+
+
+def test_batches_respect_count_and_token_limits():
+    assert [len(b) for b in split_batches(["a"] * 250, batch_size=100)] == [100, 100, 50]
+    big, small = "x" * 400, "y"
+    # 101 estimated tokens each; three don't fit under 250
+    assert split_batches([big, big, big, small], max_tokens=250) == [[big, big], [big, small]]
+    assert split_batches(["z" * 4000, small], max_tokens=250) == [["z" * 4000], [small]]
+
+
+def test_token_bucket_spreads_requests_over_the_minute():
+    now = [0.0]
+    bucket = TokenBucket(rate_per_minute=60, capacity=2, clock=lambda: now[0])
+    assert [bucket.reserve() for _ in range(4)] == [0.0, 0.0, 1.0, 2.0]
+    now[0] = 10.0
+    assert bucket.reserve() == 0.0
+    bucket.pause(5)
+    assert bucket.reserve() == 5.0
+
+
+def test_batches_are_embedded_concurrently_in_order():
+    server = FakeEmbeddingServer(latency=0.05)
+    scheduler = EmbeddingScheduler(requests_per_minute=60000, concurrency=4, batch_size=10)
+    texts = [f"chunk {i}" * (i % 7 + 1) for i in range(80)]
+
+    started = time.perf_counter()
+    vectors = asyncio.run(scheduler.embed(server.embed_documents, texts))
+    elapsed = time.perf_counter() - started
+
+    assert vectors == [[float(len(t))] for t in texts]
+    assert server.max_in_flight == 4
+    assert elapsed < 8 * 0.05 * 0.75  # well under eight sequential calls
+    assert scheduler.stats["calls"] == 8
+
+
+def test_rate_limited_batches_are_retried():
+    server = FakeEmbeddingServer(latency=0.005, quota=3, window=0.2)
+    # Configured above the server's real quota, so it has to back off on 429s
+    scheduler = EmbeddingScheduler(requests_per_minute=60000, concurrency=4, batch_size=5, backoff_base=0.1)
+    texts = [f"text {i}" for i in range(60)]
+
+    vectors = asyncio.run(scheduler.embed(server.embed_documents, texts))
+
+    assert vectors == [[float(len(t))] for t in texts]
+    assert server.rejected > 0 and scheduler.stats["rate_limited"] == server.rejected
+    assert scheduler.stats["calls"] == len(server.accepted) == 12
+
+
+def test_rate_limits_are_told_from_numbers_that_contain_429():
+    for message in ("429 RESOURCE_EXHAUSTED", "HTTP Error 429: Too Many Requests", "status=RESOURCE_EXHAUSTED",
+                    "Quota exceeded (429)."):
+        assert is_rate_limited(RuntimeError(message)), message
+    for message in ("Request 14290 failed", "payload of 4291 bytes", "model v1.429 not found", "429.5 ms timeout"):
+        assert not is_rate_limited(RuntimeError(message)), message
+
+
+def test_pipeline_embeds_ahead_of_inserts_with_a_scheduler():
+    server = FakeEmbeddingServer(latency=0.05)
+    recorder = Recorder()
+    scheduler = EmbeddingScheduler(requests_per_minute=60000, concurrency=3)
+    pages = [f"Page {i} " + "Data structures notes on heaps and tries. " * 40 for i in range(8)]
+
+    stored = asyncio.run(ingest_pdf(
+        make_pdf(pages), "ds_notes.pdf", "student@example.com",
+        embed_documents=server.embed_documents, insert_rows=recorder.insert, batch_size=3, scheduler=scheduler,
+    ))
+
+    assert stored == len(recorder.rows) == scheduler.stats["texts"]
+    assert server.max_in_flight > 1
+    # Rows are still inserted in document order
+    pages_in_order = [r["metadata"]["page"] for r in recorder.rows]
+    assert pages_in_order == sorted(pages_in_order)
@@ -0,0 +1,46 @@
+import json
+import asyncio
+from pathlib import Path
+from app.agent.event_extraction import extract_events
+
+CORPUS = json.loads((Path(__file__).parent.parent / "fixtures" / "events" / "corpus.json").read_text())
+
+
+def matches(actual, expected):
+    return len(actual) == len(expected) and all(
+        all(a.get(k) == v for k, v in e.items()) for a, e in zip(actual, expected)
+    )
+
+
+def test_fast_path_coverage_and_accuracy():
+    labeled = [c for c in CORPUS if c["expected"] is not None]
+    handled, correct, false_positives = [], [], []
+
+    for case in CORPUS:
+        result = extract_events(case["text"])
+        if not result.is_confident:
+            continue
+        if case["expected"] is None:
+            false_positives.append(case["name"])
+            continue
+        handled.append(case["name"])
+        if matches(result.events, case["expected"]):
+            correct.append(case["name"])
+
+    coverage = len(handled) / len(labeled)
+    accuracy = len(correct) / len(handled) if handled else 0.0
+    print(f"fast-path coverage={coverage:.0%} accuracy={accuracy:.0%}")
+
+    # Anything the fast path is unsure about must be left to the LLM
+    assert false_positives == []
+    assert accuracy == 1.0, sorted(set(handled) - set(correct))
+    assert coverage >= 0.9
+
+
+def test_single_event_parser_says_when_it_drops_events():
+    from app.agent.tools.event_parser_tool import EventParserTool
+
+    text = next(c["text"] for c in CORPUS if c["name"] == "contest_scanner_json")
+    event = json.loads(asyncio.run(EventParserTool().ainvoke({"text_to_parse": text})))
+    assert event["title"] == "Educational Codeforces Round 178 (Rated for Div. 2)"
+    assert "1 more event(s)" in event["note"] and "bulk_event_parser_tool" in event["note"]
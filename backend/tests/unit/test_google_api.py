@@ -0,0 +1,92 @@
+import time
+import asyncio
+import threading
+from app.services.google_api import GoogleApiRunner
+from app.services.loop_monitor import LoopLagMonitor
+
+
+class SlowRequest:
+    """Stands in for a googleapiclient HttpRequest whose execute() blocks on the network."""
+
+    def __init__(self, tracker, user, seconds=0.1):
+        self.tracker = tracker
+        self.user = user
+        self.seconds = seconds
+
+    def execute(self):
+        with self.tracker["lock"]:
+            active = self.tracker["active"].setdefault(self.user, 0) + 1
+            self.tracker["active"][self.user] = active
+            self.tracker["peak"][self.user] = max(self.tracker["peak"].get(self.user, 0), active)
+        time.sleep(self.seconds)
+        with self.tracker["lock"]:
+            self.tracker["active"][self.user] -= 1
+        return {"user": self.user, "thread": threading.current_thread().name}
+
+
+def new_tracker():
+    return {"lock": threading.Lock(), "active": {}, "peak": {}}
+
+
+def test_calls_are_capped_per_user_and_run_off_the_loop():
+    runner = GoogleApiRunner(max_workers=8, per_user=2)
+    tracker = new_tracker()
+
+    async def scenario():
+        requests = [SlowRequest(tracker, "a@x.com", 0.05) for _ in range(6)] + [SlowRequest(tracker, "b@x.com", 0.05) for _ in range(2)]
+        return await asyncio.gather(*(runner.execute(r, user=r.user) for r in requests))
+
+    results = asyncio.run(scenario())
+    runner.shutdown()
+
+    assert tracker["peak"] == {"a@x.com": 2, "b@x.com": 2}
+    assert all(r["thread"].startswith("google-api") for r in results)
+    # Nothing is kept per user once their calls are done
+    assert runner._limits == {}
+
+
+def test_event_loop_stays_responsive_under_concurrent_load():
+    runner = GoogleApiRunner(max_workers=16, per_user=4)
+    monitor = LoopLagMonitor(interval=0.01, warn_after=1.0)
+    tracker = new_tracker()
+
+    async def scenario():
+        monitor.start()
+        # 8 users chatting at once, each tool call blocking for 200ms in googleapiclient
+        requests = [SlowRequest(tracker, f"user{i % 8}", 0.2) for i in range(32)]
+        await asyncio.gather(*(runner.execute(r, user=r.user) for r in requests))
+        await monitor.stop()
+
+    started = time.perf_counter()
+    asyncio.run(scenario())
+    elapsed = time.perf_counter() - started
+    runner.shutdown()
+
+    # Run inline, these calls would block the loop for 6.4s in total
+    assert elapsed < 2.0
+    assert monitor.snapshot()["samples"] > 20
+    assert monitor.max_lag < 0.1
+
+
+def test_calls_sharing_an_http_client_run_one_at_a_time():
+    runner = GoogleApiRunner(max_workers=8, per_user=4)
+    tracker = new_tracker()
+
+    class Http:
+        pass
+
+    calendar_http, gmail_http = Http(), Http()
+
+    def request(http, label):
+        r = SlowRequest(tracker, label, 0.03)
+        r.http = http
+        return r
+
+    async def scenario():
+        requests = [request(calendar_http, "calendar") for _ in range(3)] + [request(gmail_http, "gmail") for _ in range(3)]
+        return await asyncio.gather(*(runner.execute(r, user="a@x.com") for r in requests))
+
+    asyncio.run(scenario())
+    runner.shutdown()
+    # One user's four slots, but each service's client is only ever used by one thread
+    assert tracker["peak"] == {"calendar": 1, "gmail": 1}
@@ -0,0 +1,101 @@
+import re
+import json
+import asyncio
+import hashlib
+from pathlib import Path
+import numpy as np
+from app.services.hybrid_search import BM25Index, CrossEncoderReranker, reciprocal_rank_fusion, tokenize, _STOPWORDS
+from app.services.ingestion import iter_chunks
+from app.services.vector_index import DocumentRetriever, UserVectorIndex, VectorIndexStore
+
+FIXTURES = Path(__file__).parent.parent / "fixtures" / "pdfs"
+
+
+def hashed_embedding(text, dim=512):
+    """Offline stand-in for the embedding model: hashed bag of words with digits split like subword tokens."""
+    vector = np.zeros(dim)
+    for word in re.findall(r"[a-z]+|\d", text.lower()):
+        if word in _STOPWORDS:
+            continue
+        vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % dim] += 1.0
+    return vector
+
+
+def fixture_index():
+    index = UserVectorIndex()
+    for pdf in sorted(FIXTURES.glob("*.pdf")):
+        with open(pdf, "rb") as f:
+            chunks = list(iter_chunks(f, pdf.name))
+        index.add([
+            {"content": c["content"], "file_name": pdf.name, "metadata": c["metadata"],
+             "embedding": hashed_embedding(c["content"])}
+            for c in chunks
+        ])
+    return index
+
+
+def hit_rate(index, questions, mode, k=4):
+    hits = 0
+    for q in questions:
+        vector = hashed_embedding(q["query"])
+        if mode == "vector":
+            results = index.search(vector, k)
+        elif mode == "keyword":
+            results = index.keyword_search(q["query"], k)
+        else:
+            results = index.hybrid_search(vector, q["query"], k)
+        hits += any(r["file_name"] == q["file_name"] and r["metadata"]["page"] == q["page"] for r in results)
+    return hits / len(questions)
+
+
+def test_course_codes_dates_and_rooms_tokenize_whole_and_by_part():
+    terms = tokenize("The CS-301 exam is on 18/11/2025 in LT-2")
+    assert {"cs-301", "cs301", "cs", "301", "18/11/2025", "lt-2", "lt2", "exam"} <= set(terms)
+    assert "the" not in terms
+
+
+def test_bm25_ranks_rare_exact_terms_and_respects_filters():
+    index = BM25Index()
+    index.add(0, "CS-201 exam in LT-3 on 14/11/2025")
+    index.add(1, "CS-301 exam in LT-2 on 18/11/2025")
+    index.add(2, "General exam rules apply to every exam")
+    assert index.search("where is the cs301 exam", k=3)[0][0] == 1
+    assert [doc for doc, _ in index.search("exam", k=3, allowed={0, 2})] == [2, 0]
+    assert reciprocal_rank_fusion([[1, 2, 3], [3, 1]])[0][0] == 1
+
+
+def test_hybrid_retrieval_beats_vector_search_on_fixture_pdfs():
+    questions = json.loads((FIXTURES / "questions.json").read_text())
+    exact = [q for q in questions if q["kind"] == "exact"]
+    index = fixture_index()
+
+    # hit@4: the tool hands the agent four passages
+    vector, hybrid = hit_rate(index, questions, "vector"), hit_rate(index, questions, "hybrid")
+    print(f"hit@4 vector={vector:.2f} keyword={hit_rate(index, questions, 'keyword'):.2f} hybrid={hybrid:.2f}")
+    assert hybrid >= 0.95 and hybrid > vector
+    assert hit_rate(index, exact, "hybrid") >= 0.9 > hit_rate(index, exact, "vector")
+
+
+def test_retriever_uses_hybrid_search_and_optional_reranker():
+    index = fixture_index()
+    store = VectorIndexStore()
+    store._indexes["student@example.com"] = index
+
+    class ReverseReranker(CrossEncoderReranker):
+        def rerank(self, query, passages):
+            return list(reversed(passages))
+
+    question = "Which hall is the CS-305 exam in?"
+    plain = DocumentRetriever(store, hashed_embedding)
+    top = asyncio.run(plain.retrieve("student@example.com", question, file_name="exam_schedule.pdf", k=2))
+    assert top[0]["content"].startswith("CS-305") and len(top) == 2
+
+    reranked = DocumentRetriever(store, hashed_embedding, reranker=ReverseReranker("fake-model"))
+    top = asyncio.run(reranked.retrieve("student@example.com", question, file_name="exam_schedule.pdf", k=2))
+    # Re-ranking sees the wider candidate pool, not just the top 2
+    assert len(top) == 2 and not top[0]["content"].startswith("CS-305")
+
+    # A reranker that can't load leaves the fused order alone
+    missing = CrossEncoderReranker("not-a-real/cross-encoder-model")
+    passages = [{"content": "a"}, {"content": "b"}]
+    assert missing.rerank(question, passages) == passages and not missing.enabled
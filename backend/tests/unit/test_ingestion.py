@@ -0,0 +1,185 @@
+import io
+import os
+import time
+import asyncio
+import threading
+from app.database import engine
+from app import models
+from app.services import ingestion
+from app.services.ingestion import ingest_pdf
+from app.services.ingestion_jobs import IngestionJobRunner, sweep_uploads
+
+
+def make_pdf(pages):
+    """A minimal valid PDF with one line of Helvetica text per page."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        stream = f"BT /F1 10 Tf 20 800 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    out.seek(0)
+    return out
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.events = []
+        self.rows = []
+
+    def embed(self, texts):
+        with self.lock:
+            self.events.append(("embed_start", time.perf_counter()))
+        time.sleep(0.02)
+        with self.lock:
+            self.events.append(("embed_end", time.perf_counter()))
+        return [[float(len(t))] for t in texts]
+
+    def insert(self, rows):
+        with self.lock:
+            self.events.append(("insert_start", time.perf_counter()))
+        time.sleep(0.02)
+        self.rows.extend(rows)
+
+
+def test_pages_are_embedded_and_inserted_as_a_pipeline():
+    pages = [f"Page {i} " + "Operating systems lecture notes on scheduling and paging. " * 30 for i in range(6)]
+    recorder = Recorder()
+
+    stored = asyncio.run(ingest_pdf(
+        make_pdf(pages), "os_notes.pdf", "student@example.com",
+        embed_documents=recorder.embed, insert_rows=recorder.insert, batch_size=2,
+    ))
+
+    assert stored == len(recorder.rows) >= 12
+    assert {r["metadata"]["page"] for r in recorder.rows} == set(range(6))
+    assert all(r["user_id"] == "student@example.com" and r["file_name"] == "os_notes.pdf" for r in recorder.rows)
+    # The first insert starts before the last embedding call is done
+    first_insert = min(t for name, t in recorder.events if name == "insert_start")
+    last_embed = max(t for name, t in recorder.events if name == "embed_end")
+    assert first_insert < last_embed
+
+
+def test_failed_insert_stops_the_pipeline():
+    recorder = Recorder()
+
+    def broken_insert(rows):
+        raise RuntimeError("insert failed")
+
+    pages = ["Chapter text. " * 200 for _ in range(20)]
+    try:
+        asyncio.run(ingest_pdf(make_pdf(pages), "big.pdf", "a@b.com", recorder.embed, broken_insert, batch_size=2))
+    except RuntimeError as e:
+        assert str(e) == "insert failed"
+    else:
+        raise AssertionError("expected the insert error to propagate")
+
+    # Producer was cancelled instead of embedding the whole document
+    assert sum(1 for name, _ in recorder.events if name == "embed_start") <= ingestion.MAX_PENDING_BATCHES + 2
+
+
+class FakeUpload:
+    def __init__(self, data):
+        self.stream = io.BytesIO(data)
+
+    async def read(self, size):
+        return self.stream.read(size)
+
+
+def test_failed_job_resumes_after_last_stored_batch(tmp_path):
+    models.Base.metadata.create_all(bind=engine)
+    pages = [f"Handbook section {i}. " + "Attendance rules and grading policy apply to all courses. " * 30 for i in range(4)]
+    recorder = Recorder()
+    failing = {"batch": 3}
+    embedded = []
+
+    def flaky_embed(texts):
+        embedded.append(texts[0])
+        if len(embedded) == failing["batch"]:
+            raise RuntimeError("429 quota exceeded")
+        return recorder.embed(texts)
+
+    runner = IngestionJobRunner(flaky_embed, recorder.insert, directory=str(tmp_path), batch_size=2, embed_retries=0)
+    upload = FakeUpload(make_pdf(pages).read())
+    upload.filename = "handbook.pdf"
+
+    async def scenario():
+        job = await runner.submit(upload, "student@example.com")
+        stream = runner.events(job["job_id"], "student@example.com")
+        first_run = [s async for s in stream]
+
+        failing["batch"] = None
+        await runner.retry(job["job_id"], "student@example.com")
+        second_run = [s async for s in runner.events(job["job_id"], "student@example.com")]
+        return job["job_id"], first_run, second_run
+
+    job_id, first_run, second_run = asyncio.run(scenario())
+
+    failed = first_run[-1]
+    assert failed["status"] == "failed" and "429" in failed["error"]
+    assert failed["batches_stored"] == 2 and failed["total_pages"] == 4
+    assert {"parsing", "embedding"} <= {s["status"] for s in first_run}
+
+    done = second_run[-1]
+    assert done["status"] == "done" and done["attempts"] == 2
+    assert done["chunks_stored"] == done["total_chunks"] == len(recorder.rows)
+    # Batches stored before the failure were neither re-embedded nor re-inserted
+    assert len(embedded) == 3 + (done["batches_stored"] - 2)
+    assert not (tmp_path / f"{job_id}.pdf").exists()
+
+
+def test_dropped_and_expired_uploads_are_removed(tmp_path):
+    models.Base.metadata.create_all(bind=engine)
+
+    class DroppedUpload(FakeUpload):
+        async def read(self, size):
+            if self.stream.tell():
+                raise ConnectionResetError("client went away")
+            return self.stream.read(size)
+
+    def broken_embed(texts):
+        raise RuntimeError("quota exceeded")
+
+    runner = IngestionJobRunner(broken_embed, Recorder().insert, directory=str(tmp_path), embed_retries=0)
+    dropped = DroppedUpload(b"%PDF partial")
+
+    async def scenario():
+        try:
+            await runner.submit(dropped, "student@example.com")
+        except ConnectionResetError:
+            pass
+        upload = FakeUpload(make_pdf(["Exam rules apply to every course."]).read())
+        upload.filename = "rules.pdf"
+        job = await runner.submit(upload, "student@example.com")
+        return [s async for s in runner.events(job["job_id"], "student@example.com")][-1]
+
+    failed = asyncio.run(scenario())
+    assert failed["status"] == "failed"
+    # Only the failed job's upload is left, for a retry
+    assert os.listdir(tmp_path) == [f"{failed['job_id']}.pdf"]
+
+    (tmp_path / "orphan.pdf").write_bytes(b"%PDF")
+    assert sweep_uploads(str(tmp_path), ttl_hours=1) == []
+
+    old = time.time() - 2 * 3600
+    for name in os.listdir(tmp_path):
+        os.utime(tmp_path / name, (old, old))
+    assert sorted(sweep_uploads(str(tmp_path), ttl_hours=1)) == ["orphan.pdf"]  # the job failed just now
+    assert sorted(sweep_uploads(str(tmp_path), ttl_hours=0)) == [f"{failed['job_id']}.pdf"]
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,79 @@
+import json
+import asyncio
+from pathlib import Path
+from typing import Any, List
+
+from langchain_core.tools import BaseTool
+
+from app.agent.callbacks import StreamingCallbackHandler
+from app.agent.intent_router import INTENT_MIN_CONFIDENCE, Intent, classify, format_contests, route_request
+
+CORPUS = json.loads((Path(__file__).parent.parent / "fixtures" / "intents" / "corpus.json").read_text())
+
+
+class RecordingTool(BaseTool):
+    """Returns `answer` and remembers what it was called with."""
+
+    name: str
+    description: str = "fake"
+    answer: str = ""
+    calls: List[Any] = []
+
+    def _run(self, **kwargs):
+        raise NotImplementedError
+
+    async def _arun(self, **kwargs):
+        self.calls.append(kwargs)
+        return self.answer
+
+
+def contest(title, day):
+    return {"title": title, "start_time": f"2025-11-{day:02d}T20:00:00+05:30",
+            "end_time": f"2025-11-{day:02d}T22:00:00+05:30", "location": "Online", "description": title}
+
+
+def test_labeled_corpus_is_routed_without_mistakes():
+    wrong = []
+    for example in CORPUS:
+        intent = classify(example["text"])
+        routed = intent.name if intent.confidence >= INTENT_MIN_CONFIDENCE else "agent"
+        if routed != example["intent"] or (routed != "agent" and intent.args != example["args"]):
+            wrong.append((example["text"], intent))
+    assert wrong == []
+    assert {e["intent"] for e in CORPUS} == {"contests", "roadmap", "agent"}
+
+
+def test_fast_path_streams_like_an_agent_run_and_falls_back_otherwise():
+    contests = RecordingTool(name="contest_scanner_tool", calls=[],
+                             answer=json.dumps([contest("Codeforces Round 1000", 3), contest("Codeforces Round 1001", 9)]))
+    advisor = RecordingTool(name="advisor_tool", calls=[], answer=json.dumps({"goal": "react", "steps": []}))
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def ask(message):
+        return await route_request(message, [contests, advisor], {"callbacks": [StreamingCallbackHandler(queue)]})
+
+    answer = asyncio.run(ask("show upcoming codeforces contests"))
+    assert contests.calls == [{"site_name": "codeforces"}]
+    assert "Codeforces Round 1000** — Mon, 03 Nov 2025, 20:00 IST (120 min)" in answer
+
+    events = []
+    while not queue.empty():
+        kind, data = queue.get_nowait().strip().split("\n")
+        events.append((kind.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    assert [kind for kind, _ in events] == ["tool_start", "tool_end", "final_chunk"]
+    assert events[0][1]["tool"] == "contest_scanner_tool" and events[0][1]["call_id"] == events[1][1]["call_id"]
+    assert events[2][1]["output"] == answer
+
+    assert asyncio.run(ask("Create a roadmap for: React")) == advisor.answer
+    assert advisor.calls == [{"goal": "react"}]
+    assert asyncio.run(ask("schedule the upcoming codeforces contests")) is None
+    assert asyncio.run(route_request("codeforces contests", [advisor])) is None  # tool not available
+    assert len(contests.calls) == 1
+
+
+def test_contest_answers_stay_short():
+    many = json.dumps([contest(f"Contest {i}", i % 28 + 1) for i in range(40)])
+    answer = format_contests(many, Intent("contests", 0.9, "contest_scanner_tool", {}))
+    assert answer.count("\n- **") == 15 and "...and 25 more." in answer
+    assert "no upcoming contests on AtCoder" in format_contests("[]", Intent("contests", 0.9, None,
+                                                                             {"site_name": "atcoder"}))
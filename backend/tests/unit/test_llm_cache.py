@@ -0,0 +1,100 @@
+import uuid
+import asyncio
+from datetime import timedelta
+
+from langchain_core.messages import AIMessage
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableLambda
+
+from app import models
+from app.database import engine
+from app.services.llm_cache import CachedLLM, LLMResultCache, cache_key
+
+
+class CountingModel:
+    def __init__(self, reply="{\"title\": \"Hackathon\"}"):
+        self.prompts = []
+        self.reply = reply
+
+    def __call__(self, prompt):
+        self.prompts.append(prompt.to_string())
+        return AIMessage(content=self.reply)
+
+
+def make_chain(model, version=1, **kwargs):
+    prompt = ChatPromptTemplate.from_template("Extract the event from: {text}")
+    return prompt | CachedLLM(RunnableLambda(model), "event_parser_test", version, cache=kwargs.pop("cache"), **kwargs)
+
+
+def test_hits_skip_the_model_until_the_template_version_changes():
+    models.Base.metadata.create_all(bind=engine)
+    cache = LLMResultCache()
+    model = CountingModel()
+    text = f"Hackathon {uuid.uuid4().hex} on June 3rd"
+
+    first = asyncio.run(make_chain(model, cache=cache).ainvoke({"text": text}))
+    again = make_chain(model, cache=cache).invoke({"text": text})
+    streamed = asyncio.run(_collect(make_chain(model, cache=cache).astream({"text": text})))
+    assert first.content == again.content == "".join(streamed) == model.reply
+    assert len(model.prompts) == 1 and len(streamed) == 1  # a hit arrives whole
+
+    make_chain(model, version=2, cache=cache).invoke({"text": text})
+    assert len(model.prompts) == 2
+
+    stats = cache.snapshot()["templates"]
+    assert stats["event_parser_test@1"]["hits"] == 2 and stats["event_parser_test@1"]["hit_rate"] == round(2 / 3, 3)
+    assert stats["event_parser_test@2"]["misses"] == 1 and stats["event_parser_test@2"]["stored"] == 1
+
+
+def test_rejected_and_expired_outputs_are_not_reused():
+    models.Base.metadata.create_all(bind=engine)
+    cache = LLMResultCache()
+    text = f"Seminar {uuid.uuid4().hex}"
+
+    garbage = CountingModel(reply="Sorry, I could not find anything.")
+    chain = make_chain(garbage, cache=cache, cacheable=lambda reply: "{" in reply)
+    chain.invoke({"text": text})
+    chain.invoke({"text": text})
+    assert len(garbage.prompts) == 2
+
+    model = CountingModel()
+    chain = make_chain(model, version=3, cache=cache, ttl=timedelta(seconds=-1))
+    chain.invoke({"text": text})
+    chain.invoke({"text": text})
+    assert len(model.prompts) == 2 and cache.stats["event_parser_test@3"]["expired"] == 1
+
+
+def test_refresh_skips_the_lookup_and_replaces_the_entry():
+    models.Base.metadata.create_all(bind=engine)
+    cache = LLMResultCache()
+    text = f"Workshop {uuid.uuid4().hex}"
+
+    make_chain(CountingModel(reply="{\"v\": 1}"), version=4, cache=cache).invoke({"text": text})
+    fresh = CountingModel(reply="{\"v\": 2}")
+    assert make_chain(fresh, version=4, cache=cache, refresh=True).invoke({"text": text}).content == fresh.reply
+    assert len(fresh.prompts) == 1
+    assert make_chain(CountingModel(), version=4, cache=cache).invoke({"text": text}).content == fresh.reply
+
+
+def test_least_recently_used_entries_are_evicted_past_the_bounds():
+    models.Base.metadata.create_all(bind=engine)
+    LLMResultCache(max_entries=0).evict()
+    cache = LLMResultCache(max_entries=3)
+    keys = [cache_key("m", "lru@1", f"prompt {i}") for i in range(5)]
+    for i, key in enumerate(keys):
+        cache.store(key, "m", "lru@1", f"answer {i}", timedelta(hours=1), latency=0.5)
+    assert cache.lookup(keys[0], "lru@1") == "answer 0"  # now the most recently used
+
+    assert cache.evict() == 2
+    assert [cache.lookup(k, "lru@1") for k in keys] == ["answer 0", None, None, "answer 3", "answer 4"]
+    snapshot = cache.snapshot()
+    assert snapshot["entries"] == 3 and snapshot["templates"]["lru@1"]["evicted"] == 2
+    assert snapshot["templates"]["lru@1"]["saved_seconds"] == 4 * 0.5  # four hits on 0.5s calls
+
+    cache.max_bytes = len("answer 4")
+    cache.evict()
+    assert cache.snapshot()["entries"] == 1
+
+
+async def _collect(stream):
+    return [chunk.content async for chunk in stream]
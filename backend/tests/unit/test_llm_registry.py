@@ -0,0 +1,126 @@
+import asyncio
+from typing import Any, List
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.prompts import ChatPromptTemplate
+
+from app.services.llm_registry import LLMRegistry, acting_for, parse_model_limits
+
+
+class QuotaExceeded(Exception):
+    code = 429
+    retry_after = 0.2
+
+
+class SlowChatModel(BaseChatModel):
+    """Answers after `latency` seconds and remembers who was in flight at the same time."""
+
+    latency: float = 0.02
+    log: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-fake"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        raise NotImplementedError
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        user = messages[-1].content.split()[0]
+        self.log["active"].append(user)
+        self.log["peak"] = max(self.log["peak"], len(self.log["active"]))
+        self.log["peak_by_user"][user] = max(self.log["peak_by_user"].get(user, 0), self.log["active"].count(user))
+        await asyncio.sleep(self.latency)
+        self.log["active"].remove(user)
+        self.log["finished"].append(user)
+        if "fail" in messages[-1].content:
+            raise QuotaExceeded("RESOURCE_EXHAUSTED")
+        message = AIMessage(content="ok", usage_metadata={"input_tokens": 7, "output_tokens": 3, "total_tokens": 10})
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+class StreamingChatModel(SlowChatModel):
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        for word in ("one", "two", "three"):
+            await asyncio.sleep(0)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word))
+
+
+def make_registry(concurrency=2, per_user=2):
+    log = {"active": [], "finished": [], "peak": 0, "peak_by_user": {}}
+    built: List[tuple] = []
+
+    def factory(model, temperature):
+        built.append((model, temperature))
+        return SlowChatModel(log=log)
+
+    registry = LLMRegistry(factory=factory, limits={"fake": (concurrency, 10_000_000, 100_000)}, per_user=per_user)
+    return registry, log, built
+
+
+def test_one_shared_client_per_model_and_temperature():
+    registry, _, built = make_registry()
+    assert registry.get("fake") is registry.get("fake", 0) is registry.get("fake", 0.0)
+    assert registry.get("fake", 0.7) is not registry.get("fake")
+    assert built == [("fake", 0.0), ("fake", 0.7)]
+    assert parse_model_limits("pro=2/250000, flash=16")["pro"][:2] == (2, 250000)
+
+
+def test_excess_calls_queue_fairly_within_global_and_per_user_caps():
+    registry, log, _ = make_registry(concurrency=3, per_user=2)
+    chain = ChatPromptTemplate.from_template("{user} {n}") | registry.get("fake")
+
+    async def ask(user, n):
+        with acting_for(user):
+            return (await chain.ainvoke({"user": user, "n": n})).content
+
+    async def main():
+        burst = [asyncio.create_task(ask("alice", n)) for n in range(8)]
+        await asyncio.sleep(0.005)
+        late = [asyncio.create_task(ask("bob", n)) for n in range(2)]
+        return await asyncio.gather(*burst, *late)
+
+    answers = asyncio.run(main())
+    assert answers == ["ok"] * 10  # nothing is rejected, only delayed
+    assert log["peak"] <= 3 and log["peak_by_user"]["alice"] <= 2 and log["peak_by_user"]["bob"] <= 2
+    # Bob arrived behind eight of Alice's calls but is not served last
+    assert max(i for i, user in enumerate(log["finished"]) if user == "bob") < 7
+
+    stats = registry.snapshot()["models"]["fake"]
+    assert stats["calls"] == 10 and stats["input_tokens"] == 70 and stats["output_tokens"] == 30
+    assert stats["in_flight"] == 0 and stats["waiting"] == 0 and stats["queued_p95_s"] > 0
+
+
+def test_failures_free_their_slot_and_rate_limits_pause_the_model():
+    registry, _, _ = make_registry(concurrency=1)
+    llm = registry.get("fake")
+
+    async def main():
+        results = await asyncio.gather(llm.ainvoke("carol fail"), llm.ainvoke("carol fine"), return_exceptions=True)
+        return results
+
+    failed, answered = asyncio.run(main())
+    assert isinstance(failed, QuotaExceeded) and answered.content == "ok"
+    stats = registry.snapshot()["models"]["fake"]
+    assert stats["calls"] == 2 and stats["errors"] == 1 and stats["in_flight"] == 0
+    # The 429's Retry-After held the queued call back
+    assert [c["ok"] for c in registry.calls] == [False, True] and registry.calls[1]["queued_s"] >= 0.2
+
+
+def test_a_stream_closed_early_is_not_a_failure():
+    registry = LLMRegistry(factory=lambda model, temperature: StreamingChatModel(log={}),
+                           limits={"fake": (1, 10_000_000, 100_000)})
+    llm = registry.get("fake")
+
+    async def main():
+        stream = llm.astream("dave hello")
+        first = await stream.__anext__()
+        await stream.aclose()
+        return first
+
+    assert asyncio.run(main()).content == "one"
+    stats = registry.snapshot()["models"]["fake"]
+    assert stats["calls"] == 1 and stats["errors"] == 0 and stats["in_flight"] == 0
+    assert [c["ok"] for c in registry.calls] == [True]
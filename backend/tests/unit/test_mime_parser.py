@@ -0,0 +1,89 @@
+import json
+import base64
+import asyncio
+from pathlib import Path
+from app.agent.mime_parser import parse_message, extract_body, MAX_BODY_BYTES
+from app.agent.tools.gmail_reader_tool import GmailReaderTool
+
+CORPUS = json.loads((Path(__file__).parent.parent / "fixtures" / "gmail" / "messages.json").read_text(encoding="utf-8"))
+
+
+def test_recorded_payloads_extract_readable_bodies():
+    failures = []
+    for case in CORPUS:
+        body = parse_message(case["message"])["body"]
+        missing = [s for s in case["expected_contains"] if s not in body]
+        leaked = [s for s in case["expected_excludes"] if s in body]
+        if missing or leaked:
+            failures.append((case["name"], missing, leaked))
+
+    assert failures == []
+
+
+def test_oversized_bodies_are_capped():
+    text = "Lecture notes for Operating Systems, unit 3.\n" * 20000
+    payload = {"mimeType": "text/plain", "body": {"data": base64.urlsafe_b64encode(text.encode()).decode()}}
+
+    body = extract_body(payload)
+
+    assert body.startswith("Lecture notes") and len(body.encode()) <= MAX_BODY_BYTES
+
+
+class FakeGmailService:
+    """Serves the recorded corpus; messages().get() must go through a batch."""
+
+    def __init__(self, messages):
+        self.store = {m["id"]: m for m in messages}
+        self.batches = []
+
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def list(self, userId, q, maxResults):
+        return FakeCall(lambda: {"messages": [{"id": i} for i in list(self.store)[:maxResults]]})
+
+    def get(self, userId, id, format):
+        return FakeCall(lambda: self.store[id], message_id=id)
+
+    def new_batch_http_request(self, callback):
+        return FakeBatch(self, callback)
+
+
+class FakeCall:
+    def __init__(self, fn, message_id=None):
+        self.fn = fn
+        self.message_id = message_id
+
+    def execute(self):
+        if self.message_id is not None:
+            raise AssertionError("messages().get() was executed outside a batch")
+        return self.fn()
+
+
+class FakeBatch:
+    def __init__(self, service, callback):
+        self.service = service
+        self.callback = callback
+        self.calls = []
+
+    def add(self, call, request_id):
+        self.calls.append((request_id, call))
+
+    def execute(self):
+        self.service.batches.append(len(self.calls))
+        for request_id, call in self.calls:
+            self.callback(request_id, call.fn(), None)
+
+
+def test_reader_fetches_messages_in_one_batch():
+    service = FakeGmailService([c["message"] for c in CORPUS])
+    tool = GmailReaderTool(service=service, user_email="reader@example.com")
+
+    result = asyncio.run(tool._arun("in:inbox"))
+
+    assert service.batches == [5]
+    assert "Subject: Placement drive: Acme Corp" in result
+    assert "Registrations for Smart India Hackathon close on 30 April." in result
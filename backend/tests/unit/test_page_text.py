@@ -0,0 +1,56 @@
+from pathlib import Path
+from app.agent.page_text import PageTextExtractor, extract_main_text
+
+PAGE = (Path(__file__).parent.parent / "fixtures" / "pages" / "hackathon_page.html").read_text(encoding="utf-8")
+
+
+def test_main_content_keeps_paragraphs_and_drops_boilerplate():
+    text = extract_main_text(PAGE)
+    paragraphs = text.split("\n\n")
+
+    assert paragraphs[0] == "Smart India Hackathon 2025: Internal Round"
+    assert paragraphs[1].startswith("The internal selection round")
+    assert "- 10:00 AM: Pitches, 7 minutes per team" in paragraphs
+    assert paragraphs[-1] == "Top 5 teams go to the national round."
+    for boilerplate in ("cookies", "Contact", "FAQ", "Hack of the month", "Share on", "all rights reserved", "dataLayer"):
+        assert boilerplate not in text
+
+
+def test_explicit_main_element_wins():
+    html = (
+        "<html><body><div class='content'><p>" + "Link list, " * 40 + "</p></div>"
+        "<main><p>" + "Exam schedule for the autumn semester is out. " * 6 + "</p></main></body></html>"
+    )
+
+    assert extract_main_text(html).startswith("Exam schedule for the autumn semester is out.")
+
+
+def test_reading_stops_once_enough_text_is_collected():
+    paragraphs = "".join(f"<p>Contest {i}: " + "registrations are open, hurry. " * 15 + "</p>\n" for i in range(2000))
+    html = ("<html><body><article>" + paragraphs + "</article></body></html>").encode()
+    extractor = PageTextExtractor(max_chars=2000)
+
+    for offset in range(0, len(html), 16 * 1024):
+        if extractor.feed(html[offset:offset + 16 * 1024]):
+            break
+
+    assert extractor.done and extractor.bytes_read < len(html) / 10
+    assert 1500 < len(extractor.result()) <= 2000
+
+
+def test_meta_charset_is_honoured():
+    html = '<html><head><meta charset="windows-1252"></head><body><p>Café “quiz” night</p></body></html>'
+
+    assert extract_main_text(html.encode("cp1252")) == "Café “quiz” night"
+
+
+def test_class_hints_never_drop_the_main_content():
+    article = "<p>" + "Registrations for the campus hackathon close on Friday, so apply soon. " * 5 + "</p>"
+
+    no_sidebar = f"<html><body class='no-sidebar'><div>{article}</div><div class='sidebar'><p>Ads here</p></div></body></html>"
+    assert extract_main_text(no_sidebar).startswith("Registrations for the campus hackathon")
+    assert "Ads here" not in extract_main_text(no_sidebar)
+
+    wrapped = f"<html><body><div class='menu-wrapper'><ul class='menu'><li>Home</li></ul><main>{article}</main></div></body></html>"
+    assert extract_main_text(wrapped).startswith("Registrations for the campus hackathon")
+    assert "Home" not in extract_main_text(wrapped)
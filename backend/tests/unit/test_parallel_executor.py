@@ -0,0 +1,88 @@
+import json
+import asyncio
+from typing import Any, List
+
+from langchain.agents import BaseMultiActionAgent
+from langchain.agents.output_parsers.tools import ToolAgentAction
+from langchain_core.agents import AgentFinish
+from langchain_core.tools import BaseTool
+
+from app.agent.callbacks import StreamingCallbackHandler
+from app.agent.parallel_executor import ParallelAgentExecutor
+
+
+class SleepTool(BaseTool):
+    """Sleeps for the requested seconds and tracks how many calls overlap."""
+
+    name: str = "sleep"
+    description: str = "sleeps"
+    log: Any = None
+    service: Any = None
+
+    def _run(self, seconds: float):
+        raise NotImplementedError
+
+    async def _arun(self, seconds: float):
+        self.log["active"] += 1
+        self.log["peak"] = max(self.log["peak"], self.log["active"])
+        await asyncio.sleep(seconds)
+        self.log["active"] -= 1
+        return f"slept {seconds}"
+
+
+class FanOutAgent(BaseMultiActionAgent):
+    """Asks for every call in `delays` at once, then finishes with the observations."""
+
+    delays: List[float]
+    tool: str = "sleep"
+
+    @property
+    def input_keys(self):
+        return ["input"]
+
+    def plan(self, intermediate_steps, callbacks=None, **kwargs):
+        raise NotImplementedError
+
+    async def aplan(self, intermediate_steps, callbacks=None, **kwargs):
+        if intermediate_steps:
+            return AgentFinish({"output": [step[1] for step in intermediate_steps]}, "")
+        return [ToolAgentAction(tool=self.tool, tool_input={"seconds": d}, log="", message_log=[], tool_call_id=f"call_{i}")
+                for i, d in enumerate(self.delays)]
+
+
+def run(delays, max_parallel_tools, service=None, callbacks=None):
+    log = {"active": 0, "peak": 0}
+    executor = ParallelAgentExecutor(agent=FanOutAgent(delays=delays),
+                                     tools=[SleepTool(log=log, service=service)],
+                                     max_parallel_tools=max_parallel_tools)
+    result = asyncio.run(executor.ainvoke({"input": "go"}, config={"callbacks": callbacks or []}))
+    return result["output"], log
+
+
+def test_calls_of_one_step_run_concurrently_up_to_the_cap_in_order():
+    output, log = run([0.05, 0.01, 0.03, 0.02, 0.04], max_parallel_tools=3)
+    assert log["peak"] == 3
+    assert output == ["slept 0.05", "slept 0.01", "slept 0.03", "slept 0.02", "slept 0.04"]
+
+    _, log = run([0.01, 0.01, 0.01], max_parallel_tools=1)
+    assert log["peak"] == 1
+
+
+def test_tools_sharing_a_google_service_never_overlap():
+    _, log = run([0.01, 0.01, 0.01], max_parallel_tools=3, service=object())
+    assert log["peak"] == 1
+
+
+def test_each_tool_end_streams_as_its_tool_finishes():
+    queue: asyncio.Queue = asyncio.Queue()
+    run([0.06, 0.01, 0.03], max_parallel_tools=3, callbacks=[StreamingCallbackHandler(queue)])
+
+    events = []
+    while not queue.empty():
+        kind, data = queue.get_nowait().strip().split("\n")
+        events.append((kind.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    starts = [data["call_id"] for kind, data in events if kind == "tool_start"]
+    ends = [(data["call_id"], data["tool"], data["output"]) for kind, data in events if kind == "tool_end"]
+    assert starts == ["call_0", "call_1", "call_2"]
+    assert ends == [("call_1", "sleep", "slept 0.01"), ("call_2", "sleep", "slept 0.03"),
+                    ("call_0", "sleep", "slept 0.06")]
@@ -0,0 +1,31 @@
+import json
+from datetime import timedelta
+from app.database import engine
+from app import models
+from app.services import roadmap_cache
+from app.services.roadmap_cache import canonicalize_goal, get_cached_roadmap, store_roadmap
+
+
+def test_canonicalize_goal_merges_spellings():
+    key = canonicalize_goal("Learn DSA")
+
+    assert key == "data structures and algorithms"
+    assert canonicalize_goal("learn  ds & algo") == key
+    assert canonicalize_goal("Roadmap for Data Structures and Algorithms") == key
+    assert canonicalize_goal("prepare for the SIH hackathon") == "sih hackathon"
+    assert canonicalize_goal("learn C++") == "c++"
+
+
+def test_store_and_lookup_roadmap(monkeypatch):
+    models.Base.metadata.create_all(bind=engine)
+
+    response = json.dumps({"advisor_tool_response": {"goal": "DSA", "steps": []}})
+    store_roadmap("learn DSA", response)
+
+    cached = get_cached_roadmap("How to learn data structures & algorithms?")
+    assert cached == (response, False)
+
+    monkeypatch.setattr(roadmap_cache, "ROADMAP_TTL", timedelta(seconds=-1))
+    assert get_cached_roadmap("dsa") == (response, True)
+
+    assert get_cached_roadmap("learn underwater basket weaving") is None
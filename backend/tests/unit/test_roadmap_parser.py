@@ -0,0 +1,62 @@
+import json
+import random
+from app.agent.roadmap_parser import IncrementalRoadmapParser, normalize_roadmap
+
+ROADMAP = {
+    "goal": "Learn React",
+    "steps": [
+        {"title": "Basics", "tasks": ["JSX", "Components and props"]},
+        {"title": "State", "tasks": ["useState", "useEffect {with braces}"]},
+        {"title": "Projects", "tasks": ["Build a \"todo\" app"]},
+    ],
+}
+
+
+def feed_in_chunks(parser, text, seed=0):
+    rng = random.Random(seed)
+    steps, i = [], 0
+    while i < len(text):
+        n = rng.randint(1, 12)
+        steps.extend(parser.feed(text[i:i + n]))
+        i += n
+    return steps
+
+
+def test_steps_are_emitted_as_they_close():
+    text = "Sure! Here is your roadmap:\n```json\n" + json.dumps(ROADMAP, indent=2) + "\n```"
+    parser = IncrementalRoadmapParser()
+
+    # Nothing is emitted until the first step's closing brace has arrived
+    first_close = text.index("}")
+    assert parser.feed(text[:first_close]) == []
+    assert parser.feed(text[first_close]) == [ROADMAP["steps"][0]]
+
+    assert feed_in_chunks(parser, text[first_close + 1:]) == ROADMAP["steps"][1:]
+    assert parser.finish() == ROADMAP
+
+
+def test_tolerates_llm_json_mistakes():
+    text = (
+        '{“goal”: “Learn DSA”, "steps": [\n'
+        '  {"title": "Arrays", "tasks": ["Two pointers",\n"Prefix sums",],},\n'
+        '  {"title": "Graphs", "tasks": ["BFS\tand DFS", "Don\\\'t skip Dijkstra"]},\n'
+        ']}'
+    )
+    parser = IncrementalRoadmapParser()
+    steps = feed_in_chunks(parser, text, seed=1)
+
+    assert [s["title"] for s in steps] == ["Arrays", "Graphs"]
+    parsed = parser.finish()
+    assert parsed["goal"] == "Learn DSA"
+    assert parsed["steps"][1]["tasks"] == ["BFS and DFS", "Don't skip Dijkstra"]
+
+
+def test_truncated_response_and_legacy_stages():
+    parser = IncrementalRoadmapParser()
+    parser.feed('{"title": "ML", "stages": [{"name": "Math", "duration": "2 weeks", "topics": ["Linear alg')
+
+    roadmap = normalize_roadmap(parser.finish(), "learn ML")
+    assert roadmap == {
+        "goal": "ML",
+        "steps": [{"title": "Math", "tasks": ["Duration: 2 weeks", "Linear alg"]}],
+    }
@@ -0,0 +1,181 @@
+import os
+import time
+import threading
+import numpy as np
+from app.services.segment_store import SegmentStore, UserSegments
+from app.services.vector_index import UserVectorIndex, VectorIndexStore
+
+
+def make_rows(count, dim=32, files=("syllabus.pdf", "handbook.pdf"), seed=0, start=0):
+    vectors = np.random.default_rng(seed).normal(size=(count, dim))
+    return [
+        {"content": f"chunk {start + i}", "file_name": files[i % len(files)], "metadata": {"page": start + i},
+         "embedding": vectors[i].tolist()}
+        for i in range(count)
+    ], vectors
+
+
+def brute_force(vectors, query, k):
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    return list(np.argsort(-(unit @ (query / np.linalg.norm(query))))[:k])
+
+
+def test_segments_roll_over_reopen_and_match_exact_search(tmp_path):
+    rows, vectors = make_rows(250)
+    segments = UserSegments(str(tmp_path), dtype="float16", segment_rows=64)
+    for start in range(0, 250, 70):
+        segments.append(rows[start:start + 70])
+    assert len(segments.manifest["segments"]) == 4 and len(segments) == 250
+
+    reopened = UserSegments(str(tmp_path))
+    assert reopened.dtype == "float16" and len(reopened) == 250
+    # Zero-copy: vectors are served from the mapped file, not a heap copy
+    assert all(isinstance(arrays["vec"], np.memmap) for _, _, arrays in reopened._snapshot())
+
+    for target in (0, 63, 64, 249):
+        query = vectors[target] + 0.05
+        assert [i for i, _ in reopened.search(query, k=5)] == brute_force(vectors, query, 5)
+    assert reopened.rows([64, 3]) == [
+        {"content": "chunk 64", "file_name": "syllabus.pdf", "metadata": {"page": 64}},
+        {"content": "chunk 3", "file_name": "handbook.pdf", "metadata": {"page": 3}},
+    ]
+    handbook = reopened.search(vectors[10], k=10, file_name="handbook.pdf")
+    assert all(i % 2 == 1 for i, _ in handbook)
+
+
+def test_int8_is_a_quarter_of_float32_and_keeps_the_ranking(tmp_path):
+    rows, vectors = make_rows(500, dim=128)
+    segments = UserSegments(str(tmp_path), dtype="int8")
+    segments.append(rows)
+    vec_bytes = os.path.getsize(segments._file(segments.manifest, 1, "vec"))
+    assert vec_bytes == 500 * 128
+
+    agree = 0
+    for target in range(0, 500, 25):
+        query = vectors[target] + np.random.default_rng(target).normal(scale=0.3, size=128)
+        expected = brute_force(vectors, query, 10)
+        got = [i for i, _ in segments.search(query, k=10)]
+        assert got[0] == expected[0]
+        agree += len(set(got) & set(expected))
+    assert agree / (20 * 10) >= 0.9
+
+
+def test_deleted_documents_are_hidden_then_compacted_away(tmp_path):
+    rows, vectors = make_rows(200)
+    segments = UserSegments(str(tmp_path), segment_rows=64)
+    segments.append(rows)
+    before = segments.disk_bytes()
+
+    assert segments.delete_file("handbook.pdf") == 100
+    assert segments.file_names == ["syllabus.pdf"] and segments.dead_fraction() == 0.5
+    assert all(i % 2 == 0 for i, _ in segments.search(vectors[1], k=20))
+    assert segments.search(vectors[1], k=5, file_name="handbook.pdf") == []
+
+    assert segments.compact() == 100
+    assert len(segments) == 100 and segments.generation == 1 and segments.disk_bytes() < before
+    assert not os.path.exists(tmp_path / "gen-0000")
+    assert segments.rows([0, 99]) == [
+        {"content": "chunk 0", "file_name": "syllabus.pdf", "metadata": {"page": 0}},
+        {"content": "chunk 198", "file_name": "syllabus.pdf", "metadata": {"page": 198}},
+    ]
+
+    # A re-upload under the same name is a new document
+    again, _ = make_rows(4, files=("handbook.pdf",), seed=1, start=200)
+    segments.append(again)
+    assert segments.file_names == ["handbook.pdf", "syllabus.pdf"] and len(segments) == 104
+
+
+def test_interrupted_append_is_ignored_and_truncated(tmp_path):
+    rows, vectors = make_rows(30)
+    segments = UserSegments(str(tmp_path))
+    segments.append(rows[:20])
+    # A crash after writing data but before the manifest: garbage past the recorded end
+    for ext in ("vec", "fid", "off", "jsonl"):
+        with open(segments._file(segments.manifest, 1, ext), "ab") as f:
+            f.write(b"\xff" * 37)
+
+    reopened = UserSegments(str(tmp_path))
+    assert len(reopened) == 20 and reopened.search(vectors[7], k=1)[0][0] == 7
+    reopened.append(rows[20:])
+    assert reopened.rows([19, 20, 29])[1]["content"] == "chunk 20"
+    assert [i for i, _ in UserSegments(str(tmp_path)).search(vectors[25], k=1)] == [25]
+
+
+def test_index_store_reopens_from_disk_and_follows_compaction(tmp_path):
+    rows, vectors = make_rows(60)
+    loads = []
+
+    def load_rows(user):
+        loads.append(user)
+        return [dict(r, user_id=user) for r in rows[:40]]
+
+    store = VectorIndexStore(load_rows=load_rows, segment_store=SegmentStore(str(tmp_path)))
+    assert store.search("student@example.com", vectors[5], k=1)[0]["content"] == "chunk 5"
+    store.add_rows([dict(r, user_id="student@example.com") for r in rows[40:]])
+
+    # A fresh worker opens the segments instead of backfilling from Supabase again
+    restarted = VectorIndexStore(load_rows=load_rows, segment_store=SegmentStore(str(tmp_path)))
+    assert restarted.search("student@example.com", vectors[55], k=1)[0]["content"] == "chunk 55"
+    assert loads == ["student@example.com"]
+
+    assert restarted.delete_file("student@example.com", "syllabus.pdf") == 30
+    assert restarted.compact("student@example.com") == 30
+    hit = restarted.search("student@example.com", vectors[7], k=1, query_text="chunk 7")[0]
+    assert hit["content"] == "chunk 7" and len(restarted.get("student@example.com")) == 30
+
+
+def test_ann_index_is_built_from_the_segments(monkeypatch):
+    from app.services import vector_index
+    monkeypatch.setattr(vector_index, "FLAT_MAX_VECTORS", 50)
+    rows, vectors = make_rows(120)
+    index = UserVectorIndex()
+    index.add(rows[:100])
+    index.add(rows[100:])
+    assert index.kind == "hnsw" and index.index.ntotal == 120
+    index.delete_file("handbook.pdf")
+    assert {h["file_name"] for h in index.search(vectors[3], k=10)} == {"syllabus.pdf"}
+
+
+def test_backfill_keeps_the_query_models_chunks_and_runs_once(tmp_path):
+    ours, vectors = make_rows(30)
+    unlabeled, _ = make_rows(10, seed=2, start=30)  # uploaded before chunks carried their model
+    minilm, _ = make_rows(20, dim=12, files=("frontend.pdf",), seed=1, start=100)
+    other_model, _ = make_rows(5, seed=3, files=("other.pdf",), start=200)
+    for row in ours:
+        row["metadata"]["embedding_model"] = "models/embedding-001"
+    for row in other_model:
+        row["metadata"]["embedding_model"] = "models/text-embedding-004"
+    loads = []
+
+    def load_rows(user):
+        loads.append(user)
+        time.sleep(0.05)  # Supabase round-trips; the other first queries arrive meanwhile
+        return minilm + ours + unlabeled + other_model
+
+    path = tmp_path / "poisoned"
+    store = SegmentStore(str(path))
+    # A store backfilled before the filter: the frontend's 384-dim rows fixed its dimension
+    store.for_user("student@example.com").append(minilm)
+    index_store = VectorIndexStore(load_rows=load_rows, segment_store=store,
+                                   embedding_model="models/embedding-001", dim=32)
+
+    def first_query():
+        index_store.search("student@example.com", vectors[3], k=1)
+
+    threads = [threading.Thread(target=first_query) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    index = index_store.get("student@example.com")
+    assert loads == ["student@example.com"] and len(index) == 40
+    assert sorted(index.file_names) == ["handbook.pdf", "syllabus.pdf"] and index.segments.dim == 32
+    assert index_store.search("student@example.com", vectors[3], k=1)[0]["content"] == "chunk 3"
+
+    # New uploads are stored even if MiniLM rows arrive in the same batch
+    fresh, fresh_vectors = make_rows(2, seed=4, start=300)
+    for row in fresh + minilm[:2]:
+        row["user_id"] = "student@example.com"
+    index_store.add_rows(minilm[:2] + fresh)
+    assert len(index) == 42
@@ -0,0 +1,84 @@
+import os
+import sys
+import asyncio
+import threading
+import subprocess
+
+import pytest
+
+from app.services.container import MissingConfigurationError, ServiceContainer, require_env
+
+
+def test_services_are_built_once_on_first_use():
+    calls = []
+    barrier = threading.Barrier(8)
+
+    def factory():
+        calls.append(1)
+        return object()
+
+    container = ServiceContainer()
+    container.register("client", factory)
+    assert calls == [] and not container.is_ready("client")
+
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(container.get("client"))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1 and all(r is results[0] for r in results)
+
+    container.reset("client")
+    assert container.get("client") is not results[0] and len(calls) == 2
+    with pytest.raises(KeyError):
+        container.get("unknown")
+
+
+def test_missing_configuration_fails_on_use_and_warm_up_carries_on(monkeypatch):
+    monkeypatch.delenv("CAMPUS_TEST_KEY", raising=False)
+    container = ServiceContainer()
+    container.register("needs_key", lambda: require_env("CAMPUS_TEST_KEY"))
+    container.register("fine", lambda: "ok")
+    container.register("cold", lambda: "built later", warm=False)
+
+    asyncio.run(container.warm_up())
+    snapshot = container.snapshot()
+    assert snapshot["fine"]["ready"] and not snapshot["cold"]["ready"]
+    assert not snapshot["needs_key"]["ready"] and "CAMPUS_TEST_KEY" in snapshot["needs_key"]["error"]
+    with pytest.raises(MissingConfigurationError):
+        container.get("needs_key")
+
+    monkeypatch.setenv("CAMPUS_TEST_KEY", "secret")
+    assert container.get("needs_key") == "secret" and container.snapshot()["needs_key"]["error"] is None
+
+
+def test_importing_the_app_loads_no_llm_or_supabase_clients():
+    backend = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = dict(os.environ, GOOGLE_API_KEY="", SUPABASE_URL="", SUPABASE_SERVICE_KEY="")
+    code = ("import sys, app.main; "
+            "print(sorted(m for m in ('langchain', 'langchain_community', 'langchain_google_genai', 'supabase') "
+            "if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], cwd=backend, env=env, capture_output=True, text=True)
+    assert out.returncode == 0, out.stderr
+    assert out.stdout.strip().splitlines()[-1] == "[]"
+
+
+def test_embeddings_built_off_the_loop_close_their_helper_loop(monkeypatch):
+    from app.services import container
+
+    monkeypatch.setenv("GOOGLE_API_KEY", os.getenv("GOOGLE_API_KEY") or "test-key")
+    loops = []
+    new_event_loop = asyncio.new_event_loop
+    monkeypatch.setattr(asyncio, "new_event_loop", lambda: loops.append(new_event_loop()) or loops[-1])
+    built = []
+    worker = threading.Thread(target=lambda: built.append(container._embeddings()))
+    worker.start()
+    worker.join()
+
+    assert built and len(loops) == 1 and loops[0].is_closed()
@@ -12,4 +12,18 @@ def test_file_upload(client):
 
     response = client.post("/api/files/upload", files=files, headers=headers)
 
-    assert response.status_code in [200, 500]
\ No newline at end of file
+    assert response.status_code in [202, 500]
+
+def test_upload_returns_job_and_status(client):
+    files = {"file": ("notes.pdf", io.BytesIO(b"%PDF-1.4 fake pdf"), "application/pdf")}
+    headers = {"Authorization": "Bearer fake-token"}
+
+    response = client.post("/api/files/upload", files=files, headers=headers)
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    status = client.get(f"/api/files/jobs/{job_id}", headers=headers)
+    assert status.status_code == 200
+    assert status.json()["file_name"] == "notes.pdf"
+
+    assert client.get("/api/files/jobs/does-not-exist", headers=headers).status_code == 404
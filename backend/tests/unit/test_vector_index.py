@@ -0,0 +1,81 @@
+import asyncio
+import numpy as np
+from app.services import vector_index
+from app.services.vector_index import DocumentRetriever, UserVectorIndex, VectorIndexStore
+from app.agent.tools.rag_tool import DocumentQueryTool
+
+
+def make_rows(count, user="student@example.com", files=("syllabus.pdf", "handbook.pdf"), dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(count, dim))
+    return [
+        {
+            "user_id": user,
+            "file_name": files[i % len(files)],
+            "content": f"chunk {i}",
+            # Stored the way PostgREST returns pgvector columns
+            "embedding": "[" + ",".join(f"{x:.6f}" for x in vectors[i]) + "]",
+            "metadata": {"source": files[i % len(files)], "page": i},
+        }
+        for i in range(count)
+    ], vectors
+
+
+def test_index_type_follows_corpus_size_and_filters_by_file(monkeypatch):
+    monkeypatch.setattr(vector_index, "FLAT_MAX_VECTORS", 100)
+    monkeypatch.setattr(vector_index, "HNSW_MAX_VECTORS", 400)
+    rows, vectors = make_rows(1200)
+    index = UserVectorIndex()
+
+    for upto, kind in ((80, "flat"), (300, "hnsw"), (1200, "ivf")):
+        index.add(rows[len(index):upto])
+        assert index.kind == kind and len(index) == upto
+
+        target = upto - 1
+        hits = index.search(vectors[target] + 0.01, k=3)
+        assert hits[0]["content"] == f"chunk {target}" and hits[0]["score"] > 0.99
+
+        other_file = rows[target - 1]["file_name"]
+        filtered = index.search(vectors[target], k=3, file_name=other_file)
+        assert len(filtered) == 3 and {h["file_name"] for h in filtered} == {other_file}
+
+    assert index.search(vectors[0], file_name="missing.pdf") == []
+
+
+def test_store_loads_once_and_picks_up_new_uploads():
+    rows, vectors = make_rows(40)
+    loads = []
+
+    def load_rows(user):
+        loads.append(user)
+        return [r for r in rows[:20] if r["user_id"] == user]
+
+    store = VectorIndexStore(load_rows=load_rows)
+    assert store.search("student@example.com", vectors[5], k=1)[0]["content"] == "chunk 5"
+    assert store.search("student@example.com", vectors[6], k=1)[0]["content"] == "chunk 6"
+    assert loads == ["student@example.com"]
+
+    # Newly stored chunks are searchable without a reload
+    store.add_rows(rows[20:30])
+    assert store.search("student@example.com", vectors[25], k=1)[0]["content"] == "chunk 25"
+
+    # A file this worker never saw triggers one reload
+    store.search("student@example.com", vectors[0], k=1, file_name="uploaded-elsewhere.pdf")
+    assert loads == ["student@example.com"] * 2
+
+
+def test_tool_returns_passages_from_the_users_own_documents():
+    rows, vectors = make_rows(30, files=("os_notes.pdf", "dbms_notes.pdf"))
+    other_rows, _ = make_rows(30, user="someone@else.com", seed=1)
+    store = VectorIndexStore(load_rows=lambda user: [r for r in rows + other_rows if r["user_id"] == user])
+    questions = {"when is the exam?": vectors[4]}
+    tool = DocumentQueryTool(user_email="student@example.com", top_k=2,
+                             retriever=DocumentRetriever(store, lambda q: questions[q]))
+
+    answer = asyncio.run(tool._arun("uploads/os_notes.pdf", "when is the exam?", "someone@else.com"))
+    assert answer.startswith("[1] (os_notes.pdf, page 5)\nchunk 4")
+    assert "[2] (os_notes.pdf" in answer and "dbms_notes.pdf" not in answer
+
+    # An unknown file name falls back to all of the user's documents
+    answer = asyncio.run(tool._arun("Exam Notes", "when is the exam?", "student@example.com"))
+    assert answer.startswith("[1] (os_notes.pdf, page 5)")
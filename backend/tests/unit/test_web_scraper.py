@@ -0,0 +1,123 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from app.agent.tools import web_scraper_tool
+from app.agent.tools.web_scraper_tool import WebScraperTool
+from app.services.http_cache import CachedFetcher, HttpCache
+
+PAGE = b"<html><body><nav>Menu</nav><h1>Smart India Hackathon</h1><p>Registrations close on 30 April.</p></body></html>"
+PAGES = {
+    # path -> (extra headers)
+    "/fresh": {"Cache-Control": "max-age=600"},
+    "/etag": {"Cache-Control": "no-cache", "ETag": '"v1"'},
+    "/modified": {"Cache-Control": "max-age=0", "Last-Modified": "Mon, 21 Apr 2025 09:15:00 GMT"},
+    "/private": {"Cache-Control": "no-store"},
+}
+
+
+class Handler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        extra = PAGES.get(path, {"Cache-Control": "max-age=600"})
+        conditional = (
+            ("ETag" in extra and self.headers.get("If-None-Match") == extra["ETag"])
+            or ("Last-Modified" in extra and self.headers.get("If-Modified-Since") == extra["Last-Modified"])
+        )
+        Handler.requests.append((path, 304 if conditional else 200))
+        self.send_response(304 if conditional else 200)
+        for name, value in extra.items():
+            self.send_header(name, value)
+        if conditional:
+            self.end_headers()
+            return
+        body = PAGE if path in PAGES else PAGE + b"x" * 400
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve():
+    Handler.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_cache_control_and_conditional_revalidation(tmp_path, monkeypatch):
+    server, base = serve()
+    parses = []
+    monkeypatch.setattr(web_scraper_tool, "_with_structured_events", lambda html, text: parses.append(html) or "cleaned")
+    tool = WebScraperTool(fetcher=CachedFetcher(HttpCache(str(tmp_path))))
+
+    async def scrape_each_twice():
+        return [await tool._arun(f"{base}{path}") for path in PAGES for _ in range(2)]
+
+    try:
+        results = asyncio.run(scrape_each_twice())
+    finally:
+        server.shutdown()
+
+    assert results == ["cleaned"] * 8
+    assert Handler.requests == [
+        ("/fresh", 200),  # second read served from cache without a request
+        ("/etag", 200), ("/etag", 304),
+        ("/modified", 200), ("/modified", 304),
+        ("/private", 200), ("/private", 200),
+    ]
+    # Identical content is only parsed once per URL
+    assert len(parses) == 4
+
+
+def test_cache_survives_restarts_and_evicts_lru(tmp_path):
+    server, base = serve()
+
+    async def fetch_all(fetcher, paths):
+        return [await fetcher.fetch(f"{base}{p}") for p in paths]
+
+    try:
+        asyncio.run(fetch_all(CachedFetcher(HttpCache(str(tmp_path), max_bytes=1200)), ["/a", "/b"]))
+        # A new process sees the same cache on disk
+        reopened = HttpCache(str(tmp_path), max_bytes=1200)
+        hits = asyncio.run(fetch_all(CachedFetcher(reopened), ["/a", "/c"]))
+    finally:
+        server.shutdown()
+
+    assert [h.cache_status for h in hits] == ["hit", "miss"]
+    # /b was least recently used when /c pushed the cache over its limit
+    assert reopened.get(f"{base}/b") is None
+    assert reopened.get(f"{base}/a") is not None
+    assert reopened.total_bytes <= 1200
+
+
+def test_early_stopped_downloads_are_not_cached(tmp_path):
+    server, base = serve()
+
+    class StopAtOnce:
+        def feed(self, chunk):
+            return True
+
+    cache = HttpCache(str(tmp_path))
+    fetcher = CachedFetcher(cache)
+
+    async def fetch_twice():
+        partial = await fetcher.fetch(f"{base}/fresh", consumer=StopAtOnce())
+        return partial, await fetcher.fetch(f"{base}/fresh")
+
+    try:
+        partial, full = asyncio.run(fetch_twice())
+    finally:
+        server.shutdown()
+
+    assert not partial.complete and full.cache_status == "miss" and full.body == PAGE
+    assert Handler.requests == [("/fresh", 200), ("/fresh", 200)]
+
+    # Truncated entries already on disk are treated as a miss
+    partial.url = f"{base}/legacy"
+    cache.put(partial)
+    assert HttpCache(str(tmp_path)).get(f"{base}/legacy") is None
@@ -180,6 +180,11 @@ export default function ChatSection() {
                 ...prev,
                 { type: "Tool Output", content: `Result: ${data.output.substring(0, 150)}...`},
               ])
+            } else if (event.event === "roadmap_step") {
+              setPlanSteps((prev) => [
+                ...prev,
+                { type: "Roadmap Step", content: `${data.index + 1}. ${data.step.title}`},
+              ])
             } else if (event.event === "final_chunk") {
               setMessages((prev) => [...prev, { text: data.output, sender: "ai" }])
               setPlanSteps((prev) => [...prev, { type: "Finished", content: "Agent has finished." }])